@@ -25,7 +25,9 @@ from torch.utils.data import DataLoader, Dataset
 
 from nemo.collections.nlp.models.language_modeling.megatron_gpt_model import MegatronGPTModel
 from nemo.collections.nlp.modules.common.megatron.megatron_init import fake_initialize_model_parallel
+from nemo.collections.nlp.modules.common.prefix_cache import PrefixKVCache
 from nemo.collections.nlp.modules.common.text_generation_server import MegatronServer
+from nemo.collections.nlp.modules.common.text_generation_strategy import GPTModelTextGenerationStrategy
 from nemo.collections.nlp.modules.common.text_generation_utils import generate
 from nemo.collections.nlp.modules.common.transformer.text_generation import LengthParam, SamplingParam
 from nemo.collections.nlp.parts.nlp_overrides import CustomProgressBar, NLPDDPStrategy, NLPSaveRestoreConnector
@@ -85,6 +87,9 @@ Usage:
             pipeline_model_parallel_size=-1 \
             prompts=[prompt1,prompt2]
 
+        The repetition penalty is applied when sampling, earlier versions ignored it. Its default is 1.0, i.e. no
+        penalty, so the sampling is unchanged unless `inference.repetition_penalty` is set as above.
+
     d. If you don't need to generate tokens and need model to compute logprobs:
          python megatron_gpt_eval.py \
             gpt_model_file=PATH_TO_MODEL \
@@ -325,6 +330,12 @@ def main(cfg) -> None:
     if cfg.server:
         from nemo.collections.nlp.modules.common.megatron_web_server import get_chatbot_demo, get_demo
 
+        inference_strategy = None
+        if cfg.get("prefix_cache_max_memory_mb", 0) > 0:
+            # every rank has its own cache, and the generations of all ranks use it
+            prefix_cache = PrefixKVCache(max_memory_bytes=cfg.prefix_cache_max_memory_mb * 1024 * 1024)
+            inference_strategy = GPTModelTextGenerationStrategy(model.cuda(), prefix_cache=prefix_cache)
+
         if parallel_state.is_pipeline_first_stage() and parallel_state.get_tensor_model_parallel_rank() == 0:
             if cfg.web_server:
                 if cfg.chat:
@@ -348,14 +359,21 @@ def main(cfg) -> None:
                     args=(cfg.share, cfg.username, cfg.password, cfg.port, cfg.web_port, loop),
                 )
                 thread.start()
-            server = MegatronServer(model.cuda())
+            server = MegatronServer(
+                model.cuda(),
+                inference_strategy=inference_strategy,
+                continuous_batching_max_batch_size=cfg.get("continuous_batching_max_batch_size", 0),
+            )
             server.run("0.0.0.0", port=cfg.port)
 
         while True:
             choice = torch.cuda.LongTensor(1)
             torch.distributed.broadcast(choice, 0)
             if choice[0].item() == 0:
-                generate(model.cuda())
+                if inference_strategy is not None:
+                    generate(model.cuda(), strategy=inference_strategy)
+                else:
+                    generate(model.cuda())
 
 
 if __name__ == '__main__':
@@ -0,0 +1,127 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark of streaming vocoder inference with `StreamingVocoder`, comparing the latency until the first audio chunk
+and the total time with a single forward pass over the whole spectrogram.
+
+The spectrogram is random, so the audio is meaningless, but the timing and the difference between the streaming
+and full pass outputs are representative.
+
+# Usage
+python benchmark_streaming_vocoder.py --vocoder_name tts_en_hifigan --duration 10 --chunk_frames 16 32 64
+python benchmark_streaming_vocoder.py --vocoder_path <path to .nemo> --device cpu --num_threads 8
+"""
+
+import argparse
+import time
+
+import torch
+
+from nemo.collections.tts.models.base import Vocoder
+from nemo.collections.tts.parts.utils.streaming_vocoder import StreamingVocoder
+
+
+def synchronize(device):
+    if device.type == "cuda":
+        torch.cuda.synchronize(device)
+
+
+def time_full_pass(vocoder, spec, num_iters, warmup):
+    for _ in range(warmup):
+        vocoder.convert_spectrogram_to_audio(spec=spec)
+
+    synchronize(spec.device)
+    start = time.perf_counter()
+    for _ in range(num_iters):
+        vocoder.convert_spectrogram_to_audio(spec=spec)
+    synchronize(spec.device)
+    return (time.perf_counter() - start) / num_iters
+
+
+def time_streaming(streaming_vocoder, spec, num_iters, warmup):
+    for _ in range(warmup):
+        streaming_vocoder.convert_spectrogram_to_audio(spec)
+
+    first_chunk_seconds = 0.0
+    total_seconds = 0.0
+    for _ in range(num_iters):
+        synchronize(spec.device)
+        start = time.perf_counter()
+        first_chunk_time = None
+        for _ in streaming_vocoder.stream(spec):
+            synchronize(spec.device)
+            if first_chunk_time is None:
+                first_chunk_time = time.perf_counter() - start
+        total_seconds += time.perf_counter() - start
+        first_chunk_seconds += first_chunk_time
+    return first_chunk_seconds / num_iters, total_seconds / num_iters
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streaming vocoder inference")
+    parser.add_argument("--vocoder_path", type=str, default=None, help="Path to a .nemo vocoder checkpoint")
+    parser.add_argument("--vocoder_name", type=str, default="tts_en_hifigan", help="Name of a pretrained vocoder")
+    parser.add_argument("--device", type=str, default="cuda" if torch.cuda.is_available() else "cpu")
+    parser.add_argument("--batch_size", type=int, default=1)
+    parser.add_argument("--duration", type=float, default=10.0, help="Duration of the spectrogram in seconds")
+    parser.add_argument("--chunk_frames", type=int, nargs="+", default=[16, 32, 64])
+    parser.add_argument("--num_threads", type=int, default=0, help="Torch threads, 0 keeps the default")
+    parser.add_argument("--num_iters", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=2)
+    args = parser.parse_args()
+
+    if args.num_threads > 0:
+        torch.set_num_threads(args.num_threads)
+
+    device = torch.device(args.device)
+    if args.vocoder_path:
+        vocoder = Vocoder.restore_from(args.vocoder_path, map_location=device)
+    else:
+        vocoder = Vocoder.from_pretrained(model_name=args.vocoder_name, map_location=device)
+    vocoder.eval()
+
+    torch.manual_seed(0)
+    sample_rate = vocoder.cfg.preprocessor.sample_rate
+    hop_length = vocoder.cfg.preprocessor.n_window_stride
+    num_frames = int(args.duration * sample_rate / hop_length)
+    spec = torch.randn(args.batch_size, vocoder.cfg.preprocessor.nfilt, num_frames, device=device)
+
+    with torch.inference_mode():
+        # noise driven vocoders draw different noise in every pass, so the outputs are only compared
+        # for deterministic vocoders
+        is_deterministic = getattr(vocoder.generator, "noise_dim", None) is None
+        full_audio = vocoder.convert_spectrogram_to_audio(spec=spec)
+        full_seconds = time_full_pass(vocoder, spec, args.num_iters, args.warmup)
+
+        print(
+            f"B={args.batch_size} duration={args.duration}s frames={num_frames} device={device} "
+            f"torch_threads={torch.get_num_threads()}"
+        )
+        print(f"{'full pass':>18s}: first audio {full_seconds * 1000:10.2f} ms, total {full_seconds * 1000:10.2f} ms")
+        for chunk_frames in args.chunk_frames:
+            streaming_vocoder = StreamingVocoder(vocoder, chunk_frames=chunk_frames, seed=0)
+            first_chunk_seconds, total_seconds = time_streaming(streaming_vocoder, spec, args.num_iters, args.warmup)
+            line = (
+                f"chunk_frames={chunk_frames:5d}: first audio {first_chunk_seconds * 1000:10.2f} ms, "
+                f"total {total_seconds * 1000:10.2f} ms, context {streaming_vocoder.context_frames} frames"
+            )
+            if is_deterministic:
+                max_diff = (streaming_vocoder.convert_spectrogram_to_audio(spec) - full_audio).abs().max().item()
+                line += f", max abs difference {max_diff:.3e}"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
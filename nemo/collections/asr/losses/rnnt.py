@@ -436,6 +436,75 @@ class RNNTLoss(Loss):
 
         return losses
 
+    @property
+    def supports_lattice_loss(self) -> bool:
+        """
+        Whether the loss can be computed by `forward_lattice()`, from the log probabilities of
+        the blank and next label arcs of the lattice only. True for the standard RNNT Numba loss.
+        """
+        return NUMBA_RNNT_AVAILABLE and isinstance(self._loss, RNNTLossNumba)
+
+    @property
+    def lattice_grad_clamp(self) -> float:
+        """
+        Gradient clamp of the loss, which `forward_lattice()` does not apply: the standard loss clamps the
+        gradient of the joint output, so the caller computing the lattice applies it (see `RNNTJoint.joint_lattice`).
+        """
+        return getattr(self._loss, 'clamp', 0.0) if self.supports_lattice_loss else 0.0
+
+    def forward_lattice(self, lp_blank, lp_label, input_lengths, target_lengths):
+        """
+        Computes the RNNT loss from the log probabilities of the only two arcs leaving every lattice node.
+
+        This allows the caller to compute the joint tensor piecewise (see `RNNTJoint.fused_time_chunk_size`)
+        without ever materializing the full [B, T, U, V + 1] tensor.
+
+        Args:
+            lp_blank: Tensor of shape [B, T, U + 1] with the blank log probability of every node.
+            lp_label: Tensor of shape [B, T, U + 1] with the log probability of the next target label of
+                every node. Values at and beyond the target length are ignored.
+            input_lengths: Tensor of shape [B] with the acoustic lengths.
+            target_lengths: Tensor of shape [B] with the target lengths.
+
+        Returns:
+            The loss, reduced according to `self.reduction`.
+        """
+        if not self.supports_lattice_loss:
+            raise ValueError(
+                f"Lattice based RNNT loss is only supported by `warprnnt_numba` loss, "
+                f"found {self._loss.__class__.__name__}"
+            )
+
+        input_lengths = input_lengths.long()
+        target_lengths = target_lengths.long()
+
+        max_logit_len = input_lengths.max()
+        max_targets_len = target_lengths.max()
+
+        if lp_blank.shape[1] != max_logit_len:
+            lp_blank = lp_blank.narrow(dim=1, start=0, length=max_logit_len)
+            lp_label = lp_label.narrow(dim=1, start=0, length=max_logit_len)
+
+        if lp_blank.shape[2] != max_targets_len + 1:
+            lp_blank = lp_blank.narrow(dim=2, start=0, length=max_targets_len + 1)
+            lp_label = lp_label.narrow(dim=2, start=0, length=max_targets_len + 1)
+
+        # Temporarily override loss reduction
+        loss_reduction = self._loss.reduction
+        self._loss.reduction = None
+
+        loss = self._loss.forward_lattice(
+            lp_blank.contiguous(), lp_label.contiguous(), act_lens=input_lengths, label_lens=target_lengths
+        )
+
+        # Loss reduction can be dynamic, so reset it after call
+        self._loss.reduction = loss_reduction
+
+        if self.reduction is not None:
+            loss = self.reduce(loss, target_lengths)
+
+        return loss
+
     @typecheck()
     def forward(self, log_probs, targets, input_lengths, target_lengths):
         # Cast to int 64
@@ -166,6 +166,11 @@ class AudioToMelSpectrogramPreprocessor(AudioPreprocessor, Exportable):
                 Defaults to 'slaney' (area normalization)
             stft_exact_pad: Deprecated argument, kept for compatibility with older checkpoints.
             stft_conv: Deprecated argument, kept for compatibility with older checkpoints.
+            banded_filterbank (bool): If True, the mel filterbank is applied as a few dense products over
+                the contiguous blocks of frequency bins where it is non-zero, instead of a single product with
+                the full (mostly zero) filterbank. Faster on CPU, with identical outputs.
+                Not used by the `torchaudio` implementation.
+                Defaults to False
         """
 
     def save_to(self, save_path: str):
@@ -232,6 +237,7 @@ class AudioToMelSpectrogramPreprocessor(AudioPreprocessor, Exportable):
         mel_norm="slaney",
         stft_exact_pad=False,  # Deprecated arguments; kept for config compatibility
         stft_conv=False,  # Deprecated arguments; kept for config compatibility
+        banded_filterbank: bool = False,
     ):
         super().__init__(n_window_size, n_window_stride)
 
@@ -278,6 +284,7 @@ class AudioToMelSpectrogramPreprocessor(AudioPreprocessor, Exportable):
             mel_norm=mel_norm,
             stft_exact_pad=stft_exact_pad,  # Deprecated arguments; kept for config compatibility
             stft_conv=stft_conv,  # Deprecated arguments; kept for config compatibility
+            banded_filterbank=banded_filterbank,
         )
 
     def input_example(self, max_batch: int = 8, max_dim: int = 32000, min_length: int = 200):
@@ -935,6 +942,7 @@ class AudioToMelSpectrogramPreprocessorConfig:
     mel_norm: str = "slaney"
     stft_exact_pad: bool = False  # Deprecated argument, kept for compatibility with older checkpoints.
     stft_conv: bool = False  # Deprecated argument, kept for compatibility with older checkpoints.
+    banded_filterbank: bool = False
 
 
 @dataclass
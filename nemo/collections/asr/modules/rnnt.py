@@ -30,6 +30,7 @@ from typing import Any, Dict, List, Optional, Tuple, Union
 
 import torch
 from omegaconf import DictConfig, OmegaConf
+from torch.utils.checkpoint import checkpoint
 
 from nemo.collections.asr.modules import rnnt_abstract
 from nemo.collections.asr.parts.submodules import stateless_net
@@ -1148,6 +1149,13 @@ class RNNTJoint(rnnt_abstract.AbstractRNNTJoint, Exportable, AdapterModuleMixin)
 
         fused_batch_size: Optional int, required if `fuse_loss_wer` flag is set. Determines the size of the
             sub-batches. Should be any value below the actual batch size per GPU.
+
+        fused_time_chunk_size: Optional int, only used if `fuse_loss_wer` flag is set. When provided, the joint
+            of every sub-batch is computed `fused_time_chunk_size` acoustic frames at a time, and only the log
+            probabilities of the blank and target tokens are kept for each chunk. The joint of every chunk
+            is recomputed during the backward pass instead of being stored, so the peak memory of the joint
+            no longer scales with [T, U, V + 1], at the cost of one extra joint forward pass.
+            Only supported for the standard RNNT loss computed with `warprnnt_numba`.
     """
 
     @property
@@ -1212,6 +1220,7 @@ class RNNTJoint(rnnt_abstract.AbstractRNNTJoint, Exportable, AdapterModuleMixin)
         fuse_loss_wer: bool = False,
         fused_batch_size: Optional[int] = None,
         experimental_fuse_loss_wer: Any = None,
+        fused_time_chunk_size: Optional[int] = None,
     ):
         super().__init__()
 
@@ -1231,6 +1240,8 @@ class RNNTJoint(rnnt_abstract.AbstractRNNTJoint, Exportable, AdapterModuleMixin)
         if fuse_loss_wer and (fused_batch_size is None):
             raise ValueError("If `fuse_loss_wer` is set, then `fused_batch_size` cannot be None!")
 
+        self.set_fused_time_chunk_size(fused_time_chunk_size)
+
         self._loss = None
         self._wer = None
 
@@ -1311,6 +1322,12 @@ class RNNTJoint(rnnt_abstract.AbstractRNNTJoint, Exportable, AdapterModuleMixin)
                     "`fuse_loss_wer` is set, therefore encoder and target lengths " "must be provided as well!"
                 )
 
+            if self._fused_time_chunk_size is not None and not self.loss.supports_lattice_loss:
+                raise ValueError(
+                    "`fused_time_chunk_size` is set, but the provided loss cannot be computed from chunks of "
+                    "the joint. Use the `warprnnt_numba` loss or set `fused_time_chunk_size` to None."
+                )
+
             losses = []
             target_lengths = []
             batch_size = int(encoder_outputs.size(0))  # actual batch size
@@ -1348,11 +1365,6 @@ class RNNTJoint(rnnt_abstract.AbstractRNNTJoint, Exportable, AdapterModuleMixin)
                     if sub_dec.shape[1] != max_sub_transcript_length + 1:
                         sub_dec = sub_dec.narrow(dim=1, start=0, length=int(max_sub_transcript_length + 1))
 
-                    # Perform joint => [sub-batch, T', U', V + 1]
-                    sub_joint = self.joint(sub_enc, sub_dec)
-
-                    del sub_dec
-
                     # Reduce transcript length to correct alignment
                     # Transcript: [sub-batch, L] -> [sub-batch, L']; L' <= L
                     if sub_transcripts.shape[1] != max_sub_transcript_length:
@@ -1365,13 +1377,45 @@ class RNNTJoint(rnnt_abstract.AbstractRNNTJoint, Exportable, AdapterModuleMixin)
                     # override loss reduction to sum
                     self.loss.reduction = None
 
-                    # compute and preserve loss
-                    loss_batch = self.loss(
-                        log_probs=sub_joint,
-                        targets=sub_transcripts,
-                        input_lengths=sub_enc_lens,
-                        target_lengths=sub_transcript_lens,
-                    )
+                    if self._fused_time_chunk_size is None:
+                        # Perform joint => [sub-batch, T', U', V + 1]
+                        sub_joint = self.joint(sub_enc, sub_dec)
+
+                        del sub_dec
+
+                        # compute and preserve loss
+                        loss_batch = self.loss(
+                            log_probs=sub_joint,
+                            targets=sub_transcripts,
+                            input_lengths=sub_enc_lens,
+                            target_lengths=sub_transcript_lens,
+                        )
+
+                        del sub_joint
+
+                    else:
+                        # Perform chunked joint => 2 x [sub-batch, T', U'], never materializing [T', U', V + 1]
+                        lp_blank, lp_label = self.joint_lattice(
+                            sub_enc,
+                            sub_dec,
+                            sub_transcripts,
+                            sub_transcript_lens,
+                            self._fused_time_chunk_size,
+                            clamp=self.loss.lattice_grad_clamp,
+                        )
+
+                        del sub_dec
+
+                        # compute and preserve loss
+                        loss_batch = self.loss.forward_lattice(
+                            lp_blank=lp_blank,
+                            lp_label=lp_label,
+                            input_lengths=sub_enc_lens,
+                            target_lengths=sub_transcript_lens,
+                        )
+
+                        del lp_blank, lp_label
+
                     losses.append(loss_batch)
                     target_lengths.append(sub_transcript_lens)
 
@@ -1413,6 +1457,90 @@ class RNNTJoint(rnnt_abstract.AbstractRNNTJoint, Exportable, AdapterModuleMixin)
 
             return losses, wer, wer_num, wer_denom
 
+    def joint_lattice(
+        self,
+        f: torch.Tensor,
+        g: torch.Tensor,
+        targets: torch.Tensor,
+        target_lengths: torch.Tensor,
+        time_chunk_size: int,
+        clamp: float = 0.0,
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Compute the log probabilities of the blank and next target token for every node of the RNNT lattice,
+        evaluating the joint over `time_chunk_size` acoustic frames at a time.
+
+        Only a [B, time_chunk_size, U, V + 1] slice of the joint exists at any point. When gradients are
+        required, each slice is recomputed during the backward pass (activation checkpointing) instead
+        of being kept in memory.
+
+        Args:
+            f: Output of the Encoder model. A torch.Tensor of shape [B, T, H1]
+            g: Output of the Decoder model. A torch.Tensor of shape [B, U + 1, H2]
+            targets: Target tokens. A torch.Tensor of shape [B, U]
+            target_lengths: Lengths of the targets. A torch.Tensor of shape [B]
+            time_chunk_size: Number of acoustic frames of the joint evaluated at once.
+            clamp: When > 0.0, the gradient of the joint output is clamped to [-clamp, clamp], as the RNNT
+                Numba loss does for the full joint tensor.
+
+        Returns:
+            A tuple of two float32 tensors of shape [B, T, U + 1], the log probabilities of
+            the blank token and of the next target token (blank once the target is exhausted).
+        """
+        if self._num_extra_outputs > 0:
+            raise ValueError("Chunked joint computation is only supported for the standard RNNT joint.")
+
+        blank = self._num_classes - 1
+        f = self.project_encoder(f)
+        g = self.project_prednet(g)
+
+        batch_size, max_t = f.shape[0], f.shape[1]
+        max_u = g.shape[1]
+
+        # Index of the token on the label arc of every node => [B, 1, U + 1, 1]
+        label_index = torch.full((batch_size, max_u), blank, dtype=torch.long, device=f.device)
+        label_index[:, : max_u - 1] = targets[:, : max_u - 1]
+        beyond_target = torch.arange(max_u, device=f.device).unsqueeze(0) >= target_lengths.unsqueeze(1)
+        label_index.masked_fill_(beyond_target, blank)
+        label_index = label_index[:, None, :, None]
+
+        use_checkpoint = torch.is_grad_enabled() and (f.requires_grad or g.requires_grad)
+
+        lp_blank, lp_label = [], []
+        for t in range(0, max_t, time_chunk_size):
+            f_chunk = f.narrow(dim=1, start=t, length=min(time_chunk_size, max_t - t))
+            if use_checkpoint:
+                chunk_blank, chunk_label = checkpoint(
+                    self._joint_lattice_chunk, f_chunk, g, label_index, clamp, use_reentrant=False
+                )
+            else:
+                chunk_blank, chunk_label = self._joint_lattice_chunk(f_chunk, g, label_index, clamp)
+
+            lp_blank.append(chunk_blank)
+            lp_label.append(chunk_label)
+
+        return torch.cat(lp_blank, dim=1), torch.cat(lp_label, dim=1)
+
+    def _joint_lattice_chunk(
+        self, f: torch.Tensor, g: torch.Tensor, label_index: torch.Tensor, clamp: float = 0.0
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        res = self.joint_after_projection(f, g)  # [B, T', U + 1, V + 1]
+
+        if clamp > 0.0 and res.requires_grad:
+            # Like the RNNT Numba loss, clamp the gradient of the whole joint output, which is computed by the
+            # log_softmax below; log_softmax does not change log probabilities already normalized by the joint.
+            res.register_hook(lambda grad: grad.clamp(-clamp, clamp))
+            res = res.float().log_softmax(dim=-1)
+        # joint_after_projection() returns logits when log_softmax is computed inside the CUDA loss
+        elif self.log_softmax is False or (self.log_softmax is None and res.is_cuda):
+            res = res.float().log_softmax(dim=-1)
+        else:
+            res = res.float()
+
+        lp_blank = res[..., -1]
+        lp_label = torch.gather(res, dim=-1, index=label_index.expand(-1, res.shape[1], -1, -1)).squeeze(-1)
+        return lp_blank, lp_label
+
     def project_encoder(self, encoder_output: torch.Tensor) -> torch.Tensor:
         """
         Project the encoder output to the joint hidden dimension.
@@ -1590,6 +1718,15 @@ class RNNTJoint(rnnt_abstract.AbstractRNNTJoint, Exportable, AdapterModuleMixin)
     def set_fused_batch_size(self, fused_batch_size):
         self._fused_batch_size = fused_batch_size
 
+    @property
+    def fused_time_chunk_size(self):
+        return self._fused_time_chunk_size
+
+    def set_fused_time_chunk_size(self, fused_time_chunk_size):
+        if fused_time_chunk_size is not None and fused_time_chunk_size <= 0:
+            raise ValueError("`fused_time_chunk_size` must be a positive integer or None!")
+        self._fused_time_chunk_size = fused_time_chunk_size
+
 
 class RNNTDecoderJoint(torch.nn.Module, Exportable):
     """
@@ -1730,6 +1867,15 @@ class SampledRNNTJoint(RNNTJoint):
 
         fused_batch_size: Optional int, required if `fuse_loss_wer` flag is set. Determines the size of the
             sub-batches. Should be any value below the actual batch size per GPU.
+
+        fused_time_chunk_size: Optional int, only used if `fuse_loss_wer` flag is set. When provided, the joint
+            of every sub-batch is computed `fused_time_chunk_size` acoustic frames at a time, and only the log
+            probabilities of the blank and target tokens are kept for each chunk. The joint of every chunk
+            is recomputed during the backward pass instead of being stored, so the peak memory of the joint
+            no longer scales with [T, U, V + 1], at the cost of one extra joint forward pass.
+            Only supported for the standard RNNT loss computed with `warprnnt_numba`, and only used outside of
+            training: the sampled joint of the training step cannot be computed in chunks, and raises a ValueError
+            when this is set.
     """
 
     def __init__(
@@ -1742,6 +1888,7 @@ class SampledRNNTJoint(RNNTJoint):
         preserve_memory: bool = False,
         fuse_loss_wer: bool = False,
         fused_batch_size: Optional[int] = None,
+        fused_time_chunk_size: Optional[int] = None,
     ):
         super().__init__(
             jointnet=jointnet,
@@ -1751,6 +1898,7 @@ class SampledRNNTJoint(RNNTJoint):
             preserve_memory=preserve_memory,
             fuse_loss_wer=fuse_loss_wer,
             fused_batch_size=fused_batch_size,
+            fused_time_chunk_size=fused_time_chunk_size,
         )
         self.n_samples = n_samples
         self.register_buffer('blank_id', torch.tensor([self.num_classes_with_blank - 1]), persistent=False)
@@ -1778,6 +1926,12 @@ class SampledRNNTJoint(RNNTJoint):
                 compute_wer=compute_wer,
             )
 
+        if self._fused_time_chunk_size is not None:
+            raise ValueError(
+                "`fused_time_chunk_size` is not supported by the sampled joint during training. "
+                "Set `fused_time_chunk_size` to None."
+            )
+
         if transcripts is None or transcript_lengths is None:
             logging.warning(
                 "Sampled RNNT Joint currently only works with `fuse_loss_wer` set to True, "
@@ -42,6 +42,7 @@ class GraphModuleConfig:
     topo_type: str = "default"
     topo_with_self_loops: bool = True
     token_lm: Optional[Any] = None
+    graph_cache_dir: Optional[str] = None
     intersect_pruned: bool = False
     intersect_conf: GraphIntersectDenseConfig = field(default_factory=lambda: GraphIntersectDenseConfig())
     boost_coeff: float = 0.0
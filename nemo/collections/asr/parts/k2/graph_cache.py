@@ -0,0 +1,137 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import os
+import tempfile
+from typing import Any, Callable, Dict, Optional
+
+import torch
+
+from nemo.core.utils.k2_guard import k2  # import k2 from guard module
+from nemo.utils import logging
+
+# bump if the way graphs are compiled changes, so that stale cache entries are not reused
+GRAPH_CACHE_VERSION = 1
+
+
+def fsa_content_hash(fsa: 'k2.Fsa') -> str:
+    """Computes a content hash of an Fsa: its arcs, scores and all tensor attributes.
+    Two graphs with the same hash are considered identical by the graph cache.
+    """
+    hasher = hashlib.sha256()
+    for name, value in sorted(fsa.as_dict().items()):
+        hasher.update(name.encode("utf-8"))
+        if isinstance(value, torch.Tensor):
+            value = value.detach().cpu().contiguous()
+            hasher.update(str(value.dtype).encode("utf-8"))
+            hasher.update(value.numpy().tobytes())
+        else:
+            hasher.update(repr(value).encode("utf-8"))
+    return hasher.hexdigest()
+
+
+class DecodingGraphCache(object):
+    """On-disk cache of compiled decoding graphs (e.g. topology composed with a token LM).
+
+    Every graph is stored in its own file named by a content hash of everything it was compiled from:
+    the compilation parameters (topology type, number of classes, ...) and the contents of the input graphs.
+    Reloading a model with the same tokenizer and LM therefore finds the graph compiled by an earlier run
+    (or by another worker) and skips the compilation.
+
+    Cached graphs are loaded with `torch.load(..., mmap=True, weights_only=False)`, so the arc tensors are memory-mapped
+    and only paged in when used; workers on the same host share the page cache.
+    Files are written atomically, so concurrent workers may safely compile and store the same graph.
+
+    Args:
+        cache_dir: Directory to store the compiled graphs in. Created if it does not exist.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = os.path.abspath(os.path.expanduser(cache_dir))
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(graphs: Optional[Dict[str, 'k2.Fsa']] = None, **params: Any) -> str:
+        """Builds the cache key from the compilation parameters and the input graphs.
+
+        Args:
+            graphs: Input graphs of the compilation (e.g. the token LM), hashed by content.
+            **params: Compilation parameters; they must have a stable `repr`.
+
+        Returns:
+            Hex digest identifying the compiled graph.
+        """
+        hasher = hashlib.sha256(f"graph_cache_v{GRAPH_CACHE_VERSION}".encode("utf-8"))
+        for name, value in sorted(params.items()):
+            hasher.update(f"{name}={value!r};".encode("utf-8"))
+        for name, graph in sorted((graphs or {}).items()):
+            hasher.update(f"{name}={fsa_content_hash(graph)};".encode("utf-8"))
+        return hasher.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pt")
+
+    def get(self, key: str) -> Optional['k2.Fsa']:
+        """Loads a cached graph or returns None if there is no (readable) entry for the key."""
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            # graphs with ragged attributes (e.g. aux_labels of a composed graph) store k2.RaggedTensor objects,
+            # which are not accepted by weights-only loading; the cache only holds graphs written by `put`
+            try:
+                graph_dict = torch.load(path, map_location="cpu", mmap=True, weights_only=False)
+            except TypeError:
+                # torch < 2.1 does not support memory-mapped loading
+                graph_dict = torch.load(path, map_location="cpu")
+            return k2.Fsa.from_dict(graph_dict)
+        except Exception as e:
+            logging.warning(f"Failed to load the cached graph {path}, it will be recompiled: {e}")
+            return None
+
+    def put(self, key: str, graph: 'k2.Fsa'):
+        """Stores a graph in the cache."""
+        graph_dict = {
+            name: value.detach().cpu() if isinstance(value, torch.Tensor) else value
+            for name, value in graph.as_dict().items()
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                torch.save(graph_dict, f)
+            os.replace(tmp_path, self.path(key))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get_or_compile(self, key: str, compile_fn: Callable[[], 'k2.Fsa']) -> 'k2.Fsa':
+        """Returns the cached graph for the key, compiling and storing it on a cache miss.
+
+        Args:
+            key: Cache key from `make_key`.
+            compile_fn: Callable without arguments which compiles the graph.
+
+        Returns:
+            The compiled graph on CPU.
+        """
+        graph = self.get(key)
+        if graph is not None:
+            logging.info(f"Loaded the compiled graph from the cache: {self.path(key)}")
+            return graph
+        graph = compile_fn()
+        self.put(key, graph)
+        logging.info(f"Stored the compiled graph in the cache: {self.path(key)}")
+        return graph
@@ -30,6 +30,7 @@ from typing import Optional, Tuple
 
 import torch
 
+from nemo.collections.asr.parts.k2.graph_cache import DecodingGraphCache
 from nemo.collections.asr.parts.k2.utils import add_self_loops, compose_with_self_loops, intersect_with_self_loops
 
 from nemo.core.utils.k2_guard import k2  # import k2 from guard module
@@ -80,6 +81,9 @@ class CtcTopologyCompiler(object):
 class CtcNumGraphCompiler(CtcTopologyCompiler):
     """Graph compiler with auxiliary graph to compose with the topology.
     The supervision graph contains the auxiliary graph information.
+
+    If graph_cache is provided, the composition of the topology and the auxiliary graph
+    is looked up in (and stored to) the cache instead of being compiled every time.
     """
 
     def __init__(
@@ -90,13 +94,27 @@ class CtcNumGraphCompiler(CtcTopologyCompiler):
         topo_with_self_loops: bool = True,
         device: torch.device = torch.device("cpu"),
         aux_graph: Optional['k2.Fsa'] = None,
+        graph_cache: Optional[DecodingGraphCache] = None,
     ):
         super().__init__(num_classes, blank, topo_type, topo_with_self_loops, device)
+        self.graph_cache = graph_cache
         if aux_graph is None:
             self.decoding_graph = k2.create_fsa_vec([self.ctc_topo_inv.invert()]).to(self.device)
         else:
-            self.base_graph = intersect_with_self_loops(self.ctc_topo_inv, aux_graph).invert_()
-            self.base_graph = k2.arc_sort(self.base_graph).to(self.device)
+            self.base_graph = self._compile_base_graph(aux_graph)
+
+    def _compile_base_graph(self, aux_graph: 'k2.Fsa') -> 'k2.Fsa':
+        def compile_fn():
+            return intersect_with_self_loops(self.ctc_topo_inv, aux_graph).invert_()
+
+        if self.graph_cache is None:
+            base_graph = compile_fn()
+        else:
+            key = self.graph_cache.make_key(
+                graphs={"topo_inv": self.ctc_topo_inv, "aux_graph": aux_graph}, op="intersect_with_self_loops",
+            )
+            base_graph = self.graph_cache.get_or_compile(key, compile_fn)
+        return k2.arc_sort(base_graph).to(self.device)
 
     def compile(
         self, targets: torch.Tensor, target_lengths: torch.Tensor, aux_graph: Optional['k2.Fsa'] = None,
@@ -106,8 +124,7 @@ class CtcNumGraphCompiler(CtcTopologyCompiler):
                 f"At least one of aux_graph and self.base_graph must be set: {aux_graph}, {self.base_graph}"
             )
         elif aux_graph is not None:
-            self.base_graph = intersect_with_self_loops(self.ctc_topo_inv, aux_graph).invert()
-            self.base_graph = k2.arc_sort(self.base_graph).to(self.device)
+            self.base_graph = self._compile_base_graph(aux_graph)
         return super().compile(targets, target_lengths)
 
 
@@ -125,8 +142,9 @@ class MmiGraphCompiler(CtcNumGraphCompiler):
         topo_with_self_loops: bool = True,
         device: torch.device = torch.device("cpu"),
         aux_graph: Optional['k2.Fsa'] = None,
+        graph_cache: Optional[DecodingGraphCache] = None,
     ):
-        super().__init__(num_classes, blank, topo_type, topo_with_self_loops, device, aux_graph)
+        super().__init__(num_classes, blank, topo_type, topo_with_self_loops, device, aux_graph, graph_cache)
         if aux_graph is None:
             self.decoding_graph = k2.create_fsa_vec([self.ctc_topo_inv.invert()]).to(self.device)
         else:
@@ -19,8 +19,10 @@ import torch
 from omegaconf import DictConfig
 
 from nemo.collections.asr.parts.k2.classes import GraphIntersectDenseConfig
+from nemo.collections.asr.parts.k2.graph_cache import DecodingGraphCache
 from nemo.collections.asr.parts.k2.loss_mixins import CtcK2Mixin, RnntK2Mixin
 from nemo.collections.asr.parts.k2.utils import invert_permutation, load_graph
+from nemo.core.utils.k2_guard import k2  # import k2 from guard module
 from nemo.utils import logging
 
 
@@ -287,6 +289,9 @@ class TokenLMDecoder(BaseDecoder):
 
     Can do decoding and forced alignment.
 
+    If graph_cache_dir is set, the composition of the topology and token_lm is cached on disk,
+    so that it is compiled only once for every topology and token_lm.
+
     cfg takes precedence over all optional parameters
     We keep explicit parameter setting to be able to create an instance without the need of a config.
     """
@@ -301,6 +306,7 @@ class TokenLMDecoder(BaseDecoder):
         intersect_conf: GraphIntersectDenseConfig = GraphIntersectDenseConfig(),
         topo_type: str = "default",
         topo_with_self_loops: bool = True,
+        graph_cache_dir: Optional[str] = None,
         device: torch.device = torch.device("cpu"),
     ):
         super().__init__(
@@ -308,6 +314,8 @@ class TokenLMDecoder(BaseDecoder):
         )
         if cfg is not None:
             token_lm = cfg.get("token_lm", token_lm)
+            graph_cache_dir = cfg.get("graph_cache_dir", graph_cache_dir)
+        self.graph_cache = DecodingGraphCache(graph_cache_dir) if graph_cache_dir is not None else None
         if token_lm is not None:
             self.token_lm = load_graph(token_lm) if isinstance(token_lm, str) else token_lm
             if self.token_lm is not None:
@@ -332,7 +340,15 @@ class TokenLMDecoder(BaseDecoder):
         labels = token_lm.labels
         if labels.max() != self.num_classes - 1:
             raise ValueError(f"token_lm is not compatible with the num_classes: {labels.unique()}, {self.num_classes}")
+        from nemo.collections.asr.parts.k2.graph_compilers import CtcNumGraphCompiler
+
         self.graph_compiler = CtcNumGraphCompiler(
-            self.num_classes, self.blank, self.topo_type, self.topo_with_self_loops, self.device, token_lm
+            self.num_classes,
+            self.blank,
+            self.topo_type,
+            self.topo_with_self_loops,
+            self.device,
+            token_lm,
+            graph_cache=self.graph_cache,
         )
         self.base_graph = k2.create_fsa_vec([self.graph_compiler.base_graph]).to(self.device)
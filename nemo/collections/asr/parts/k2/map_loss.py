@@ -33,6 +33,7 @@ import torch
 from omegaconf import DictConfig
 
 from nemo.collections.asr.parts.k2.classes import GraphIntersectDenseConfig
+from nemo.collections.asr.parts.k2.graph_cache import DecodingGraphCache
 from nemo.collections.asr.parts.k2.loss_mixins import CtcK2Mixin
 from nemo.collections.asr.parts.k2.ml_loss import MLLoss
 from nemo.collections.asr.parts.k2.utils import (
@@ -51,6 +52,9 @@ class MAPLoss(MLLoss):
     It implements Lattice-Free Maximum Mutual Information (LF-MMI) and LF-boosted-MMI (LF-bMMI) losses.
     
     Based on https://github.com/k2-fsa/snowfall/blob/master/snowfall/objectives/mmi.py
+
+    If graph_cache_dir is set, the composition of the topology and token_lm is cached on disk,
+    so that it is compiled only once for every topology and token_lm.
     
     cfg takes precedence over all optional parameters
     We keep explicit parameter setting to be able to create an instance without the need of a config.
@@ -69,6 +73,7 @@ class MAPLoss(MLLoss):
         intersect_pruned: bool = False,
         intersect_conf: GraphIntersectDenseConfig = GraphIntersectDenseConfig(),
         boost_coeff: float = 0.0,
+        graph_cache_dir: Optional[str] = None,
     ):
         super().__init__(
             num_classes=num_classes,
@@ -83,7 +88,9 @@ class MAPLoss(MLLoss):
             intersect_pruned = cfg.get("intersect_pruned", intersect_pruned)
             intersect_conf = cfg.get("intersect_conf", intersect_conf)
             boost_coeff = cfg.get("boost_coeff", boost_coeff)
+            graph_cache_dir = cfg.get("graph_cache_dir", graph_cache_dir)
         self.boost_coeff = boost_coeff
+        self.graph_cache = DecodingGraphCache(graph_cache_dir) if graph_cache_dir is not None else None
         self._intersect_calc_scores_impl = (
             self._intersect_calc_scores_impl_pruned if intersect_pruned else self._intersect_calc_scores_impl_exact_opt
         )
@@ -291,6 +298,7 @@ class CtcMmiLoss(MAPLoss, CtcK2Mixin):
         intersect_pruned: bool = False,
         intersect_conf: GraphIntersectDenseConfig = GraphIntersectDenseConfig(),
         boost_coeff: float = 0.0,
+        graph_cache_dir: Optional[str] = None,
     ):
         super().__init__(
             num_classes=num_classes,
@@ -303,6 +311,7 @@ class CtcMmiLoss(MAPLoss, CtcK2Mixin):
             intersect_pruned=intersect_pruned,
             intersect_conf=intersect_conf,
             boost_coeff=boost_coeff,
+            graph_cache_dir=graph_cache_dir,
         )
 
     def update_graph(self, graph: 'k2.Fsa'):
@@ -316,5 +325,10 @@ class CtcMmiLoss(MAPLoss, CtcK2Mixin):
         from nemo.collections.asr.parts.k2.graph_compilers import MmiGraphCompiler as compiler
 
         self.graph_compiler = compiler(
-            self.num_classes, self.blank, self.topo_type, self.topo_with_self_loops, aux_graph=lm_graph
+            self.num_classes,
+            self.blank,
+            self.topo_type,
+            self.topo_with_self_loops,
+            aux_graph=lm_graph,
+            graph_cache=self.graph_cache,
         )
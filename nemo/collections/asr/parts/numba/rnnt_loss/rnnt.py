@@ -27,12 +27,15 @@
 # limitations under the License.
 
 import multiprocessing
+import random
 
+import numba
+import numpy as np
 import torch
 from numba import cuda
 
 from nemo.collections.asr.parts.numba.rnnt_loss.utils import global_constants, rnnt_helper
-from nemo.collections.asr.parts.numba.rnnt_loss.utils.cpu_utils import cpu_rnnt
+from nemo.collections.asr.parts.numba.rnnt_loss.utils.cpu_utils import cpu_rnnt, cpu_rnnt_parallel
 from nemo.collections.asr.parts.numba.rnnt_loss.utils.cuda_utils import gpu_rnnt
 
 
@@ -135,6 +138,277 @@ def rnnt_loss_cpu(
     return True
 
 
+def _set_cpu_num_threads(num_threads: int):
+    """
+    Sets the number of Numba threads used by the parallel CPU kernels, without changing the torch thread pool.
+    """
+    _torch_num_threads = torch.get_num_threads()
+    if num_threads > 0:
+        numba.set_num_threads(min(multiprocessing.cpu_count(), num_threads))
+    torch.set_num_threads(_torch_num_threads)
+
+
+def _gather_lattice_log_probs(log_probs: torch.Tensor, labels: torch.Tensor, label_lengths: torch.Tensor, blank: int):
+    """
+    Selects the log probabilities of the only two arcs leaving every node of the transducer lattice.
+
+    Args:
+        log_probs: Log probabilities of shape [B, T, U, V+1].
+        labels: Ground truth labels of shape [B, U-1].
+        label_lengths: Lengths of the target sequence as a vector of ints [B].
+        blank: Index of the blank token in the vocabulary.
+
+    Returns:
+        A tuple of the blank log probabilities [B, T, U], the next label log probabilities [B, T, U]
+        and the index [B, T, U, 1] of the next label in the vocabulary (blank past the end of every target).
+    """
+    minibatch_size, maxT, maxU, _ = log_probs.shape
+
+    label_index = torch.full((minibatch_size, maxU), blank, dtype=torch.long, device=log_probs.device)
+    label_index[:, : maxU - 1] = labels[:, : maxU - 1]
+    beyond_target = torch.arange(maxU, device=log_probs.device).unsqueeze(0) >= label_lengths.unsqueeze(1)
+    label_index.masked_fill_(beyond_target, blank)
+    label_index = label_index[:, None, :, None].expand(minibatch_size, maxT, maxU, 1)
+
+    lp_blank = log_probs[..., blank]
+    lp_label = torch.gather(log_probs, dim=-1, index=label_index).squeeze(-1)
+    return lp_blank, lp_label, label_index
+
+
+def _to_numba_array(tensor: torch.Tensor):
+    return tensor.detach().cpu().contiguous().numpy()
+
+
+def rnnt_loss_cpu_parallel(
+    acts: torch.Tensor,
+    labels: torch.Tensor,
+    input_lengths: torch.Tensor,
+    label_lengths: torch.Tensor,
+    costs: torch.Tensor,
+    grads: torch.Tensor,
+    blank_label: int,
+    fastemit_lambda: float,
+    clamp: float,
+    num_threads: int,
+):
+    """
+    Wrapper method for accessing the multithreaded CPU RNNT loss.
+
+    Computes the same quantities as :func:`rnnt_loss_cpu`, but the lattice is evaluated by compiled
+    Numba kernels along its anti-diagonals, with the batch split across threads.
+
+    Args:
+        acts: Log probability tensor of shape [B, T, U, V+1].
+        labels: Ground truth labels of shape [B, U].
+        input_lengths: Lengths of the acoustic sequence as a vector of ints [B].
+        label_lengths: Lengths of the target sequence as a vector of ints [B].
+        costs: Zero vector of length [B] in which costs will be set.
+        grads: Zero tensor of shape [B, T, U, V+1] where the gradient will be set.
+        blank_label: Index of the blank token in the vocabulary.
+        fastemit_lambda: Float scaling factor for FastEmit regularization. Refer to
+            FastEmit: Low-latency Streaming ASR with Sequence-level Emission Regularization.
+        clamp: Unused. Gradient clamping is applied to the gradient of the log_softmax on CPU.
+        num_threads: Number of threads for Numba. Values <= 0 keep the current Numba setting.
+    """
+    _set_cpu_num_threads(num_threads)
+
+    lp_blank, lp_label, label_index = _gather_lattice_log_probs(acts, labels, label_lengths, blank_label)
+    lp_blank = _to_numba_array(lp_blank)
+    lp_label = _to_numba_array(lp_label)
+
+    costs_np = np.zeros(acts.shape[0], dtype=lp_blank.dtype)
+    grads_blank = np.zeros_like(lp_blank)
+    grads_label = np.zeros_like(lp_label)
+
+    cpu_rnnt_parallel.rnnt_cost_and_grads(
+        lp_blank,
+        lp_label,
+        _to_numba_array(input_lengths),
+        _to_numba_array(label_lengths),
+        costs_np,
+        grads_blank,
+        grads_label,
+        fastemit_lambda,
+        grads is not None,
+    )
+
+    costs.copy_(torch.from_numpy(costs_np))
+
+    if grads is not None:
+        grads[..., blank_label] += torch.from_numpy(grads_blank).to(grads)
+        grads.scatter_add_(-1, label_index, torch.from_numpy(grads_label).to(grads).unsqueeze(-1))
+
+    return True
+
+
+def rnnt_lattice_loss_cpu(
+    lp_blank: torch.Tensor,
+    lp_label: torch.Tensor,
+    input_lengths: torch.Tensor,
+    label_lengths: torch.Tensor,
+    costs: torch.Tensor,
+    grads_blank: torch.Tensor,
+    grads_label: torch.Tensor,
+    fastemit_lambda: float,
+    num_threads: int,
+):
+    """
+    Wrapper method for accessing the multithreaded CPU RNNT loss on an already gathered lattice.
+
+    Unlike :func:`rnnt_loss_cpu_parallel`, the full [B, T, U, V+1] log probability tensor is never required,
+    only the log probabilities of the blank and next label arcs of every node. This allows the caller to
+    compute the joint in chunks and discard each chunk after its two arcs have been selected.
+
+    Args:
+        lp_blank: Blank log probability tensor of shape [B, T, U].
+        lp_label: Next label log probability tensor of shape [B, T, U].
+        input_lengths: Lengths of the acoustic sequence as a vector of ints [B].
+        label_lengths: Lengths of the target sequence as a vector of ints [B].
+        costs: Zero vector of length [B] in which costs will be set.
+        grads_blank: Zero tensor of shape [B, T, U] where the gradient of the blank arcs will be set, or None.
+        grads_label: Zero tensor of shape [B, T, U] where the gradient of the label arcs will be set, or None.
+        fastemit_lambda: Float scaling factor for FastEmit regularization. Refer to
+            FastEmit: Low-latency Streaming ASR with Sequence-level Emission Regularization.
+        num_threads: Number of threads for Numba. Values <= 0 keep the current Numba setting.
+    """
+    _set_cpu_num_threads(num_threads)
+
+    lp_blank_np = _to_numba_array(lp_blank)
+    lp_label_np = _to_numba_array(lp_label)
+
+    costs_np = np.zeros(lp_blank.shape[0], dtype=lp_blank_np.dtype)
+    grads_blank_np = np.zeros_like(lp_blank_np)
+    grads_label_np = np.zeros_like(lp_label_np)
+
+    compute_grads = grads_blank is not None and grads_label is not None
+    cpu_rnnt_parallel.rnnt_cost_and_grads(
+        lp_blank_np,
+        lp_label_np,
+        _to_numba_array(input_lengths),
+        _to_numba_array(label_lengths),
+        costs_np,
+        grads_blank_np,
+        grads_label_np,
+        fastemit_lambda,
+        compute_grads,
+    )
+
+    costs.copy_(torch.from_numpy(costs_np))
+
+    if compute_grads:
+        grads_blank.copy_(torch.from_numpy(grads_blank_np))
+        grads_label.copy_(torch.from_numpy(grads_label_np))
+
+    return True
+
+
+def tdt_loss_cpu(
+    label_acts: torch.Tensor,
+    duration_acts: torch.Tensor,
+    labels: torch.Tensor,
+    input_lengths: torch.Tensor,
+    label_lengths: torch.Tensor,
+    costs: torch.Tensor,
+    label_grads: torch.Tensor,
+    duration_grads: torch.Tensor,
+    blank_label: int,
+    durations: list,
+    fastemit_lambda: float,
+    clamp: float,
+    num_threads: int,
+    sigma: float,
+    omega: float,
+):
+    """
+    Wrapper method for accessing the multithreaded CPU TDT loss (https://arxiv.org/abs/2304.06795).
+
+    Mirrors :func:`tdt_loss_gpu`: the token activations are un-normalized logits and their log_softmax is computed
+    here, while the duration activations are expected to be log probabilities already.
+
+    Args:
+        label_acts: Activation tensor of shape [B, T, U, V], where V includes the blank symbol.
+        duration_acts: Activation tensor of shape [B, T, U, D], where D is the number of durations.
+        labels: Ground truth labels of shape [B, U].
+        input_lengths: Lengths of the acoustic sequence as a vector of ints [B].
+        label_lengths: Lengths of the target sequence as a vector of ints [B].
+        costs: Zero vector of length [B] in which costs will be set.
+        label_grads: Zero tensor of shape [B, T, U, V] where the gradient to label_acts will be set.
+        duration_grads: Zero tensor of shape [B, T, U, D] where the gradient to duration_acts will be set.
+        blank_label: Index of the standard blank token in the vocabulary.
+        durations: A list of supported durations for TDT. Must include 0 and 1.
+        fastemit_lambda: Float scaling factor for FastEmit regularization. Refer to
+            FastEmit: Low-latency Streaming ASR with Sequence-level Emission Regularization.
+        clamp: Float value. When set to value >= 0.0, will clamp the gradient to [-clamp, clamp].
+        num_threads: Number of threads for Numba. Values <= 0 keep the current Numba setting.
+        sigma: logit-undernormalization weight used in the multi-blank model. Refer to
+            the multi-blank paper https://arxiv.org/abs/2304.06795 for detailed explanations.
+        omega: weight for regular RNN-T loss
+    """
+    _set_cpu_num_threads(num_threads)
+
+    log_probs = torch.log_softmax(label_acts.detach().float(), dim=-1)
+    lp_blank, lp_label, label_index = _gather_lattice_log_probs(log_probs, labels, label_lengths, blank_label)
+    lp_blank = _to_numba_array(lp_blank)
+    lp_label = _to_numba_array(lp_label)
+    np_input_lengths = _to_numba_array(input_lengths)
+    np_label_lengths = _to_numba_array(label_lengths)
+
+    training = label_grads is not None
+    costs_np = np.zeros(label_acts.shape[0], dtype=lp_blank.dtype)
+    grads_blank = np.zeros_like(lp_blank)
+    grads_label = np.zeros_like(lp_label)
+    grads_duration = np.zeros(duration_acts.shape, dtype=lp_blank.dtype)
+
+    if random.uniform(0, 1) < omega:
+        # sampled standard RNN-T loss, durations receive no gradient
+        cpu_rnnt_parallel.rnnt_cost_and_grads(
+            lp_blank,
+            lp_label,
+            np_input_lengths,
+            np_label_lengths,
+            costs_np,
+            grads_blank,
+            grads_label,
+            fastemit_lambda,
+            training,
+        )
+    else:
+        cpu_rnnt_parallel.tdt_cost_and_grads(
+            lp_blank - sigma,
+            lp_label - sigma,
+            _to_numba_array(duration_acts.float()),
+            np.asarray(durations, dtype=np.int64),
+            np_input_lengths,
+            np_label_lengths,
+            costs_np,
+            grads_blank,
+            grads_label,
+            grads_duration,
+            fastemit_lambda,
+            training,
+        )
+
+    costs.copy_(torch.from_numpy(costs_np))
+
+    if training:
+        grads_blank = torch.from_numpy(grads_blank)
+        grads_label = torch.from_numpy(grads_label)
+
+        # chain rule through the log_softmax: d/dx_v = g_v - softmax_v * sum_k(g_k), where only blank and label
+        # arcs have a non-zero gradient g_k.
+        grads = -log_probs.exp() * (grads_blank + grads_label).unsqueeze(-1)
+        grads[..., blank_label] += grads_blank
+        grads.scatter_add_(-1, label_index, grads_label.unsqueeze(-1))
+
+        if clamp > 0.0:
+            grads.clamp_(-clamp, clamp)
+
+        label_grads.copy_(grads)
+        duration_grads.copy_(torch.from_numpy(grads_duration))
+
+    return True
+
+
 def rnnt_loss_gpu(
     acts: torch.Tensor,
     labels: torch.Tensor,
@@ -34,7 +34,7 @@ from torch.nn import Module
 from nemo.collections.asr.parts.numba.rnnt_loss import rnnt
 from nemo.collections.asr.parts.numba.rnnt_loss.utils.cpu_utils import cpu_rnnt
 
-__all__ = ['rnnt_loss', 'RNNTLossNumba', 'MultiblankRNNTLossNumba', 'TDTLossNumba']
+__all__ = ['rnnt_loss', 'rnnt_lattice_loss', 'RNNTLossNumba', 'MultiblankRNNTLossNumba', 'TDTLossNumba']
 
 
 class _RNNTNumba(Function):
@@ -54,7 +54,7 @@ class _RNNTNumba(Function):
         if clamp < 0:
             raise ValueError("`clamp` must be 0.0 or positive float value.")
 
-        loss_func = rnnt.rnnt_loss_gpu if is_cuda else rnnt.rnnt_loss_cpu
+        loss_func = rnnt.rnnt_loss_gpu if is_cuda else rnnt.rnnt_loss_cpu_parallel
         grads = torch.zeros_like(acts) if acts.requires_grad else None
         minibatch_size = acts.size(0)
         costs = torch.zeros(minibatch_size, device=acts.device, dtype=torch.float32)
@@ -91,6 +91,83 @@ class _RNNTNumba(Function):
             return ctx.grads.mul_(grad_output), None, None, None, None, None, None, None
 
 
+class _RNNTLatticeNumba(Function):
+    """
+    Numba class for the RNNT loss computed from the blank and next label log probabilities of every lattice node,
+    instead of the full joint tensor. Gradients are returned w.r.t. these two [B, T, U] tensors.
+    """
+
+    @staticmethod
+    def forward(ctx, lp_blank, lp_label, act_lens, label_lens, reduction, fastemit_lambda, clamp):
+        """
+        lp_blank: Tensor of (batch x seqLength x labelLength) containing the blank log probabilities
+        lp_label: Tensor of (batch x seqLength x labelLength) containing the next label log probabilities
+        act_lens: Tensor of size (batch) containing size of each output sequence from the network
+        label_lens: Tensor of (batch) containing label length of each example
+        fastemit_lambda: Float scaling factor for FastEmit regularization. Refer to
+            FastEmit: Low-latency Streaming ASR with Sequence-level Emission Regularization.
+        clamp: Float value. When set to value > 0.0, will clamp the gradient to [-clamp, clamp].
+        """
+        if clamp < 0:
+            raise ValueError("`clamp` must be 0.0 or positive float value.")
+        if lp_blank.shape != lp_label.shape or lp_blank.dim() != 3:
+            raise ValueError(
+                f"`lp_blank` and `lp_label` must both have shape [B, T, U]. "
+                f"Given : {tuple(lp_blank.shape)} and {tuple(lp_label.shape)}"
+            )
+
+        # The lattice is evaluated on CPU; it is only [B, T, U] and thus cheap to move off the accelerator.
+        device, dtype = lp_blank.device, lp_blank.dtype
+        lp_blank_cpu = lp_blank.detach().float().cpu()
+        lp_label_cpu = lp_label.detach().float().cpu()
+
+        compute_grads = lp_blank.requires_grad or lp_label.requires_grad
+        grads_blank = torch.zeros_like(lp_blank_cpu) if compute_grads else None
+        grads_label = torch.zeros_like(lp_label_cpu) if compute_grads else None
+        minibatch_size = lp_blank.size(0)
+        costs = torch.zeros(minibatch_size, dtype=torch.float32)
+
+        rnnt.rnnt_lattice_loss_cpu(
+            lp_blank_cpu,
+            lp_label_cpu,
+            input_lengths=act_lens.cpu(),
+            label_lengths=label_lens.cpu(),
+            costs=costs,
+            grads_blank=grads_blank,
+            grads_label=grads_label,
+            fastemit_lambda=fastemit_lambda,
+            num_threads=0,
+        )
+
+        if compute_grads:
+            if clamp > 0.0:
+                grads_blank.clamp_(-clamp, clamp)
+                grads_label.clamp_(-clamp, clamp)
+            grads_blank = grads_blank.to(device=device, dtype=dtype)
+            grads_label = grads_label.to(device=device, dtype=dtype)
+
+        costs = costs.to(device)
+        if reduction in ['sum', 'mean']:
+            costs = costs.sum().unsqueeze_(-1)
+            if reduction == 'mean':
+                costs /= minibatch_size
+
+                if compute_grads:
+                    grads_blank /= minibatch_size
+                    grads_label /= minibatch_size
+
+        ctx.grads = (grads_blank, grads_label)
+
+        return costs
+
+    @staticmethod
+    def backward(ctx, grad_output):
+        grads_blank, grads_label = ctx.grads
+        if grad_output is not None and grads_blank is not None:
+            grad_output = grad_output.view(-1, 1, 1).to(grads_blank)
+            return grads_blank.mul_(grad_output), grads_label.mul_(grad_output), None, None, None, None, None
+
+
 class _TDTNumba(Function):
     """
     Numba class for Token-and-Duration Transducer (TDT) loss (https://arxiv.org/abs/2304.06795)
@@ -133,10 +210,7 @@ class _TDTNumba(Function):
         if clamp < 0:
             raise ValueError("`clamp` must be 0.0 or positive float value.")
 
-        if is_cuda:
-            loss_func = rnnt.tdt_loss_gpu
-        else:
-            raise ValueError("TDT is not yet implemented for non CUDA computation.")
+        loss_func = rnnt.tdt_loss_gpu if is_cuda else rnnt.tdt_loss_cpu
 
         label_grads = torch.zeros_like(label_acts) if label_acts.requires_grad else None
         duration_grads = torch.zeros_like(duration_acts) if duration_acts.requires_grad else None
@@ -293,6 +367,31 @@ def rnnt_loss(
     return _RNNTNumba.apply(acts, labels, act_lens, label_lens, blank, reduction, fastemit_lambda, clamp)
 
 
+def rnnt_lattice_loss(
+    lp_blank, lp_label, act_lens, label_lens, reduction='mean', fastemit_lambda: float = 0.0, clamp: float = 0.0
+):
+    """RNN Transducer Loss (functional form) over a pre-gathered lattice.
+
+    Only the log probabilities of the two arcs leaving every node of the lattice are required, which allows
+    the joint to be computed in chunks without ever materializing the full [B, T, U, V+1] tensor.
+
+    Args:
+        lp_blank: Tensor of (batch x seqLength x labelLength) containing the log probability of blank
+            at every lattice node (log_softmax must already be applied).
+        lp_label: Tensor of (batch x seqLength x labelLength) containing the log probability of the next
+            target label at every lattice node. Values beyond the target length are ignored.
+        act_lens: Tensor of size (batch) containing size of each output sequence from the network
+        label_lens: Tensor of (batch) containing label length of each example
+        reduction (string, optional): Specifies the reduction to apply to the output:
+            'none' | 'mean' | 'sum'. Default: 'mean'
+        fastemit_lambda: Float scaling factor for FastEmit regularization.
+        clamp: Float value. When set to value > 0.0, will clamp the gradient of the lattice log probabilities
+            to [-clamp, clamp]. Unlike `rnnt_loss`, which clamps the gradient of the whole joint output, only the
+            gradient of the two arcs of every node is clamped.
+    """
+    return _RNNTLatticeNumba.apply(lp_blank, lp_label, act_lens, label_lens, reduction, fastemit_lambda, clamp)
+
+
 def multiblank_rnnt_loss(
     acts,
     labels,
@@ -436,6 +535,21 @@ class RNNTLossNumba(Module):
             acts, labels, act_lens, label_lens, self.blank, self.reduction, self.fastemit_lambda, self.clamp
         )
 
+    def forward_lattice(self, lp_blank, lp_label, act_lens, label_lens):
+        """
+        Computes the same loss as `forward`, from the pre-gathered lattice arcs instead of the joint tensor.
+        The gradient is not clamped here, since `clamp` applies to the gradient of the joint output, from which
+        the lattice is gathered: the caller clamps it (see `RNNTJoint.joint_lattice`).
+
+        lp_blank: Tensor of (batch x seqLength x labelLength) containing the blank log probabilities
+        lp_label: Tensor of (batch x seqLength x labelLength) containing the next label log probabilities
+        act_lens: Tensor of size (batch) containing size of each output sequence from the network
+        label_lens: Tensor of (batch) containing label length of each example
+        """
+        return _RNNTLatticeNumba.apply(
+            lp_blank, lp_label, act_lens, label_lens, self.reduction, self.fastemit_lambda, 0.0
+        )
+
 
 class MultiblankRNNTLossNumba(Module):
     """
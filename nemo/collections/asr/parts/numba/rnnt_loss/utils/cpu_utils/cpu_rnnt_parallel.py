@@ -0,0 +1,336 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Multithreaded CPU kernels for the RNNT and TDT losses.
+
+Unlike :mod:`cpu_rnnt`, which walks the lattice one scalar torch op at a time, these kernels are compiled
+with Numba and operate on compact ``[B, T, U]`` views of the log-probabilities that are actually used by the
+lattice (the blank and the target label at every node). The batch is split across threads with ``prange``,
+and within every sample the forward (alpha) and backward (beta) variables are computed anti-diagonal by
+anti-diagonal (``t + u = n``), so that all cells processed by the innermost loop are independent of each other.
+
+All kernels return gradients with respect to the log-probabilities of the lattice arcs, i.e. ``[B, T, U]``
+tensors for blank and label emissions (and ``[B, T, U, D]`` for TDT durations). Scattering them back into the
+full vocabulary is done by the torch wrappers in :mod:`nemo.collections.asr.parts.numba.rnnt_loss.rnnt`.
+"""
+
+import math
+
+import numba
+import numpy as np
+
+NEG_INF = -np.inf
+
+
+@numba.njit(inline='always')
+def log_sum_exp(a: float, b: float) -> float:
+    if a == NEG_INF:
+        return b
+
+    if b == NEG_INF:
+        return a
+
+    if a > b:
+        return math.log1p(math.exp(b - a)) + a
+    else:
+        return math.log1p(math.exp(a - b)) + b
+
+
+@numba.njit
+def _rnnt_alphas(lp_blank: np.ndarray, lp_label: np.ndarray, T: int, U: int, alphas: np.ndarray) -> float:
+    """
+    Forward variable of a single sample, computed along the anti-diagonals of the [T, U] lattice.
+
+    Args:
+        lp_blank: Log probability of blank at every lattice node, [maxT, maxU].
+        lp_label: Log probability of the next target label at every lattice node, [maxT, maxU].
+        T: Length of the acoustic sequence (without padding).
+        U: Length of the target sequence + 1 (without padding).
+        alphas: Working memory of shape [maxT, maxU] that is updated inplace.
+
+    Returns:
+        Log-likelihood of the forward variable.
+    """
+    alphas[0, 0] = 0.0
+    for n in range(1, T + U - 1):
+        for u in range(max(0, n - T + 1), min(n, U - 1) + 1):
+            t = n - u
+            if u == 0:
+                alphas[t, 0] = alphas[t - 1, 0] + lp_blank[t - 1, 0]
+            elif t == 0:
+                alphas[0, u] = alphas[0, u - 1] + lp_label[0, u - 1]
+            else:
+                no_emit = alphas[t - 1, u] + lp_blank[t - 1, u]
+                emit = alphas[t, u - 1] + lp_label[t, u - 1]
+                alphas[t, u] = log_sum_exp(emit, no_emit)
+
+    return alphas[T - 1, U - 1] + lp_blank[T - 1, U - 1]
+
+
+@numba.njit
+def _rnnt_betas(lp_blank: np.ndarray, lp_label: np.ndarray, T: int, U: int, betas: np.ndarray) -> float:
+    """
+    Backward variable of a single sample, computed along the anti-diagonals of the [T, U] lattice.
+    Arguments are the same as for :func:`_rnnt_alphas`.
+
+    Returns:
+        Log-likelihood of the backward variable.
+    """
+    betas[T - 1, U - 1] = lp_blank[T - 1, U - 1]
+    for n in range(T + U - 3, -1, -1):
+        for u in range(max(0, n - T + 1), min(n, U - 1) + 1):
+            t = n - u
+            if u == U - 1:
+                betas[t, u] = betas[t + 1, u] + lp_blank[t, u]
+            elif t == T - 1:
+                betas[t, u] = betas[t, u + 1] + lp_label[t, u]
+            else:
+                no_emit = betas[t + 1, u] + lp_blank[t, u]
+                emit = betas[t, u + 1] + lp_label[t, u]
+                betas[t, u] = log_sum_exp(emit, no_emit)
+
+    return betas[0, 0]
+
+
+@numba.njit(parallel=True)
+def rnnt_cost_and_grads(
+    lp_blank: np.ndarray,
+    lp_label: np.ndarray,
+    input_lengths: np.ndarray,
+    label_lengths: np.ndarray,
+    costs: np.ndarray,
+    grads_blank: np.ndarray,
+    grads_label: np.ndarray,
+    fastemit_lambda: float,
+    compute_grads: bool,
+):
+    """
+    Compute the RNNT loss and its gradients w.r.t. the blank and label log probabilities, in parallel over
+    the batch.
+
+    Args:
+        lp_blank: Log probability of the blank token, [B, T, U].
+        lp_label: Log probability of the next target label, [B, T, U]. The last valid `u` is unused.
+        input_lengths: Lengths of the acoustic sequences, [B].
+        label_lengths: Lengths of the target sequences, [B].
+        costs: Zero vector of length [B] which is updated inplace with the negative log likelihood.
+        grads_blank: Zero tensor of shape [B, T, U], updated inplace with the gradient of the blank arcs.
+        grads_label: Zero tensor of shape [B, T, U], updated inplace with the gradient of the label arcs.
+        fastemit_lambda: Float scaling factor for FastEmit regularization.
+        compute_grads: Whether to compute the backward variable and the gradients.
+    """
+    minibatch, maxT, maxU = lp_blank.shape
+    log_fastemit_scale = math.log1p(fastemit_lambda)
+
+    for b in numba.prange(minibatch):
+        T = input_lengths[b]
+        U = label_lengths[b] + 1
+
+        alphas = np.empty_like(lp_blank[b])
+        ll_forward = _rnnt_alphas(lp_blank[b], lp_label[b], T, U, alphas)
+        costs[b] = -ll_forward * (1.0 + fastemit_lambda)
+
+        if not compute_grads:
+            continue
+
+        betas = np.empty_like(lp_blank[b])
+        _rnnt_betas(lp_blank[b], lp_label[b], T, U, betas)
+
+        for t in range(T):
+            for u in range(U):
+                if t < T - 1:
+                    grads_blank[b, t, u] = -math.exp(alphas[t, u] + betas[t + 1, u] + lp_blank[b, t, u] - ll_forward)
+                if u < U - 1:
+                    grads_label[b, t, u] = -math.exp(
+                        log_fastemit_scale + alphas[t, u] + betas[t, u + 1] + lp_label[b, t, u] - ll_forward
+                    )
+
+        # gradient to the last blank transition
+        grads_blank[b, T - 1, U - 1] = -math.exp(alphas[T - 1, U - 1] + lp_blank[b, T - 1, U - 1] - ll_forward)
+
+
+@numba.njit
+def _tdt_alphas(
+    lp_blank: np.ndarray,
+    lp_label: np.ndarray,
+    lp_duration: np.ndarray,
+    durations: np.ndarray,
+    T: int,
+    U: int,
+    alphas: np.ndarray,
+) -> float:
+    """
+    Forward variable of a single TDT sample (Equation 7 in https://arxiv.org/abs/2304.06795).
+    Every node (t, u) only depends on nodes on earlier anti-diagonals, since blank emissions advance by at
+    least one frame and label emissions advance by one label.
+
+    Args:
+        lp_blank: Log probability of blank (with logit under-normalization applied), [maxT, maxU].
+        lp_label: Log probability of the next target label (with under-normalization applied), [maxT, maxU].
+        lp_duration: Log probabilities of the durations, [maxT, maxU, D].
+        durations: Supported durations, [D]. Must include 0 and 1.
+        T: Length of the acoustic sequence (without padding).
+        U: Length of the target sequence + 1 (without padding).
+        alphas: Working memory of shape [maxT, maxU] that is updated inplace.
+
+    Returns:
+        Log-likelihood of the forward variable.
+    """
+    num_durations = durations.shape[0]
+
+    alphas[0, 0] = 0.0
+    for n in range(1, T + U - 1):
+        for u in range(max(0, n - T + 1), min(n, U - 1) + 1):
+            t = n - u
+            acc = NEG_INF
+            for i in range(num_durations):
+                d = durations[i]
+                if t < d:
+                    continue
+                if d > 0:
+                    acc = log_sum_exp(acc, alphas[t - d, u] + lp_blank[t - d, u] + lp_duration[t - d, u, i])
+                if u > 0:
+                    acc = log_sum_exp(
+                        acc, alphas[t - d, u - 1] + lp_label[t - d, u - 1] + lp_duration[t - d, u - 1, i]
+                    )
+            alphas[t, u] = acc
+
+    loglike = NEG_INF
+    for i in range(num_durations):
+        d = durations[i]
+        if d > 0 and T >= d:
+            loglike = log_sum_exp(
+                loglike, alphas[T - d, U - 1] + lp_blank[T - d, U - 1] + lp_duration[T - d, U - 1, i]
+            )
+    return loglike
+
+
+@numba.njit
+def _tdt_betas(
+    lp_blank: np.ndarray,
+    lp_label: np.ndarray,
+    lp_duration: np.ndarray,
+    durations: np.ndarray,
+    T: int,
+    U: int,
+    betas: np.ndarray,
+) -> float:
+    """
+    Backward variable of a single TDT sample. Arguments are the same as for :func:`_tdt_alphas`.
+
+    Returns:
+        Log-likelihood of the backward variable.
+    """
+    num_durations = durations.shape[0]
+
+    for n in range(T + U - 2, -1, -1):
+        for u in range(max(0, n - T + 1), min(n, U - 1) + 1):
+            t = n - u
+            acc = NEG_INF
+            for i in range(num_durations):
+                d = durations[i]
+                if d > 0:
+                    if t + d < T:
+                        acc = log_sum_exp(acc, betas[t + d, u] + lp_blank[t, u] + lp_duration[t, u, i])
+                    elif t + d == T and u == U - 1:
+                        # blank emission that terminates the sequence
+                        acc = log_sum_exp(acc, lp_blank[t, u] + lp_duration[t, u, i])
+                if u < U - 1 and t + d < T:
+                    acc = log_sum_exp(acc, betas[t + d, u + 1] + lp_label[t, u] + lp_duration[t, u, i])
+            betas[t, u] = acc
+
+    return betas[0, 0]
+
+
+@numba.njit(parallel=True)
+def tdt_cost_and_grads(
+    lp_blank: np.ndarray,
+    lp_label: np.ndarray,
+    lp_duration: np.ndarray,
+    durations: np.ndarray,
+    input_lengths: np.ndarray,
+    label_lengths: np.ndarray,
+    costs: np.ndarray,
+    grads_blank: np.ndarray,
+    grads_label: np.ndarray,
+    grads_duration: np.ndarray,
+    fastemit_lambda: float,
+    compute_grads: bool,
+):
+    """
+    Compute the TDT loss and its gradients w.r.t. the blank, label and duration log probabilities,
+    in parallel over the batch.
+
+    Args:
+        lp_blank: Log probability of the blank token (with logit under-normalization applied), [B, T, U].
+        lp_label: Log probability of the next target label (with logit under-normalization applied), [B, T, U].
+        lp_duration: Log probabilities of the durations, [B, T, U, D].
+        durations: Supported durations, [D]. Must include 0 and 1.
+        input_lengths: Lengths of the acoustic sequences, [B].
+        label_lengths: Lengths of the target sequences, [B].
+        costs: Zero vector of length [B] which is updated inplace with the negative log likelihood.
+        grads_blank: Zero tensor of shape [B, T, U], updated inplace with the gradient of the blank arcs.
+        grads_label: Zero tensor of shape [B, T, U], updated inplace with the gradient of the label arcs.
+        grads_duration: Zero tensor of shape [B, T, U, D], updated inplace with the gradient of the durations.
+        fastemit_lambda: Float scaling factor for FastEmit regularization.
+        compute_grads: Whether to compute the backward variable and the gradients.
+    """
+    minibatch, maxT, maxU = lp_blank.shape
+    num_durations = durations.shape[0]
+
+    for b in numba.prange(minibatch):
+        T = input_lengths[b]
+        U = label_lengths[b] + 1
+
+        alphas = np.empty_like(lp_blank[b])
+        ll_forward = _tdt_alphas(lp_blank[b], lp_label[b], lp_duration[b], durations, T, U, alphas)
+        costs[b] = -ll_forward * (1.0 + fastemit_lambda)
+
+        if not compute_grads:
+            continue
+
+        betas = np.empty_like(lp_blank[b])
+        _tdt_betas(lp_blank[b], lp_label[b], lp_duration[b], durations, T, U, betas)
+
+        for t in range(T):
+            for u in range(U):
+                g_blank = 0.0
+                g_label = 0.0
+                for i in range(num_durations):
+                    d = durations[i]
+                    g_duration = 0.0
+                    if d > 0 and t + d < T:
+                        g_duration += math.exp(
+                            alphas[t, u] + betas[t + d, u] + lp_blank[b, t, u] + lp_duration[b, t, u, i] - ll_forward
+                        )
+                    elif d > 0 and t + d == T and u == U - 1:
+                        g_duration += math.exp(alphas[t, u] + lp_blank[b, t, u] + lp_duration[b, t, u, i] - ll_forward)
+                    g_blank += g_duration
+
+                    if u < U - 1 and t + d < T:
+                        flow = math.exp(
+                            alphas[t, u]
+                            + betas[t + d, u + 1]
+                            + lp_label[b, t, u]
+                            + lp_duration[b, t, u, i]
+                            - ll_forward
+                        )
+                        g_label += flow
+                        g_duration += flow
+
+                    grads_duration[b, t, u, i] = -g_duration
+
+                grads_blank[b, t, u] = -g_blank
+                grads_label[b, t, u] = -(1.0 + fastemit_lambda) * g_label
@@ -54,6 +54,8 @@ except ModuleNotFoundError:
 
 
 CONSTANT = 1e-5
+# Number of consecutive mel filters applied as a single block by the banded filterbank
+FILTERBANK_BAND_SIZE = 8
 
 
 def normalize_batch(x, seq_len, normalize_type):
@@ -260,6 +262,7 @@ class FilterbankFeatures(nn.Module):
         mel_norm="slaney",
         stft_exact_pad=False,  # Deprecated arguments; kept for config compatibility
         stft_conv=False,  # Deprecated arguments; kept for config compatibility
+        banded_filterbank=False,
     ):
         super().__init__()
         if stft_conv or stft_exact_pad:
@@ -332,10 +335,18 @@ class FilterbankFeatures(nn.Module):
         ).unsqueeze(0)
         self.register_buffer("fb", filterbanks)
 
+        # Every mel filter is non-zero over a narrow range of frequency bins only, therefore the filterbank
+        # can be applied as a few small dense products over contiguous (mel, frequency) blocks
+        self.banded_filterbank = banded_filterbank
+        self.fb_bands = self._get_filterbank_bands(filterbanks[0]) if banded_filterbank else None
+
         # Calculate maximum sequence length
         max_length = self.get_seq_len(torch.tensor(max_duration * sample_rate, dtype=torch.float))
         max_pad = pad_to - (max_length % pad_to) if pad_to > 0 else 0
         self.max_length = max_length + max_pad
+
+        # Frame indices used to mask the padded frames, cached up to the maximum expected sequence length
+        self.register_buffer("frame_index", torch.arange(int(self.max_length)), persistent=False)
         self.pad_value = pad_value
         self.mag_power = mag_power
 
@@ -397,6 +408,45 @@ class FilterbankFeatures(nn.Module):
     def filter_banks(self):
         return self.fb
 
+    @staticmethod
+    def _get_filterbank_bands(fb, band_size=FILTERBANK_BAND_SIZE):
+        """
+        Splits the mel filterbank into groups of `band_size` consecutive mel filters, and finds the range of
+        frequency bins where each group is non-zero.
+
+        Args:
+            fb: Mel filterbank of shape [nfilt, n_fft // 2 + 1].
+            band_size: Number of mel filters in every group.
+
+        Returns:
+            A list of (first mel, last mel + 1, first frequency bin, last frequency bin + 1) tuples.
+        """
+        bands = []
+        for mel_start in range(0, fb.shape[0], band_size):
+            mel_end = min(mel_start + band_size, fb.shape[0])
+            freq_bins = fb[mel_start:mel_end].abs().sum(dim=0).nonzero().squeeze(-1)
+            if freq_bins.numel() > 0:
+                bands.append((mel_start, mel_end, int(freq_bins[0]), int(freq_bins[-1]) + 1))
+            else:
+                bands.append((mel_start, mel_end, 0, 0))
+        return bands
+
+    def apply_filterbank(self, x):
+        """
+        Projects a linear spectrogram of shape [B, n_fft // 2 + 1, T] onto the mel filterbank.
+        """
+        fb = self.fb.to(x.dtype)
+        if self.fb_bands is None:
+            return torch.matmul(fb, x)
+
+        return torch.cat(
+            [
+                torch.matmul(fb[:, mel_start:mel_end, freq_start:freq_end], x[:, freq_start:freq_end, :])
+                for mel_start, mel_end, freq_start, freq_end in self.fb_bands
+            ],
+            dim=1,
+        )
+
     def forward(self, x, seq_len, linear_spec=False):
         seq_len = self.get_seq_len(seq_len)
 
@@ -421,7 +471,11 @@ class FilterbankFeatures(nn.Module):
         # guard is needed for sqrt if grads are passed through
         guard = 0 if not self.use_grads else CONSTANT
         x = torch.view_as_real(x)
-        x = torch.sqrt(x.pow(2).sum(-1) + guard)
+        if self.mag_power == 2.0:
+            # power spectrum is computed directly, without the round trip through the magnitude
+            x = x.pow(2).sum(-1) + guard
+        else:
+            x = torch.sqrt(x.pow(2).sum(-1) + guard)
 
         if self.training and self.nb_augmentation_prob > 0.0:
             for idx in range(x.shape[0]):
@@ -429,7 +483,7 @@ class FilterbankFeatures(nn.Module):
                     x[idx, self._nb_max_fft_bin :, :] = 0.0
 
         # get power spectrum
-        if self.mag_power != 1.0:
+        if self.mag_power not in (1.0, 2.0):
             x = x.pow(self.mag_power)
 
         # return plain spectrogram if required
@@ -437,7 +491,7 @@ class FilterbankFeatures(nn.Module):
             return x, seq_len
 
         # dot with filterbank energies
-        x = torch.matmul(self.fb.to(x.dtype), x)
+        x = self.apply_filterbank(x)
         # log features if required
         if self.log:
             if self.log_zero_guard_type == "add":
@@ -457,9 +511,14 @@ class FilterbankFeatures(nn.Module):
 
         # mask to zero any values beyond seq_len in batch, pad to multiple of `pad_to` (for efficiency)
         max_len = x.size(-1)
-        mask = torch.arange(max_len).to(x.device)
-        mask = mask.repeat(x.size(0), 1) >= seq_len.unsqueeze(1)
-        x = x.masked_fill(mask.unsqueeze(1).type(torch.bool).to(device=x.device), self.pad_value)
+        # exported graphs always build the indices, so that they do not depend on the length of the traced input
+        exporting = torch.jit.is_tracing() or torch.jit.is_scripting()
+        if not exporting and max_len <= self.frame_index.size(0):
+            frame_index = self.frame_index[:max_len]
+        else:
+            frame_index = torch.arange(max_len, device=x.device)
+        mask = frame_index.unsqueeze(0) >= seq_len.unsqueeze(1)
+        x = x.masked_fill(mask.unsqueeze(1), self.pad_value)
         del mask
         pad_to = self.pad_to
         if pad_to == "max":
@@ -509,6 +568,7 @@ class FilterbankFeaturesTA(nn.Module):
         rng: Optional[random.Random] = None,  # Deprecated arguments; kept for config compatibility
         stft_exact_pad: bool = False,  # Deprecated arguments; kept for config compatibility
         stft_conv: bool = False,  # Deprecated arguments; kept for config compatibility
+        banded_filterbank: bool = False,  # Unused; torchaudio applies its own filterbank
     ):
         super().__init__()
         if not HAVE_TORCHAUDIO:
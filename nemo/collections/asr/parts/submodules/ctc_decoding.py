@@ -25,6 +25,7 @@ from nemo.collections.asr.parts.submodules import ctc_beam_decoding, ctc_greedy_
 from nemo.collections.asr.parts.utils.asr_confidence_utils import ConfidenceConfig, ConfidenceMixin
 from nemo.collections.asr.parts.utils.rnnt_utils import Hypothesis, NBestHypotheses
 from nemo.collections.common.tokenizers.aggregate_tokenizer import DummyTokenizer
+from nemo.collections.common.tokenizers.sentencepiece_tokenizer import SentencePieceTokenizer
 from nemo.collections.common.tokenizers.tokenizer_spec import TokenizerSpec
 from nemo.utils import logging, logging_mode
 
@@ -34,6 +35,77 @@ def move_dimension_to_the_front(tensor, dim_index):
     return tensor.permute(*([dim_index] + all_dims[:dim_index] + all_dims[dim_index + 1 :]))
 
 
+def _split_by_counts(values: List, counts: List[int]) -> List[List]:
+    offsets = np.cumsum([0] + counts)
+    return [values[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+def batched_ctc_collapse(
+    predictions: List[torch.Tensor], blank_id: int, fold_consecutive: bool = True
+) -> Tuple[List[List[int]], List[List[int]], List[List[int]]]:
+    """
+    Performs the CTC collapse (removal of blanks and, optionally, of repeated tokens) of a batch of
+    per-frame label sequences with tensor operations over the whole batch.
+
+    Args:
+        predictions: List of 1D integer tensors with the per-frame labels of every sample.
+        blank_id: The id of the CTC blank token.
+        fold_consecutive: Whether to fold consecutive repeated tokens into a single token.
+
+    Returns:
+        A tuple of three lists with one entry per sample -
+        the collapsed token ids,
+        the number of frames since the previous emitted token (the first value is the frame of the first token),
+        the number of consecutive frames each emitted token was repeated for.
+    """
+    batch_size = len(predictions)
+    lengths = torch.tensor([len(prediction) for prediction in predictions], dtype=torch.long)
+    if batch_size == 0 or lengths.sum() == 0:
+        return [[] for _ in range(batch_size)], [[] for _ in range(batch_size)], [[] for _ in range(batch_size)]
+
+    # Concatenate the batch into a single sequence of frames, keeping track of the sample of every frame
+    labels = torch.cat([prediction.to(device='cpu', dtype=torch.long) for prediction in predictions])
+    num_frames = labels.numel()
+    segment_ids = torch.repeat_interleave(torch.arange(batch_size), lengths)
+    segment_starts = torch.cumsum(lengths, dim=0) - lengths
+    frame_index = torch.arange(num_frames) - segment_starts[segment_ids]
+
+    # A new run of frames starts at every label change and at the first frame of every sample
+    run_starts = torch.ones(num_frames + 1, dtype=torch.bool)
+    run_starts[1:num_frames] = labels[1:] != labels[:-1]
+    run_starts[:num_frames] |= frame_index == 0
+
+    non_blank = labels != blank_id
+    emitted = non_blank & run_starts[:num_frames] if fold_consecutive else non_blank
+    emitted_index = torch.nonzero(emitted, as_tuple=False)[:, 0]
+
+    tokens = labels[emitted_index]
+    emitted_segments = segment_ids[emitted_index]
+    counts = torch.bincount(emitted_segments, minlength=batch_size).tolist()
+
+    if fold_consecutive:
+        # Number of frames since the previously emitted token of the same sample
+        emitted_frames = frame_index[emitted_index]
+        previous_frames = torch.zeros_like(emitted_frames)
+        previous_frames[1:] = emitted_frames[:-1]
+        previous_frames[1:].masked_fill_(emitted_segments[1:] != emitted_segments[:-1], 0)
+        token_lengths = emitted_frames - previous_frames
+
+        # Length of the run of every emitted token, i.e. the distance to the next run start
+        run_start_index = torch.where(run_starts, torch.arange(num_frames + 1), num_frames)
+        next_run_start = torch.flip(torch.cummin(torch.flip(run_start_index, dims=[0]), dim=0).values, dims=[0])
+        token_repetitions = next_run_start[emitted_index + 1] - emitted_index
+    else:
+        token_lengths = torch.ones_like(tokens)
+        token_repetitions = torch.ones_like(tokens)
+
+    return (
+        _split_by_counts(tokens.tolist(), counts),
+        _split_by_counts(token_lengths.tolist(), counts),
+        _split_by_counts(token_repetitions.tolist(), counts),
+    )
+
+
 class AbstractCTCDecoding(ConfidenceMixin):
     """
     Used for performing CTC auto-regressive / non-auto-regressive decoding of the logprobs.
@@ -336,8 +408,7 @@ class AbstractCTCDecoding(ConfidenceMixin):
                 # If computing timestamps
                 if self.compute_timestamps is True:
                     timestamp_type = self.cfg.get('ctc_timestamp_type', 'all')
-                    for hyp_idx in range(len(decoded_hyps)):
-                        decoded_hyps[hyp_idx] = self.compute_ctc_timestamps(decoded_hyps[hyp_idx], timestamp_type)
+                    decoded_hyps = self.compute_ctc_timestamps_batch(decoded_hyps, timestamp_type)
 
                 hypotheses.append(decoded_hyps[0])  # best hypothesis
                 all_hypotheses.append(decoded_hyps)
@@ -364,8 +435,7 @@ class AbstractCTCDecoding(ConfidenceMixin):
                     for hyp in hypotheses:
                         hyp.text = hyp.text[:2]
                 timestamp_type = self.cfg.get('ctc_timestamp_type', 'all')
-                for hyp_idx in range(len(hypotheses)):
-                    hypotheses[hyp_idx] = self.compute_ctc_timestamps(hypotheses[hyp_idx], timestamp_type)
+                hypotheses = self.compute_ctc_timestamps_batch(hypotheses, timestamp_type)
 
             if return_hypotheses:
                 return hypotheses, None
@@ -386,67 +456,33 @@ class AbstractCTCDecoding(ConfidenceMixin):
         Returns:
             A list of strings.
         """
-        for ind in range(len(hypotheses_list)):
+        predictions = []
+        for hyp in hypotheses_list:
             # Extract the integer encoded hypothesis
-            hyp = hypotheses_list[ind]
-            prediction = hyp.y_sequence
+            prediction = torch.as_tensor(hyp.y_sequence, dtype=torch.long)
             predictions_len = hyp.length if hyp.length > 0 else None
 
-            if fold_consecutive:
-                if type(prediction) != list:
-                    prediction = prediction.numpy().tolist()
-
-                if predictions_len is not None:
-                    prediction = prediction[:predictions_len]
-
-                # CTC decoding procedure
-                decoded_prediction = []
-                token_lengths = []  # preserve token lengths
-                token_repetitions = []  # preserve number of repetitions per token
-
-                previous = self.blank_id
-                last_length = 0
-                last_repetition = 1
-
-                for pidx, p in enumerate(prediction):
-                    if (p != previous or previous == self.blank_id) and p != self.blank_id:
-                        decoded_prediction.append(p)
-
-                        token_lengths.append(pidx - last_length)
-                        last_length = pidx
-                        token_repetitions.append(last_repetition)
-                        last_repetition = 1
-
-                    if p == previous and previous != self.blank_id:
-                        last_repetition += 1
-
-                    previous = p
-
-                if len(token_repetitions) > 0:
-                    token_repetitions = token_repetitions[1:] + [last_repetition]
-
-            else:
-                if predictions_len is not None:
-                    prediction = prediction[:predictions_len]
-                decoded_prediction = prediction[prediction != self.blank_id].tolist()
-                token_lengths = [1] * len(decoded_prediction)  # preserve number of repetitions per token
-                token_repetitions = [1] * len(decoded_prediction)  # preserve number of repetitions per token
+            if predictions_len is not None:
+                prediction = prediction[:predictions_len]
+            predictions.append(prediction)
 
-            # De-tokenize the integer tokens; if not computing timestamps
-            if self.compute_timestamps is True:
-                # keep the original predictions, wrap with the number of repetitions per token
-                # this is done so that `ctc_decoder_predictions_tensor()` can process this hypothesis
-                # in order to compute exact time stamps.
-                hypothesis = (decoded_prediction, token_lengths, token_repetitions)
-            else:
-                hypothesis = self.decode_tokens_to_str(decoded_prediction)
+        # CTC decoding procedure, for the entire batch at once
+        decoded_predictions, token_lengths, token_repetitions = batched_ctc_collapse(
+            predictions, blank_id=self.blank_id, fold_consecutive=fold_consecutive
+        )
 
+        # De-tokenize the integer tokens; if not computing timestamps
+        if self.compute_timestamps is True:
+            # keep the original predictions, wrap with the number of repetitions per token
+            # this is done so that `ctc_decoder_predictions_tensor()` can process this hypothesis
+            # in order to compute exact time stamps.
+            for ind, hypothesis in enumerate(zip(decoded_predictions, token_lengths, token_repetitions)):
+                hypotheses_list[ind].text = hypothesis
+        else:
+            for ind, hypothesis in enumerate(self.decode_tokens_to_str_batch(decoded_predictions)):
                 # TODO: remove
                 # collapse leading spaces before . , ? for PC models
-                hypothesis = re.sub(r'(\s+)([\.\,\?])', r'\2', hypothesis)
-
-            # Preserve this wrapped hypothesis or decoded text tokens.
-            hypotheses_list[ind].text = hypothesis
+                hypotheses_list[ind].text = re.sub(r'(\s+)([\.\,\?])', r'\2', hypothesis)
 
         return hypotheses_list
 
@@ -461,6 +497,8 @@ class AbstractCTCDecoding(ConfidenceMixin):
         Returns:
             A list of hypotheses with high-level confidence scores.
         """
+        frame_confidence = []
+        segment_lengths = []
         for hyp in hypotheses_list:
             if not isinstance(hyp.text, tuple) or len(hyp.text) != 3:
                 # the method must have been called in the wrong place
@@ -471,24 +509,39 @@ class AbstractCTCDecoding(ConfidenceMixin):
                 )
             token_repetitions = hyp.text[2]
             hyp.text = hyp.text[:2]
-            token_confidence = []
             if self.exclude_blank_from_confidence:
-                non_blank_frame_confidence = hyp.non_blank_frame_confidence
-                i = 0
-                for tr in token_repetitions:
-                    # token repetition can be zero
-                    j = i + tr
-                    token_confidence.append(self._aggregate_confidence(non_blank_frame_confidence[i:j]))
-                    i = j
+                # token repetition can be zero
+                hyp_frame_confidence = hyp.non_blank_frame_confidence
+                hyp_segment_lengths = list(token_repetitions)
             else:
                 # <blank> tokens are considered to belong to the last non-blank token, if any.
                 token_lengths = hyp.text[1]
                 if len(token_lengths) > 0:
-                    ts = token_lengths[0]
-                    for tl in token_lengths[1:] + [len(hyp.frame_confidence)]:
-                        token_confidence.append(self._aggregate_confidence(hyp.frame_confidence[ts : ts + tl]))
-                        ts += tl
-            hyp.token_confidence = token_confidence
+                    hyp_frame_confidence = hyp.frame_confidence[token_lengths[0] :]
+                    hyp_segment_lengths = token_lengths[1:] + [len(hyp_frame_confidence) - sum(token_lengths[1:])]
+                else:
+                    hyp_frame_confidence, hyp_segment_lengths = [], []
+
+            # clip the segments to the available frames
+            hyp_segment_ends = np.minimum(np.cumsum(hyp_segment_lengths, dtype=np.int64), len(hyp_frame_confidence))
+            hyp_segment_lengths = np.diff(hyp_segment_ends, prepend=0).clip(min=0).tolist()
+            frame_confidence.extend(hyp_frame_confidence[: sum(hyp_segment_lengths)])
+            segment_lengths.append(hyp_segment_lengths)
+
+        # aggregate the frame confidence of every token of the batch at once
+        num_tokens = [len(lengths) for lengths in segment_lengths]
+        if sum(num_tokens) > 0:
+            token_confidence = torch.segment_reduce(
+                torch.tensor(frame_confidence, dtype=torch.float64),
+                self.word_confidence_aggregation,
+                lengths=torch.tensor([tl for lengths in segment_lengths for tl in lengths], dtype=torch.long),
+                unsafe=True,
+            ).tolist()
+        else:
+            token_confidence = []
+
+        for hyp, hyp_token_confidence in zip(hypotheses_list, _split_by_counts(token_confidence, num_tokens)):
+            hyp.token_confidence = hyp_token_confidence
         if self.preserve_word_confidence:
             for hyp in hypotheses_list:
                 hyp.word_confidence = self._aggregate_token_confidence(hyp)
@@ -521,6 +574,19 @@ class AbstractCTCDecoding(ConfidenceMixin):
         """
         raise NotImplementedError()
 
+    def decode_tokens_to_str_batch(self, tokens_list: List[List[int]]) -> List[str]:
+        """
+        Decodes a batch of token id lists into strings. Subclasses may override this method
+        with a single bulk call to the tokenizer.
+
+        Args:
+            tokens_list: List of lists of int representing the token ids.
+
+        Returns:
+            A list of decoded strings.
+        """
+        return [self.decode_tokens_to_str(tokens) for tokens in tokens_list]
+
     def compute_ctc_timestamps(self, hypothesis: Hypothesis, timestamp_type: str = "all"):
         """
         Method to compute time stamps at char/subword, and word level given some hypothesis.
@@ -539,70 +605,98 @@ class AbstractCTCDecoding(ConfidenceMixin):
             A Hypothesis object with a modified `timestep` value, which is now a dictionary containing
             the time stamp information.
         """
+        return self.compute_ctc_timestamps_batch([hypothesis], timestamp_type)[0]
+
+    def compute_ctc_timestamps_batch(self, hypotheses: List[Hypothesis], timestamp_type: str = "all"):
+        """
+        Batched version of `compute_ctc_timestamps()`. The token ids of all the hypotheses are de-tokenized
+        with a single call to `decode_tokens_to_str_batch()`.
+
+        Args:
+            hypotheses: A list of Hypothesis objects, with a wrapped `text` field (see `compute_ctc_timestamps()`).
+            timestamp_type: A str value that represents the type of time stamp calculated.
+                Can be one of "char", "word" or "all"
+
+        Returns:
+            The list of Hypothesis objects with a modified `timestep` value, which is now a dictionary containing
+            the time stamp information.
+        """
         assert timestamp_type in ['char', 'word', 'all']
 
         # Unpack the temporary storage, and set the decoded predictions
-        decoded_prediction, token_lengths = hypothesis.text
-        hypothesis.text = decoded_prediction
-
-        # Retrieve offsets
-        char_offsets = word_offsets = None
-        char_offsets = self._compute_offsets(hypothesis, token_lengths, self.blank_id)
+        all_token_lengths = []
+        for hypothesis in hypotheses:
+            decoded_prediction, token_lengths = hypothesis.text
+            hypothesis.text = decoded_prediction
+            all_token_lengths.append(token_lengths)
+
+        # De-tokenize every token of every hypothesis, as well as the full hypotheses, at once
+        num_tokens = [len(hypothesis.text) for hypothesis in hypotheses]
+        token_texts = self.decode_tokens_to_str_batch(
+            [[char] for hypothesis in hypotheses for char in hypothesis.text]
+        )
+        token_texts = _split_by_counts(token_texts, num_tokens)
+        texts = self.decode_tokens_to_str_batch([hypothesis.text for hypothesis in hypotheses])
 
-        # Assert number of offsets and hypothesis tokens are 1:1 match.
-        if len(char_offsets) != len(hypothesis.text):
-            raise ValueError(
-                f"`char_offsets`: {char_offsets} and `processed_tokens`: {hypothesis.text}"
-                " have to be of the same length, but are: "
-                f"`len(offsets)`: {len(char_offsets)} and `len(processed_tokens)`:"
-                f" {len(hypothesis.text)}"
-            )
+        for hypothesis, token_lengths, hyp_token_texts, text in zip(hypotheses, all_token_lengths, token_texts, texts):
+            # Retrieve offsets
+            char_offsets = word_offsets = None
+            char_offsets = self._compute_offsets(hypothesis, token_lengths, self.blank_id)
 
-        # Correctly process the token ids to chars/subwords.
-        for i, char in enumerate(hypothesis.text):
-            char_offsets[i]["char"] = self.decode_tokens_to_str([char])
+            # Assert number of offsets and hypothesis tokens are 1:1 match.
+            if len(char_offsets) != len(hypothesis.text):
+                raise ValueError(
+                    f"`char_offsets`: {char_offsets} and `processed_tokens`: {hypothesis.text}"
+                    " have to be of the same length, but are: "
+                    f"`len(offsets)`: {len(char_offsets)} and `len(processed_tokens)`:"
+                    f" {len(hypothesis.text)}"
+                )
 
-        # detect char vs subword models
-        lens = [len(list(v["char"])) > 1 for v in char_offsets]
-        if any(lens):
-            text_type = 'subword'
-        else:
-            text_type = 'char'
+            # Correctly process the token ids to chars/subwords.
+            for offset, char in zip(char_offsets, hyp_token_texts):
+                offset["char"] = char
 
-        # retrieve word offsets from character offsets
-        word_offsets = None
-        if timestamp_type in ['word', 'all']:
-            if text_type == 'char':
-                word_offsets = self._get_word_offsets_chars(char_offsets, word_delimiter_char=self.word_seperator)
+            # detect char vs subword models
+            lens = [len(list(v["char"])) > 1 for v in char_offsets]
+            if any(lens):
+                text_type = 'subword'
             else:
-                word_offsets = self._get_word_offsets_subwords_sentencepiece(
-                    char_offsets,
-                    hypothesis,
-                    decode_ids_to_tokens=self.decode_ids_to_tokens,
-                    decode_tokens_to_str=self.decode_tokens_to_str,
-                )
+                text_type = 'char'
 
-        # attach results
-        if len(hypothesis.timestep) > 0:
-            timestep_info = hypothesis.timestep
-        else:
-            timestep_info = []
+            # retrieve word offsets from character offsets
+            word_offsets = None
+            if timestamp_type in ['word', 'all']:
+                if text_type == 'char':
+                    word_offsets = self._get_word_offsets_chars(char_offsets, word_delimiter_char=self.word_seperator)
+                else:
+                    word_offsets = self._get_word_offsets_subwords_sentencepiece(
+                        char_offsets,
+                        hypothesis,
+                        decode_ids_to_tokens=self.decode_ids_to_tokens,
+                        decode_tokens_to_str=self.decode_tokens_to_str,
+                    )
 
-        # Setup defaults
-        hypothesis.timestep = {"timestep": timestep_info}
+            # attach results
+            if len(hypothesis.timestep) > 0:
+                timestep_info = hypothesis.timestep
+            else:
+                timestep_info = []
 
-        # Add char / subword time stamps
-        if char_offsets is not None and timestamp_type in ['char', 'all']:
-            hypothesis.timestep['char'] = char_offsets
+            # Setup defaults
+            hypothesis.timestep = {"timestep": timestep_info}
 
-        # Add word time stamps
-        if word_offsets is not None and timestamp_type in ['word', 'all']:
-            hypothesis.timestep['word'] = word_offsets
+            # Add char / subword time stamps
+            if char_offsets is not None and timestamp_type in ['char', 'all']:
+                hypothesis.timestep['char'] = char_offsets
 
-        # Convert the token indices to text
-        hypothesis.text = self.decode_tokens_to_str(hypothesis.text)
+            # Add word time stamps
+            if word_offsets is not None and timestamp_type in ['word', 'all']:
+                hypothesis.timestep['word'] = word_offsets
 
-        return hypothesis
+            # Convert the token indices to text
+            hypothesis.text = text
+
+        return hypotheses
 
     @staticmethod
     def _compute_offsets(
@@ -931,6 +1025,8 @@ class CTCDecoding(AbstractCTCDecoding):
         blank_id = len(vocabulary)
         self.vocabulary = vocabulary
         self.labels_map = dict([(i, vocabulary[i]) for i in range(len(vocabulary))])
+        # vocabulary lookup table for bulk decoding, blank is mapped to an empty string
+        self._labels_array = np.asarray(list(vocabulary) + [''], dtype=object)
 
         super().__init__(decoding_cfg=decoding_cfg, blank_id=blank_id)
 
@@ -980,6 +1076,20 @@ class CTCDecoding(AbstractCTCDecoding):
         token_list = [self.labels_map[c] for c in tokens if c != self.blank_id]
         return token_list
 
+    def decode_tokens_to_str_batch(self, tokens_list: List[List[int]]) -> List[str]:
+        """
+        Decodes a batch of token id lists into strings, with a single lookup of all the token ids.
+
+        Args:
+            tokens_list: List of lists of int representing the token ids.
+
+        Returns:
+            A list of decoded strings.
+        """
+        counts = [len(tokens) for tokens in tokens_list]
+        chars = self._labels_array[np.fromiter((c for tokens in tokens_list for c in tokens), dtype=np.int64)].tolist()
+        return [''.join(hyp_chars) for hyp_chars in _split_by_counts(chars, counts)]
+
 
 class CTCBPEDecoding(AbstractCTCDecoding):
     """
@@ -1158,6 +1268,21 @@ class CTCBPEDecoding(AbstractCTCDecoding):
         token_list = self.tokenizer.ids_to_tokens(tokens)
         return token_list
 
+    def decode_tokens_to_str_batch(self, tokens_list: List[List[int]]) -> List[str]:
+        """
+        Decodes a batch of token id lists into strings. SentencePiece tokenizers decode
+        the entire batch with a single call.
+
+        Args:
+            tokens_list: List of lists of int representing the token ids.
+
+        Returns:
+            A list of decoded strings.
+        """
+        if isinstance(self.tokenizer, SentencePieceTokenizer) and not self.tokenizer.legacy:
+            return self.tokenizer.tokenizer.decode_ids(tokens_list) if len(tokens_list) > 0 else []
+        return super().decode_tokens_to_str_batch(tokens_list)
+
 
 @dataclass
 class CTCDecodingConfig:
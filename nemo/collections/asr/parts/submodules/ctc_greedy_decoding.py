@@ -171,14 +171,12 @@ class GreedyCTCInfer(Typing, ConfidenceMethodMixin):
 
             # determine type of input - logprobs or labels
             if prediction_cpu_tensor.ndim == 2:  # labels
-                greedy_decode = self._greedy_decode_labels
+                for ind in range(prediction_cpu_tensor.shape[0]):
+                    out_len = decoder_lengths[ind] if decoder_lengths is not None else None
+                    hypothesis = self._greedy_decode_labels(prediction_cpu_tensor[ind], out_len)
+                    hypotheses.append(hypothesis)
             else:
-                greedy_decode = self._greedy_decode_logprobs
-
-            for ind in range(prediction_cpu_tensor.shape[0]):
-                out_len = decoder_lengths[ind] if decoder_lengths is not None else None
-                hypothesis = greedy_decode(prediction_cpu_tensor[ind], out_len)
-                hypotheses.append(hypothesis)
+                hypotheses = self._greedy_decode_logprobs_batch(prediction_cpu_tensor, decoder_lengths)
 
             # Pack results into Hypotheses
             packed_result = pack_hypotheses(hypotheses, decoder_lengths)
@@ -186,34 +184,49 @@ class GreedyCTCInfer(Typing, ConfidenceMethodMixin):
         return (packed_result,)
 
     @torch.no_grad()
-    def _greedy_decode_logprobs(self, x: torch.Tensor, out_len: torch.Tensor):
-        # x: [T, D]
-        # out_len: [seq_len]
+    def _greedy_decode_logprobs_batch(self, x: torch.Tensor, out_len: Optional[torch.Tensor]):
+        # x: [B, T, D]
+        # out_len: [B]
 
-        # Initialize blank state and empty label set in Hypothesis
-        hypothesis = rnnt_utils.Hypothesis(score=0.0, y_sequence=[], dec_state=None, timestep=[], last_token=None)
+        # argmax and the blank mask are computed once for the entire batch
         prediction = x.detach().cpu()
+        batch_logprobs, batch_labels = prediction.max(dim=-1)
+        non_blank_ids = batch_labels != self.blank_id
 
         if out_len is not None:
-            prediction = prediction[:out_len]
+            lengths = out_len.cpu().tolist() if torch.is_tensor(out_len) else list(out_len)
+        else:
+            lengths = [prediction.shape[1]] * prediction.shape[0]
 
-        prediction_logprobs, prediction_labels = prediction.max(dim=-1)
+        scores = batch_logprobs.masked_fill(~non_blank_ids, 0.0)
+        frame_mask = torch.arange(prediction.shape[1]).unsqueeze(0) < torch.tensor(lengths).unsqueeze(1)
+        scores = scores.masked_fill(~frame_mask, 0.0).sum(dim=-1)
 
-        non_blank_ids = prediction_labels != self.blank_id
-        hypothesis.y_sequence = prediction_labels.numpy().tolist()
-        hypothesis.score = (prediction_logprobs[non_blank_ids]).sum()
+        if self.preserve_frame_confidence:
+            batch_frame_confidence = self._get_confidence(prediction)
 
-        if self.preserve_alignments:
-            # Preserve the logprobs, as well as labels after argmax
-            hypothesis.alignments = (prediction.clone(), prediction_labels.clone())
+        hypotheses = []
+        for ind, length in enumerate(lengths):
+            # Initialize blank state and empty label set in Hypothesis
+            hypothesis = rnnt_utils.Hypothesis(
+                score=scores[ind], y_sequence=[], dec_state=None, timestep=[], last_token=None
+            )
+            prediction_labels = batch_labels[ind, :length]
+            hypothesis.y_sequence = prediction_labels.tolist()
 
-        if self.compute_timestamps:
-            hypothesis.timestep = torch.nonzero(non_blank_ids, as_tuple=False)[:, 0].numpy().tolist()
+            if self.preserve_alignments:
+                # Preserve the logprobs, as well as labels after argmax
+                hypothesis.alignments = (prediction[ind, :length].clone(), prediction_labels.clone())
 
-        if self.preserve_frame_confidence:
-            hypothesis.frame_confidence = self._get_confidence(prediction)
+            if self.compute_timestamps:
+                hypothesis.timestep = torch.nonzero(non_blank_ids[ind, :length], as_tuple=False)[:, 0].tolist()
 
-        return hypothesis
+            if self.preserve_frame_confidence:
+                hypothesis.frame_confidence = batch_frame_confidence[ind][:length]
+
+            hypotheses.append(hypothesis)
+
+        return hypotheses
 
     @torch.no_grad()
     def _greedy_decode_labels(self, x: torch.Tensor, out_len: torch.Tensor):
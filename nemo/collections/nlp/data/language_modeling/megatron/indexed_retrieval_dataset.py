@@ -29,7 +29,14 @@ import torch
 
 from nemo.utils import logging
 
-__all__ = ["KNNIndex", "MMapRetrievalIndexedDataset", "MMapRetrievalIndexedDatasetBuilder"]
+__all__ = [
+    "KNNIndex",
+    "MMapRetrievalIndexedDataset",
+    "MMapRetrievalIndexedDatasetBuilder",
+    "build_chunk_id_to_range",
+    "dedup_knn",
+    "merge_knn_files",
+]
 
 
 dtypes = {1: np.uint8, 2: np.int8, 3: np.int16, 4: np.int32, 5: np.int64, 6: np.float64, 7: np.double, 8: np.uint16}
@@ -69,16 +76,39 @@ class KNNIndex(object):
 
     _HDR_MAGIC = b'KNNRETM\x00\x00'
 
+    _HDR_SIZE = 9 + 8 + 8 + 8 + 8
+    # byte offset of the total number of chunks in the header
+    _LEN_OFFSET = 9 + 8 + 8
+
     @classmethod
-    def writer(cls, path, K, offset=0):
+    def writer(cls, path, K, offset=0, resume=False):
         """
         path: file path of the index
         K: number of neighbors for a chunk
         offset: start chunk_id for shard index
+        resume: continue the index file at `path` if it exists, after the chunks of its last checkpoint.
+            The chunks written after the last checkpoint are discarded.
         """
 
         class _Writer(object):
             def __enter__(self):
+                self.K = K
+                self.count_chunks = 0
+                self.path = path
+                if resume and os.path.exists(path):
+                    existing = cls(path)
+                    existing_K, existing_len, existing_offset = existing.K, existing.len, existing.chunk_start_id
+                    del existing
+                    if existing_K != K or existing_offset != offset:
+                        raise ValueError(
+                            f'cannot resume {path}, it has {existing_K} neighbors from chunk {existing_offset}, '
+                            f'expected {K} neighbors from chunk {offset}'
+                        )
+                    self.count_chunks = existing_len
+                    self._file = open(path, 'r+b')
+                    self._file.truncate(cls._HDR_SIZE + existing_len * K * 8)
+                    self._file.seek(0, os.SEEK_END)
+                    return self
                 self._file = open(path, 'wb')
                 self._file.write(cls._HDR_MAGIC)
                 self._file.write(struct.pack('<Q', 1))
@@ -87,9 +117,6 @@ class KNNIndex(object):
                 self._file.write(struct.pack('<Q', 0))
                 # chunk start
                 self._file.write(struct.pack('<Q', offset))
-                self.K = K
-                self.count_chunks = 0
-                self.path = path
                 return self
 
             def write(self, chunk_knn: np.array):
@@ -98,15 +125,25 @@ class KNNIndex(object):
                 self._file.write(chunk_knn.tobytes(order='C'))
                 self.count_chunks += chunk_knn.shape[0]
 
+            def _write_len(self):
+                self._file.seek(cls._LEN_OFFSET)
+                self._file.write(struct.pack('<Q', self.count_chunks))
+                self._file.seek(0, os.SEEK_END)
+
+            def checkpoint(self):
+                """
+                Makes the chunks written so far durable, a writer resumed after a failure continues after them.
+                """
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._write_len()
+                self._file.flush()
+                os.fsync(self._file.fileno())
+
             def __exit__(self, exc_type, exc_val, exc_tb):
-                self._file.close()
                 # Update the chunk size, Since total number of chunks is determined in the end
-                _bin_buffer_mmap = np.memmap(self.path, mode='r+', order='C', shape=(9 + 8 + 8 + 8),)
-                buffer = memoryview(_bin_buffer_mmap)
-                len_array = np.frombuffer(buffer, dtype=np.int64, count=1, offset=9 + 8 + 8)
-                len_array[0] = self.count_chunks
-                _bin_buffer_mmap.flush()
-                _bin_buffer_mmap._mmap.close()
+                self._write_len()
+                self._file.close()
 
         return _Writer()
 
@@ -135,9 +172,17 @@ class KNNIndex(object):
         )
 
     def get_KNN_chunk_ids(self, chunk_id):
-        """ get the chunk address (in bytes) from chunk id
+        """ get the KNN chunk ids from chunk id, or from an array of chunk ids
         """
-        if not (self.chunk_start_id <= chunk_id < self.chunk_end_id):
+        if isinstance(chunk_id, np.ndarray):
+            if chunk_id.size > 0 and not (
+                self.chunk_start_id <= chunk_id.min() and chunk_id.max() < self.chunk_end_id
+            ):
+                raise ValueError(
+                    f'chunks [{chunk_id.min()}, {chunk_id.max()}] are out side the range '
+                    f'[{self.chunk_start_id}, {self.chunk_end_id})'
+                )
+        elif not (self.chunk_start_id <= chunk_id < self.chunk_end_id):
             raise ValueError(f'chunk {chunk_id} is out side the range [{self.chunk_start_id}, {self.chunk_end_id})')
         return self.knn_map[chunk_id - self.chunk_start_id]
 
@@ -152,23 +197,76 @@ class KNNIndex(object):
         return self.len
 
 
-def merge_knn_files(knn_files: List[KNNIndex], output_file: str):
+def build_chunk_id_to_range(chunk_start: np.ndarray, total_chunks: int, start_id: int, end_id: int) -> np.ndarray:
+    """
+    Build the map from chunk_id to the range of chunk ids that are from the same document.
+
+    Args:
+        chunk_start: first chunk id of every document, in increasing order.
+        total_chunks: total number of chunks, the end of the last document.
+        start_id: first chunk id of the map.
+        end_id: end chunk id of the map, exclusive.
+    Returns:
+        array of shape (end_id - start_id, 2), whose row `i` is the range [beg, end) of the document of chunk
+        `start_id + i`.
+    """
+    chunk_start = np.asarray(chunk_start, dtype=np.int64)
+    chunk_end = np.append(chunk_start[1:], total_chunks)
+    # the empty documents start at the same chunk as the next document, the last one holds the chunk
+    doc_ids = np.searchsorted(chunk_start, np.arange(start_id, end_id, dtype=np.int64), side='right') - 1
+    return np.stack([chunk_start[doc_ids], chunk_end[doc_ids]], axis=1)
+
+
+def dedup_knn(knn: np.ndarray, chunk_id_to_range: np.ndarray) -> np.ndarray:
+    """
+    Remove the neighbors that are from the same document as the data chunks.
+
+    Args:
+        knn: neighbor chunk ids of shape (num_chunks, num_neighbors), e.g. a Faiss search result.
+        chunk_id_to_range: range [beg, end) of the document of every data chunk, of shape (num_chunks, 2).
+    Returns:
+        array of the same shape as `knn`, with the remaining neighbors of every chunk in their original order,
+        followed by -1.
+    """
+    beg = chunk_id_to_range[:, 0:1]
+    end = chunk_id_to_range[:, 1:2]
+    duplicated = (knn >= beg) & (knn < end)
+    # the stable sort moves the remaining neighbors first, in their original order
+    order = np.argsort(duplicated, axis=1, kind='stable')
+    result = np.take_along_axis(knn, order, axis=1)
+    num_remaining = knn.shape[1] - duplicated.sum(axis=1, keepdims=True)
+    result[np.arange(knn.shape[1]) >= num_remaining] = -1
+    return result
+
+
+def merge_knn_files(knn_files: List[str], output_file: str, block_size: int = 1 << 20):
     """
     Merge a list of knn sharding index files into one.
+    The shards are ordered by their start chunk id, and copied one block of `block_size` chunks at a time,
+    so that the memory does not grow with the size of the shards.
     """
-    files = [KNNIndex(f) for f in knn_files]
-    sorted_files = sorted(files, key=lambda x: x.chunk_start_id)
+    headers = []
+    for path in knn_files:
+        f = KNNIndex(path)
+        headers.append((f.chunk_start_id, f.chunk_end_id, f.K, path))
+        del f
+    headers.sort()
     # consistence check
-    start_id = sorted_files[0].chunk_start_id
-    previous_end = sorted_files[0].chunk_end_id
-    K = sorted_files[0].K
-    for i in sorted_files[1:]:
-        assert previous_end == i.chunk_start_id
-        assert K == i.K
-        previous_end = i.chunk_end_id
+    start_id, previous_end, K, _ = headers[0]
+    for chunk_start_id, chunk_end_id, shard_K, path in headers[1:]:
+        if previous_end != chunk_start_id:
+            raise ValueError(
+                f'{path} starts at chunk {chunk_start_id}, expected the previous shard end {previous_end}'
+            )
+        if K != shard_K:
+            raise ValueError(f'{path} has {shard_K} neighbors, expected {K}')
+        previous_end = chunk_end_id
     with KNNIndex.writer(output_file, K, offset=start_id) as w:
-        for i in sorted_files:
-            w.write(i.knn_map)
+        for _, _, _, path in headers:
+            f = KNNIndex(path)
+            for beg in range(0, f.len, block_size):
+                w.write(np.ascontiguousarray(f.knn_map[beg : beg + block_size]))
+            del f
     f = KNNIndex(output_file)
     logging.info(f'{output_file} index starts at {f.chunk_start_id}')
     logging.info(f'{output_file} index ends at {f.chunk_end_id}')
@@ -404,6 +502,8 @@ class MMapRetrievalIndexedDataset(torch.utils.data.Dataset):
         self._bin_buffer_mmap = np.memmap(data_file_path(self._path), mode='r', order='C')
         logging.info("    creating memory view of numpy buffer...")
         self._bin_buffer = memoryview(self._bin_buffer_mmap)
+        # all the tokens of the data file, used to gather chunks without copying the file
+        self._tokens = np.frombuffer(self._bin_buffer, dtype=self._index.dtype)
 
     def __del__(self):
         self._bin_buffer_mmap._mmap.close()
@@ -503,6 +603,46 @@ class MMapRetrievalIndexedDataset(torch.utils.data.Dataset):
             sents = [np_array[pos : pos + chunk_size] for pos in starting_pos - starting_pos[0]]
             return sents
 
+    def get_chunks(self, chunk_ids, force_no_cont_ids=False, pad_id=None, out=None):
+        """ Retrieves many chunk items from the dataset at once.
+        The chunks are gathered with a single vectorized lookup into an array of shape
+        chunk_ids.shape + (chunk_size,) for training data or chunk_ids.shape + (2*chunk_size,) for retrieval data.
+        If force_no_cont_ids=True, it will always get chunk_size tokens.
+        If pad_id is not None, the negative chunk ids (no neighbor) are filled with pad_id.
+        If out is not None, the chunks are written into it, and it is returned.
+        """
+        chunk_ids = np.asarray(chunk_ids, dtype=np.int64)
+        if self._index.retrieval_db and (not force_no_cont_ids):
+            chunk_size = self._index.chunk_size * 2
+        else:
+            chunk_size = self._index.chunk_size
+        shape = chunk_ids.shape + (chunk_size,)
+        if out is None:
+            out = np.empty(shape, dtype=self._index.dtype)
+        elif out.shape != shape:
+            raise ValueError(f'out has shape {out.shape}, expected {shape}')
+
+        missing = None
+        if pad_id is not None:
+            missing = chunk_ids < 0
+            chunk_ids = np.where(missing, 0, chunk_ids)
+        starting_pos = self._index._chunk_address[chunk_ids] // self._index._dtype_size
+        # view of all the windows of chunk_size tokens, the chunks are the windows at their starting positions
+        windows = np.lib.stride_tricks.sliding_window_view(self._tokens, chunk_size)
+        # checked here because mode='clip' is used below, which is faster with `out` than mode='raise'
+        if starting_pos.size > 0 and starting_pos.max() > len(windows) - 1:
+            raise ValueError(
+                f'chunk ids {chunk_ids[starting_pos > len(windows) - 1].tolist()} do not have {chunk_size} tokens '
+                f'in the data file'
+            )
+        if out.dtype == windows.dtype:
+            np.take(windows, starting_pos, axis=0, out=out, mode='clip')
+        else:
+            np.copyto(out, np.take(windows, starting_pos, axis=0, mode='clip'))
+        if missing is not None:
+            out[missing] = pad_id
+        return out
+
     @property
     def sizes(self):
         """
@@ -15,6 +15,8 @@
 """RETRO Style dataset."""
 
 import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
 import numpy as np
@@ -47,6 +49,7 @@ except (ImportError, ModuleNotFoundError):
 
 __all__ = [
     "RETRODataset",
+    "RETROPrefetchingBatchSampler",
     "build_train_valid_test_datasets",
     "MockRETRODataset",
     "build_mock_train_valid_test_datasets",
@@ -107,6 +110,10 @@ class RETRODataset(Dataset):
         self.neighbors = cfg.data.get('neighbors', self.knn_index.K)
         # the number of neighbors cannot exceed the max number of neighbors in the index
         assert self.neighbors <= self.knn_index.K
+        # number of upcoming batches read ahead in a background thread, see RETROPrefetchingBatchSampler
+        self.prefetch_batches = cfg.data.get('prefetch_batches', 0)
+        self._prefetch_executor = None
+        self._prefetched = {}
         # create index_mapping_dir on rank 0
         if torch.distributed.is_available() and torch.distributed.is_initialized():
             if torch.distributed.get_rank() == 0:
@@ -127,7 +134,6 @@ class RETRODataset(Dataset):
         )
         if len(self.doc_idx) > np.iinfo('int32').max:
             raise "number of epochs exceeds the maximum number for int32 used by sample_idx"
-        self.padding_context = np.ones(2 * self.chunk_size, dtype=self.retrieval_index._index.dtype) * self.pad_id
 
     def _validate_pad_id(self):
         # validate the pad_id matches the dataset pad_id
@@ -155,21 +161,15 @@ class RETRODataset(Dataset):
         #    sample i --> [sample_idx[i], sample_idx[i+1])
         return self.sample_idx.shape[0] - 1
 
-    def _get_chunks(self, chunk_id: int, num_chunks: int, chunks: List):
+    def _get_chunks(self, chunk_ids: np.ndarray) -> np.ndarray:
         """
-        starting from chunk_id, loop for num_chunks, get the 
-        KNN chunk ids from retrieval dataset, and get the chunk token ids,
-        put them into the chunks list
+        get the KNN chunk ids of the data chunk_ids from the retrieval dataset, and gather
+        their token ids into one array of shape [len(chunk_ids), neighbors, 2 * chunk_size]
         """
-        for i in range(chunk_id, chunk_id + num_chunks):
-            knn = self.knn_index.get_KNN_chunk_ids(i)
-            for rid in knn[: self.neighbors]:
-                if rid < 0:
-                    # no neighbor, just pad it
-                    one_chunk = self.padding_context
-                else:
-                    one_chunk = self.retrieval_index.get_chunk(rid)
-                chunks.append(one_chunk)
+        knn = self.knn_index.get_KNN_chunk_ids(chunk_ids)[:, : self.neighbors]
+        chunks = np.empty((len(chunk_ids), self.neighbors, 2 * self.chunk_size), dtype=np.int64)
+        # the missing neighbors are padded
+        return self.retrieval_index.get_chunks(knn, pad_id=self.pad_id, out=chunks)
 
     def _get_text(self, idx: int) -> np.ndarray:
         # Get the shuffled index.
@@ -186,36 +186,49 @@ class RETRODataset(Dataset):
             )
             chunk_id = self.indexed_dataset.get_chunk_id(self.doc_idx[doc_index_f], offset_f)
             num_chunks = (offset_l - offset_f) // self.chunk_size
-            chunks = []
-            self._get_chunks(chunk_id, num_chunks, chunks)
-            chunks = np.stack(chunks, axis=0).reshape(num_chunks, self.neighbors, -1).astype(np.int64)
+            chunk_ids = [np.arange(chunk_id, chunk_id + num_chunks)]
         else:
             # Otherwise, get the rest of the initial document.
             sample_list = [self.indexed_dataset.get(self.doc_idx[doc_index_f], offset=offset_f)]
             num_chunks = (self.indexed_dataset._index.sizes[self.doc_idx[doc_index_f]] - offset_f) // self.chunk_size
-            total_chunks = num_chunks
-            chunks = []
             chunk_id = self.indexed_dataset.get_chunk_id(self.doc_idx[doc_index_f], offset_f)
-            self._get_chunks(chunk_id, num_chunks, chunks)
+            chunk_ids = [np.arange(chunk_id, chunk_id + num_chunks)]
             # Loop over all in between documents and add the entire document.
             for i in range(doc_index_f + 1, doc_index_l):
                 sample_list.append(self.indexed_dataset.get(self.doc_idx[i]))
                 chunk_id = self.indexed_dataset.get_chunk_id(self.doc_idx[i], 0)
                 num_chunks = self.indexed_dataset._index.sizes[self.doc_idx[i]] // self.chunk_size
-                total_chunks += num_chunks
-                self._get_chunks(chunk_id, num_chunks, chunks)
+                chunk_ids.append(np.arange(chunk_id, chunk_id + num_chunks))
                 # And finally add the relevant portion of last document.
             chunk_id = self.indexed_dataset.get_chunk_id(self.doc_idx[doc_index_l], 0)
             num_chunks = (offset_l) // self.chunk_size
-            total_chunks += num_chunks
-            self._get_chunks(chunk_id, num_chunks, chunks)
+            chunk_ids.append(np.arange(chunk_id, chunk_id + num_chunks))
             sample_list.append(self.indexed_dataset.get(self.doc_idx[doc_index_l], length=offset_l + 1))
             sample = np.concatenate(sample_list)
-            chunks = np.stack(chunks, axis=0).reshape(total_chunks, self.neighbors, -1).astype(np.int64)
+        # the neighbors of all the chunks of the sample are gathered at once
+        chunks = self._get_chunks(np.concatenate(chunk_ids))
         return sample.astype(np.int64), chunks
 
+    def prefetch(self, indices):
+        """
+        Start reading the samples with the given indices in a background thread, so that they are ready when
+        `__getitem__` is called for them.
+        """
+        if self._prefetch_executor is None:
+            self._prefetch_executor = ThreadPoolExecutor(max_workers=1)
+        for idx in indices:
+            if idx not in self._prefetched:
+                self._prefetched[idx] = self._prefetch_executor.submit(self._get_text, idx)
+
+    def cancel_prefetch(self):
+        """Cancel the reads of the prefetched samples which were not used."""
+        for future in self._prefetched.values():
+            future.cancel()
+        self._prefetched = {}
+
     def __getitem__(self, idx):
-        text, retrieved = self._get_text(idx)
+        future = self._prefetched.pop(idx, None)
+        text, retrieved = future.result() if future is not None else self._get_text(idx)
         text = torch.from_numpy(text)
         retrieved = torch.from_numpy(retrieved)
         tokens = text[:-1].contiguous()
@@ -232,6 +245,50 @@ class RETRODataset(Dataset):
         }
 
 
+class RETROPrefetchingBatchSampler:
+    """
+    Wraps a batch sampler to read the samples of the next `num_batches` batches of a RETRODataset in a background
+    thread, while the current batch is processed.
+
+    The upcoming indices are taken from the batch sampler itself, so they follow its actual order, e.g. the shuffled
+    indices of a random sampler and the slice of the data parallel rank. The dataset is read in the process iterating
+    the sampler, so it must only be used by a data loader without workers.
+
+    Args:
+        batch_sampler: Batch sampler of the data loader.
+        dataset: RETRODataset the indices refer to.
+        num_batches: Number of batches read ahead.
+    """
+
+    def __init__(self, batch_sampler, dataset: RETRODataset, num_batches: int):
+        self.batch_sampler = batch_sampler
+        self.dataset = dataset
+        self.num_batches = num_batches
+
+    def __len__(self):
+        return len(self.batch_sampler)
+
+    def __getattr__(self, name):
+        # attributes of the wrapped sampler, e.g. its consumed samples
+        if name == 'batch_sampler':
+            raise AttributeError(name)
+        return getattr(self.batch_sampler, name)
+
+    def __iter__(self):
+        self.dataset.cancel_prefetch()
+        upcoming = deque()
+        try:
+            for batch in self.batch_sampler:
+                self.dataset.prefetch(batch)
+                upcoming.append(batch)
+                if len(upcoming) > self.num_batches:
+                    yield upcoming.popleft()
+            while upcoming:
+                yield upcoming.popleft()
+        finally:
+            self.dataset.cancel_prefetch()
+
+
 def build_train_valid_test_datasets(
     cfg,
     trainer,
@@ -220,7 +220,7 @@ class MegatronGPTPromptLearningModel(MegatronBasePromptLearningModel):
                 "temperature": self.cfg.inference.get('temperature', 1.0),
                 "top_k": self.cfg.inference.get('tok_k', 0),
                 "top_p": self.cfg.inference.get('top_p', 0.9),
-                "repetition_penalty": self.cfg.inference.get('repetition_penalty', 1.2),
+                "repetition_penalty": self.cfg.inference.get('repetition_penalty', 1.0),
                 "add_BOS": True,
                 "all_probs": False,
                 "compute_logprob": False,
@@ -24,6 +24,7 @@ from nemo.collections.nlp.data.language_modeling.megatron.data_samplers import (
     MegatronPretrainingSampler,
 )
 from nemo.collections.nlp.data.language_modeling.megatron.retro_dataset import (
+    RETROPrefetchingBatchSampler,
     build_mock_train_valid_test_datasets,
     build_train_valid_test_datasets,
 )
@@ -425,6 +426,14 @@ class MegatronRetrievalModel(MegatronBaseModel, TextGeneration):
         else:
             raise ValueError('cfg.data.dataloader_type not found. Must be "single" or "cyclic"')
 
+        prefetch_batches = getattr(dataset, 'prefetch_batches', 0)
+        if prefetch_batches > 0:
+            if self.cfg.data.num_workers > 0:
+                # the data loader workers already read the upcoming batches
+                logging.info('Prefetching of RETRO samples is disabled, since the data loader has workers')
+            else:
+                batch_sampler = RETROPrefetchingBatchSampler(batch_sampler, dataset, prefetch_batches)
+
         # Torch dataloader.
         return torch.utils.data.DataLoader(
             dataset, batch_sampler=batch_sampler, num_workers=self.cfg.data.num_workers, pin_memory=True,
@@ -0,0 +1,269 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Batched beam search for decoder-only language models.
+
+The beams of all prompts are flattened into the batch dimension, so that every step runs the model once on
+[num_prompts * beam_size] sequences. When a step selects the beams to keep, the key-value memory of the model is
+reordered with a single gather over the valid positions, and the prompts whose search is finished are removed from
+the batch.
+"""
+
+from abc import abstractmethod
+from typing import List, Optional, Sequence, Tuple
+
+import torch
+import torch.nn.functional as F
+
+from nemo.collections.nlp.modules.common.logits_processors import LogitsProcessorList
+from nemo.collections.nlp.modules.common.speculative_decoding import IncrementalLanguageModel
+
+__all__ = ["BeamSearchLanguageModel", "BeamSearchDecoder", "compute_beam_search_len_penalty"]
+
+
+def compute_beam_search_len_penalty(lengths: torch.Tensor, alpha: int) -> torch.Tensor:
+    """
+    Length penalty used in the beam search
+    Args:
+        lengths: lengths of decoded sequences
+        alpha: params of the penalty
+    Returns:
+         tensor with the penalty value
+    """
+    return ((5 + lengths) / 6).pow(alpha)
+
+
+class BeamSearchLanguageModel(IncrementalLanguageModel):
+    """Incremental language model whose memory can be reordered between the sequences of the batch."""
+
+    @abstractmethod
+    def reorder(self, indices: torch.Tensor, length: int):
+        """
+        Selects the sequences of the batch: the memory of the sequence i becomes the memory of the previous
+        sequence indices[i]. The size of the batch changes to the number of indices.
+
+        Args:
+            indices: Indices of the previous sequences [new_batch_size], which may be repeated.
+            length: Number of valid positions of the memory.
+        """
+        raise NotImplementedError
+
+
+class _Hypotheses:
+    """The best finished sequences of a prompt, with their length normalized scores."""
+
+    def __init__(self, num_beams: int):
+        self.num_beams = num_beams
+        self.hypotheses: List[Tuple[float, torch.Tensor]] = []
+
+    @property
+    def worst_score(self) -> float:
+        return self.hypotheses[-1][0] if self.hypotheses else -float('inf')
+
+    def add(self, score: float, tokens: torch.Tensor):
+        if len(self.hypotheses) < self.num_beams or score > self.worst_score:
+            self.hypotheses.append((score, tokens))
+            self.hypotheses.sort(key=lambda hypothesis: -hypothesis[0])
+            del self.hypotheses[self.num_beams :]
+
+    def is_full(self) -> bool:
+        return len(self.hypotheses) == self.num_beams
+
+
+class BeamSearchDecoder:
+    """
+    Generates the most likely sequences of a batch of prompts with beam search.
+
+    The score of a sequence is the sum of the log probabilities of its generated tokens, divided by the length
+    penalty of `compute_beam_search_len_penalty`. A sequence is finished when it generates an end token. The search
+    of a prompt stops when it has `beam_size` finished sequences, and the best running beam cannot get a better
+    score at its current length than the worst of them.
+
+    Args:
+        model: The language model.
+        beam_size: Number of beams of every prompt.
+        end_token_ids: Tokens which end a sequence.
+        length_penalty: Exponent `alpha` of the length penalty, 0 to compare the sums of the log probabilities.
+        num_return_sequences: Number of best sequences returned for every prompt, at most `beam_size`.
+        logits_processors: Processors of the logits before the log softmax, e.g. the banned words. Their token
+            history is reordered with the beams.
+        vocab_size: Size of the vocabulary, the logits of padded vocabularies are truncated to it.
+        pad_id: Token of the positions after the end of the returned sequences.
+    """
+
+    def __init__(
+        self,
+        model: BeamSearchLanguageModel,
+        beam_size: int,
+        end_token_ids: Sequence[int],
+        length_penalty: float = 0.0,
+        num_return_sequences: int = 1,
+        logits_processors: Optional[LogitsProcessorList] = None,
+        vocab_size: Optional[int] = None,
+        pad_id: int = 0,
+    ):
+        if beam_size < 1:
+            raise ValueError(f"beam_size must be at least 1, got {beam_size}")
+        if not 1 <= num_return_sequences <= beam_size:
+            raise ValueError(
+                f"num_return_sequences must be between 1 and beam_size={beam_size}, got {num_return_sequences}"
+            )
+        self.model = model
+        self.beam_size = beam_size
+        self.end_token_ids = sorted(set(end_token_ids))
+        self.length_penalty = length_penalty
+        self.num_return_sequences = num_return_sequences
+        self.logits_processors = logits_processors or LogitsProcessorList()
+        self.vocab_size = vocab_size
+        self.pad_id = pad_id
+
+    def _penalty(self, num_generated: torch.Tensor) -> torch.Tensor:
+        return compute_beam_search_len_penalty(num_generated.float(), self.length_penalty)
+
+    def search(
+        self, tokens: torch.Tensor, context_lengths: torch.Tensor, max_length: int
+    ) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+        """
+        Runs the beam search.
+
+        Args:
+            tokens: Token ids [num_prompts, length] with length >= max_length, starting with the prompts.
+            context_lengths: Lengths of the prompts [num_prompts].
+            max_length: Maximum length of the sequences, including the prompts.
+
+        Returns:
+            A tuple `(tokens, lengths, scores)` with the best sequences of every prompt, sorted by score:
+            the token ids [num_prompts, num_return_sequences, max_length] padded with `pad_id`, the lengths of the
+            sequences including their end token [num_prompts, num_return_sequences] and their scores
+            [num_prompts, num_return_sequences].
+        """
+        num_prompts = tokens.size(0)
+        beam_size = self.beam_size
+        device = tokens.device
+        start = int(context_lengths.min().item())
+        end_token_ids = torch.tensor(self.end_token_ids, dtype=torch.long, device=device)
+
+        logits = self.model.forward(tokens, 0, start)[:, -1]
+        # the beams of a prompt start from the memory of its context
+        rows = torch.arange(num_prompts, device=device).repeat_interleave(beam_size)
+        self.model.reorder(rows, start)
+        tokens = tokens[rows, :max_length].clone()
+        logits = logits[rows]
+        history = self.logits_processors.make_history(tokens.size(0), logits.size(-1), device)
+        if history is not None:
+            history.add_prompt(tokens[:, :start])
+
+        # the beams of a prompt are identical until it generates its first token, so only the first one is extended
+        beam_scores = torch.full((num_prompts, beam_size), -float('inf'), device=device)
+        beam_scores[:, 0] = 0.0
+        # prompts of the batch, whose beams are the rows [i * beam_size, (i + 1) * beam_size)
+        prompts = torch.arange(num_prompts, device=device)
+        hypotheses = [_Hypotheses(beam_size) for _ in range(num_prompts)]
+        beam_offsets = torch.arange(beam_size, device=device)
+
+        for position in range(start, max_length):
+            num_active = prompts.size(0)
+            if self.vocab_size is not None:
+                logits = logits[..., : self.vocab_size]
+            vocab_size = logits.size(-1)
+            log_probs = F.log_softmax(self.logits_processors(logits.float(), history), dim=-1)
+            candidate_scores = beam_scores.unsqueeze(2) + log_probs.view(num_active, beam_size, vocab_size)
+            # each beam has at most len(end_token_ids) ending candidates, so there are at least beam_size running
+            # ones among the best beam_size * (1 + len(end_token_ids)) candidates
+            num_candidates = min(beam_size * (1 + len(self.end_token_ids)), beam_size * vocab_size)
+            top_scores, top_indices = candidate_scores.view(num_active, -1).topk(num_candidates, dim=1)
+            top_beams = torch.div(top_indices, vocab_size, rounding_mode='floor')
+            top_tokens = top_indices % vocab_size
+            is_end = torch.isin(top_tokens, end_token_ids)
+
+            in_context = context_lengths[prompts] > position
+            num_generated = position + 1 - context_lengths[prompts]
+
+            # candidates ending among the best beam_size ones are finished sequences
+            is_finished = is_end & torch.isfinite(top_scores) & ~in_context.unsqueeze(1)
+            is_finished[:, beam_size:] = False
+            if is_finished.any():
+                finished_scores = top_scores / self._penalty(num_generated).unsqueeze(1)
+                for i, rank in is_finished.nonzero().tolist():
+                    sequence = tokens[i * beam_size + top_beams[i, rank], : position + 1].clone()
+                    sequence[position] = top_tokens[i, rank]
+                    hypotheses[prompts[i]].add(finished_scores[i, rank].item(), sequence)
+
+            # the other beam_size best candidates are the next beams
+            order = torch.argsort(is_end.int(), dim=1, stable=True)[:, :beam_size]
+            next_beams = top_beams.gather(1, order)
+            next_tokens = top_tokens.gather(1, order)
+            next_scores = top_scores.gather(1, order)
+            # the beams of the prompts in their context are kept, with the token of the context
+            keep_context = in_context.unsqueeze(1)
+            context_tokens = tokens.view(num_active, beam_size, -1)[:, :, position]
+            next_beams = torch.where(keep_context, beam_offsets, next_beams)
+            next_tokens = torch.where(keep_context, context_tokens, next_tokens)
+            beam_scores = torch.where(keep_context, beam_scores, next_scores)
+
+            # the search of a prompt is done when its best running beam cannot beat its finished sequences
+            best_running_scores = (beam_scores[:, 0] / self._penalty(num_generated)).tolist()
+            is_done = torch.tensor(
+                [
+                    not is_context and hypotheses[prompt].is_full() and hypotheses[prompt].worst_score >= score
+                    for prompt, is_context, score in zip(prompts.tolist(), in_context.tolist(), best_running_scores)
+                ],
+                device=device,
+            )
+
+            parents = (torch.arange(num_active, device=device) * beam_size).unsqueeze(1) + next_beams
+            if is_done.any():
+                keep = ~is_done
+                parents, next_tokens, beam_scores, prompts = (
+                    parents[keep],
+                    next_tokens[keep],
+                    beam_scores[keep],
+                    prompts[keep],
+                )
+                in_context = in_context[keep]
+            parents = parents.view(-1)
+            tokens = tokens[parents]
+            tokens[:, position] = next_tokens.view(-1)
+            if history is not None:
+                history.reorder(parents)
+                history.add_tokens(tokens[:, position], is_generated=~in_context.repeat_interleave(beam_size))
+
+            if prompts.size(0) == 0 or position + 1 == max_length:
+                break
+            # the memory holds the positions before `position`, and is only gathered when the beams change
+            if parents.size(0) != num_active * beam_size or not torch.equal(
+                parents, torch.arange(parents.size(0), device=device)
+            ):
+                self.model.reorder(parents, position)
+            logits = self.model.forward(tokens, position, position + 1)[:, -1]
+
+        # the running beams of the prompts which are not done are finished at the maximum length
+        final_scores = (beam_scores / self._penalty(max_length - context_lengths[prompts]).unsqueeze(1)).tolist()
+        for i, prompt in enumerate(prompts.tolist()):
+            for beam in range(beam_size):
+                if final_scores[i][beam] > -float('inf'):
+                    hypotheses[prompt].add(final_scores[i][beam], tokens[i * beam_size + beam])
+
+        output_tokens = torch.full(
+            (num_prompts, self.num_return_sequences, max_length), self.pad_id, dtype=torch.long, device=device
+        )
+        lengths = torch.zeros(num_prompts, self.num_return_sequences, dtype=torch.long, device=device)
+        scores = torch.full((num_prompts, self.num_return_sequences), -float('inf'), device=device)
+        for prompt in range(num_prompts):
+            for rank, (score, sequence) in enumerate(hypotheses[prompt].hypotheses[: self.num_return_sequences]):
+                output_tokens[prompt, rank, : sequence.size(0)] = sequence
+                lengths[prompt, rank] = sequence.size(0)
+                scores[prompt, rank] = score
+        return output_tokens, lengths, scores
@@ -0,0 +1,432 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Logits processors for sampling in text generation.
+
+A logits processor transforms the [batch_size, vocab_size] logits of the next token, e.g. by scaling them with the
+temperature or by filtering tokens outside of the top-k. Processors are combined with `LogitsProcessorList`, and
+the chain for a set of sampling parameters is built with `get_logits_processors`.
+
+All processors are implemented with batched tensor operations only, so that they do not synchronize with the host
+and work on all rows of a batch at once. Processors which depend on the previously generated tokens, such as the
+repetition penalty, read them from a `TokenHistory`, which is updated incrementally after every generated token.
+"""
+
+import math
+from abc import ABC, abstractmethod
+from typing import List, Optional, Sequence
+
+import torch
+import torch.nn.functional as F
+
+__all__ = [
+    "TokenHistory",
+    "LogitsProcessor",
+    "LogitsProcessorList",
+    "TemperatureLogitsProcessor",
+    "TopKLogitsProcessor",
+    "TopPLogitsProcessor",
+    "MinPLogitsProcessor",
+    "RepetitionPenaltyLogitsProcessor",
+    "PresenceFrequencyPenaltyLogitsProcessor",
+    "MinLengthLogitsProcessor",
+    "BadWordsLogitsProcessor",
+    "TokenRangeLogitsProcessor",
+    "get_logits_processors",
+]
+
+
+class TokenHistory:
+    """
+    Tokens of a batch of sequences which are being generated, for the processors which depend on them.
+
+    Args:
+        batch_size: Number of sequences.
+        vocab_size: Size of the vocabulary, i.e. the last dimension of the logits.
+        device: Device of the logits.
+        track_counts: Whether to track which tokens occur in the prompt and how often every token was generated.
+        window: Number of most recent tokens to keep for every sequence.
+    """
+
+    def __init__(
+        self, batch_size: int, vocab_size: int, device: torch.device, track_counts: bool = True, window: int = 0
+    ):
+        self.vocab_size = vocab_size
+        self.num_generated = torch.zeros(batch_size, dtype=torch.long, device=device)
+        self.counts = None
+        self.prompt_mask = None
+        if track_counts:
+            self.counts = torch.zeros(batch_size, vocab_size, dtype=torch.int32, device=device)
+            self.prompt_mask = torch.zeros(batch_size, vocab_size, dtype=torch.bool, device=device)
+        self.recent_tokens = None
+        if window > 0:
+            # -1 never matches a token
+            self.recent_tokens = torch.full((batch_size, window), -1, dtype=torch.long, device=device)
+
+    def add_prompt(self, tokens: torch.Tensor):
+        """
+        Adds the tokens of the prompts.
+
+        Args:
+            tokens: [batch_size, prompt_length] prompt tokens.
+        """
+        if self.prompt_mask is not None:
+            self.prompt_mask.scatter_(1, tokens.clamp(0, self.vocab_size - 1), True)
+        self._add_recent(tokens)
+
+    def add_tokens(self, tokens: torch.Tensor, is_generated: Optional[torch.Tensor] = None):
+        """
+        Adds the next token of every sequence.
+
+        Args:
+            tokens: [batch_size] next tokens.
+            is_generated: Optional [batch_size] bool tensor, False for rows where the token is still part of
+                the prompt. Defaults to all tokens being generated.
+        """
+        tokens = tokens.view(-1, 1).long()
+        if is_generated is None:
+            is_generated = torch.ones_like(self.num_generated, dtype=torch.bool)
+        is_generated = is_generated.view(-1)
+        self.num_generated += is_generated
+        if self.counts is not None:
+            clamped = tokens.clamp(0, self.vocab_size - 1)
+            self.counts.scatter_add_(1, clamped, is_generated.view(-1, 1).to(self.counts.dtype))
+            self.prompt_mask.scatter_(1, clamped, ~is_generated.view(-1, 1) | self.prompt_mask.gather(1, clamped))
+        self._add_recent(tokens)
+
+    def reorder(self, indices: torch.Tensor):
+        """
+        Selects the sequences of the batch, e.g. the beams kept by a step of beam search.
+
+        Args:
+            indices: [new_batch_size] indices of the previous sequences, which may be repeated.
+        """
+        self.num_generated = self.num_generated[indices]
+        if self.counts is not None:
+            self.counts = self.counts[indices]
+            self.prompt_mask = self.prompt_mask[indices]
+        if self.recent_tokens is not None:
+            self.recent_tokens = self.recent_tokens[indices]
+
+    def _add_recent(self, tokens: torch.Tensor):
+        if self.recent_tokens is None:
+            return
+        window = self.recent_tokens.shape[1]
+        self.recent_tokens = torch.cat([self.recent_tokens, tokens.long()], dim=1)[:, -window:]
+
+
+class LogitsProcessor(ABC):
+    """Transforms the logits of the next token."""
+
+    # whether the processor reads the token counts of the history
+    needs_counts: bool = False
+    # number of most recent tokens of the history the processor reads
+    window: int = 0
+    # whether the processor reads the number of generated tokens of the history
+    needs_history: bool = False
+
+    @abstractmethod
+    def __call__(self, logits: torch.Tensor, history: Optional[TokenHistory] = None) -> torch.Tensor:
+        """
+        Args:
+            logits: [batch_size, vocab_size] float logits of the next token. May be modified in place.
+            history: Tokens of the sequences, required by processors with `needs_history`.
+
+        Returns:
+            [batch_size, vocab_size] processed logits.
+        """
+        raise NotImplementedError
+
+
+class LogitsProcessorList(list):
+    """Chain of logits processors, applied in order."""
+
+    @property
+    def needs_history(self) -> bool:
+        return any(processor.needs_history for processor in self)
+
+    @property
+    def needs_counts(self) -> bool:
+        return any(processor.needs_counts for processor in self)
+
+    @property
+    def window(self) -> int:
+        return max((processor.window for processor in self), default=0)
+
+    def make_history(self, batch_size: int, vocab_size: int, device: torch.device) -> Optional[TokenHistory]:
+        """Creates the token history needed by the processors, or returns None if they do not need one."""
+        if not self.needs_history:
+            return None
+        return TokenHistory(
+            batch_size=batch_size,
+            vocab_size=vocab_size,
+            device=device,
+            track_counts=self.needs_counts,
+            window=self.window,
+        )
+
+    def __call__(self, logits: torch.Tensor, history: Optional[TokenHistory] = None) -> torch.Tensor:
+        for processor in self:
+            logits = processor(logits, history)
+        return logits
+
+
+class TemperatureLogitsProcessor(LogitsProcessor):
+    """Divides the logits by the temperature."""
+
+    def __init__(self, temperature: float):
+        if temperature <= 0:
+            raise ValueError(f"temperature must be positive, got {temperature}")
+        self.temperature = temperature
+
+    def __call__(self, logits, history=None):
+        if self.temperature != 1.0:
+            logits /= self.temperature
+        return logits
+
+
+class TopKLogitsProcessor(LogitsProcessor):
+    """Keeps the `top_k` tokens with the highest logits. Ties with the k-th logit are kept."""
+
+    def __init__(self, top_k: int, filter_value: float = -float('Inf')):
+        self.top_k = top_k
+        self.filter_value = filter_value
+
+    def __call__(self, logits, history=None):
+        top_k = min(self.top_k, logits.shape[-1])
+        if top_k <= 0:
+            return logits
+        kth_logits = torch.topk(logits, top_k, dim=-1)[0][..., -1:]
+        return logits.masked_fill_(logits < kth_logits, self.filter_value)
+
+
+class TopPLogitsProcessor(LogitsProcessor):
+    """
+    Keeps the smallest set of most likely tokens whose cumulative probability exceeds `top_p` (nucleus sampling).
+    """
+
+    def __init__(self, top_p: float, filter_value: float = -float('Inf')):
+        self.top_p = top_p
+        self.filter_value = filter_value
+
+    def __call__(self, logits, history=None):
+        if not 0.0 < self.top_p < 1.0:
+            return logits
+        sorted_logits, sorted_indices = torch.sort(logits, descending=True, dim=-1)
+        cumulative_probs = torch.cumsum(F.softmax(sorted_logits, dim=-1), dim=-1)
+        # shift the mask to the right to also keep the first token above the threshold
+        sorted_indices_to_remove = torch.zeros_like(cumulative_probs, dtype=torch.bool)
+        sorted_indices_to_remove[..., 1:] = cumulative_probs[..., :-1] > self.top_p
+        indices_to_remove = sorted_indices_to_remove.scatter(-1, sorted_indices, sorted_indices_to_remove)
+        return logits.masked_fill_(indices_to_remove, self.filter_value)
+
+
+class MinPLogitsProcessor(LogitsProcessor):
+    """Removes the tokens whose probability is less than `min_p` times the probability of the most likely token."""
+
+    def __init__(self, min_p: float, filter_value: float = -float('Inf')):
+        self.min_p = min_p
+        self.filter_value = filter_value
+
+    def __call__(self, logits, history=None):
+        if self.min_p <= 0.0:
+            return logits
+        # p < min_p * p_max  <=>  logit < max_logit + log(min_p)
+        threshold = logits.max(dim=-1, keepdim=True)[0] + math.log(self.min_p)
+        return logits.masked_fill_(logits < threshold, self.filter_value)
+
+
+class RepetitionPenaltyLogitsProcessor(LogitsProcessor):
+    """
+    Penalizes the tokens which occur in the prompt or were generated, as in https://arxiv.org/pdf/1909.05858.pdf.
+    Positive logits are divided by the penalty, and negative logits are multiplied by it.
+    """
+
+    needs_counts = True
+    needs_history = True
+
+    def __init__(self, repetition_penalty: float):
+        if repetition_penalty <= 0:
+            raise ValueError(f"repetition_penalty must be positive, got {repetition_penalty}")
+        self.repetition_penalty = repetition_penalty
+
+    def __call__(self, logits, history=None):
+        vocab_size = history.vocab_size
+        seen = history.prompt_mask | (history.counts > 0)
+        penalized = torch.where(
+            logits[:, :vocab_size] > 0,
+            logits[:, :vocab_size] / self.repetition_penalty,
+            logits[:, :vocab_size] * self.repetition_penalty,
+        )
+        logits[:, :vocab_size] = torch.where(seen, penalized, logits[:, :vocab_size])
+        return logits
+
+
+class PresenceFrequencyPenaltyLogitsProcessor(LogitsProcessor):
+    """
+    Subtracts `presence_penalty` from the logits of every generated token, and `frequency_penalty` times the
+    number of times it was generated.
+    """
+
+    needs_counts = True
+    needs_history = True
+
+    def __init__(self, presence_penalty: float = 0.0, frequency_penalty: float = 0.0):
+        self.presence_penalty = presence_penalty
+        self.frequency_penalty = frequency_penalty
+
+    def __call__(self, logits, history=None):
+        counts = history.counts.to(logits.dtype)
+        penalty = self.frequency_penalty * counts + self.presence_penalty * (counts > 0).to(logits.dtype)
+        logits[:, : history.vocab_size] -= penalty
+        return logits
+
+
+class MinLengthLogitsProcessor(LogitsProcessor):
+    """Prevents the end of sequence token from being generated before `min_length` tokens were generated."""
+
+    needs_history = True
+
+    def __init__(self, min_length: int, eos_id: int, filter_value: float = -float('Inf')):
+        self.min_length = min_length
+        self.eos_id = eos_id
+        self.filter_value = filter_value
+
+    def __call__(self, logits, history=None):
+        if self.min_length <= 0:
+            return logits
+        too_short = history.num_generated < self.min_length
+        logits[:, self.eos_id].masked_fill_(too_short, self.filter_value)
+        return logits
+
+
+class BadWordsLogitsProcessor(LogitsProcessor):
+    """
+    Prevents sequences of tokens from being generated. The last token of a sequence is removed when the most
+    recent tokens match the rest of the sequence, and single tokens are always removed.
+
+    Args:
+        bad_words_ids: Token ids of every banned sequence.
+    """
+
+    def __init__(self, bad_words_ids: Sequence[Sequence[int]], filter_value: float = -float('Inf')):
+        self.bad_words_ids = [list(ids) for ids in bad_words_ids if len(ids) > 0]
+        self.filter_value = filter_value
+        self.single_token_ids = sorted({ids[0] for ids in self.bad_words_ids if len(ids) == 1})
+        self.multi_token_ids = [ids for ids in self.bad_words_ids if len(ids) > 1]
+        self.window = max((len(ids) - 1 for ids in self.multi_token_ids), default=0)
+        self.needs_history = self.window > 0
+        self._prefixes = {}
+
+    def _get_prefix(self, ids: List[int], device: torch.device) -> torch.Tensor:
+        key = (tuple(ids), device)
+        if key not in self._prefixes:
+            self._prefixes[key] = torch.tensor(ids[:-1], dtype=torch.long, device=device)
+        return self._prefixes[key]
+
+    def __call__(self, logits, history=None):
+        if self.single_token_ids:
+            logits[:, self.single_token_ids] = self.filter_value
+        for ids in self.multi_token_ids:
+            prefix = self._get_prefix(ids, logits.device)
+            matches = (history.recent_tokens[:, -prefix.shape[0] :] == prefix).all(dim=-1)
+            logits[:, ids[-1]].masked_fill_(matches, self.filter_value)
+        return logits
+
+
+class TokenRangeLogitsProcessor(LogitsProcessor):
+    """Keeps only the tokens with ids in [min_id, max_id)."""
+
+    def __init__(self, min_id: int = 0, max_id: Optional[int] = None, filter_value: float = -float('Inf')):
+        self.min_id = min_id
+        self.max_id = max_id
+        self.filter_value = filter_value
+
+    def __call__(self, logits, history=None):
+        logits[:, : self.min_id] = self.filter_value
+        if self.max_id is not None:
+            logits[:, self.max_id :] = self.filter_value
+        return logits
+
+
+def get_logits_processors(
+    temperature: float = 1.0,
+    top_k: int = 0,
+    top_p: float = 0.0,
+    min_p: float = 0.0,
+    repetition_penalty: float = 1.0,
+    presence_penalty: float = 0.0,
+    frequency_penalty: float = 0.0,
+    min_length: int = 0,
+    eos_id: Optional[int] = None,
+    bad_words_ids: Optional[Sequence[Sequence[int]]] = None,
+    vocab_size: Optional[int] = None,
+    greedy: bool = False,
+) -> LogitsProcessorList:
+    """
+    Builds the chain of logits processors for a set of sampling parameters. Processors which would not change
+    the logits are left out.
+
+    The constraints and penalties are applied first, followed by the temperature and the filters of sampling.
+    Greedy decoding only applies the constraints (vocabulary range, bad words and minimum length) and selects the
+    most likely token: the penalties, the temperature and the filters are left out.
+
+    Args:
+        temperature: Sampling temperature.
+        top_k: If > 0, only the top k tokens with the highest probability are kept.
+        top_p: If in (0, 1), only the most likely tokens with a cumulative probability of top_p are kept.
+        min_p: If > 0, tokens with a probability less than min_p times the highest probability are removed.
+        repetition_penalty: Penalty of tokens of the prompt and of generated tokens. 1.0 means no penalty.
+        presence_penalty: Penalty subtracted from the logits of generated tokens.
+        frequency_penalty: Penalty subtracted from the logits of generated tokens per occurrence.
+        min_length: Minimum number of tokens to generate before `eos_id`.
+        eos_id: End of sequence token, required with `min_length`.
+        bad_words_ids: Token ids of sequences which must not be generated.
+        vocab_size: If given, tokens with ids of at least vocab_size, e.g. of a padded vocabulary, are removed.
+        greedy: Whether the tokens are selected greedily instead of being sampled, without penalties.
+
+    Returns:
+        Chain of logits processors.
+    """
+    processors = LogitsProcessorList()
+    if vocab_size is not None:
+        processors.append(TokenRangeLogitsProcessor(min_id=0, max_id=vocab_size))
+    if bad_words_ids:
+        processors.append(BadWordsLogitsProcessor(bad_words_ids))
+    if min_length > 0:
+        if eos_id is None:
+            raise ValueError("eos_id is required with min_length")
+        processors.append(MinLengthLogitsProcessor(min_length=min_length, eos_id=eos_id))
+    if greedy:
+        return processors
+
+    if repetition_penalty != 1.0:
+        processors.append(RepetitionPenaltyLogitsProcessor(repetition_penalty))
+    if presence_penalty != 0.0 or frequency_penalty != 0.0:
+        processors.append(
+            PresenceFrequencyPenaltyLogitsProcessor(
+                presence_penalty=presence_penalty, frequency_penalty=frequency_penalty
+            )
+        )
+
+    if temperature != 1.0:
+        processors.append(TemperatureLogitsProcessor(temperature))
+    if top_k > 0:
+        processors.append(TopKLogitsProcessor(top_k))
+    if 0.0 < top_p < 1.0:
+        processors.append(TopPLogitsProcessor(top_p))
+    if min_p > 0.0:
+        processors.append(MinPLogitsProcessor(min_p))
+    return processors
@@ -503,12 +503,9 @@ class ParallelAttention(MegatronModule, adapter_mixins.AdapterModuleMixin):
             # adjust the key rotary positional embedding
             if rotary_pos_emb is not None:
                 q_pos_emb, k_pos_emb = rotary_pos_emb
-                if not set_inference_key_value_memory:
-                    # In inference, we compute one token at a time.
-                    # Select the correct positional embedding.
-                    q_pos_emb = q_pos_emb[end - 1 : end]
-                else:
-                    q_pos_emb = q_pos_emb[:end, :, :, :]
+                # Select the positional embedding of the new positions, which are usually a single token after the
+                # first step, or several tokens when the first ones are read from a prefix cache.
+                q_pos_emb = q_pos_emb[start:end, :, :, :]
                 k_pos_emb = k_pos_emb[:end, :, :, :]
                 rotary_pos_emb = (q_pos_emb, k_pos_emb)
 
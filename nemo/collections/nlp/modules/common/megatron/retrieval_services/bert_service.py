@@ -16,6 +16,7 @@ import base64
 import pickle
 import threading
 import time
+from functools import partial
 from typing import List, Union
 
 import torch
@@ -24,6 +25,7 @@ from flask_restful import Api, Resource
 from sentence_transformers import SentenceTransformer
 
 from nemo.collections.common.tokenizers.tokenizer_spec import TokenizerSpec
+from nemo.collections.nlp.modules.common.megatron.retrieval_services.util import EmbeddingBatcher
 
 BERT_RETRIEVER_PORT_NUM = 17190
 
@@ -32,16 +34,16 @@ class SentenceBertResource(Resource):
     """
     SentenceBERT Flask resource.
     The PUT method is to get token/str embedding.
+    The sentences of concurrent requests are embedded in shared batches by the batcher, which caches the embeddings.
     """
 
     def __init__(
-        self, bert_model, tokenizer, pool, sentence_bert_batch,
+        self, bert_model, tokenizer, batcher,
     ):
         # server
         self.bert_model = bert_model
         self.tokenizer = tokenizer
-        self.pool = pool
-        self.sentence_bert_batch = sentence_bert_batch
+        self.batcher = batcher
         self.embedding_dim = self.bert_model.get_sentence_embedding_dimension()
 
     def put(self):
@@ -62,9 +64,7 @@ class SentenceBertResource(Resource):
                 text = self.tokenizer.ids_to_text(q)
                 sentence_list.append(text)
             query = sentence_list
-        emb = self.bert_model.encode_multi_process(
-            sentences=query, pool=self.pool, batch_size=self.sentence_bert_batch
-        )
+        emb = self.batcher.embed(query)
         return emb
 
 
@@ -80,6 +80,9 @@ class SentenceBertServer(object):
         tokenizer: TokenizerSpec,
         sentence_bert: str = 'all-mpnet-base-v2',
         sentence_bert_batch: int = 4,
+        max_batch_size: int = 256,
+        max_wait_time: float = 0.002,
+        cache_size: int = 100000,
     ):
         self.app = Flask(__name__, static_url_path='')
 
@@ -93,11 +96,15 @@ class SentenceBertServer(object):
         self.tokenizer = tokenizer
         self.pool = self.bert_model.start_multi_process_pool(device_list)
         self.sentence_bert_batch = sentence_bert_batch
+        self.batcher = EmbeddingBatcher(
+            partial(self.bert_model.encode_multi_process, pool=self.pool, batch_size=self.sentence_bert_batch),
+            max_batch_size=max_batch_size,
+            max_wait_time=max_wait_time,
+            cache_size=cache_size,
+        )
         api = Api(self.app)
         api.add_resource(
-            SentenceBertResource,
-            '/knn',
-            resource_class_args=[self.bert_model, self.tokenizer, self.pool, self.sentence_bert_batch,],
+            SentenceBertResource, '/knn', resource_class_args=[self.bert_model, self.tokenizer, self.batcher,],
         )
 
     def run(self, url, port=None):
@@ -113,14 +120,28 @@ def start_sentence_bert_server(
     sentence_bert: str = 'all-mpnet-base-v2',
     sentence_bert_batch: int = 4,
     port: int = None,
+    max_batch_size: int = 256,
+    max_wait_time: float = 0.002,
+    cache_size: int = 100000,
 ):
     """
     Start the sentence bert server method.
     It only starts the server at rank 0 worker.
     Doesn't support multiple nodes yet.
+    The sentences of concurrent requests are merged into batches of up to `max_batch_size` sentences, waiting
+    up to `max_wait_time` seconds for more requests, and the embeddings of `cache_size` sentences are cached.
     """
     # register the bert model port number
-    server = SentenceBertServer(name, devices, tokenizer, sentence_bert, sentence_bert_batch,)
+    server = SentenceBertServer(
+        name,
+        devices,
+        tokenizer,
+        sentence_bert,
+        sentence_bert_batch,
+        max_batch_size=max_batch_size,
+        max_wait_time=max_wait_time,
+        cache_size=cache_size,
+    )
     server.run("0.0.0.0", port=port)
     # sleep to make sure the sentence bert server is full started.
     time.sleep(2)
@@ -14,6 +14,7 @@
 
 import pickle
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Union
 
 import faiss
@@ -36,10 +37,12 @@ class ComboRetrievalResource(Resource):
     """
     Combo Faiss Retrieval Flask resource.
     The PUT method is to get KNN tokens, add new chunks, reset index.
+    The KNN queries are sent to the retrieval services concurrently by the executor.
     """
 
-    def __init__(self, retrieval_services, weight_container):
+    def __init__(self, retrieval_services, weight_container, executor):
         self.retrieval_services = retrieval_services
+        self.executor = executor
         self.updatable = any([service.updatable for service in retrieval_services])
 
         self.weight_container = weight_container
@@ -103,7 +106,7 @@ class ComboRetrievalResource(Resource):
         if neighbors == 0:
             return self.retrieval_services[0].get_knn(query, 0)
         total_neighbors = 0
-        results = []
+        futures = []
         for i, service in enumerate(self.retrieval_services):
             k = int(neighbors * weights[i])
             if i == len(self.retrieval_services) - 1:
@@ -112,8 +115,8 @@ class ComboRetrievalResource(Resource):
             if k == 0:
                 # empty, skip it
                 continue
-            result = service.get_knn(query, k)
-            results.append(result)
+            futures.append(self.executor.submit(service.get_knn, query, k))
+        results = [future.result() for future in futures]
         return np.concatenate(results, axis=1)
 
     def add_docs_to_index(self, query: List[str], add_eos: bool = True):
@@ -163,21 +166,29 @@ class ComboRetrievalServer(object):
             weights.append(service_cfg.weight)
             if service_cfg.type == 'FaissRetrievalService':
                 service = FaissRetrievalService(
-                    tokenizer=tokenizer, service_ip=service_cfg.service_ip, service_port=service_cfg.service_port
+                    tokenizer=tokenizer,
+                    service_ip=service_cfg.service_ip,
+                    service_port=service_cfg.service_port,
+                    query_cache_size=service_cfg.get('query_cache_size', 0),
                 )
             elif service_cfg.type == 'DynamicFaissRetrievalService':
                 service = DynamicFaissRetrievalService(
-                    tokenizer=tokenizer, service_ip=service_cfg.service_ip, service_port=service_cfg.service_port
+                    tokenizer=tokenizer,
+                    service_ip=service_cfg.service_ip,
+                    service_port=service_cfg.service_port,
+                    query_cache_size=service_cfg.get('query_cache_size', 0),
                 )
             else:
                 raise ValueError(f'Unsupported retrieval service {service_cfg.type}')
             services.append(service)
         self.weight_container = [weights]
         self.tokenizer = tokenizer
+        # the resource is created for every request, so the executor of the concurrent queries is kept by the server
+        self.executor = ThreadPoolExecutor(max_workers=len(services))
 
         api = Api(self.app)
         api.add_resource(
-            ComboRetrievalResource, '/knn', resource_class_args=[services, self.weight_container,],
+            ComboRetrievalResource, '/knn', resource_class_args=[services, self.weight_container, self.executor],
         )
 
     def run(self, url, port=None):
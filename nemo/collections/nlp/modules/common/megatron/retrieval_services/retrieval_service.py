@@ -21,7 +21,7 @@ import numpy as np
 import torch
 
 from nemo.collections.common.tokenizers.tokenizer_spec import TokenizerSpec
-from nemo.collections.nlp.modules.common.megatron.retrieval_services.util import request_data
+from nemo.collections.nlp.modules.common.megatron.retrieval_services.util import LRUCache, request_data
 
 log = logging.getLogger('retrieval')
 log.setLevel(logging.ERROR)
@@ -62,15 +62,23 @@ class FaissRetrievalService(RetrievalService):
     """
     Static retrieval service client class.
     It implements the retrieval services interface, has a simple client to do KNN queries.
+    The neighbors of the most recent queries are cached when `query_cache_size` is positive, so that only the
+    queries which are not cached are sent to the service.
     """
 
     def __init__(
-        self, tokenizer: TokenizerSpec, service_ip: str = None, service_port: int = None, updatable: bool = False,
+        self,
+        tokenizer: TokenizerSpec,
+        service_ip: str = None,
+        service_port: int = None,
+        updatable: bool = False,
+        query_cache_size: int = 0,
     ):
         self.updatable = updatable
         self.tokenizer = tokenizer
         self.service_ip = service_ip
         self.service_port = service_port
+        self.query_cache = LRUCache(query_cache_size)
 
     def get_knn(self, query: Union[List[str], str, torch.Tensor], neighbors):
         """Get K-nearest neighbor chunks based on the input query
@@ -86,24 +94,50 @@ class FaissRetrievalService(RetrievalService):
                 text = self.tokenizer.ids_to_text(q)
                 sentence_list.append(text)
             query = sentence_list
+        if self.query_cache.max_size > 0 and neighbors > 0:
+            return self._get_knn_cached(query, neighbors)
         data = {'sentences': query}
         data['neighbors'] = neighbors
         result = request_data(data, self.service_ip, self.service_port)
         result = np.array(result)
         return result
 
+    def _get_knn_cached(self, query: Union[List[str], str], neighbors: int) -> np.ndarray:
+        single_sentence = isinstance(query, str)
+        sentences = [query] if single_sentence else query
+        cached = [self.query_cache.get((sentence, neighbors)) for sentence in sentences]
+        missing = list(dict.fromkeys(s for s, result in zip(sentences, cached) if result is None))
+        computed = {}
+        if missing:
+            data = {'sentences': missing, 'neighbors': neighbors}
+            result = np.array(request_data(data, self.service_ip, self.service_port))
+            for sentence, sentence_neighbors in zip(missing, result):
+                self.query_cache.put((sentence, neighbors), sentence_neighbors)
+                computed[sentence] = sentence_neighbors
+        result = np.stack([computed[s] if r is None else r for s, r in zip(sentences, cached)], axis=0)
+        if single_sentence:
+            return result[0]
+        return result
+
 
 class DynamicFaissRetrievalService(FaissRetrievalService):
     """
     Dynamic retrieval service client class.
     It implements the retrieval services interface, has a simple client to add, reset and query
     the dynamic retrieval index.
+    The cached neighbors are discarded when the index is changed through this client.
     """
 
     def __init__(
-        self, tokenizer: TokenizerSpec, service_ip: str = None, service_port: int = None,
+        self, tokenizer: TokenizerSpec, service_ip: str = None, service_port: int = None, query_cache_size: int = 0,
     ):
-        super().__init__(tokenizer=tokenizer, service_ip=service_ip, service_port=service_port, updatable=True)
+        super().__init__(
+            tokenizer=tokenizer,
+            service_ip=service_ip,
+            service_port=service_port,
+            updatable=True,
+            query_cache_size=query_cache_size,
+        )
 
     def add_docs_to_index(self, query: List[str], add_eos: bool = True):
         """
@@ -119,6 +153,7 @@ class DynamicFaissRetrievalService(FaissRetrievalService):
                 sentence_list.append(text)
             query = sentence_list
         data = {'sentences': query, 'add_eos': add_eos}
+        self.query_cache.clear()
         return request_data(data, self.service_ip, self.service_port)
 
     def write_index(self, index_name: str):
@@ -137,6 +172,7 @@ class DynamicFaissRetrievalService(FaissRetrievalService):
             index_name: str, the index name used for the file name
         """
         data = {'reset': None}
+        self.query_cache.clear()
         return request_data(data, self.service_ip, self.service_port)
 
 
@@ -147,9 +183,11 @@ class ComboRetrievalService(DynamicFaissRetrievalService):
     """
 
     def __init__(
-        self, tokenizer: TokenizerSpec, service_ip: str = None, service_port: int = None,
+        self, tokenizer: TokenizerSpec, service_ip: str = None, service_port: int = None, query_cache_size: int = 0,
     ):
-        super().__init__(tokenizer=tokenizer, service_ip=service_ip, service_port=service_port)
+        super().__init__(
+            tokenizer=tokenizer, service_ip=service_ip, service_port=service_port, query_cache_size=query_cache_size
+        )
 
     def update_weights(self, weights: List[float]):
         """ update the weights between the children services
@@ -157,4 +195,5 @@ class ComboRetrievalService(DynamicFaissRetrievalService):
             weights (List[float]): weights for children services
         """
         data = {"update_weight": weights}
+        self.query_cache.clear()
         return request_data(data, self.service_ip, self.service_port)
@@ -14,26 +14,67 @@
 
 import json
 import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, List, Optional
 
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
 
 headers = {"Content-Type": "application/json"}
 
 lock = threading.Lock()
 
-__all__ = ["request_data", "lock"]
+# number of pooled connections per host of the session of a thread
+POOL_SIZE = 16
+
+_sessions = threading.local()
+
+__all__ = ["request_data", "lock", "get_session", "LRUCache", "EmbeddingBatcher"]
+
+
+def get_session() -> requests.Session:
+    """
+    Returns the HTTP session of the current thread, whose connections are kept alive and reused by the requests
+    to the same services.
+    """
+    session = getattr(_sessions, 'session', None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _sessions.session = session
+    return session
 
 
 def request_data(data, ip='localhost', port=None):
-    resp = requests.put(f'http://{ip}:{port}/knn', data=json.dumps(data), headers=headers)
+    resp = get_session().put(f'http://{ip}:{port}/knn', data=json.dumps(data), headers=headers)
     return resp.json()
 
 
 def text_generation(data, ip='localhost', port=None):
-    resp = requests.put(f'http://{ip}:{port}/generate', data=json.dumps(data), headers=headers)
+    resp = get_session().put(f'http://{ip}:{port}/generate', data=json.dumps(data), headers=headers)
     return resp.json()
 
 
+def text_generation_stream(data, ip='localhost', port=None):
+    """
+    Yields the server-sent events of the streaming text generation endpoint as dicts, until the final event.
+    Raises RuntimeError if the server reports that the generation failed.
+    """
+    with get_session().put(
+        f'http://{ip}:{port}/generate_stream', data=json.dumps(data), headers=headers, stream=True
+    ) as resp:
+        for line in resp.iter_lines(decode_unicode=True):
+            if line and line.startswith('data: '):
+                event = json.loads(line[len('data: ') :])
+                if 'error' in event:
+                    raise RuntimeError(f"Text generation failed: {event['error']}")
+                yield event
+
+
 def convert_retrieved_to_md(retrieved):
     output_str = '<table><tr><th>Query</th><th>Retrieved Doc</th></tr>'
     for item in retrieved:
@@ -45,3 +86,140 @@ def convert_retrieved_to_md(retrieved):
                 output_str += f"<tr><td>{neighbor}</td></tr>"
     output_str += '</table>'
     return output_str
+
+
+class LRUCache:
+    """
+    Thread-safe cache which evicts the least recently used entries.
+
+    Args:
+        max_size: Maximum number of entries, 0 disables the cache.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class _EmbeddingRequest:
+    def __init__(self, sentences: List[str]):
+        self.sentences = sentences
+        self.embeddings = None
+        self.exception = None
+        self.done = threading.Event()
+
+
+class EmbeddingBatcher:
+    """
+    Computes the embeddings of the sentences of concurrent requests in shared batches. The requests which arrive
+    while a batch is computed, or within `max_wait_time` of the first one, are merged, and identical sentences are
+    only embedded once. The embeddings of the most recent sentences are cached.
+
+    Args:
+        embed_fn: Function computing the embeddings [num_sentences, dim] of a list of sentences.
+        max_batch_size: Maximum number of sentences of a merged batch, a larger request is embedded on its own.
+        max_wait_time: Time in seconds to wait for more requests before computing a batch.
+        cache_size: Number of cached sentence embeddings, 0 disables the cache.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[List[str]], np.ndarray],
+        max_batch_size: int = 256,
+        max_wait_time: float = 0.002,
+        cache_size: int = 100000,
+    ):
+        self.embed_fn = embed_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_time = max_wait_time
+        self.cache = LRUCache(cache_size)
+        self.num_batches = 0
+        self._pending: List[_EmbeddingRequest] = []
+        self._condition = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+
+    def embed(self, sentences: List[str]) -> np.ndarray:
+        """
+        Returns the embeddings [len(sentences), dim] of the sentences, blocking until they are computed.
+        """
+        if len(sentences) == 0:
+            return self.embed_fn(sentences)
+        cached = [self.cache.get(sentence) for sentence in sentences]
+        missing = list(OrderedDict.fromkeys(s for s, embedding in zip(sentences, cached) if embedding is None))
+        computed = {}
+        if missing:
+            request = _EmbeddingRequest(missing)
+            with self._condition:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, daemon=True)
+                    self._worker.start()
+                self._pending.append(request)
+                self._condition.notify()
+            request.done.wait()
+            if request.exception is not None:
+                raise request.exception
+            computed = dict(zip(missing, request.embeddings))
+        return np.stack([computed[s] if embedding is None else embedding for s, embedding in zip(sentences, cached)])
+
+    def _next_batch(self) -> List[_EmbeddingRequest]:
+        with self._condition:
+            while not self._pending:
+                self._condition.wait()
+            deadline = time.monotonic() + self.max_wait_time
+            while sum(len(r.sentences) for r in self._pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            batch = [self._pending.pop(0)]
+            size = len(batch[0].sentences)
+            while self._pending and size + len(self._pending[0].sentences) <= self.max_batch_size:
+                size += len(self._pending[0].sentences)
+                batch.append(self._pending.pop(0))
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            sentences = list(OrderedDict.fromkeys(s for request in batch for s in request.sentences))
+            try:
+                embeddings = self.embed_fn(sentences)
+                self.num_batches += 1
+                by_sentence = dict(zip(sentences, embeddings))
+                for sentence, embedding in by_sentence.items():
+                    self.cache.put(sentence, embedding)
+                for request in batch:
+                    request.embeddings = [by_sentence[s] for s in request.sentences]
+            except Exception as e:
+                for request in batch:
+                    request.exception = e
+            for request in batch:
+                request.done.set()
@@ -26,6 +26,7 @@ from nemo.collections.nlp.modules.common.megatron.retrieval_services.util import
     convert_retrieved_to_md,
     request_data,
     text_generation,
+    text_generation_stream,
 )
 
 __all__ = ['RetroDemoWebApp', 'get_demo']
@@ -99,6 +100,34 @@ def create_gen_function(port=5555, chat=False):
     return get_generation
 
 
+def create_stream_gen_function(port=5555):
+    """Same as `create_gen_function`, but the returned function yields the generated text so far as it grows."""
+
+    def get_generation(prompt, greedy, add_BOS, token_to_gen, min_tokens, temp, top_p, top_k, repetition, end_strings):
+        data = {
+            "sentences": [prompt],
+            "tokens_to_generate": int(token_to_gen),
+            "temperature": temp,
+            "add_BOS": add_BOS,
+            "top_k": top_k,
+            "top_p": top_p,
+            "greedy": greedy,
+            "all_probs": False,
+            "repetition_penalty": repetition,
+            "min_tokens_to_generate": int(min_tokens),
+            "end_strings": [i.strip() for i in end_strings.split(',') if len(i) != 0],
+        }
+        bot_message = ''
+        # closing the generator closes the connection, which cancels the generation
+        for event in text_generation_stream(data, port=port):
+            if event.get('done'):
+                break
+            bot_message += event['text']
+            yield bot_message
+
+    return get_generation
+
+
 def get_demo(share, username, password, server_port=5555, web_port=9889, loop=None):
     check_gradio_import()
     asyncio.set_event_loop(loop)
@@ -332,7 +361,8 @@ def get_chatbot_demo(
                         prompt_preset['BOT_TURN_TOKEN'] + assistant_name + prompt_preset['END_OF_NAME'] + value_str
                     )
                     prompt_text = prompt_preset['SYSTEM_TURN_TOKEN'] + preamble + prompt_text
-                    bot_message = create_gen_function(server_port)(
+                    bot_message = ''
+                    for bot_message in create_stream_gen_function(server_port)(
                         prompt_text,
                         False,
                         False,
@@ -343,7 +373,9 @@ def get_chatbot_demo(
                         top_k,
                         repetition_penality,
                         '<extra_id_1>',
-                    )
+                    ):
+                        history[-1][1] = bot_message
+                        yield history
                     if bot_message.endswith(TURN_TOKEN):
                         bot_message = bot_message[: -len(TURN_TOKEN)]
                     history[-1][1] = bot_message
@@ -351,7 +383,7 @@ def get_chatbot_demo(
                     print(bot_message)
                     print('-------------------')
                     session_state.append(value_str + bot_message.strip())
-                    return history
+                    yield history
 
                 msg.submit(user, [msg, chatbot, session_state], [msg, chatbot], queue=False).then(
                     bot,
@@ -379,7 +411,8 @@ def get_chatbot_demo(
                     return None
 
                 clear.click(clear_fun, [session_state], chatbot, queue=False)
-        demo.launch(share=share, server_port=web_port, server_name='0.0.0.0', auth=(username, password))
+        # the streamed replies of the bot need the queue
+        demo.queue().launch(share=share, server_port=web_port, server_name='0.0.0.0', auth=(username, password))
 
 
 class RetroDemoWebApp:
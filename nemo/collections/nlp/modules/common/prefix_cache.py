@@ -0,0 +1,206 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Cache of the key-value memory of prompt prefixes, shared between generation requests.
+
+Requests often share a prefix, e.g. a system prompt or few-shot examples. The key-value memory of a position only
+depends on the tokens up to that position, so the memory computed for a prefix by a previous request can be reused,
+and only the rest of the context has to be run through the model.
+"""
+
+import heapq
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import torch
+
+__all__ = ["PrefixKVCache"]
+
+# key and value memory of every attention layer, with the positions as first dimension
+LayerMemory = List[Tuple[torch.Tensor, torch.Tensor]]
+
+
+class _Node:
+    def __init__(self, token_ids: Tuple[int, ...], memory: LayerMemory, parent: Optional["_Node"]):
+        self.token_ids = token_ids
+        self.memory = memory
+        self.parent = parent
+        # children by their first token
+        self.children: Dict[int, _Node] = {}
+        self.last_access = 0
+
+    @property
+    def num_bytes(self) -> int:
+        return sum(
+            key.numel() * key.element_size() + value.numel() * value.element_size() for key, value in self.memory
+        )
+
+
+class PrefixKVCache:
+    """
+    Radix tree of token id sequences, holding the key-value memory of their positions.
+
+    Every node holds a run of tokens and their memory, and a sequence is the concatenation of the nodes on the path
+    from the root. When the memory exceeds the budget, the least recently used leaves are evicted.
+
+    Args:
+        max_memory_bytes: Memory budget in bytes.
+    """
+
+    def __init__(self, max_memory_bytes: int):
+        if max_memory_bytes <= 0:
+            raise ValueError(f"max_memory_bytes must be positive, got {max_memory_bytes}")
+        self.max_memory_bytes = max_memory_bytes
+        self.memory_bytes = 0
+        self._root = _Node((), [], None)
+        # logical clock of the accesses, so that the eviction only depends on the sequence of calls
+        self._clock = 0
+
+    def _walk(self, token_ids: Sequence[int]) -> Tuple[List[_Node], int]:
+        """Returns the nodes matching a prefix of `token_ids`, and the number of tokens matched in the last one."""
+        path = []
+        node = self._root
+        position = 0
+        while position < len(token_ids):
+            child = node.children.get(token_ids[position])
+            if child is None:
+                break
+            length = 0
+            while (
+                length < len(child.token_ids)
+                and position + length < len(token_ids)
+                and child.token_ids[length] == token_ids[position + length]
+            ):
+                length += 1
+            path.append(child)
+            position += length
+            if length < len(child.token_ids):
+                return path, length
+            node = child
+        return path, len(path[-1].token_ids) if path else 0
+
+    def _touch(self, path: List[_Node]):
+        self._clock += 1
+        for node in path:
+            node.last_access = self._clock
+
+    def match(self, token_ids: Sequence[int]) -> Tuple[int, Optional[LayerMemory]]:
+        """
+        Finds the longest cached prefix of a sequence.
+
+        Args:
+            token_ids: Token ids of the sequence.
+
+        Returns:
+            The number of tokens of the prefix, and the key and value memory of its positions for every layer, or
+            None if no prefix is cached.
+        """
+        path, last_length = self._walk(token_ids)
+        if not path:
+            return 0, None
+        self._touch(path)
+        num_tokens = sum(len(node.token_ids) for node in path[:-1]) + last_length
+        memory = []
+        for layer in range(len(path[0].memory)):
+            keys = [node.memory[layer][0] for node in path[:-1]] + [path[-1].memory[layer][0][:last_length]]
+            values = [node.memory[layer][1] for node in path[:-1]] + [path[-1].memory[layer][1][:last_length]]
+            memory.append((torch.cat(keys), torch.cat(values)))
+        return num_tokens, memory
+
+    def insert(self, token_ids: Sequence[int], memory: LayerMemory):
+        """
+        Adds a sequence to the cache. Only the memory of the positions which are not cached yet is copied.
+
+        Args:
+            token_ids: Token ids of the sequence.
+            memory: Key and value memory of the positions of the sequence for every layer, with the positions as
+                first dimension.
+        """
+        token_ids = tuple(token_ids)
+        path, last_length = self._walk(token_ids)
+        node = self._root
+        position = 0
+        if path:
+            node = path[-1]
+            position = sum(len(n.token_ids) for n in path[:-1]) + last_length
+            if last_length < len(node.token_ids):
+                node = self._split(node, last_length)
+                path[-1] = node
+
+        if position < len(token_ids):
+            child = _Node(
+                token_ids[position:],
+                [
+                    (key[position : len(token_ids)].clone(), value[position : len(token_ids)].clone())
+                    for key, value in memory
+                ],
+                node,
+            )
+            node.children[token_ids[position]] = child
+            self.memory_bytes += child.num_bytes
+            path.append(child)
+        self._touch(path)
+        self._evict()
+
+    def _split(self, node: _Node, length: int) -> _Node:
+        """Splits a node after its first `length` tokens, and returns the node of these tokens."""
+        head = _Node(
+            node.token_ids[:length],
+            [(key[:length].clone(), value[:length].clone()) for key, value in node.memory],
+            node.parent,
+        )
+        head.last_access = node.last_access
+        head.children[node.token_ids[length]] = node
+        node.parent.children[node.token_ids[0]] = head
+        node.parent = head
+        node.token_ids = node.token_ids[length:]
+        node.memory = [(key[length:].clone(), value[length:].clone()) for key, value in node.memory]
+        return head
+
+    def _evict(self):
+        if self.memory_bytes <= self.max_memory_bytes:
+            return
+        leaves = []
+        stack = list(self._root.children.values())
+        while stack:
+            node = stack.pop()
+            if node.children:
+                stack.extend(node.children.values())
+            else:
+                leaves.append((node.last_access, id(node), node))
+        heapq.heapify(leaves)
+        while self.memory_bytes > self.max_memory_bytes and leaves:
+            _, _, leaf = heapq.heappop(leaves)
+            parent = leaf.parent
+            del parent.children[leaf.token_ids[0]]
+            self.memory_bytes -= leaf.num_bytes
+            # the parent is accessed at least as recently as its children, so it is evicted after them
+            if parent is not self._root and not parent.children:
+                heapq.heappush(leaves, (parent.last_access, id(parent), parent))
+
+    @property
+    def num_tokens(self) -> int:
+        """Number of cached positions."""
+        total = 0
+        stack = list(self._root.children.values())
+        while stack:
+            node = stack.pop()
+            total += len(node.token_ids)
+            stack.extend(node.children.values())
+        return total
+
+    def clear(self):
+        """Removes all sequences."""
+        self._root = _Node((), [], None)
+        self.memory_bytes = 0
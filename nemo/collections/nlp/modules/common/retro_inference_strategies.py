@@ -141,6 +141,7 @@ class RetroModelTextGenerationStrategy(TextGenerationStrategy):
         self.retrieved = []
         self.retrieved_text = []
         """initialize the batch data before the inference steps."""
+        self._reset_stop_string_checker()
         # Move to GPU.
         tokenizer = self.model.tokenizer
         tokens = context_tokens.contiguous().cuda()
@@ -289,6 +290,7 @@ class RetroQAModelTextGenerationStrategy(RetroModelTextGenerationStrategy):
         self.retrieved_text = []
         self.reuse_neighbors = pickle.loads(self.store.get('reuse_neighbors'))
         """initialize the batch data before the inference steps."""
+        self._reset_stop_string_checker()
         # Move to GPU.
         tokenizer = self.model.tokenizer
         tokens = context_tokens.contiguous().cuda()
@@ -0,0 +1,267 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Speculative decoding.
+
+A small draft model proposes the next `k` tokens one by one, and the target model computes the distributions of all
+of them in a single forward pass. The proposed tokens are accepted with probability min(1, p(x) / q(x)), where p and
+q are the target and draft distributions, and the first rejected token is replaced by a sample of the normalized
+max(0, p - q). Every generated token is thus distributed according to the target model, while a forward pass of the
+target model generates up to k + 1 tokens.
+"""
+
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+
+import torch
+import torch.nn.functional as F
+
+from nemo.collections.nlp.modules.common.logits_processors import LogitsProcessorList
+
+__all__ = [
+    "IncrementalLanguageModel",
+    "SpeculativeDecodingStats",
+    "SpeculativeDecoder",
+    "verify_draft_tokens",
+    "sample_after_draft",
+]
+
+
+class IncrementalLanguageModel(ABC):
+    """
+    Language model run on growing sequences, which keeps a memory of the processed positions, e.g. the key-value
+    memory of the attention layers.
+    """
+
+    @abstractmethod
+    def forward(self, tokens: torch.Tensor, start: int, end: int) -> torch.Tensor:
+        """
+        Runs the model on the positions [start, end) of the sequences. The memory of the positions before `start` is
+        valid, and the memory of the positions from `start` on is overwritten, so that rejected positions are
+        discarded by running the model from an earlier position.
+
+        Args:
+            tokens: Token ids [batch_size, length] with length >= end.
+            start: First position to run, 0 at the start of a generation.
+            end: Position after the last one to run.
+
+        Returns:
+            Logits of the tokens following the positions [batch_size, end - start, vocab_size].
+        """
+        raise NotImplementedError
+
+
+@dataclass
+class SpeculativeDecodingStats:
+    """Counters of speculative decoding, accumulated over generations."""
+
+    num_target_forwards: int = 0
+    num_proposed_tokens: int = 0
+    num_accepted_tokens: int = 0
+    num_generated_tokens: int = 0
+    generation_time: float = 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        """Returns the counters and the acceptance rate, the tokens per target forward pass and the tokens per second."""
+        return {
+            "num_target_forwards": self.num_target_forwards,
+            "num_proposed_tokens": self.num_proposed_tokens,
+            "num_accepted_tokens": self.num_accepted_tokens,
+            "num_generated_tokens": self.num_generated_tokens,
+            "acceptance_rate": self.num_accepted_tokens / max(self.num_proposed_tokens, 1),
+            "tokens_per_target_forward": self.num_generated_tokens / max(self.num_target_forwards, 1),
+            "tokens_per_second": self.num_generated_tokens / self.generation_time if self.generation_time > 0 else 0.0,
+        }
+
+
+def verify_draft_tokens(
+    target_probs: torch.Tensor, draft_probs: Optional[torch.Tensor], draft_tokens: torch.Tensor, greedy: bool = False
+) -> torch.Tensor:
+    """
+    Accepts or rejects the draft tokens.
+
+    Args:
+        target_probs: Target distributions of the draft positions [batch_size, k, vocab_size].
+        draft_probs: Draft distributions the draft tokens were sampled from [batch_size, k, vocab_size], not used
+            with `greedy`.
+        draft_tokens: Draft tokens [batch_size, k].
+        greedy: Whether the tokens are selected greedily, in which case a draft token is accepted if it is the most
+            likely target token.
+
+    Returns:
+        Whether every draft token is accepted [batch_size, k].
+    """
+    if greedy:
+        return draft_tokens == target_probs.argmax(dim=-1)
+    p = target_probs.gather(-1, draft_tokens.unsqueeze(-1)).squeeze(-1)
+    q = draft_probs.gather(-1, draft_tokens.unsqueeze(-1)).squeeze(-1)
+    # u < p / q, without dividing by q
+    return torch.rand_like(p) * q < p
+
+
+def sample_after_draft(
+    target_probs: torch.Tensor, draft_probs: Optional[torch.Tensor] = None, greedy: bool = False
+) -> torch.Tensor:
+    """
+    Samples the token of a position after a rejected draft token, from the normalized max(0, p - q), or after the
+    accepted draft tokens from p when `draft_probs` is None.
+
+    Args:
+        target_probs: Target distributions [batch_size, vocab_size].
+        draft_probs: Draft distributions of the rejected tokens [batch_size, vocab_size].
+        greedy: Whether the most likely target token is selected instead.
+
+    Returns:
+        Sampled tokens [batch_size].
+    """
+    if greedy:
+        return target_probs.argmax(dim=-1)
+    probs = target_probs
+    if draft_probs is not None:
+        residual = (target_probs - draft_probs).clamp(min=0.0)
+        mass = residual.sum(dim=-1, keepdim=True)
+        # the residual is only empty up to rounding errors, when p and q are equal
+        probs = torch.where(mass > 0, residual / mass.clamp(min=1e-20), target_probs)
+    return torch.multinomial(probs, num_samples=1).view(-1)
+
+
+class SpeculativeDecoder:
+    """
+    Generates the tokens of a batch with speculative decoding.
+
+    All sequences of a batch share the position of the next token, so every round generates the tokens up to the
+    first position where the draft token of any sequence is rejected. Since every generated token is distributed
+    according to the target model, stopping a sequence at an earlier position than its own first rejection does not
+    change the distribution.
+
+    Args:
+        target: The target model.
+        draft: The draft model, with the same vocabulary.
+        num_speculative_tokens: Number of tokens proposed by the draft model at every round.
+        logits_processors: Processors of the logits of both models, which must not depend on the previous tokens.
+        vocab_size: Size of the vocabulary, the logits of padded vocabularies are truncated to it.
+        greedy: Whether the most likely tokens are selected instead of being sampled.
+        stats: Counters updated during the generation.
+    """
+
+    def __init__(
+        self,
+        target: IncrementalLanguageModel,
+        draft: IncrementalLanguageModel,
+        num_speculative_tokens: int,
+        logits_processors: Optional[LogitsProcessorList] = None,
+        vocab_size: Optional[int] = None,
+        greedy: bool = False,
+        stats: Optional[SpeculativeDecodingStats] = None,
+    ):
+        if num_speculative_tokens < 1:
+            raise ValueError(f"num_speculative_tokens must be at least 1, got {num_speculative_tokens}")
+        logits_processors = logits_processors or LogitsProcessorList()
+        if logits_processors.needs_history:
+            raise ValueError(
+                "Speculative decoding does not support logits processors depending on the previous tokens, "
+                "e.g. the repetition penalty"
+            )
+        self.target = target
+        self.draft = draft
+        self.num_speculative_tokens = num_speculative_tokens
+        self.logits_processors = logits_processors
+        self.vocab_size = vocab_size
+        self.greedy = greedy
+        self.stats = stats if stats is not None else SpeculativeDecodingStats()
+
+    def _probs(self, logits: torch.Tensor) -> torch.Tensor:
+        if self.vocab_size is not None:
+            logits = logits[..., : self.vocab_size]
+        shape = logits.shape
+        logits = self.logits_processors(logits.float().reshape(-1, shape[-1]))
+        return F.softmax(logits, dim=-1).view(shape)
+
+    def generate(self, tokens: torch.Tensor, context_lengths: torch.Tensor, max_length: int) -> Iterator[int]:
+        """
+        Generates the tokens of the sequences in place.
+
+        Args:
+            tokens: Token ids [batch_size, length] with length >= max_length, starting with the contexts.
+            context_lengths: Lengths of the contexts [batch_size]. The positions of a longer context than the
+                shortest one keep their context token.
+            max_length: Length of the sequences at the end of the generation.
+
+        Yields:
+            The position of every generated token, once the tokens of all sequences are set at it. The generation
+            can be stopped by closing the generator.
+        """
+        length = int(context_lengths.min().item())
+        target_valid = draft_valid = 0
+        while length < max_length:
+            round_start = time.perf_counter()
+            k = min(self.num_speculative_tokens, max_length - length - 1)
+
+            # the draft model proposes the tokens at the positions [length, length + k)
+            draft_probs = []
+            for j in range(k):
+                logits = self.draft.forward(tokens, draft_valid, length + j)[:, -1]
+                draft_valid = length + j
+                probs = self._probs(logits)
+                proposal = probs.argmax(dim=-1) if self.greedy else torch.multinomial(probs, num_samples=1).view(-1)
+                is_context = context_lengths > length + j
+                tokens[:, length + j] = torch.where(is_context, tokens[:, length + j], proposal)
+                draft_probs.append(probs)
+
+            # the target model computes the distributions of the positions [length, length + k]
+            target_probs = self._probs(self.target.forward(tokens, target_valid, length + k)[:, -(k + 1) :])
+            target_valid = length + k
+            self.stats.num_target_forwards += 1
+
+            num_generated = k + 1
+            if k > 0:
+                draft_probs = torch.stack(draft_probs, dim=1)
+                draft_tokens = tokens[:, length : length + k]
+                accepted = verify_draft_tokens(target_probs[:, :k], draft_probs, draft_tokens, self.greedy)
+                is_context = context_lengths.unsqueeze(1) > torch.arange(length, length + k, device=tokens.device)
+                accepted |= is_context
+                num_accepted = accepted.long().cumprod(dim=1).sum(dim=1)
+                proposed = ~is_context
+                self.stats.num_proposed_tokens += int(proposed.sum().item())
+                is_leading = accepted.long().cumprod(dim=1).bool()
+                self.stats.num_accepted_tokens += int((is_leading & proposed).sum().item())
+                num_generated = int(num_accepted.min().item()) + 1
+
+            # the last position of the round gets the draft token where it is accepted, and otherwise a sample of
+            # the residual distribution after a rejection, or of the target distribution after k accepted tokens
+            position = length + num_generated - 1
+            if num_generated <= k:
+                residual_sample = sample_after_draft(
+                    target_probs[:, num_generated - 1], draft_probs[:, num_generated - 1], self.greedy
+                )
+                is_accepted = num_accepted > num_generated - 1
+                next_tokens = torch.where(is_accepted, tokens[:, position], residual_sample)
+            else:
+                next_tokens = sample_after_draft(target_probs[:, k], greedy=self.greedy)
+            tokens[:, position] = torch.where(context_lengths > position, tokens[:, position], next_tokens)
+
+            # the memory of the positions after the last accepted token is discarded at the next round
+            target_valid = min(target_valid, position)
+            draft_valid = min(draft_valid, position)
+            # the positions in the longer contexts are not generated
+            generated_positions = torch.arange(length, length + num_generated, device=tokens.device)
+            self.stats.num_generated_tokens += int((context_lengths.unsqueeze(1) <= generated_positions).sum().item())
+            self.stats.generation_time += time.perf_counter() - round_start
+
+            for generated_position in range(length, length + num_generated):
+                yield generated_position
+            length += num_generated
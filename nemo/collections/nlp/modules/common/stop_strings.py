@@ -0,0 +1,189 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Detection of end strings in text generation.
+
+Instead of detokenizing the whole sequence at every step, every sequence has an `IncrementalDetokenizer`, which
+detokenizes only a small window of the most recent tokens to get the text added by a token, and the added text is
+streamed through a `StopStringMatcher`, an Aho-Corasick automaton matching all end strings at once. The cost of a
+step is thus independent of the length of the sequence.
+"""
+
+from collections import deque
+from typing import Dict, List, Sequence, Tuple
+
+__all__ = ["IncrementalDetokenizer", "StopStringMatcher", "StopStringChecker"]
+
+# text of incomplete multi-byte characters
+REPLACEMENT_CHAR = "\ufffd"
+
+
+class IncrementalDetokenizer:
+    """
+    Detokenizes a sequence token by token.
+
+    The text added by a token is the difference between the text of a window of recent tokens with and without
+    the token. Starting the window a few tokens before the new one keeps the context needed by tokenizers which
+    detokenize tokens differently at the start of a text, e.g. SentencePiece dropping the leading space. While the
+    text ends with an incomplete character, the token is held back until the character is complete.
+
+    Args:
+        tokenizer: Tokenizer with an `ids_to_text` method.
+        prompt_ids: Token ids of the prompt, only the last `num_context_tokens` are kept as context.
+        num_context_tokens: Number of prompt tokens used as context of the first generated token.
+        max_pending_tokens: Maximum number of tokens held back for incomplete characters.
+    """
+
+    def __init__(
+        self, tokenizer, prompt_ids: Sequence[int] = (), num_context_tokens: int = 5, max_pending_tokens: int = 8
+    ):
+        self.tokenizer = tokenizer
+        self.max_pending_tokens = max_pending_tokens
+        # token ids from the start of the window, the text of the first `num_read` of them was already returned
+        self.window = list(prompt_ids[-num_context_tokens:]) if num_context_tokens > 0 else []
+        self.num_read = len(self.window)
+
+    def add_token(self, token_id: int) -> str:
+        """
+        Adds the next token.
+
+        Returns:
+            Text added by the token, which may be empty when the token ends with an incomplete character or includes
+            text of previous tokens which were held back.
+        """
+        self.window.append(token_id)
+        prefix_text = self.tokenizer.ids_to_text(self.window[: self.num_read]) if self.num_read > 0 else ""
+        text = self.tokenizer.ids_to_text(self.window)
+        num_pending = len(self.window) - self.num_read
+        if len(text) <= len(prefix_text) or (
+            text.endswith(REPLACEMENT_CHAR) and num_pending < self.max_pending_tokens
+        ):
+            return ""
+
+        # the read tokens become the context of the next token
+        self.window = self.window[self.num_read :]
+        self.num_read = len(self.window)
+        return text[len(prefix_text) :]
+
+
+class StopStringMatcher:
+    """
+    Aho-Corasick automaton matching a set of strings in streamed text.
+
+    The state of a stream is an int, starting with `StopStringMatcher.INITIAL_STATE`. Feeding text to a stream costs
+    O(1) per character, independently of the number of strings.
+
+    Args:
+        strings: Strings to match.
+    """
+
+    INITIAL_STATE = 0
+
+    def __init__(self, strings: Sequence[str]):
+        self.strings = [s for s in strings if s]
+        self.max_length = max((len(s) for s in self.strings), default=0)
+        # transitions of the trie of the strings
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # whether a string ends at the node, directly or as a suffix of the node
+        self._is_match: List[bool] = [False]
+
+        for string in self.strings:
+            node = 0
+            for char in string:
+                if char not in self._goto[node]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._is_match.append(False)
+                    self._goto[node][char] = len(self._goto) - 1
+                node = self._goto[node][char]
+            self._is_match[node] = True
+
+        # failure links in breadth first order
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._is_match[child] = self._is_match[child] or self._is_match[self._fail[child]]
+
+    def _step(self, state: int, char: str) -> int:
+        while state and char not in self._goto[state]:
+            state = self._fail[state]
+        return self._goto[state].get(char, 0)
+
+    def feed(self, state: int, text: str) -> Tuple[int, int]:
+        """
+        Feeds text to a stream.
+
+        Args:
+            state: State of the stream.
+            text: Text to feed.
+
+        Returns:
+            The new state of the stream and the position in `text` after the end of the first match, or -1 if no
+            string ends in `text`.
+        """
+        match_end = -1
+        for i, char in enumerate(text):
+            state = self._step(state, char)
+            if match_end < 0 and self._is_match[state]:
+                match_end = i + 1
+        return state, match_end
+
+
+class StopStringChecker:
+    """
+    Checks whether the sequences of a batch end with one of the end strings, token by token.
+
+    An end string is detected as soon as it is contained in the text generated so far, including when the token
+    completing it has extra characters after it, and when it starts in the prompt.
+
+    Args:
+        tokenizer: Tokenizer with an `ids_to_text` method.
+        end_strings: End strings to detect.
+        prompts: Token ids of the prompt of every sequence.
+    """
+
+    def __init__(self, tokenizer, end_strings: Sequence[str], prompts: Sequence[Sequence[int]]):
+        self.tokenizer = tokenizer
+        self.matcher = StopStringMatcher(end_strings)
+        self.detokenizers = [IncrementalDetokenizer(tokenizer, prompt_ids) for prompt_ids in prompts]
+        self.states = []
+        for prompt_ids in prompts:
+            state = StopStringMatcher.INITIAL_STATE
+            if prompt_ids and self.matcher.max_length > 1:
+                # only the end of the prompt can be part of an end string completed by a generated token
+                prompt_text = tokenizer.ids_to_text(list(prompt_ids))
+                state, _ = self.matcher.feed(state, prompt_text[-(self.matcher.max_length - 1) :])
+            self.states.append(state)
+
+    def add_tokens(self, token_ids: Sequence[int]) -> List[bool]:
+        """
+        Adds the next token of every sequence.
+
+        Returns:
+            Whether an end string was completed by the token, for every sequence.
+        """
+        is_end = []
+        for i, token_id in enumerate(token_ids):
+            text = self.detokenizers[i].add_token(token_id)
+            self.states[i], match_end = self.matcher.feed(self.states[i], text)
+            is_end.append(match_end >= 0)
+        return is_end
@@ -0,0 +1,616 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Continuous batching of text generation requests.
+
+`ContinuousBatchingScheduler` queues incoming requests and runs them in a shared generation batch. At every token
+boundary, finished sequences leave the batch and queued requests join it, so short requests do not wait for long
+ones and the batch stays full under load. The model is wrapped in a `GenerationEngine`, which computes the logits of
+the next token of a list of sequences of any lengths.
+"""
+
+import itertools
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+from nemo.collections.nlp.modules.common.logits_processors import get_logits_processors
+from nemo.collections.nlp.modules.common.stop_strings import IncrementalDetokenizer, StopStringChecker
+from nemo.collections.nlp.modules.common.text_generation_strategy import (
+    END_OF_SEQ,
+    _check_multi_token_steps,
+    model_inference_strategy_dispatcher,
+)
+from nemo.utils import logging
+
+try:
+    from megatron.core import parallel_state, tensor_parallel
+
+    HAVE_MEGATRON_CORE = True
+
+except (ImportError, ModuleNotFoundError):
+
+    HAVE_MEGATRON_CORE = False
+
+__all__ = [
+    "GenerationRequest",
+    "GenerationEngine",
+    "MegatronGPTGenerationEngine",
+    "ContinuousBatchingScheduler",
+]
+
+_request_ids = itertools.count()
+
+
+@dataclass
+class GenerationRequest:
+    """
+    Generation of a single sequence.
+
+    The sampling parameters have the same meaning as the arguments of `text_generation_utils.generate`.
+    The scheduler fills in the generated tokens, the timings and the result of `future`. With `stream`, the text of
+    the generated tokens is also put into `text_queue` as it is generated, see `iter_text`.
+    """
+
+    prompt_ids: List[int]
+    tokens_to_generate: int = 64
+    temperature: float = 1.0
+    top_k: int = 0
+    top_p: float = 0.9
+    greedy: bool = False
+    repetition_penalty: float = 1.0
+    min_tokens_to_generate: int = 0
+    end_strings: List[str] = field(default_factory=lambda: [END_OF_SEQ])
+    stream: bool = False
+    request_id: int = field(default_factory=lambda: next(_request_ids))
+    generated_ids: List[int] = field(default_factory=list)
+    arrival_time: Optional[float] = None
+    admission_time: Optional[float] = None
+    token_times: List[float] = field(default_factory=list)
+    finish_time: Optional[float] = None
+    future: Future = field(default_factory=Future, repr=False)
+    text_queue: queue.Queue = field(default_factory=queue.Queue, repr=False)
+    cancelled: bool = False
+
+    @property
+    def token_ids(self) -> List[int]:
+        return self.prompt_ids + self.generated_ids
+
+    def cancel(self):
+        """
+        Cancels the request. A queued request is never run, and a running request is removed from the batch at the
+        next step, with the tokens generated so far as result.
+        """
+        self.cancelled = True
+        self.future.cancel()
+
+    def iter_text(self, timeout: Optional[float] = None) -> Iterator[str]:
+        """
+        Yields the text of the generated tokens as it is generated, until the request is finished.
+        Requires `stream`. Raises the exception of the request if its generation failed.
+
+        Args:
+            timeout: Maximum time to wait for the next text in seconds, `queue.Empty` is raised after it.
+        """
+        if not self.stream:
+            raise ValueError("The text of a request is only streamed with `stream=True`")
+        while True:
+            text = self.text_queue.get(timeout=timeout)
+            if text is None:
+                break
+            yield text
+        if self.exception() is not None:
+            raise self.exception()
+
+    def exception(self) -> Optional[BaseException]:
+        """Returns the exception of the request if its generation failed, None otherwise."""
+        if not self.future.done() or self.future.cancelled():
+            return None
+        return self.future.exception()
+
+    def get_timings(self) -> Dict[str, Optional[float]]:
+        """Returns the latencies of the request in seconds."""
+        inter_token = np.diff(self.token_times)
+        return {
+            "queue_time": self.admission_time - self.arrival_time,
+            "time_to_first_token": self.token_times[0] - self.arrival_time if self.token_times else None,
+            "inter_token_latency": float(np.mean(inter_token)) if len(inter_token) else None,
+            "total_time": self.finish_time - self.arrival_time,
+        }
+
+
+class GenerationEngine(ABC):
+    """Computes the logits of the next token of a batch of sequences."""
+
+    # maximum length of a sequence, including the prompt
+    max_sequence_length: Optional[int] = None
+    # maximum number of sequences generated at the same time, None for no limit
+    max_batch_size: Optional[int] = None
+
+    def __init__(self, tokenizer):
+        self.tokenizer = tokenizer
+
+    @abstractmethod
+    def forward(self, sequences: List[List[int]], sequence_ids: List[int]) -> torch.Tensor:
+        """
+        Args:
+            sequences: Token ids of every sequence, the sequences may have different lengths.
+            sequence_ids: Ids of the sequences, which are the same at every step of a sequence. An engine with a
+                key-value memory only runs the tokens of a sequence which were not run at its previous steps.
+
+        Returns:
+            [batch_size, vocab_size] logits of the next token of every sequence.
+        """
+        raise NotImplementedError
+
+    def release(self, sequence_id: int):
+        """Frees the memory of a sequence which left the batch."""
+        pass
+
+    def get_end_of_generation_tokens_and_strings(self, end_strings: List[str]) -> Tuple[Set[int], List[str]]:
+        """
+        Returns the tokens ending the generation, and the end strings which have to be matched in the text.
+        """
+        end_strings = [end_string for end_string in end_strings if end_string != END_OF_SEQ]
+        return {self.tokenizer.eos_id}, end_strings
+
+
+def _gather_aligned_memory(
+    memory: torch.Tensor, slots: torch.Tensor, lengths: torch.Tensor, end: int
+) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    Gathers the key-value memory of sequences of different lengths, with their last positions aligned.
+
+    Args:
+        memory: [max_sequence_length, max_batch_size, ...] memory of all slots, the position p of a sequence is
+            stored at [p, slot].
+        slots: [batch_size] slots of the sequences.
+        lengths: [batch_size] number of positions of every sequence in the memory, at most `end`.
+        end: Position of the next token of all sequences in the gathered memory.
+
+    Returns:
+        A tuple `(gathered, padding)` with the [end + 1, batch_size, ...] memory whose position `end - lengths[i] + p`
+        is the position p of the sequence i, and the [batch_size, end + 1] mask of the positions before the sequences.
+    """
+    positions = torch.arange(end + 1, device=memory.device)
+    # position of the sequences stored at every gathered position, negative before the sequences
+    source = positions.unsqueeze(1) - (end - lengths).unsqueeze(0)
+    padding = (source < 0).t()
+    gathered = memory[source[:end].clamp(min=0), slots.unsqueeze(0)]
+    return torch.cat([gathered, gathered.new_empty((1,) + gathered.shape[1:])]), padding
+
+
+class MegatronGPTGenerationEngine(GenerationEngine):
+    """
+    Engine of a Megatron GPT model, without model parallelism.
+
+    Every sequence of the batch has a slot in a key-value memory of `max_batch_size` sequences. The prompt of a
+    sequence joining the batch is run once, and its keys and values are stored in its slot. The next steps only
+    run the last token of every sequence, with the memory of the sequences gathered so that their last tokens are
+    at the same position, and the positions before the shorter sequences masked. The keys and values of the new
+    tokens are then written back to the slots.
+
+    It requires the NeMo transformer (`mcore_gpt=False`) without flash attention, whose attention applies the
+    attention mask of every sequence at every step.
+
+    Args:
+        model: The GPT model.
+        inference_strategy: Text generation strategy of the model, defaults to the strategy of the model class.
+        max_batch_size: Number of slots of the key-value memory.
+        max_sequence_length: Maximum length of a sequence, defaults to the sequence length of the model.
+    """
+
+    def __init__(
+        self, model, inference_strategy=None, max_batch_size: int = 8, max_sequence_length: Optional[int] = None
+    ):
+        super().__init__(model.tokenizer)
+        if parallel_state.get_tensor_model_parallel_world_size() > 1 or (
+            parallel_state.get_pipeline_model_parallel_world_size() > 1
+        ):
+            raise ValueError("Continuous batching does not support model parallelism")
+        _check_multi_token_steps(model, "Continuous batching")
+        if model.cfg.get('use_flash_attention', False):
+            raise ValueError("Continuous batching does not support flash attention, which ignores the attention mask")
+        self.model = model
+        self.inference_strategy = inference_strategy or model_inference_strategy_dispatcher(model)
+        self.max_batch_size = max_batch_size
+        self.max_sequence_length = self.inference_strategy.clip_max_len(
+            max_sequence_length or model.cfg.encoder_seq_length + 1
+        )
+        # key and value memory of every attention layer [max_sequence_length, max_batch_size, ...]
+        self._memory = None
+        self._free_slots = list(range(max_batch_size - 1, -1, -1))
+        self._slots: Dict[int, int] = {}
+        # number of positions of every sequence in the memory
+        self._lengths: Dict[int, int] = {}
+
+    def _run_model(self, tokens, position_ids, attention_mask, set_memory: bool, memory_length: int) -> torch.Tensor:
+        # the model is called directly, since the forward step of the model only keeps the attention mask of the
+        # first sequence of the batch
+        forward_model = self.inference_strategy.forward_model
+        if isinstance(forward_model, list):
+            forward_model = forward_model[0]
+        output = forward_model(
+            tokens,
+            position_ids,
+            attention_mask,
+            set_inference_key_value_memory=set_memory,
+            inference_max_sequence_len=memory_length,
+        )
+        return tensor_parallel.gather_from_tensor_model_parallel_region(output)
+
+    def _run_prompts(self, prompts: List[List[int]], sequence_ids: List[int]) -> torch.Tensor:
+        """Runs the prompts of the sequences joining the batch, and stores their memory in free slots."""
+        if len(prompts) > len(self._free_slots):
+            raise ValueError(f"The key-value memory only has {self.max_batch_size} slots")
+        batch_size = len(prompts)
+        lengths = [len(prompt) for prompt in prompts]
+        max_length = max(lengths)
+        tokens = torch.full((batch_size, max_length), self.tokenizer.eos_id, dtype=torch.long)
+        for i, prompt in enumerate(prompts):
+            tokens[i, : lengths[i]] = torch.tensor(prompt, dtype=torch.long)
+        tokens = tokens.cuda()
+        # padding is at the end of the prompts, so the causal mask keeps it out of the attended tokens
+        self.inference_strategy.init_batch(tokens, max_length, compute_attention_mask=True)
+        logits = self._run_model(
+            tokens,
+            self.inference_strategy.position_ids,
+            self.inference_strategy.attention_mask,
+            set_memory=True,
+            memory_length=max_length,
+        )
+
+        layers = self.inference_strategy._get_attention_layers()
+        if self._memory is None:
+            self._memory = [
+                tuple(
+                    memory.new_empty((self.max_sequence_length, self.max_batch_size) + tuple(memory.shape[2:]))
+                    for memory in (layer.inference_key_memory, layer.inference_value_memory)
+                )
+                for layer in layers
+            ]
+        for i, sequence_id in enumerate(sequence_ids):
+            slot = self._free_slots.pop()
+            self._slots[sequence_id] = slot
+            self._lengths[sequence_id] = lengths[i]
+            for layer, (key_memory, value_memory) in zip(layers, self._memory):
+                key_memory[: lengths[i], slot] = layer.inference_key_memory[: lengths[i], i]
+                value_memory[: lengths[i], slot] = layer.inference_value_memory[: lengths[i], i]
+        last_positions = torch.tensor(lengths, device=logits.device) - 1
+        return logits[torch.arange(batch_size, device=logits.device), last_positions]
+
+    def _run_last_tokens(self, sequences: List[List[int]], sequence_ids: List[int]) -> torch.Tensor:
+        """Runs the last token of every sequence of the batch with the memory of its previous tokens."""
+        for sequence, sequence_id in zip(sequences, sequence_ids):
+            if len(sequence) != self._lengths[sequence_id] + 1:
+                raise ValueError(
+                    f"Sequence {sequence_id} has {len(sequence)} tokens, but {self._lengths[sequence_id]} are in "
+                    "the key-value memory"
+                )
+        device = torch.cuda.current_device()
+        batch_size = len(sequences)
+        slots = torch.tensor([self._slots[sequence_id] for sequence_id in sequence_ids], device=device)
+        lengths = torch.tensor([self._lengths[sequence_id] for sequence_id in sequence_ids], device=device)
+        end = max(self._lengths[sequence_id] for sequence_id in sequence_ids)
+
+        for layer, (key_memory, value_memory) in zip(self.inference_strategy._get_attention_layers(), self._memory):
+            layer.inference_key_memory, padding = _gather_aligned_memory(key_memory, slots, lengths, end)
+            layer.inference_value_memory, _ = _gather_aligned_memory(value_memory, slots, lengths, end)
+            layer.inference_current_sequence_len = end
+        # the attention reads the row `end` of the mask, the positions before the sequences are masked
+        attention_mask = padding.view(batch_size, 1, 1, end + 1).expand(batch_size, 1, end + 1, end + 1)
+        tokens = torch.tensor([sequence[-1:] for sequence in sequences], dtype=torch.long, device=device)
+        logits = self._run_model(
+            tokens, lengths.view(batch_size, 1), attention_mask, set_memory=False, memory_length=end + 1
+        )
+
+        for layer, (key_memory, value_memory) in zip(self.inference_strategy._get_attention_layers(), self._memory):
+            key_memory[lengths, slots] = layer.inference_key_memory[end]
+            value_memory[lengths, slots] = layer.inference_value_memory[end]
+        for sequence_id in sequence_ids:
+            self._lengths[sequence_id] += 1
+        return logits[:, -1]
+
+    def forward(self, sequences, sequence_ids):
+        new = [i for i, sequence_id in enumerate(sequence_ids) if sequence_id not in self._slots]
+        running = [i for i, sequence_id in enumerate(sequence_ids) if sequence_id in self._slots]
+        logits = [None] * len(sequences)
+        with torch.no_grad():
+            for indices, run in [(new, self._run_prompts), (running, self._run_last_tokens)]:
+                if indices:
+                    output = run([sequences[i] for i in indices], [sequence_ids[i] for i in indices])
+                    for i, row in zip(indices, output):
+                        logits[i] = row
+        return torch.stack(logits)
+
+    def release(self, sequence_id):
+        if sequence_id in self._slots:
+            self._free_slots.append(self._slots.pop(sequence_id))
+            del self._lengths[sequence_id]
+
+    def get_end_of_generation_tokens_and_strings(self, end_strings):
+        eos_id = self.tokenizer.eos_id
+        if not end_strings or end_strings == [END_OF_SEQ]:
+            return {eos_id}, []
+        return self.inference_strategy._get_end_of_generation_tokens_and_strings(eos_id, end_strings)
+
+
+@dataclass
+class _ActiveSequence:
+    request: GenerationRequest
+    logits_processors: list
+    token_history: Optional[object]
+    end_tokens: Set[int]
+    stop_string_checker: Optional[StopStringChecker]
+    detokenizer: Optional[IncrementalDetokenizer]
+
+
+class ContinuousBatchingScheduler:
+    """
+    Runs generation requests with continuous batching.
+
+    Requests are submitted from any thread with `submit`, and are run by `step`, either called directly or by the
+    background thread started with `start`. At every step, queued requests are admitted in arrival order while the
+    batch has fewer than `max_batch_size` sequences, the engine computes the next token of all sequences, and finished
+    sequences are removed from the batch and their future is resolved.
+
+    Args:
+        engine: Engine computing the logits of the next token.
+        max_batch_size: Maximum number of sequences generated at the same time.
+        max_queue_size: Maximum number of queued requests, 0 for no limit. `submit` raises `queue.Full` when the queue
+            is full.
+        metrics_window: Number of most recent finished requests used for the latency metrics.
+    """
+
+    def __init__(
+        self, engine: GenerationEngine, max_batch_size: int = 8, max_queue_size: int = 0, metrics_window: int = 1000
+    ):
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be positive, got {max_batch_size}")
+        if engine.max_batch_size is not None and max_batch_size > engine.max_batch_size:
+            raise ValueError(
+                f"max_batch_size is {max_batch_size}, but the engine runs at most {engine.max_batch_size} sequences"
+            )
+        self.engine = engine
+        self.tokenizer = engine.tokenizer
+        self.max_batch_size = max_batch_size
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._active: List[_ActiveSequence] = []
+        self._finished_timings = []
+        self._metrics_window = metrics_window
+        self._num_steps = 0
+        self._num_batched_sequences = 0
+        self._num_generated_tokens = 0
+        self._num_finished = 0
+        self._metrics_lock = threading.Lock()
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    @property
+    def num_active(self) -> int:
+        return len(self._active)
+
+    @property
+    def num_queued(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, request: GenerationRequest) -> Future:
+        """
+        Queues a request.
+
+        Returns:
+            Future of the request, with the request itself as result once it is finished.
+        """
+        if not request.prompt_ids:
+            raise ValueError("The prompt of a request must not be empty")
+        if self.engine.max_sequence_length is not None and len(request.prompt_ids) >= self.engine.max_sequence_length:
+            raise ValueError(
+                f"The prompt has {len(request.prompt_ids)} tokens, but the maximum sequence length is "
+                f"{self.engine.max_sequence_length}"
+            )
+        request.arrival_time = time.perf_counter()
+        self._queue.put_nowait(request)
+        return request.future
+
+    def _admit(self, request: GenerationRequest):
+        request.admission_time = time.perf_counter()
+        vocab_size = getattr(self.tokenizer, "vocab_size", None)
+        end_tokens, end_strings = self.engine.get_end_of_generation_tokens_and_strings(request.end_strings)
+        logits_processors = get_logits_processors(
+            temperature=request.temperature,
+            top_k=request.top_k,
+            top_p=request.top_p,
+            repetition_penalty=request.repetition_penalty,
+            min_length=request.min_tokens_to_generate,
+            eos_id=self.tokenizer.eos_id,
+            vocab_size=vocab_size,
+            greedy=request.greedy,
+        )
+        stop_string_checker = None
+        if end_strings:
+            stop_string_checker = StopStringChecker(self.tokenizer, end_strings, prompts=[request.prompt_ids])
+        self._active.append(
+            _ActiveSequence(
+                request=request,
+                logits_processors=logits_processors,
+                token_history=None,
+                end_tokens=end_tokens,
+                stop_string_checker=stop_string_checker,
+                detokenizer=IncrementalDetokenizer(self.tokenizer, request.prompt_ids) if request.stream else None,
+            )
+        )
+
+    def _sample(self, logits: torch.Tensor) -> List[int]:
+        next_tokens = []
+        for i, sequence in enumerate(self._active):
+            processors = sequence.logits_processors
+            if sequence.token_history is None:
+                sequence.token_history = processors.make_history(1, logits.size(-1), logits.device)
+                if sequence.token_history is not None:
+                    prompt = torch.tensor([sequence.request.prompt_ids], dtype=torch.long, device=logits.device)
+                    sequence.token_history.add_prompt(prompt)
+            row_logits = processors(logits[i : i + 1].float(), sequence.token_history)
+            if sequence.request.greedy:
+                next_tokens.append(torch.argmax(row_logits, dim=-1))
+            else:
+                next_tokens.append(torch.multinomial(F.softmax(row_logits, dim=-1), num_samples=1).view(-1))
+        next_tokens = torch.cat(next_tokens)
+        for sequence, token in zip(self._active, next_tokens):
+            if sequence.token_history is not None:
+                sequence.token_history.add_tokens(token.view(1))
+        return next_tokens.tolist()
+
+    def _is_finished(self, sequence: _ActiveSequence, token_id: int) -> bool:
+        request = sequence.request
+        if token_id in sequence.end_tokens:
+            return True
+        if sequence.stop_string_checker is not None and sequence.stop_string_checker.add_tokens([token_id])[0]:
+            return True
+        if len(request.generated_ids) >= request.tokens_to_generate:
+            return True
+        max_length = self.engine.max_sequence_length
+        return max_length is not None and len(request.token_ids) >= max_length
+
+    def _finish(self, request: GenerationRequest, exception: Optional[Exception] = None):
+        request.finish_time = time.perf_counter()
+        if exception is not None:
+            request.future.set_exception(exception)
+        elif not request.future.cancelled():
+            # a request cancelled while queued has no result
+            with self._metrics_lock:
+                self._num_finished += 1
+                self._finished_timings.append(request.get_timings())
+                del self._finished_timings[: -self._metrics_window]
+            request.future.set_result(request)
+        if request.stream:
+            # the stream is closed after the result is set, so that its consumers can tell whether the request failed
+            request.text_queue.put(None)
+
+    def step(self) -> int:
+        """
+        Admits queued requests and generates the next token of all sequences of the batch.
+
+        Returns:
+            Number of sequences in the batch after the step.
+        """
+        for sequence in self._active:
+            if sequence.request.cancelled:
+                self.engine.release(sequence.request.request_id)
+                self._finish(sequence.request)
+        self._active = [sequence for sequence in self._active if not sequence.request.cancelled]
+
+        while len(self._active) < self.max_batch_size:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request.future.set_running_or_notify_cancel():
+                self._admit(request)
+            else:
+                self._finish(request)
+        if not self._active:
+            return 0
+
+        try:
+            logits = self.engine.forward(
+                [sequence.request.token_ids for sequence in self._active],
+                [sequence.request.request_id for sequence in self._active],
+            )
+            next_tokens = self._sample(logits)
+        except Exception as e:
+            logging.error(f"Generation step failed: {e}")
+            for sequence in self._active:
+                self.engine.release(sequence.request.request_id)
+                self._finish(sequence.request, exception=e)
+            self._active = []
+            return 0
+
+        now = time.perf_counter()
+        running = []
+        for sequence, token_id in zip(self._active, next_tokens):
+            sequence.request.generated_ids.append(token_id)
+            sequence.request.token_times.append(now)
+            if sequence.detokenizer is not None:
+                text = sequence.detokenizer.add_token(token_id)
+                if text:
+                    sequence.request.text_queue.put(text)
+            if self._is_finished(sequence, token_id):
+                self.engine.release(sequence.request.request_id)
+                self._finish(sequence.request)
+            else:
+                running.append(sequence)
+
+        with self._metrics_lock:
+            self._num_steps += 1
+            self._num_batched_sequences += len(self._active)
+            self._num_generated_tokens += len(self._active)
+        # finished sequences are evicted right away, their slots are filled at the next step
+        self._active = running
+        return len(self._active)
+
+    def run(self, poll_interval: float = 0.01):
+        """Runs steps until `stop` is called, waiting for requests while the batch is empty."""
+        while not self._stop_event.is_set():
+            if not self._active and self._queue.empty():
+                self._stop_event.wait(poll_interval)
+                continue
+            self.step()
+
+    def start(self):
+        """Starts running steps in a background thread."""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run, daemon=True, name="ContinuousBatchingScheduler")
+        self._thread.start()
+
+    def stop(self):
+        """Stops the background thread after the current step."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def get_metrics(self) -> Dict[str, float]:
+        """
+        Returns the queueing and token latency metrics of the most recent finished requests, in seconds,
+        and counters of the scheduler.
+        """
+        with self._metrics_lock:
+            timings = list(self._finished_timings)
+            metrics = {
+                "num_finished_requests": self._num_finished,
+                "num_generated_tokens": self._num_generated_tokens,
+                "num_steps": self._num_steps,
+                "mean_batch_size": self._num_batched_sequences / self._num_steps if self._num_steps else 0.0,
+                "num_active": len(self._active),
+                "num_queued": self.num_queued,
+            }
+        for name in ["queue_time", "time_to_first_token", "inter_token_latency", "total_time"]:
+            values = [t[name] for t in timings if t[name] is not None]
+            if not values:
+                continue
+            metrics[f"{name}_mean"] = float(np.mean(values))
+            for percentile in [50, 90, 99]:
+                metrics[f"{name}_p{percentile}"] = float(np.percentile(values, percentile))
+        return metrics
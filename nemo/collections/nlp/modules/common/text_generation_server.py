@@ -14,16 +14,24 @@
 """Utilities for generating text."""
 
 import json
+import queue
 import threading
 
+import numpy as np
 import torch
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from flask_restful import Api, Resource
 
 from nemo.collections.nlp.modules.common.retro_inference_strategies import (
     RetroModelTextGenerationStrategy,
     RetroQAModelTextGenerationStrategy,
 )
+from nemo.collections.nlp.modules.common.stop_strings import IncrementalDetokenizer
+from nemo.collections.nlp.modules.common.text_generation_scheduler import (
+    ContinuousBatchingScheduler,
+    GenerationRequest,
+    MegatronGPTGenerationEngine,
+)
 from nemo.collections.nlp.modules.common.text_generation_utils import generate
 from nemo.utils import logging
 
@@ -51,16 +59,23 @@ API_ALLOWED_KEYS = set(
 
 
 class MegatronGenerate(Resource):
-    def __init__(self, model, inference_strategy=None):
+    def __init__(self, model, inference_strategy=None, scheduler=None):
         self.model = model
         self.inference_strategy = inference_strategy
+        self.scheduler = scheduler
 
     @staticmethod
     def send_do_generate():
         choice = torch.cuda.LongTensor([GENERATE_NUM])
         torch.distributed.broadcast(choice, 0)
 
-    def put(self):
+    def parse_request(self):
+        """
+        Validates the arguments of the request.
+
+        Returns:
+            A dict of the generation arguments, or the error response if the request is not valid.
+        """
         logging.info("request IP: " + str(request.remote_addr))
         logging.info(json.dumps(request.get_json()))
         # check keys
@@ -134,7 +149,7 @@ class MegatronGenerate(Resource):
             if not (0.0 <= top_p <= 1.0):
                 return "top_p must be a positive number less than or equal to 1.0"
 
-        repetition_penalty = 1.2
+        repetition_penalty = 1.0
         if "repetition_penalty" in request.get_json():
             repetition_penalty = request.get_json()["repetition_penalty"]
             if not (type(repetition_penalty) == int or type(repetition_penalty) == float):
@@ -172,6 +187,65 @@ class MegatronGenerate(Resource):
             if not isinstance(compute_logprob, bool):
                 return "compute_logprob must be a boolean value"
 
+        return {
+            'sentences': sentences,
+            'task_ids': task_ids,
+            'tokens_to_generate': tokens_to_generate,
+            'all_probs': all_probs,
+            'temperature': temperature,
+            'add_BOS': add_BOS,
+            'greedy': greedy,
+            'top_k': top_k,
+            'top_p': top_p,
+            'repetition_penalty': repetition_penalty,
+            'end_strings': end_strings,
+            'min_tokens_to_generate': min_tokens_to_generate,
+            'neighbors': neighbors,
+            'compute_logprob': compute_logprob,
+        }
+
+    def put(self):
+        args = self.parse_request()
+        if not isinstance(args, dict):
+            return args
+        sentences = args['sentences']
+        task_ids = args['task_ids']
+        tokens_to_generate = args['tokens_to_generate']
+        all_probs = args['all_probs']
+        temperature = args['temperature']
+        add_BOS = args['add_BOS']
+        greedy = args['greedy']
+        top_k = args['top_k']
+        top_p = args['top_p']
+        repetition_penalty = args['repetition_penalty']
+        end_strings = args['end_strings']
+        min_tokens_to_generate = args['min_tokens_to_generate']
+        neighbors = args['neighbors']
+        compute_logprob = args['compute_logprob']
+
+        if self.scheduler is not None:
+            if task_ids is not None or neighbors is not None or compute_logprob or all_probs:
+                return (
+                    "task_ids, neighbors, compute_logprob and all_probs are not supported with continuous batching",
+                    400,
+                )
+            if not all(isinstance(s, str) for s in sentences):
+                return "sentences must be a list of strings with continuous batching", 400
+            return jsonify(
+                self.generate_with_scheduler(
+                    sentences,
+                    tokens_to_generate=tokens_to_generate,
+                    temperature=temperature,
+                    add_BOS=add_BOS,
+                    top_k=top_k,
+                    top_p=top_p,
+                    greedy=greedy,
+                    repetition_penalty=repetition_penalty,
+                    end_strings=end_strings,
+                    min_tokens_to_generate=min_tokens_to_generate,
+                )
+            )
+
         with lock:  # Need to get lock to keep multiple threads from hitting code
             MegatronGenerate.send_do_generate()  # Tell other ranks we're doing generate
             extra = {}
@@ -216,12 +290,251 @@ class MegatronGenerate(Resource):
                 output['retrieved'] = retrieved_doc
         return jsonify(output)
 
+    def generate_with_scheduler(self, sentences, add_BOS, **sampling_args):
+        """
+        Submits one request per sentence to the continuous batching scheduler, and waits for all of them.
+        The output has the same keys as the output of `generate`, except for the log probabilities,
+        and the latencies of every sentence in 'timings'.
+        """
+        tokenizer = self.model.tokenizer
+        futures = []
+        for sentence in sentences:
+            prompt_ids = tokenizer.text_to_ids(sentence)
+            if add_BOS:
+                prompt_ids = [tokenizer.bos_id] + prompt_ids
+            futures.append(self.scheduler.submit(GenerationRequest(prompt_ids=prompt_ids, **sampling_args)))
+        requests = [future.result() for future in futures]
+
+        output = {'sentences': [], 'tokens': [], 'logprob': None, 'token_ids': [], 'offsets': [], 'timings': []}
+        for request in requests:
+            token_ids = request.token_ids
+            words = [tokenizer.ids_to_tokens([token_id])[0] for token_id in token_ids]
+            output['sentences'].append(tokenizer.ids_to_text(token_ids))
+            output['tokens'].append(words)
+            output['token_ids'].append(token_ids)
+            output['offsets'].append([0] + np.cumsum([len(word) for word in words[:-1]]).tolist())
+            output['timings'].append(request.get_timings())
+        return output
+
+
+def _format_event(event):
+    return f"data: {json.dumps(event)}\n\n"
+
+
+class _BatchTextStreamer:
+    """
+    Stream callback of `generate`, which puts the text added to every sentence of the batch into a queue as
+    (index, text) items. Returns whether the generation was cancelled.
+    """
+
+    def __init__(self, tokenizer, text_queue, cancelled):
+        self.tokenizer = tokenizer
+        self.text_queue = text_queue
+        self.cancelled = cancelled
+        self.detokenizers = None
+        self.num_fed = None
+        self.is_done = None
+
+    def __call__(self, tokens, context_lengths):
+        if self.detokenizers is None:
+            context_lengths = context_lengths.tolist()
+            self.detokenizers = [
+                IncrementalDetokenizer(self.tokenizer, tokens[i, : context_lengths[i]].tolist())
+                for i in range(tokens.size(0))
+            ]
+            self.num_fed = context_lengths
+            self.is_done = [False] * tokens.size(0)
+        # rows with a longer context only start generating once their context is consumed
+        new_tokens = tokens[:, -1].tolist()
+        for i, token_id in enumerate(new_tokens):
+            if self.is_done[i] or self.num_fed[i] >= tokens.size(1):
+                continue
+            self.num_fed[i] += 1
+            if token_id == self.tokenizer.eos_id:
+                self.is_done[i] = True
+                continue
+            text = self.detokenizers[i].add_token(token_id)
+            if text:
+                self.text_queue.put((i, text))
+        return self.cancelled.is_set()
+
+
+class MegatronGenerateStream(MegatronGenerate):
+    """
+    Streams the generated text as server-sent events, with the same request as '/generate'.
+
+    Every event is a JSON object, either {"index": i, "text": ...} with the text added to the i-th sentence, or
+    {"done": true, "sentences": [...]} with the full sentences once the generation is finished, or
+    {"done": true, "error": ...} if the generation failed. Closing the connection cancels the generation.
+    """
+
+    def put(self):
+        args = self.parse_request()
+        if not isinstance(args, dict):
+            return args
+        if args['task_ids'] is not None or args['compute_logprob'] or args['all_probs']:
+            return "task_ids, compute_logprob and all_probs are not supported with streaming", 400
+        if not all(isinstance(s, str) for s in args['sentences']):
+            return "sentences must be a list of strings with streaming", 400
+
+        if self.scheduler is not None:
+            if args['neighbors'] is not None:
+                return "neighbors are not supported with continuous batching", 400
+            events = self.stream_with_scheduler(args)
+        else:
+            events = self.stream_with_generate(args)
+        return Response((_format_event(event) for event in events), mimetype='text/event-stream')
+
+    def stream_with_scheduler(self, args):
+        tokenizer = self.model.tokenizer
+        requests = []
+        for sentence in args['sentences']:
+            prompt_ids = tokenizer.text_to_ids(sentence)
+            if args['add_BOS']:
+                prompt_ids = [tokenizer.bos_id] + prompt_ids
+            requests.append(
+                GenerationRequest(
+                    prompt_ids=prompt_ids,
+                    tokens_to_generate=args['tokens_to_generate'],
+                    temperature=args['temperature'],
+                    top_k=args['top_k'],
+                    top_p=args['top_p'],
+                    greedy=args['greedy'],
+                    repetition_penalty=args['repetition_penalty'],
+                    min_tokens_to_generate=args['min_tokens_to_generate'],
+                    end_strings=args['end_strings'],
+                    stream=True,
+                )
+            )
+            self.scheduler.submit(requests[-1])
+
+        try:
+            pending = set(range(len(requests)))
+            while pending:
+                for i in sorted(pending):
+                    # the requests are generated together, so waiting on one of them does not delay the others
+                    text = requests[i].text_queue.get()
+                    if text is None:
+                        pending.remove(i)
+                        continue
+                    yield {'index': i, 'text': text}
+                    while True:
+                        try:
+                            text = requests[i].text_queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        if text is None:
+                            pending.remove(i)
+                            break
+                        yield {'index': i, 'text': text}
+            errors = [str(request.exception()) for request in requests if request.exception() is not None]
+            if errors:
+                yield {'done': True, 'error': errors[0]}
+            else:
+                yield {'done': True, 'sentences': [tokenizer.ids_to_text(request.token_ids) for request in requests]}
+        finally:
+            # the client closed the connection, or the generation is finished and this is a no-op
+            for request in requests:
+                request.cancel()
+
+    def stream_with_generate(self, args):
+        text_queue = queue.Queue()
+        cancelled = threading.Event()
+        streamer = _BatchTextStreamer(self.model.tokenizer, text_queue, cancelled)
+        result = {}
+
+        def run():
+            try:
+                with lock:
+                    MegatronGenerate.send_do_generate()
+                    extra = {}
+                    if self.inference_strategy is not None:
+                        extra['strategy'] = self.inference_strategy
+                        if isinstance(
+                            self.inference_strategy,
+                            (RetroModelTextGenerationStrategy, RetroQAModelTextGenerationStrategy),
+                        ):
+                            if args['neighbors'] is not None:
+                                self.inference_strategy.update_neighbors(args['neighbors'])
+                    result['output'] = generate(
+                        self.model,
+                        args['sentences'],
+                        args['tokens_to_generate'],
+                        False,
+                        args['temperature'],
+                        args['add_BOS'],
+                        args['top_k'],
+                        args['top_p'],
+                        args['greedy'],
+                        args['repetition_penalty'],
+                        end_strings=args['end_strings'],
+                        min_tokens_to_generate=args['min_tokens_to_generate'],
+                        stream_callback=streamer,
+                        **extra,
+                    )
+            except Exception as e:
+                logging.error(f"Streaming generation failed: {e}")
+                result['error'] = str(e)
+            finally:
+                text_queue.put(None)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = text_queue.get()
+                if item is None:
+                    break
+                yield {'index': item[0], 'text': item[1]}
+            if 'error' in result:
+                yield {'done': True, 'error': result['error']}
+            else:
+                yield {'done': True, 'sentences': result['output']['sentences']}
+        finally:
+            cancelled.set()
+
+
+class MegatronMetrics(Resource):
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+
+    def get(self):
+        return jsonify(self.scheduler.get_metrics())
+
 
 class MegatronServer(object):
-    def __init__(self, model, inference_strategy=None):
+    """
+    Text generation server.
+
+    Args:
+        model: The model.
+        inference_strategy: Text generation strategy of the model.
+        continuous_batching_max_batch_size: If > 0, concurrent requests are generated together with continuous
+            batching, with at most this many sequences in a batch, and the metrics of the scheduler are served at
+            '/metrics'. Otherwise, requests are generated one after the other.
+
+    The generated text is also streamed as server-sent events at '/generate_stream', see `MegatronGenerateStream`.
+    """
+
+    def __init__(self, model, inference_strategy=None, continuous_batching_max_batch_size=0):
         self.app = Flask(__name__, static_url_path='')
         api = Api(self.app)
-        api.add_resource(MegatronGenerate, '/generate', resource_class_args=[model, inference_strategy])
+        self.scheduler = None
+        if continuous_batching_max_batch_size > 0:
+            engine = MegatronGPTGenerationEngine(
+                model, inference_strategy, max_batch_size=continuous_batching_max_batch_size
+            )
+            self.scheduler = ContinuousBatchingScheduler(engine, max_batch_size=continuous_batching_max_batch_size)
+            self.scheduler.start()
+            api.add_resource(MegatronMetrics, '/metrics', resource_class_args=[self.scheduler])
+        api.add_resource(
+            MegatronGenerate, '/generate', resource_class_args=[model, inference_strategy, self.scheduler]
+        )
+        api.add_resource(
+            MegatronGenerateStream,
+            '/generate_stream',
+            resource_class_args=[model, inference_strategy, self.scheduler],
+        )
 
     def run(self, url, port=5000):
         self.app.run(url, threaded=True, port=port, debug=False)
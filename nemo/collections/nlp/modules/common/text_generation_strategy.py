@@ -17,12 +17,22 @@ import copy
 import os
 import re
 import warnings
-from typing import List, Set, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
 import torch
 
+from nemo.collections.nlp.modules.common.beam_search import BeamSearchDecoder, BeamSearchLanguageModel
 from nemo.collections.nlp.modules.common.lm_utils import pad_batch
+from nemo.collections.nlp.modules.common.logits_processors import LogitsProcessorList
+from nemo.collections.nlp.modules.common.megatron.attention import ParallelAttention
 from nemo.collections.nlp.modules.common.megatron.utils import get_ltor_masks_and_position_ids
+from nemo.collections.nlp.modules.common.prefix_cache import PrefixKVCache
+from nemo.collections.nlp.modules.common.speculative_decoding import (
+    IncrementalLanguageModel,
+    SpeculativeDecoder,
+    SpeculativeDecodingStats,
+)
+from nemo.collections.nlp.modules.common.stop_strings import StopStringChecker
 
 try:
     from apex.transformer.pipeline_parallel.utils import get_num_microbatches
@@ -33,6 +43,7 @@ except (ImportError, ModuleNotFoundError):
     HAVE_APEX = False
 
 try:
+    from megatron.core import parallel_state, tensor_parallel
     from megatron.core.pipeline_parallel.schedules import get_forward_backward_func
 
     HAVE_MEGATRON_CORE = True
@@ -61,6 +72,10 @@ class TextGenerationStrategy:
             )
             self.model.eval()
         self._end_of_generation_cache = None
+        self._reset_stop_string_checker()
+        # set by the generation loop when the context of the next generation may be read from a prefix cache,
+        # and cleared at its first step
+        self.use_prefix_cache = False
 
     def forward_step(self, batch, tensor_shape):
         fwd_bwd_function = get_forward_backward_func()
@@ -168,19 +183,45 @@ class TextGenerationStrategy:
         is_end = torch.isin(prev, torch.tensor(list(end_tokens), dtype=prev.dtype, device=prev.device))
 
         if end_strings_to_check:
-            # The loop below is inefficient (see warning in `_get_end_of_generation_tokens_and_strings()`)
-            # TODO In addition, we will not stop if the model generates an end string followed by extra characters,
-            # e.g., if `end_string` is "Done" and there exists a "Done!" token it could generate tokens
-            #       [..., ".", "Done!"]
-            # which would fail the `endswith("Done")` check. However, stopping when "Done!" is generated would not
-            # work either, since we would need to post-process the generated string to truncate the extra "!".
-            # ==> this is left for future work if there is a compelling use case requiring this feature.
-            for idx, token_seq in enumerate(tokens):
-                text = self.model.tokenizer.ids_to_text(token_seq.tolist())
-                is_end[idx] |= any(text.endswith(end_string) for end_string in end_strings_to_check)
+            # The text of every sequence is detokenized incrementally, so that checking the end strings does not
+            # depend on the length of the sequences. An end string followed by extra characters in the same token,
+            # e.g. "Done" in a "Done!" token, also stops the generation, and the extra characters are kept.
+            checker = self._get_stop_string_checker(tokens, end_strings_to_check)
+            is_end_string = checker.add_tokens(tokens[:, -1].tolist())
+            is_end |= torch.tensor(is_end_string, dtype=torch.bool, device=is_end.device)
 
         return is_end
 
+    def _get_stop_string_checker(self, tokens: torch.Tensor, end_strings: List[str]) -> StopStringChecker:
+        """
+        return the checker of the end strings of the current generation, which is created at the first step
+        Args:
+            tokens (torch.Tensor): the generated tokens so far
+            end_strings (List[str]): the list of end strings without associated special token
+        Returns:
+            the checker, with all tokens but the last one added
+        """
+        # `init_batch` resets the checker of the previous generation. Within a generation, one token is added at
+        # every step; otherwise a new checker is created with the previous tokens as prompts.
+        key = (tokens.size(0), tuple(end_strings))
+        if (
+            self._stop_string_checker is None
+            or self._stop_string_checker_key != key
+            or self._stop_string_checker_length != tokens.size(1) - 1
+        ):
+            self._stop_string_checker = StopStringChecker(
+                self.model.tokenizer, end_strings, prompts=tokens[:, :-1].tolist()
+            )
+            self._stop_string_checker_key = key
+        self._stop_string_checker_length = tokens.size(1)
+        return self._stop_string_checker
+
+    def _reset_stop_string_checker(self):
+        """drop the checker of the end strings of the previous generation, called by `init_batch`"""
+        self._stop_string_checker = None
+        self._stop_string_checker_key = None
+        self._stop_string_checker_length = None
+
     def post_generation_process(self, output):
         """
         At the end of the text generation, post process the results
@@ -250,10 +291,39 @@ class TextGenerationStrategy:
         return end_tokens, end_strings_to_check
 
 
+def _check_multi_token_steps(model, feature: str):
+    """
+    Raises a ValueError if the model cannot run several tokens at once after the first step of a generation, with
+    the key-value memory of the previous positions.
+    """
+    # the static inference of Megatron Core disables the attention mask once the key-value memory holds tokens
+    if model.cfg.get('mcore_gpt', False):
+        raise ValueError(f"{feature} does not support Megatron Core models (`mcore_gpt=True`)")
+    position_embedding_type = model.cfg.get('position_embedding_type', 'learned_absolute')
+    if position_embedding_type not in ['learned_absolute', 'rope']:
+        raise ValueError(f"{feature} does not support `{position_embedding_type}` position embeddings")
+
+
 class GPTModelTextGenerationStrategy(TextGenerationStrategy):
-    def __init__(self, model):
+    """
+    Text generation strategy of GPT models.
+
+    Args:
+        model: The GPT model.
+        prefix_cache: If given, the key-value memory of the contexts is cached, and the context of a generation is
+            only run through the model after its longest prefix found in the cache. The prefix is common to all the
+            sequences of a batch. It requires the NeMo transformer (`mcore_gpt=False`), since the static inference of
+            Megatron Core disables the attention mask once the key-value memory holds tokens.
+    """
+
+    def __init__(self, model, prefix_cache: Optional[PrefixKVCache] = None):
         super().__init__(model)
         self.forward_model = self.model.model
+        if prefix_cache is not None:
+            _check_multi_token_steps(self.model, "The prefix cache")
+        self.prefix_cache = prefix_cache
+        # tokens and context length of the generation whose context is added to the cache after the next forward step
+        self._prefix_cache_insertion = None
 
     def clip_max_len(self, maxlen: int) -> int:
         """ clip the max len based on the LM model max sequence length"""
@@ -266,6 +336,7 @@ class GPTModelTextGenerationStrategy(TextGenerationStrategy):
 
     def init_batch(self, context_tokens: torch.Tensor, context_length: int, compute_attention_mask: bool):
         """initialize the batch data before the inference steps."""
+        self._reset_stop_string_checker()
         # Move to GPU.
         tokenizer = self.model.tokenizer
         tokens = context_tokens.contiguous().cuda()
@@ -293,10 +364,19 @@ class GPTModelTextGenerationStrategy(TextGenerationStrategy):
         """
         # types2use = None
         if step == 0:
-            # Allocate memory for the entire context.
-            set_inference_key_value_memory = True
-            tokens2use = tokens[:, :context_length]
-            positions2use = self.position_ids[:, :context_length]
+            num_cached_positions = 0
+            if self.use_prefix_cache and self.prefix_cache is not None:
+                self.use_prefix_cache = False
+                num_cached_positions = self._load_cached_prefix(tokens, maxlen, context_length)
+                self._prefix_cache_insertion = (tokens, context_length)
+            if num_cached_positions > 0:
+                # The memory of the cached prefix is already allocated and filled.
+                set_inference_key_value_memory = False
+            else:
+                # Allocate memory for the entire context.
+                set_inference_key_value_memory = True
+            tokens2use = tokens[:, num_cached_positions:context_length]
+            positions2use = self.position_ids[:, num_cached_positions:context_length]
             # not using type2use. uncomment it if it is used
             # if type_ids is not None:
             #     types2use = type_ids[:, :context_length]
@@ -323,6 +403,271 @@ class GPTModelTextGenerationStrategy(TextGenerationStrategy):
         tensor_shape = [tokens2use.shape[1], micro_batch_size, self.model.cfg.hidden_size]
         return batch, tensor_shape
 
+    def forward_step(self, batch, tensor_shape):
+        output_tensor = super().forward_step(batch, tensor_shape)
+        if self._prefix_cache_insertion is not None:
+            tokens, context_length = self._prefix_cache_insertion
+            self._prefix_cache_insertion = None
+            layers = self._get_attention_layers()
+            inserted = set()
+            for i, token_ids in enumerate(tokens[:, :context_length].tolist()):
+                if tuple(token_ids) in inserted:
+                    continue
+                inserted.add(tuple(token_ids))
+                memory = [
+                    (layer.inference_key_memory[:context_length, i], layer.inference_value_memory[:context_length, i])
+                    for layer in layers
+                ]
+                self.prefix_cache.insert(token_ids, memory)
+        return output_tensor
+
+    def _get_attention_layers(self) -> List[ParallelAttention]:
+        models = self.forward_model if isinstance(self.forward_model, list) else [self.forward_model]
+        return [module for model in models for module in model.modules() if isinstance(module, ParallelAttention)]
+
+    def _load_cached_prefix(self, tokens: torch.Tensor, maxlen: int, context_length: int) -> int:
+        """
+        Fills the key-value memory of the attention layers with the longest cached prefix of the context.
+        Returns:
+            the number of cached positions, the last token of the context is always run through the model
+        """
+        num_cached_positions, memory = self.prefix_cache.match(tokens[0, : context_length - 1].tolist())
+        # all sequences share the position in the key-value memory, so the prefix must be common to all of them
+        if num_cached_positions > 0 and tokens.size(0) > 1:
+            is_common = (tokens[:, :num_cached_positions] == tokens[:1, :num_cached_positions]).all(dim=0)
+            num_cached_positions = int(is_common.long().cumprod(dim=0).sum().item())
+        # the caches of the model parallel ranks may differ when they evict different prefixes
+        model_parallel_group = parallel_state.get_model_parallel_group()
+        if torch.distributed.get_world_size(model_parallel_group) > 1:
+            num_cached_positions_tensor = torch.cuda.LongTensor([num_cached_positions])
+            torch.distributed.all_reduce(
+                num_cached_positions_tensor, op=torch.distributed.ReduceOp.MIN, group=model_parallel_group,
+            )
+            num_cached_positions = num_cached_positions_tensor.item()
+        if num_cached_positions == 0:
+            return 0
+
+        batch_size = tokens.size(0)
+        for layer, (key, value) in zip(self._get_attention_layers(), memory):
+            layer.inference_key_memory = layer._allocate_memory(maxlen, batch_size, key.dtype, key.device)
+            layer.inference_value_memory = layer._allocate_memory(maxlen, batch_size, value.dtype, value.device)
+            layer.inference_key_memory[:num_cached_positions] = key[:num_cached_positions].unsqueeze(1)
+            layer.inference_value_memory[:num_cached_positions] = value[:num_cached_positions].unsqueeze(1)
+            layer.inference_current_sequence_len = num_cached_positions
+        return num_cached_positions
+
+
+class _GPTIncrementalModel(IncrementalLanguageModel):
+    """
+    Runs the GPT model of a strategy on a part of the sequences, with the key-value memory of the previous positions.
+    The batch of the generation must be initialized with `init_batch`.
+    """
+
+    def __init__(self, strategy: GPTModelTextGenerationStrategy, max_length: int):
+        self.strategy = strategy
+        self.max_length = max_length
+
+    def forward(self, tokens: torch.Tensor, start: int, end: int) -> torch.Tensor:
+        strategy = self.strategy
+        batch_size = tokens.size(0)
+        if start > 0:
+            # the memory of the positions from `start` on is overwritten
+            for layer in strategy._get_attention_layers():
+                layer.inference_current_sequence_len = start
+        attention_mask_repeat = None
+        if strategy.attention_mask is not None:
+            attention_mask_repeat = torch.concat([strategy.attention_mask for _ in range(batch_size)])
+        setkey_value_array = torch.tensor([start == 0] * batch_size, device=torch.cuda.current_device())
+        len_array = torch.tensor([self.max_length] * batch_size, device=torch.cuda.current_device())
+        batch = [
+            tokens[:, start:end],
+            attention_mask_repeat,
+            strategy.position_ids[:, start:end],
+            setkey_value_array,
+            len_array,
+        ]
+        tensor_shape = [end - start, batch_size, strategy.model.cfg.hidden_size]
+        output = strategy.forward_step(batch, tensor_shape)
+        return tensor_parallel.gather_from_tensor_model_parallel_region(output[0]['logits'])
+
+
+class SpeculativeGPTModelTextGenerationStrategy(GPTModelTextGenerationStrategy):
+    """
+    Text generation strategy of GPT models with speculative decoding: a small draft model proposes the next tokens,
+    which are verified by the model in a single forward pass, see `speculative_decoding.SpeculativeDecoder`.
+    The generated tokens have the same distribution as with `GPTModelTextGenerationStrategy`.
+
+    The sampling parameters must not depend on the previous tokens, e.g. there is no repetition penalty, and the log
+    probabilities are not computed. Both models require the NeMo transformer (`mcore_gpt=False`), and pipeline
+    parallelism is not supported.
+
+    Args:
+        model: The GPT model.
+        draft_model: The draft GPT model, with the same tokenizer.
+        num_speculative_tokens: Number of tokens proposed by the draft model for every forward pass of the model.
+    """
+
+    def __init__(self, model, draft_model, num_speculative_tokens: int = 4):
+        super().__init__(model)
+        _check_multi_token_steps(model, "Speculative decoding")
+        _check_multi_token_steps(draft_model, "Speculative decoding")
+        if parallel_state.get_pipeline_model_parallel_world_size() > 1:
+            raise ValueError("Speculative decoding does not support pipeline parallelism")
+        self.draft_strategy = GPTModelTextGenerationStrategy(draft_model)
+        self.num_speculative_tokens = num_speculative_tokens
+        self.stats = SpeculativeDecodingStats()
+
+    def init_batch(self, context_tokens: torch.Tensor, context_length: int, compute_attention_mask: bool):
+        super().init_batch(context_tokens, context_length, compute_attention_mask)
+        self.draft_strategy.init_batch(context_tokens, context_length, compute_attention_mask)
+
+    def check_sampling_params(
+        self, greedy: bool, repetition_penalty: float, presence_penalty: float = 0.0, frequency_penalty: float = 0.0
+    ):
+        """
+        raise a ValueError naming the sampling parameter if a penalty depending on the previous tokens is set
+        Args:
+            greedy (bool): whether the most likely tokens are selected, which ignores the penalties
+            repetition_penalty (float): must be 1.0 unless greedy
+            presence_penalty (float): must be 0.0 unless greedy
+            frequency_penalty (float): must be 0.0 unless greedy
+        """
+        if greedy:
+            return
+        for name, value, no_penalty in [
+            ('repetition_penalty', repetition_penalty, 1.0),
+            ('presence_penalty', presence_penalty, 0.0),
+            ('frequency_penalty', frequency_penalty, 0.0),
+        ]:
+            if value != no_penalty:
+                raise ValueError(
+                    f"Speculative decoding does not support penalties depending on the previous tokens, "
+                    f"set `{name}` to {no_penalty} or use greedy decoding, got {value}"
+                )
+
+    def get_decoder(self, max_length: int, logits_processors: LogitsProcessorList, greedy: bool) -> SpeculativeDecoder:
+        """
+        return the decoder of a generation, whose batch is initialized with `init_batch`
+        Args:
+            max_length (int): the length of the sequences at the end of the generation
+            logits_processors (LogitsProcessorList): the processors of the logits of both models
+            greedy (bool): whether the most likely tokens are selected instead of being sampled
+        """
+        return SpeculativeDecoder(
+            target=_GPTIncrementalModel(self, max_length),
+            draft=_GPTIncrementalModel(self.draft_strategy, max_length),
+            num_speculative_tokens=self.num_speculative_tokens,
+            logits_processors=logits_processors,
+            vocab_size=self.model.tokenizer.vocab_size,
+            greedy=greedy,
+            stats=self.stats,
+        )
+
+    def get_metrics(self) -> Dict[str, float]:
+        """return the acceptance rate of the draft tokens, the throughput and the counters of all generations"""
+        return self.stats.as_dict()
+
+
+def _reorder_memory(memory: torch.Tensor, indices: torch.Tensor, length: int) -> torch.Tensor:
+    """
+    Selects the sequences `indices` of a key-value memory [max_sequence_length, batch_size, ...]. Only the first
+    `length` positions are copied, and the memory is reused when the batch size does not change.
+    """
+    reordered = memory[:length].index_select(1, indices)
+    if indices.size(0) == memory.size(1):
+        memory[:length] = reordered
+        return memory
+    new_memory = memory.new_empty((memory.size(0), indices.size(0)) + tuple(memory.shape[2:]))
+    new_memory[:length] = reordered
+    return new_memory
+
+
+class _GPTBeamSearchModel(_GPTIncrementalModel, BeamSearchLanguageModel):
+    """Runs the GPT model of a beam search strategy, whose key-value memory is reordered with the beams."""
+
+    def reorder(self, indices: torch.Tensor, length: int):
+        self.strategy.reorder_batch(indices, length)
+
+
+class BeamSearchGPTModelTextGenerationStrategy(GPTModelTextGenerationStrategy):
+    """
+    Text generation strategy of GPT models with beam search, see `beam_search.BeamSearchDecoder`. The beams of all
+    prompts are generated as one batch, and the key-value memory is reordered when the beams are selected.
+
+    The logits processors must not sample, e.g. there is no temperature or top-k, and the log probabilities are not
+    computed. Pipeline parallelism is not supported.
+
+    Args:
+        model: The GPT model.
+        beam_size: Number of beams of every prompt.
+        beam_alpha: Exponent of the length penalty, 0 to compare the sums of the log probabilities.
+        num_return_sequences: Number of best sequences returned for every prompt, at most `beam_size`.
+    """
+
+    def __init__(self, model, beam_size: int = 4, beam_alpha: float = 0.0, num_return_sequences: int = 1):
+        super().__init__(model)
+        if parallel_state.get_pipeline_model_parallel_world_size() > 1:
+            raise ValueError("Beam search does not support pipeline parallelism")
+        if not 1 <= num_return_sequences <= beam_size:
+            raise ValueError(
+                f"num_return_sequences must be between 1 and beam_size={beam_size}, got {num_return_sequences}"
+            )
+        self.beam_size = beam_size
+        self.beam_alpha = beam_alpha
+        self.num_return_sequences = num_return_sequences
+        # scores of the sequences of the last generation [batch_size, num_return_sequences]
+        self.scores = None
+
+    def reorder_batch(self, indices: torch.Tensor, length: int):
+        """
+        select the sequences of the batch during the generation, the sequence i becomes the previous sequence
+        indices[i]
+        Args:
+            indices (torch.Tensor): the indices of the previous sequences, which may be repeated
+            length (int): the number of valid positions of the key-value memory
+        """
+        self.position_ids = self.position_ids[indices]
+        if self.model.mcore_gpt:
+            inference_params = self.model.inference_params
+            for layer_number, (key, value) in inference_params.key_value_memory_dict.items():
+                inference_params.key_value_memory_dict[layer_number] = (
+                    _reorder_memory(key, indices, length),
+                    _reorder_memory(value, indices, length),
+                )
+            inference_params.max_batch_size = indices.size(0)
+        else:
+            for layer in self._get_attention_layers():
+                layer.inference_key_memory = _reorder_memory(layer.inference_key_memory, indices, length)
+                layer.inference_value_memory = _reorder_memory(layer.inference_value_memory, indices, length)
+
+    def get_decoder(
+        self, max_length: int, logits_processors: LogitsProcessorList, end_token_ids: Set[int]
+    ) -> BeamSearchDecoder:
+        """
+        return the decoder of a generation, whose batch is initialized with `init_batch`
+        Args:
+            max_length (int): the length of the sequences at the end of the generation
+            logits_processors (LogitsProcessorList): the processors of the logits
+            end_token_ids (Set[int]): the tokens which end a sequence
+        """
+        tokenizer = self.model.tokenizer
+        return BeamSearchDecoder(
+            model=_GPTBeamSearchModel(self, max_length),
+            beam_size=self.beam_size,
+            end_token_ids=end_token_ids,
+            length_penalty=self.beam_alpha,
+            num_return_sequences=self.num_return_sequences,
+            logits_processors=logits_processors,
+            vocab_size=tokenizer.vocab_size,
+            pad_id=tokenizer.eos_id,
+        )
+
+    def post_generation_process(self, output):
+        output = super().post_generation_process(output)
+        if self.scores is not None:
+            output['beam_scores'] = self.scores.view(-1).tolist()
+        return output
+
 
 def neva_process_prompts(prompt, tokenizer, multimodal_cfg, num_media_latents, conv_template):
     from nemo.collections.multimodal.data.neva.neva_dataset import (
@@ -415,6 +760,7 @@ class NevaModelTextGenerationStrategy(TextGenerationStrategy):
 
     def init_batch(self, context_tokens: torch.Tensor, context_length: int, compute_attention_mask: bool):
         """initialize the batch data before the inference steps."""
+        self._reset_stop_string_checker()
         # Move to GPU.
         tokenizer = self.model.tokenizer
         tokens = context_tokens.contiguous().cuda()
@@ -511,6 +857,7 @@ class PromptLearningModelTextGenerationStrategy(TextGenerationStrategy):
 
     def init_batch(self, context_tokens: torch.Tensor, context_length: int, compute_attention_mask: bool):
         """initialize the batch data before the inference steps."""
+        self._reset_stop_string_checker()
         # Move to GPU.
         tokenizer = self.model.tokenizer
         tokens = context_tokens.contiguous().cuda()
@@ -602,6 +949,17 @@ def model_inference_strategy_dispatcher(model, **args):
     if isinstance(model, MegatronGPTPromptLearningModel):
         return PromptLearningModelTextGenerationStrategy(model, **args)
     elif isinstance(model, MegatronGPTModel):
+        if args.get('draft_model') is not None:
+            return SpeculativeGPTModelTextGenerationStrategy(
+                model, args['draft_model'], num_speculative_tokens=args.get('num_speculative_tokens', 4)
+            )
+        if args.get('beam_size', 1) > 1:
+            return BeamSearchGPTModelTextGenerationStrategy(
+                model,
+                beam_size=args['beam_size'],
+                beam_alpha=args.get('beam_alpha', 0.0),
+                num_return_sequences=args.get('num_return_sequences', 1),
+            )
         return GPTModelTextGenerationStrategy(model)
     elif isinstance(model, MegatronRetrievalModel):
         strategy_name = args['strategy']
@@ -31,8 +31,22 @@ from nemo.collections.multimodal.data.neva.conversation import (
     DEFAULT_IM_START_TOKEN,
     DEFAULT_IMAGE_PATCH_TOKEN,
 )
+from nemo.collections.nlp.modules.common.beam_search import compute_beam_search_len_penalty
+from nemo.collections.nlp.modules.common.logits_processors import (
+    LogitsProcessorList,
+    MinPLogitsProcessor,
+    TemperatureLogitsProcessor,
+    TokenRangeLogitsProcessor,
+    TopKLogitsProcessor,
+    TopPLogitsProcessor,
+    get_logits_processors,
+)
 from nemo.collections.nlp.modules.common.megatron.utils import get_ltor_masks_and_position_ids
-from nemo.collections.nlp.modules.common.text_generation_strategy import model_inference_strategy_dispatcher
+from nemo.collections.nlp.modules.common.text_generation_strategy import (
+    BeamSearchGPTModelTextGenerationStrategy,
+    SpeculativeGPTModelTextGenerationStrategy,
+    model_inference_strategy_dispatcher,
+)
 from nemo.collections.nlp.modules.common.transformer.text_generation import LengthParam, OutputType, SamplingParam
 from nemo.utils import AppState
 
@@ -137,6 +151,10 @@ def megatron_gpt_generate(model, inputs, tokenizer, length_params, sampling_para
                 repetition_penalty=sampling_params['repetition_penalty'],
                 end_strings=sampling_params['end_strings'],
                 min_tokens_to_generate=length_params['min_length'],
+                min_p=sampling_params.get('min_p', 0.0),
+                presence_penalty=sampling_params.get('presence_penalty', 0.0),
+                frequency_penalty=sampling_params.get('frequency_penalty', 0.0),
+                bad_words_ids=sampling_params.get('bad_words_ids', None),
                 **strategy_args,
             )
             return output
@@ -270,12 +288,6 @@ def get_batch(model, tokenizer, context_tokens):
     return tokens, attention_mask, position_ids
 
 
-def tab_logits(logits, min_id, max_id, filter_value=-float('Inf')):
-    logits[:, :min_id] = filter_value
-    logits[:, max_id:] = filter_value
-    return logits
-
-
 def top_k_logits(logits, top_k=0, top_p=0.0, filter_value=-float('Inf'), started=None):
     """
        This function has been mostly taken from huggingface conversational
@@ -290,46 +302,16 @@ def top_k_logits(logits, top_k=0, top_p=0.0, filter_value=-float('Inf'), started
         @started: a tensor of bools indicating whether the text generation starts for the batch
         returns the filtered logits
     """
+    filtered = logits
     if top_k > 0:
-        # Remove all tokens with a probability less than the
-        # last token of the top-k
-        indices_to_remove = logits < torch.topk(logits, top_k)[0][..., -1, None]
-        if started is not None:
-            for i in np.arange(indices_to_remove.size(0))[started.cpu().numpy()]:
-                logits[i, indices_to_remove[i]] = filter_value
-        else:
-            logits[indices_to_remove] = filter_value
-
+        filtered = TopKLogitsProcessor(top_k, filter_value=filter_value)(filtered.clone())
     if top_p > 0.0:
-        # Cconvert to 1D
-        sorted_logits, sorted_indices = torch.sort(logits, descending=True, dim=-1)
-        cumulative_probs = torch.cumsum(F.softmax(sorted_logits, dim=-1), dim=-1)
-
-        # Remove tokens with cumulative probability above the threshold
-        sorted_indices_to_remove = cumulative_probs > top_p
-        # Shift the indices to the right to keep also the first token
-        # above the threshold
-        sorted_indices_to_remove[..., 1:] = sorted_indices_to_remove[..., :-1].clone()
-        sorted_indices_to_remove[..., 0] = 0
-        if started is not None:
-            for i in np.arange(sorted_indices.size(0))[started.cpu().numpy()]:
-                indices_to_remove = sorted_indices[i][sorted_indices_to_remove[i]]
-                logits[i, indices_to_remove] = filter_value
-        else:
-            for i in range(sorted_indices.size(0)):
-                indices_to_remove = sorted_indices[i][sorted_indices_to_remove[i]]
-                logits[i, indices_to_remove] = filter_value
-
-    return logits
-
-
-def repetition_penalty(logits, repetition_penalty, used_tokens):
-    """ Implement the repetition penalty, check paper 
-    https://arxiv.org/pdf/1909.05858.pdf
-    """
-    if used_tokens is not None and repetition_penalty != 1.0:
-        logits_update = torch.gather(logits, 1, used_tokens)
-        logits = torch.scatter(logits, 1, used_tokens, logits_update / repetition_penalty)
+        filtered = TopPLogitsProcessor(top_p, filter_value=filter_value)(filtered.clone())
+    if started is None:
+        logits[:] = filtered
+    else:
+        # only filter the rows of the batch where the generation has started
+        logits[:] = torch.where(started.view(-1, 1), filtered, logits)
     return logits
 
 
@@ -359,6 +341,10 @@ def send_generate_info(
     repetition_penalty,
     min_tokens_to_generate,
     end_strings,
+    min_p=0.0,
+    presence_penalty=0.0,
+    frequency_penalty=0.0,
+    bad_words_ids=None,
 ):
     """
     Needs to be synced up with receive_generate_info
@@ -378,6 +364,9 @@ def send_generate_info(
         greedy,
         repetition_penalty,
         min_tokens_to_generate,
+        min_p,
+        presence_penalty,
+        frequency_penalty,
     ]
     input_info_tensor = torch.cuda.FloatTensor(input_info)
     torch.distributed.broadcast(input_info_tensor, src, model_parallel_group)
@@ -386,9 +375,9 @@ def send_generate_info(
     torch.distributed.broadcast(context_length_tensor, src, model_parallel_group)
     torch.distributed.broadcast(context_tokens_tensor, src, model_parallel_group)
 
-    # send end strings
+    # send end strings and bad words
     string_tensor = torch.as_tensor(
-        np.frombuffer(pickle.dumps(end_strings), dtype=np.int8), device=torch.cuda.current_device()
+        np.frombuffer(pickle.dumps((end_strings, bad_words_ids)), dtype=np.int8), device=torch.cuda.current_device()
     )
     size = torch.as_tensor([string_tensor.size(0)], device=torch.cuda.current_device(), dtype=torch.int64)
     torch.distributed.broadcast(size, src, model_parallel_group)
@@ -401,7 +390,7 @@ def receive_generate_info():
     """
     model_parallel_group = parallel_state.get_model_parallel_group()
     src = get_model_parallel_src_rank()
-    input_info_tensor = torch.empty(11, dtype=torch.float32, device=torch.cuda.current_device())
+    input_info_tensor = torch.empty(14, dtype=torch.float32, device=torch.cuda.current_device())
     torch.distributed.broadcast(input_info_tensor, src, model_parallel_group)
     batch_size = int(input_info_tensor[0].item())
     seq_len = int(input_info_tensor[1].item())
@@ -414,6 +403,9 @@ def receive_generate_info():
     greedy = bool(input_info_tensor[8].item())
     repetition_penalty = float(input_info_tensor[9].item())
     min_tokens_to_generate = int(input_info_tensor[10].item())
+    min_p = float(input_info_tensor[11].item())
+    presence_penalty = float(input_info_tensor[12].item())
+    frequency_penalty = float(input_info_tensor[13].item())
 
     context_length_tensor = torch.empty(batch_size, dtype=torch.int64, device=torch.cuda.current_device())
     context_tokens_tensor = torch.empty(batch_size, seq_len, dtype=torch.int64, device=torch.cuda.current_device())
@@ -427,7 +419,7 @@ def receive_generate_info():
     string_tensor = torch.empty(array_size[0], dtype=torch.int8, device=torch.cuda.current_device())
     torch.distributed.broadcast(string_tensor, src, model_parallel_group)
     bytes = string_tensor.cpu().numpy().tobytes()
-    end_strings = pickle.loads(bytes)
+    end_strings, bad_words_ids = pickle.loads(bytes)
 
     return (
         context_length_tensor,
@@ -442,6 +434,10 @@ def receive_generate_info():
         repetition_penalty,
         min_tokens_to_generate,
         end_strings,
+        min_p,
+        presence_penalty,
+        frequency_penalty,
+        bad_words_ids,
     )
 
 
@@ -458,10 +454,15 @@ def synced_generate(
     greedy=False,
     compute_attention_mask=True,
     compute_logprob=False,
-    repetition_penalty=1.2,
+    repetition_penalty=1.0,
     end_strings=[],
     min_tokens_to_generate=0,
     image_list=None,
+    min_p=0.0,
+    presence_penalty=0.0,
+    frequency_penalty=0.0,
+    bad_words_ids=None,
+    stream_callback=None,
 ):
     context_length = context_length_tensor.min().item()
     tokenizer = model.tokenizer
@@ -476,6 +477,52 @@ def synced_generate(
             compute_attention_mask=compute_attention_mask,
             temperature=temperature,
         )
+    elif isinstance(inference_strategy, BeamSearchGPTModelTextGenerationStrategy):
+        if compute_logprob or all_probs:
+            raise ValueError("Beam search does not compute the log probabilities")
+        # the sequences are only known at the end of the search, so there are no intermediate steps to stream
+        tokens = beam_search_sequence_batch(
+            model,
+            inference_strategy,
+            context_tokens_tensor,
+            context_length_tensor,
+            tokens_to_generate,
+            compute_attention_mask=compute_attention_mask,
+            end_strings=end_strings,
+            extra={
+                "repetition_penalty": repetition_penalty,
+                "min_tokens_to_generate": min_tokens_to_generate,
+                "presence_penalty": presence_penalty,
+                "frequency_penalty": frequency_penalty,
+                "bad_words_ids": bad_words_ids,
+            },
+        )
+        return tokens, None, None
+    elif isinstance(inference_strategy, SpeculativeGPTModelTextGenerationStrategy):
+        if compute_logprob or all_probs:
+            raise ValueError("Speculative decoding does not compute the log probabilities")
+        inference_strategy.check_sampling_params(greedy, repetition_penalty, presence_penalty, frequency_penalty)
+        batch_token_iterator = speculative_sample_sequence_batch(
+            model,
+            inference_strategy,
+            context_tokens_tensor,
+            context_length_tensor,
+            tokens_to_generate,
+            compute_attention_mask=compute_attention_mask,
+            temperature=temperature,
+            end_strings=end_strings,
+            extra={
+                "top_p": top_p,
+                "top_k": top_k,
+                "greedy": greedy,
+                "repetition_penalty": repetition_penalty,
+                "min_tokens_to_generate": min_tokens_to_generate,
+                "min_p": min_p,
+                "presence_penalty": presence_penalty,
+                "frequency_penalty": frequency_penalty,
+                "bad_words_ids": bad_words_ids,
+            },
+        )
     else:
         batch_token_iterator = sample_sequence_batch(
             model,
@@ -495,11 +542,20 @@ def synced_generate(
                 "greedy": greedy,
                 "repetition_penalty": repetition_penalty,
                 "min_tokens_to_generate": min_tokens_to_generate,
+                "min_p": min_p,
+                "presence_penalty": presence_penalty,
+                "frequency_penalty": frequency_penalty,
+                "bad_words_ids": bad_words_ids,
             },
         )
 
     for tokens, lengths, output_logits, full_logits in batch_token_iterator:
         context_length += 1
+        if stream_callback is not None and tokens is not None:
+            stop = stream_callback(tokens[:, :context_length], context_length_tensor)
+            # the other model parallel ranks cannot be told to stop
+            if stop and torch.distributed.get_world_size(parallel_state.get_model_parallel_group()) == 1:
+                break
 
     if parallel_state.is_pipeline_last_stage():
         src = parallel_state.get_pipeline_model_parallel_last_rank()
@@ -556,6 +612,11 @@ def generate(
     end_strings=['<|endoftext|>'],
     image_list=None,
     min_tokens_to_generate=0,
+    min_p=0.0,
+    presence_penalty=0.0,
+    frequency_penalty=0.0,
+    bad_words_ids=None,
+    stream_callback=None,
     **strategy_args,
 ) -> OutputType:
     """
@@ -571,7 +632,16 @@ def generate(
         greedy (bool):  Whether or not to use sampling ; use greedy decoding otherwise
         repetition_penalty (float): The parameter for repetition penalty. 1.0 means no penalty
         min_tokens_to_generate (int): The minimum length of the tokens to be generated
-        strategy_args, the extra arguments are treated as inference strategy arguments
+        min_p (float): If > 0, tokens with a probability less than min_p times the highest probability are not sampled
+        presence_penalty (float): Penalty subtracted from the logits of tokens which were already generated
+        frequency_penalty (float): Penalty subtracted from the logits of tokens per time they were already generated
+        bad_words_ids (List[List[int]]): token ids of sequences which must not be generated
+        stream_callback (Callable): if given, it is called after every generation step with the tokens so far
+            [batch_size, length] and the context lengths [batch_size], on the ranks where the tokens are available.
+            If it returns True and there is no model parallelism, the generation stops early.
+        strategy_args, the extra arguments are treated as inference strategy arguments, e.g. `draft_model` and
+            `num_speculative_tokens` for speculative decoding with GPT models, or `beam_size`, `beam_alpha` and
+            `num_return_sequences` for beam search with GPT models
         end_strings, a list of strings to stop generation when they are encountered in the output.
     Returns:
         OutputType: It generates the output in a dictionary type. It has the following keys:
@@ -581,6 +651,8 @@ def generate(
             full_logprob: List[Tensor], log prob of all the tokens in the vocab
             token_ids: List[Tensor], output sentence token ids
             offsets: List[List[int]]  # list of tokens start positions in text
+            beam_scores: List[float], with beam search, the scores of the sentences, the `num_return_sequences`
+                best sentences of every input being consecutive
     """
     if 'strategy' in strategy_args:
         inference_strategy = strategy_args['strategy']
@@ -608,6 +680,10 @@ def generate(
             repetition_penalty,
             min_tokens_to_generate,
             end_strings,
+            min_p=min_p,
+            presence_penalty=presence_penalty,
+            frequency_penalty=frequency_penalty,
+            bad_words_ids=bad_words_ids,
         )
     else:
         (
@@ -623,6 +699,10 @@ def generate(
             repetition_penalty,
             min_tokens_to_generate,
             end_strings,
+            min_p,
+            presence_penalty,
+            frequency_penalty,
+            bad_words_ids,
         ) = receive_generate_info()
 
     output = synced_generate(
@@ -642,6 +722,11 @@ def generate(
         end_strings=end_strings,
         min_tokens_to_generate=min_tokens_to_generate,
         image_list=image_list,
+        min_p=min_p,
+        presence_penalty=presence_penalty,
+        frequency_penalty=frequency_penalty,
+        bad_words_ids=bad_words_ids,
+        stream_callback=stream_callback,
     )
     special_tokens = set()
     if hasattr(tokenizer, 'pad_token') and tokenizer.pad_token is not None:
@@ -751,6 +836,8 @@ def sample_sequence_batch(
     with torch.no_grad():
         context_length = context_lengths.min().item()
         inference_strategy.init_batch(context_tokens, context_length, compute_attention_mask)
+        # the log probabilities of the whole context are needed, so none of it can be read from a prefix cache
+        inference_strategy.use_prefix_cache = not compute_logprob
         # added eos_id to support the function generate_samples_eval that passes
         # eos_id as an argument and needs termination when that id id found.
         eod_id = tokenizer.eos_id
@@ -760,7 +847,24 @@ def sample_sequence_batch(
         is_done = torch.zeros([batch_size]).byte().cuda()
         tokens = context_tokens
         output_logits = None
-        all_generated_indices = None  # used to track all generated indices
+        greedy = extra.get('greedy', False)
+        logits_processors = get_logits_processors(
+            temperature=temperature,
+            top_k=extra.get('top_k', 0),
+            top_p=extra.get('top_p', 0.9),
+            min_p=extra.get('min_p', 0.0),
+            repetition_penalty=extra.get('repetition_penalty', 1.0),
+            presence_penalty=extra.get('presence_penalty', 0.0),
+            frequency_penalty=extra.get('frequency_penalty', 0.0),
+            min_length=extra.get('min_tokens_to_generate', 0),
+            eos_id=eod_id,
+            bad_words_ids=extra.get('bad_words_ids', None),
+            # make sure it won't sample outside the vocab_size range
+            vocab_size=tokenizer.vocab_size,
+            greedy=greedy,
+        )
+        # tokens of the sequences, used by the processors depending on them, e.g. the repetition penalty
+        token_history = None
         # Generate enough tokens for the longest sequence
         maxlen = tokens_to_generate + context_lengths.max().item()
 
@@ -793,28 +897,19 @@ def sample_sequence_batch(
                     assert logits is not None
                     logits = logits.view(batch_size, -1)
 
-                # make sure it will generate at least min_length
-                min_length = extra.get('min_tokens_to_generate', 0)
-                if min_length > 0:
-                    within_min_length = (context_length - context_lengths) < min_length
-                    logits[within_min_length, eod_id] = -float('Inf')
-
-                # make sure it won't sample outside the vocab_size range
-                logits[:, tokenizer.vocab_size :] = -float('Inf')
+                if token_history is None:
+                    token_history = logits_processors.make_history(batch_size, logits.size(-1), logits.device)
+                    if token_history is not None:
+                        token_history.add_prompt(tokens[:, :context_length])
 
                 # started indicates whether the current token step passes the context_length, so we make sure not to overwrite the context tokens
-
                 started = context_lengths <= context_length
-                if extra.get('greedy', False):
+
+                # the logits of the rows which have not started are processed as well, their samples are discarded
+                logits = logits_processors(logits.float(), token_history)
+                if greedy:
                     prev = torch.argmax(logits, dim=-1).view(-1)
                 else:
-                    logits = logits.float()
-                    logits /= temperature
-                    # handle repetition penality
-                    logits = repetition_penalty(logits, extra.get('repetition_penalty', 1.2), all_generated_indices)
-                    logits = top_k_logits(
-                        logits, top_k=extra.get('top_k', 0), top_p=extra.get('top_p', 0.9), started=started
-                    )
                     probs = F.softmax(logits, dim=-1)
                     prev = torch.multinomial(probs, num_samples=1).view(-1)
 
@@ -830,6 +925,8 @@ def sample_sequence_batch(
 
                 # Insert either new predicted or next prompt token
                 tokens[:, context_length] = new_tokens
+                if token_history is not None:
+                    token_history.add_tokens(new_tokens, is_generated=started)
 
                 if compute_logprob:
                     if output_logits is None:
@@ -837,7 +934,6 @@ def sample_sequence_batch(
 
                         indices = torch.unsqueeze(tokens[:, 1 : context_length + 1], 2)
                         output_logits = torch.gather(output, 2, indices).squeeze(2)
-                        all_generated_indices = indices[:, :, 0]
                         if all_probs:
                             full_logits = output
                     else:
@@ -847,7 +943,6 @@ def sample_sequence_batch(
 
                         # TODO(rprenger) we're copying output_logits every time.  Should pre-allocate
                         output_logits = torch.cat([output_logits, new_output_logits], 1)
-                        all_generated_indices = torch.cat([all_generated_indices, indices[:, :, 0]], 1)
                         if all_probs:
                             full_logits = torch.cat([full_logits, output], 1)
 
@@ -899,6 +994,137 @@ def sample_sequence_batch(
                 break
 
 
+def speculative_sample_sequence_batch(
+    model,
+    inference_strategy,
+    context_tokens,
+    context_lengths,
+    tokens_to_generate,
+    compute_attention_mask=True,
+    temperature=None,
+    end_strings=['<|endoftext|>'],
+    extra={},
+):
+    """
+    Same as `sample_sequence_batch` with a `SpeculativeGPTModelTextGenerationStrategy`, which generates several tokens
+    per forward pass of the model. The tokens are still yielded one by one.
+    """
+    app_state = AppState()
+    micro_batch_size = context_tokens.shape[0]
+    _reconfigure_microbatch_calculator(
+        rank=app_state.global_rank,
+        rampup_batch_size=None,
+        global_batch_size=micro_batch_size,
+        micro_batch_size=micro_batch_size,
+        data_parallel_size=1,
+    )
+
+    tokenizer = model.tokenizer
+    with torch.no_grad():
+        context_length = context_lengths.min().item()
+        inference_strategy.init_batch(context_tokens, context_length, compute_attention_mask)
+        eod_id = tokenizer.eos_id
+        greedy = extra.get('greedy', False)
+        # the logits are truncated to the vocabulary by the decoder
+        logits_processors = get_logits_processors(
+            temperature=temperature,
+            top_k=extra.get('top_k', 0),
+            top_p=extra.get('top_p', 0.9),
+            min_p=extra.get('min_p', 0.0),
+            repetition_penalty=extra.get('repetition_penalty', 1.0),
+            presence_penalty=extra.get('presence_penalty', 0.0),
+            frequency_penalty=extra.get('frequency_penalty', 0.0),
+            min_length=extra.get('min_tokens_to_generate', 0),
+            eos_id=eod_id,
+            bad_words_ids=extra.get('bad_words_ids', None),
+            greedy=greedy,
+        )
+
+        batch_size = context_tokens.size(0)
+        is_done = torch.zeros([batch_size]).byte().cuda()
+        tokens = context_tokens
+        maxlen = tokens_to_generate + context_lengths.max().item()
+        maxlen = inference_strategy.clip_max_len(maxlen)
+        lengths = torch.ones([batch_size]).long().cuda() * maxlen
+
+        decoder = inference_strategy.get_decoder(maxlen, logits_processors, greedy)
+        for position in decoder.generate(tokens, context_lengths, maxlen):
+            started = context_lengths <= position
+            # Replace sampled tokens w/ done token if EOD has already been sampled
+            new_tokens = switch(tokens[:, position], eod_id, is_done)
+            tokens[:, position] = new_tokens
+
+            done_token = inference_strategy.end_of_generation_condition(
+                tokens[:, : position + 1], new_tokens, eod_id, end_strings
+            )
+            done_token = done_token.byte() & started.byte()
+
+            just_finished = (done_token & ~is_done).bool()
+            lengths[just_finished.view(-1)] = position
+            is_done = is_done | done_token
+            yield tokens, lengths, None, None
+
+            if torch.all(is_done):
+                break
+
+
+def beam_search_sequence_batch(
+    model,
+    inference_strategy,
+    context_tokens,
+    context_lengths,
+    tokens_to_generate,
+    compute_attention_mask=True,
+    end_strings=['<|endoftext|>'],
+    extra={},
+):
+    """
+    Generates the best sequences of every context with a `BeamSearchGPTModelTextGenerationStrategy`.
+    Returns:
+        the token ids [batch_size * num_return_sequences, max_length], the sequences of a context being consecutive
+        and sorted by score, and padded with the end of document token
+    """
+    app_state = AppState()
+    micro_batch_size = context_tokens.shape[0]
+    _reconfigure_microbatch_calculator(
+        rank=app_state.global_rank,
+        rampup_batch_size=None,
+        global_batch_size=micro_batch_size,
+        micro_batch_size=micro_batch_size,
+        data_parallel_size=1,
+    )
+
+    tokenizer = model.tokenizer
+    with torch.no_grad():
+        context_length = context_lengths.min().item()
+        inference_strategy.init_batch(context_tokens, context_length, compute_attention_mask)
+        eod_id = tokenizer.eos_id
+        end_tokens, end_strings_to_check = inference_strategy._get_end_of_generation_tokens_and_strings(
+            eod_id, end_strings
+        )
+        if end_strings_to_check:
+            raise ValueError(
+                f"Beam search only supports end strings which are single tokens, got {end_strings_to_check}"
+            )
+        # the beams are selected by their scores, so only the constraints and the penalties are applied,
+        # without the temperature and the filters of sampling
+        logits_processors = get_logits_processors(
+            repetition_penalty=extra.get('repetition_penalty', 1.0),
+            presence_penalty=extra.get('presence_penalty', 0.0),
+            frequency_penalty=extra.get('frequency_penalty', 0.0),
+            min_length=extra.get('min_tokens_to_generate', 0),
+            eos_id=eod_id,
+            bad_words_ids=extra.get('bad_words_ids', None),
+        )
+
+        maxlen = tokens_to_generate + context_lengths.max().item()
+        maxlen = inference_strategy.clip_max_len(maxlen)
+        decoder = inference_strategy.get_decoder(maxlen, logits_processors, end_tokens)
+        tokens, _, scores = decoder.search(context_tokens, context_lengths, maxlen)
+        inference_strategy.scores = scores
+        return tokens.view(-1, maxlen)
+
+
 def tab_sample_sequence_batch(
     model,
     inference_strategy,
@@ -962,6 +1188,12 @@ def tab_sample_sequence_batch(
 
         lengths = torch.ones([batch_size]).long().cuda() * maxlen
 
+        logits_processors = get_logits_processors(temperature=temperature)
+        # allowed tokens of every position in a row, the last one is the line break
+        token_range_processors = [TokenRangeLogitsProcessor(min_id, max_id) for min_id, max_id in tokenid_range]
+        eor_id = tokenizer.eor
+        token_range_processors.append(TokenRangeLogitsProcessor(min(eor_id, eod_id), max(eor_id, eod_id) + 1))
+
         while context_length < maxlen:
             batch, tensor_shape = inference_strategy.prepare_batch_at_step(
                 tokens, maxlen, micro_batch_size, counter, context_length, compute_attention_mask
@@ -976,18 +1208,9 @@ def tab_sample_sequence_batch(
                 logits = output[:, -1].view(batch_size, -1).contiguous()
                 token_in_row = (counter + offset) % tokens_per_row
                 logits = logits.float()
-                logits /= temperature
-                if token_in_row == tokens_per_row - 1:
-                    # line break
-                    eor_id = tokenizer.eor
-                    eod_id = tokenizer.eos_id
-                    min_id = min(eor_id, eod_id)
-                    max_id = max(eor_id, eod_id) + 1
-                    logits = tab_logits(logits, min_id, max_id)
-                else:
-                    # limit the range
-                    min_id, max_id = tokenid_range[token_in_row]
-                    logits = tab_logits(logits, min_id, max_id)
+                logits = logits_processors(logits)
+                # limit the range
+                logits = token_range_processors[token_in_row](logits)
                 probs = F.softmax(logits, dim=-1)
                 prev = torch.multinomial(probs, num_samples=1).view(-1)
                 started = context_lengths <= context_length
@@ -1073,9 +1296,9 @@ def sample_token_greedy(logits):
     return log_probs, token_ids
 
 
-def sample_token_topk(logits, top_k=0, top_p=0.0, temperature=1.0, filter_value=-float('Inf')):
+def sample_token_topk(logits, top_k=0, top_p=0.0, temperature=1.0, filter_value=-float('Inf'), min_p=0.0):
     """
-    Greedy sampling. Returns the token with the highest probability, and corresponding log_prob.
+    Top-k/top-p sampling. Returns a token sampled from the filtered distribution, and corresponding log_prob.
 
     Args:
         logits: [batch_size, vocab_size] - unnormalized log probabilities of the next token
@@ -1083,14 +1306,21 @@ def sample_token_topk(logits, top_k=0, top_p=0.0, temperature=1.0, filter_value=
         top_p: float - if > 0.0: only sample from a subset of candidates, where the cumulative probability
         temperature: float - temperature for sampling
         filter_value: float - value to set filtered tokens to
+        min_p: float - if > 0.0: only sample from tokens with a probability of at least min_p times the highest one
     
     Returns:
         log_probs: [batch_size] - log probabilities of the sampled tokens
         token_ids: [batch_size] - sampled token ids
     """
-    logits = logits.float()
-    logits /= temperature
-    logits = top_k_logits(logits, top_k=top_k, top_p=top_p, filter_value=filter_value)
+    logits_processors = LogitsProcessorList(
+        [
+            TemperatureLogitsProcessor(temperature),
+            TopKLogitsProcessor(top_k, filter_value=filter_value),
+            TopPLogitsProcessor(top_p, filter_value=filter_value),
+            MinPLogitsProcessor(min_p, filter_value=filter_value),
+        ]
+    )
+    logits = logits_processors(logits.float())
     log_probs = torch.nn.functional.log_softmax(logits, dim=-1)
 
     token_ids = torch.multinomial(log_probs.exp(), num_samples=1).view(-1)
@@ -1125,18 +1355,6 @@ def sample_token_topk_beam_search(logits: torch.Tensor, beam_size: int = 1, dim:
     return log_probs, token_ids
 
 
-def compute_beam_search_len_penalty(lengths: torch.Tensor, alpha: int) -> torch.Tensor:
-    """
-    Length penalty used in the beam search
-    Args:
-        lengths: lengths of decoded sequences
-        alpha: params of the penalty
-    Returns:
-         tensor with the penalty value
-    """
-    return ((5 + lengths) / 6).pow(alpha)
-
-
 def get_sampling_token_fn(sampling_method: str, sampling_kwargs: dict) -> Tuple[Callable, dict]:
     """
     Specifies the sampling function that takes in a tensor of logits [batch_size, vocab_size] and returns a tuple
@@ -1161,7 +1379,7 @@ def get_sampling_token_fn(sampling_method: str, sampling_kwargs: dict) -> Tuple[
     """
     all_default_sampling_kwargs = {
         'greedy-search': {},
-        'topkp-sampling': {'top_k': 0, 'top_p': 0.0, 'temperature': 1.0},
+        'topkp-sampling': {'top_k': 0, 'top_p': 0.0, 'temperature': 1.0, 'min_p': 0.0},
         'beam-search': {'beam_size': 1, 'beam_alpha': 0.0, 'keep_only_best_tokens': False, 'return_scores': False},
     }
 
@@ -1177,7 +1395,8 @@ def get_sampling_token_fn(sampling_method: str, sampling_kwargs: dict) -> Tuple[
         top_k = default_sampling_kwargs['top_k']
         top_p = default_sampling_kwargs['top_p']
         temperature = default_sampling_kwargs['temperature']
-        sampling_token_fn = partial(sample_token_topk, top_k=top_k, top_p=top_p, temperature=temperature)
+        min_p = default_sampling_kwargs['min_p']
+        sampling_token_fn = partial(sample_token_topk, top_k=top_k, top_p=top_p, temperature=temperature, min_p=min_p)
 
     elif sampling_method == "beam-search":
         beam_size = default_sampling_kwargs['beam_size']
@@ -0,0 +1,220 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import torch.utils.data
+
+from nemo.collections.asr.parts.utils.manifest_utils import read_manifest
+from nemo.collections.tts.parts.utils.codec_tokens import CodecTokens
+from nemo.collections.tts.parts.utils.tts_dataset_utils import (
+    filter_dataset_by_duration,
+    get_duration_bucket_sampler,
+    get_weighted_sampler,
+    stack_tensors,
+)
+from nemo.core.classes import Dataset
+from nemo.utils import logging
+from nemo.utils.decorators import experimental
+
+
+@dataclass
+class DatasetMeta:
+    manifest_path: Path
+    tokens_path: Path
+    sample_weight: float = 1.0
+
+
+@dataclass
+class DatasetSample:
+    dataset_name: str
+    manifest_entry: dict
+    codec_tokens: CodecTokens
+    token_index: int
+
+
+def codec_tokens_collate_fn(batch: List[dict]):
+    dataset_name_list = []
+    audio_filepath_list = []
+    tokens_list = []
+    tokens_len_list = []
+
+    for example in batch:
+        dataset_name_list.append(example["dataset_name"])
+        audio_filepath_list.append(example["audio_filepath"])
+        tokens_list.append(example["tokens"])
+        tokens_len_list.append(example["tokens_len"])
+
+    batch_tokens_len = torch.IntTensor(tokens_len_list)
+    tokens_max_len = int(batch_tokens_len.max().item())
+
+    batch_tokens = stack_tensors(tokens_list, max_lens=[tokens_max_len])
+
+    batch_dict = {
+        "dataset_names": dataset_name_list,
+        "audio_filepaths": audio_filepath_list,
+        "tokens": batch_tokens,
+        "tokens_lens": batch_tokens_len,
+    }
+
+    return batch_dict
+
+
+def preprocess_manifest(
+    dataset_name: str, dataset: DatasetMeta, min_duration: float, max_duration: float,
+):
+    entries = read_manifest(dataset.manifest_path)
+    codec_tokens = CodecTokens(dataset.tokens_path)
+    if len(codec_tokens) != len(entries):
+        raise ValueError(
+            f"Codec tokens {dataset.tokens_path} have {len(codec_tokens)} entries, "
+            f"but manifest {dataset.manifest_path} has {len(entries)} entries"
+        )
+    token_indices = {id(entry): i for i, entry in enumerate(entries)}
+
+    filtered_entries, total_hours, filtered_hours = filter_dataset_by_duration(
+        entries=entries, min_duration=min_duration, max_duration=max_duration
+    )
+
+    logging.info(dataset_name)
+    logging.info(f"Original # of files: {len(entries)}")
+    logging.info(f"Filtered # of files: {len(filtered_entries)}")
+    logging.info(f"Original duration: {total_hours:.2f} hours")
+    logging.info(f"Filtered duration: {filtered_hours:.2f} hours")
+
+    samples = []
+    sample_weights = []
+    for entry in filtered_entries:
+        sample = DatasetSample(
+            dataset_name=dataset_name,
+            manifest_entry=entry,
+            codec_tokens=codec_tokens,
+            token_index=token_indices[id(entry)],
+        )
+        samples.append(sample)
+        sample_weights.append(dataset.sample_weight)
+
+    return samples, sample_weights
+
+
+@experimental
+class CodecTokenDataset(Dataset):
+    """
+    Class for loading audio codec tokens computed with scripts/dataset_processing/tts/compute_codec_tokens.py.
+
+    Args:
+        dataset_meta: Dict of dataset names (string) to dataset metadata, with the 'manifest_path' and the path
+            prefix 'tokens_path' of the codec tokens of every dataset, and an optional 'sample_weight'.
+        n_frames: Optional int, if provided then n_frames frames of tokens will be randomly sampled from every
+            utterance.
+        weighted_sampling_steps_per_epoch: Optional int, If provided, then data will be sampled (with replacement)
+            based on the sample weights provided in the dataset metadata. If None, then sample weights will be
+            ignored.
+        min_duration: Optional float, if provided utterances in the manifest shorter than 'min_duration'
+            will be ignored.
+        max_duration: Optional float, if provided utterances in the manifest longer than 'max_duration'
+            will be ignored.
+        batch_duration: Optional float, if provided then batches are formed from utterances of similar duration,
+            with the padded duration of a batch limited to 'batch_duration' seconds, and the batch size of the data
+            loader used as the maximum batch size. See DurationBucketBatchSampler.
+        num_buckets: Number of duration buckets used when 'batch_duration' is provided.
+    """
+
+    def __init__(
+        self,
+        dataset_meta: Dict,
+        n_frames: Optional[int] = None,
+        weighted_sampling_steps_per_epoch: Optional[int] = None,
+        min_duration: Optional[float] = None,
+        max_duration: Optional[float] = None,
+        batch_duration: Optional[float] = None,
+        num_buckets: int = 10,
+    ):
+        super().__init__()
+
+        self.n_frames = n_frames
+        self.weighted_sampling_steps_per_epoch = weighted_sampling_steps_per_epoch
+        self.batch_duration = batch_duration
+        self.num_buckets = num_buckets
+
+        self.data_samples = []
+        self.sample_weights = []
+        for dataset_name, dataset_info in dataset_meta.items():
+            dataset = DatasetMeta(**dataset_info)
+            samples, weights = preprocess_manifest(
+                dataset_name=dataset_name, dataset=dataset, min_duration=min_duration, max_duration=max_duration,
+            )
+            self.data_samples += samples
+            self.sample_weights += weights
+
+    def get_sampler(self, batch_size: int, world_size: int) -> Optional[torch.utils.data.Sampler]:
+        if self.batch_duration:
+            return get_duration_bucket_sampler(
+                durations=[self._get_loaded_duration(sample) for sample in self.data_samples],
+                batch_duration=self.batch_duration,
+                batch_size=batch_size,
+                world_size=world_size,
+                num_buckets=self.num_buckets,
+                sample_weights=self.sample_weights if self.weighted_sampling_steps_per_epoch else None,
+                num_steps=self.weighted_sampling_steps_per_epoch,
+            )
+
+        if not self.weighted_sampling_steps_per_epoch:
+            return None
+
+        sampler = get_weighted_sampler(
+            sample_weights=self.sample_weights,
+            batch_size=batch_size,
+            world_size=world_size,
+            num_steps=self.weighted_sampling_steps_per_epoch,
+        )
+        return sampler
+
+    def _get_loaded_duration(self, sample: DatasetSample) -> float:
+        # duration of the tokens returned by __getitem__
+        num_frames = int(sample.codec_tokens.num_frames[sample.token_index])
+        if self.n_frames:
+            num_frames = min(num_frames, self.n_frames)
+        return num_frames * sample.codec_tokens.samples_per_frame / sample.codec_tokens.sample_rate
+
+    def __len__(self):
+        return len(self.data_samples)
+
+    def __getitem__(self, index):
+        data = self.data_samples[index]
+
+        num_frames = int(data.codec_tokens.num_frames[data.token_index])
+        frame_offset = 0
+        if self.n_frames and num_frames > self.n_frames:
+            frame_offset = random.randint(0, num_frames - self.n_frames)
+            num_frames = self.n_frames
+
+        tokens = data.codec_tokens.get(data.token_index, frame_offset=frame_offset, num_frames=num_frames)
+        tokens = torch.from_numpy(tokens.astype(np.int64))
+
+        example = {
+            "dataset_name": data.dataset_name,
+            "audio_filepath": data.manifest_entry["audio_filepath"],
+            "tokens": tokens,
+            "tokens_len": num_frames,
+        }
+
+        return example
+
+    def collate_fn(self, batch):
+        return codec_tokens_collate_fn(batch)
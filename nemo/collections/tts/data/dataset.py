@@ -34,12 +34,9 @@ from nemo.collections.common.tokenizers.text_to_speech.tts_tokenizers import (
     EnglishCharsTokenizer,
     EnglishPhonemesTokenizer,
 )
-from nemo.collections.tts.parts.utils.tts_dataset_utils import (
-    BetaBinomialInterpolator,
-    beta_binomial_prior_distribution,
-    general_padding,
-    get_base_dir,
-)
+from nemo.collections.tts.parts.utils.sup_data_store import SupDataStore
+from nemo.collections.tts.parts.utils.token_store import load_token_store
+from nemo.collections.tts.parts.utils.tts_dataset_utils import BetaBinomialPriorTable, general_padding, get_base_dir
 from nemo.collections.tts.torch.tts_data_types import (
     DATA_STR2DATA_CLASS,
     MAIN_DATA_TYPES,
@@ -90,6 +87,7 @@ class TTSDataset(Dataset):
         text_tokenizer_pad_id: Optional[int] = None,
         sup_data_types: Optional[List[str]] = None,
         sup_data_path: Optional[Union[Path, str]] = None,
+        sup_data_store_path: Optional[Union[Path, str]] = None,
         max_duration: Optional[float] = None,
         min_duration: Optional[float] = None,
         ignore_file: Optional[Union[str, Path]] = None,
@@ -127,12 +125,18 @@ class TTSDataset(Dataset):
                     "duration": <Duration of audio clip in seconds> (Optional),
             sample_rate (int): The sample rate of the audio. Or the sample rate that we will resample all files to.
             text_tokenizer (Optional[Union[BaseTokenizer, Callable[[str], List[int]]]]): BaseTokenizer or callable which represents text tokenizer.
+                If a manifest was pre-tokenized with the same BaseTokenizer configuration by
+                scripts/dataset_processing/tts/pretokenize_text.py, its token ids are read instead of tokenizing the text.
             tokens (Optional[List[str]]): Tokens from text_tokenizer. Should be specified if text_tokenizer is not BaseTokenizer.
             text_normalizer (Optional[Union[Normalizer, Callable[[str], str]]]): Normalizer or callable which represents text normalizer.
             text_normalizer_call_kwargs (Optional[Dict]): Additional arguments for text_normalizer function.
             text_tokenizer_pad_id (Optional[int]): Index of padding. Should be specified if text_tokenizer is not BaseTokenizer.
             sup_data_types (Optional[List[str]]): List of supplementary data types.
             sup_data_path (Optional[Union[Path, str]]): A folder that contains or will contain supplementary data (e.g. pitch).
+            sup_data_store_path (Optional[Union[Path, str]]): A packed, memory-mapped supplementary data store created by
+                scripts/dataset_processing/tts/convert_sup_data_to_store.py. Log mel, pitch, voiced_mask, p_voiced
+                and energy are read from the store first, and only utterances missing from it fall back to
+                sup_data_path. Defaults to None which does not use a store.
             max_duration (Optional[float]): Max duration of audio clips in seconds. All samples exceeding this will be
                 pruned prior to training. Note: Requires "duration" to be set in the manifest file. It does not load
                 audio to compute duration. Defaults to None which does not prune.
@@ -165,7 +169,7 @@ class TTSDataset(Dataset):
             energy_folder (Optional[Union[Path, str]]): The folder that contains or will contain energy.
             durs_file (Optional[str]): String path to pickled durations location.
             durs_type (Optional[str]): Type of durations. Currently, supported only "aligner-based".
-            use_beta_binomial_interpolator (Optional[bool]): Whether to use beta-binomial interpolator for calculating alignment prior matrix. Defaults to False.
+            use_beta_binomial_interpolator (Optional[bool]): Deprecated and ignored. Alignment prior matrices are always computed exactly from a precomputed table.
             pitch_fmin (Optional[float]): The fmin input to librosa.pyin. Defaults to librosa.note_to_hz('C2').
             pitch_fmax (Optional[float]): The fmax input to librosa.pyin. Defaults to librosa.note_to_hz('C7').
             pitch_mean (Optional[float]): The mean that we use to normalize the pitch.
@@ -224,10 +228,14 @@ class TTSDataset(Dataset):
 
         data = []
         total_duration = 0
+        tokenizer_hash = None
         for manifest_file in self.manifest_filepath:
+            token_store = load_token_store(manifest_file, self.text_tokenizer, tokenizer_hash)
+            if token_store is not None:
+                tokenizer_hash = token_store.tokenizer_hash
             with open(Path(manifest_file).expanduser(), 'r') as f:
                 logging.info(f"Loading dataset from {manifest_file}.")
-                for line in tqdm(f):
+                for line_index, line in enumerate(tqdm(f)):
                     item = json.loads(line)
 
                     file_info = {
@@ -248,8 +256,17 @@ class TTSDataset(Dataset):
                             text = self.text_normalizer_call(text, **self.text_normalizer_call_kwargs)
                         file_info["normalized_text"] = text
 
+                    text_tokens = None
+                    if token_store is not None and self.cache_text:
+                        text_tokens = token_store.get(line_index, file_info["normalized_text"])
+                    elif token_store is not None:
+                        file_info["token_store"] = token_store
+                        file_info["manifest_line"] = line_index
+
                     if self.cache_text:
-                        file_info["text_tokens"] = self.text_tokenizer(file_info["normalized_text"])
+                        if text_tokens is None:
+                            text_tokens = self.text_tokenizer(file_info["normalized_text"])
+                        file_info["text_tokens"] = text_tokens
 
                     data.append(file_info)
                     # Calculating length of spectrogram from input audio for batch sampling
@@ -321,6 +338,8 @@ class TTSDataset(Dataset):
             Path(sup_data_path).mkdir(parents=True, exist_ok=True)
             self.sup_data_path = sup_data_path
 
+        self.sup_data_store = SupDataStore(sup_data_store_path) if sup_data_store_path is not None else None
+
         self.sup_data_types = []
         if sup_data_types is not None:
             for d_as_str in sup_data_types:
@@ -410,17 +429,14 @@ class TTSDataset(Dataset):
                 )
 
     def add_align_prior_matrix(self, **kwargs):
-        self.use_beta_binomial_interpolator = kwargs.pop('use_beta_binomial_interpolator', False)
-        if not self.cache_text:
-            if 'use_beta_binomial_interpolator' in kwargs and not self.use_beta_binomial_interpolator:
-                logging.warning(
-                    "phoneme_probability is not None, but use_beta_binomial_interpolator=False, we"
-                    " set use_beta_binomial_interpolator=True manually to use phoneme_probability."
-                )
-            self.use_beta_binomial_interpolator = True
-
-        if self.use_beta_binomial_interpolator:
-            self.beta_binomial_interpolator = BetaBinomialInterpolator()
+        # Priors are computed exactly from a shared table of log-gamma values, which is cheap enough to do per sample
+        # without a cache, so use_beta_binomial_interpolator is only accepted for backward compatibility.
+        if kwargs.pop('use_beta_binomial_interpolator', None) is not None:
+            logging.warning(
+                "use_beta_binomial_interpolator is deprecated and ignored, alignment prior matrices are always "
+                "computed exactly. Remove it from the dataset config."
+            )
+        self.beta_binomial_prior_table = BetaBinomialPriorTable()
 
     def add_pitch(self, **kwargs):
         self.pitch_folder = kwargs.pop('pitch_folder', None)
@@ -503,6 +519,13 @@ class TTSDataset(Dataset):
         else:
             raise NotImplementedError(f"Reference audio type \"{reference_audio_type}\" is not supported.")
 
+    def get_stored_sup_data(self, key: str, data_type: TTSDataType) -> Optional[torch.Tensor]:
+        """Reads supplementary data of an utterance from the sup data store, if it is stored there."""
+        if self.sup_data_store is None:
+            return None
+        value = self.sup_data_store.get(key, data_type.name)
+        return torch.from_numpy(value).float() if value is not None else None
+
     def get_spec(self, audio):
         with torch.cuda.amp.autocast(enabled=False):
             spec = self.stft(audio)
@@ -595,7 +618,17 @@ class TTSDataset(Dataset):
             text = torch.tensor(sample["text_tokens"]).long()
             text_length = torch.tensor(len(text)).long()
         else:
-            tokenized = self.text_tokenizer(sample["normalized_text"])
+            tokenized = None
+            token_store = sample.get("token_store")
+            if token_store is not None:
+                # pick one of the pre-tokenized random mixes of phonemes and graphemes
+                tokenized = token_store.get(
+                    sample["manifest_line"],
+                    sample["normalized_text"],
+                    variant=random.randrange(token_store.num_variants),
+                )
+            if tokenized is None:
+                tokenized = self.text_tokenizer(sample["normalized_text"])
             text = torch.tensor(tokenized).long()
             text_length = torch.tensor(len(tokenized)).long()
 
@@ -603,10 +636,11 @@ class TTSDataset(Dataset):
         log_mel, log_mel_length = None, None
         if LogMel in self.sup_data_types_set:
             mel_path = sample["mel_filepath"]
+            log_mel = self.get_stored_sup_data(rel_audio_path_as_text_id, LogMel)
 
-            if mel_path is not None and Path(mel_path).exists():
+            if log_mel is None and mel_path is not None and Path(mel_path).exists():
                 log_mel = torch.load(mel_path)
-            else:
+            elif log_mel is None:
                 mel_path = self.log_mel_folder / f"{rel_audio_path_as_text_id}.pt"
 
                 if mel_path.exists():
@@ -626,11 +660,9 @@ class TTSDataset(Dataset):
         # Load alignment prior matrix if needed
         align_prior_matrix = None
         if AlignPriorMatrix in self.sup_data_types_set:
-            mel_len = self.get_log_mel(audio).shape[2]
-            if self.use_beta_binomial_interpolator:
-                align_prior_matrix = torch.from_numpy(self.beta_binomial_interpolator(mel_len, text_length.item()))
-            else:
-                align_prior_matrix = torch.from_numpy(beta_binomial_prior_distribution(text_length, mel_len))
+            # number of frames of the centered STFT in get_log_mel, without computing it
+            mel_len = 1 + audio_length.item() // self.hop_len
+            align_prior_matrix = self.beta_binomial_prior_table(mel_len, text_length.item())
 
         non_exist_voiced_index = []
         my_var = locals()
@@ -638,7 +670,10 @@ class TTSDataset(Dataset):
             if voiced_item in self.sup_data_types_set:
                 voiced_folder = getattr(self, f"{voiced_item.name}_folder")
                 voiced_filepath = voiced_folder / f"{rel_audio_path_as_text_id}.pt"
-                if voiced_filepath.exists():
+                stored_value = self.get_stored_sup_data(rel_audio_path_as_text_id, voiced_item)
+                if stored_value is not None:
+                    my_var.__setitem__(voiced_item.name, stored_value)
+                elif voiced_filepath.exists():
                     my_var.__setitem__(voiced_item.name, torch.load(voiced_filepath).float())
                 else:
                     non_exist_voiced_index.append((i, voiced_item.name, voiced_filepath))
@@ -688,10 +723,11 @@ class TTSDataset(Dataset):
         energy, energy_length = None, None
         if Energy in self.sup_data_types_set:
             energy_path = self.energy_folder / f"{rel_audio_path_as_text_id}.pt"
+            energy = self.get_stored_sup_data(rel_audio_path_as_text_id, Energy)
 
-            if energy_path.exists():
+            if energy is None and energy_path.exists():
                 energy = torch.load(energy_path).float()
-            else:
+            elif energy is None:
                 spec = self.get_spec(audio)
                 energy = torch.linalg.norm(spec.squeeze(0), axis=0).float()
                 torch.save(energy, energy_path)
@@ -13,6 +13,7 @@
 # limitations under the License.
 
 import json
+import random
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, List, Optional
@@ -24,9 +25,12 @@ from nemo.collections.asr.parts.utils.manifest_utils import read_manifest
 from nemo.collections.common.tokenizers.text_to_speech.tts_tokenizers import BaseTokenizer
 from nemo.collections.tts.parts.preprocessing.feature_processors import FeatureProcessor
 from nemo.collections.tts.parts.preprocessing.features import Featurizer
+from nemo.collections.tts.parts.utils.sup_data_store import SupDataStore
+from nemo.collections.tts.parts.utils.token_store import TokenStore, load_token_store
 from nemo.collections.tts.parts.utils.tts_dataset_utils import (
     beta_binomial_prior_distribution,
     filter_dataset_by_duration,
+    get_duration_bucket_sampler,
     get_weighted_sampler,
     load_audio,
     stack_tensors,
@@ -42,6 +46,7 @@ class DatasetMeta:
     audio_dir: Path
     feature_dir: Path
     sample_weight: float = 1.0
+    feature_store_dir: Optional[Path] = None
 
 
 @dataclass
@@ -53,6 +58,9 @@ class DatasetSample:
     text: str
     speaker: str
     speaker_index: int = None
+    feature_store: Optional[SupDataStore] = None
+    token_store: Optional[TokenStore] = None
+    manifest_line: Optional[int] = None
 
 
 @experimental
@@ -64,9 +72,14 @@ class TextToSpeechDataset(Dataset):
         dataset_meta: Dict of dataset names (string) to dataset metadata.
         sample_rate: Sample rate to load audio as. If the audio is stored at a different sample rate, then it will
             be resampled.
-        text_tokenizer: Tokenizer to apply to the text field.
+        text_tokenizer: Tokenizer to apply to the text field. If a manifest was pre-tokenized with the same tokenizer
+            configuration by scripts/dataset_processing/tts/pretokenize_text.py, its token ids are read instead.
         weighted_sampling_steps_per_epoch: Optional int, If provided, then data will be sampled (with replacement) based on
             the sample weights provided in the dataset metadata. If None, then sample weights will be ignored.
+        batch_duration: Optional float, if provided then batches are formed from utterances of similar duration, with
+            the padded duration of a batch limited to 'batch_duration' seconds, and the batch size of the data loader
+            used as the maximum batch size. See DurationBucketBatchSampler.
+        num_buckets: Number of duration buckets used when 'batch_duration' is provided.
         speaker_path: Optional, path to JSON file with speaker indices, for multi-speaker training. Can be created with
             scripts.dataset_processing.tts.create_speaker_map.py
         featurizers: Optional, list of featurizers to load feature data from. Should be the same config provided
@@ -95,12 +108,16 @@ class TextToSpeechDataset(Dataset):
         min_duration: Optional[float] = None,
         max_duration: Optional[float] = None,
         volume_norm: bool = True,
+        batch_duration: Optional[float] = None,
+        num_buckets: int = 10,
     ):
         super().__init__()
 
         self.sample_rate = sample_rate
         self.text_tokenizer = text_tokenizer
         self.weighted_sampling_steps_per_epoch = weighted_sampling_steps_per_epoch
+        self.batch_duration = batch_duration
+        self.num_buckets = num_buckets
         self.align_prior_hop_length = align_prior_hop_length
         self.include_align_prior = self.align_prior_hop_length is not None
         self.volume_norm = volume_norm
@@ -127,6 +144,7 @@ class TextToSpeechDataset(Dataset):
 
         self.data_samples = []
         self.sample_weights = []
+        self._tokenizer_hash = None
         for dataset_name, dataset_info in dataset_meta.items():
             dataset = DatasetMeta(**dataset_info)
             samples, weights = self._preprocess_manifest(
@@ -140,6 +158,17 @@ class TextToSpeechDataset(Dataset):
             self.sample_weights += weights
 
     def get_sampler(self, batch_size: int, world_size: int) -> Optional[torch.utils.data.Sampler]:
+        if self.batch_duration:
+            return get_duration_bucket_sampler(
+                durations=[sample.manifest_entry["duration"] for sample in self.data_samples],
+                batch_duration=self.batch_duration,
+                batch_size=batch_size,
+                world_size=world_size,
+                num_buckets=self.num_buckets,
+                sample_weights=self.sample_weights if self.weighted_sampling_steps_per_epoch else None,
+                num_steps=self.weighted_sampling_steps_per_epoch,
+            )
+
         if not self.weighted_sampling_steps_per_epoch:
             return None
 
@@ -160,6 +189,7 @@ class TextToSpeechDataset(Dataset):
         speaker_index_map: Dict[str, int],
     ):
         entries = read_manifest(dataset.manifest_path)
+        manifest_lines = {id(entry): line for line, entry in enumerate(entries)}
         filtered_entries, total_hours, filtered_hours = filter_dataset_by_duration(
             entries=entries, min_duration=min_duration, max_duration=max_duration
         )
@@ -170,6 +200,16 @@ class TextToSpeechDataset(Dataset):
         logging.info(f"Original duration: {total_hours:.2f} hours")
         logging.info(f"Filtered duration: {filtered_hours:.2f} hours")
 
+        if dataset.feature_store_dir:
+            feature_store = SupDataStore(dataset.feature_store_dir)
+            logging.info(f"Reading features from store {dataset.feature_store_dir} with {len(feature_store)} entries")
+        else:
+            feature_store = None
+
+        token_store = load_token_store(dataset.manifest_path, self.text_tokenizer, self._tokenizer_hash)
+        if token_store is not None:
+            self._tokenizer_hash = token_store.tokenizer_hash
+
         samples = []
         sample_weights = []
         for entry in filtered_entries:
@@ -194,6 +234,9 @@ class TextToSpeechDataset(Dataset):
                 text=text,
                 speaker=speaker,
                 speaker_index=speaker_index,
+                feature_store=feature_store,
+                token_store=token_store,
+                manifest_line=manifest_lines[id(entry)],
             )
             samples.append(sample)
             sample_weights.append(dataset.sample_weight)
@@ -215,7 +258,12 @@ class TextToSpeechDataset(Dataset):
         audio = torch.tensor(audio_array, dtype=torch.float32)
         audio_len = audio.shape[0]
 
-        tokens = self.text_tokenizer(data.text)
+        tokens = None
+        if data.token_store is not None:
+            variant = random.randrange(data.token_store.num_variants)
+            tokens = data.token_store.get(data.manifest_line, data.text, variant=variant)
+        if tokens is None:
+            tokens = self.text_tokenizer(data.text)
         tokens = torch.tensor(tokens, dtype=torch.int32)
         text_len = tokens.shape[0]
 
@@ -239,9 +287,17 @@ class TextToSpeechDataset(Dataset):
             example["align_prior"] = align_prior
 
         for featurizer in self.featurizers:
-            feature_dict = featurizer.load(
-                manifest_entry=data.manifest_entry, audio_dir=data.audio_dir, feature_dir=data.feature_dir
-            )
+            if data.feature_store is not None:
+                feature_dict = featurizer.load(
+                    manifest_entry=data.manifest_entry,
+                    audio_dir=data.audio_dir,
+                    feature_dir=data.feature_dir,
+                    feature_store=data.feature_store,
+                )
+            else:
+                feature_dict = featurizer.load(
+                    manifest_entry=data.manifest_entry, audio_dir=data.audio_dir, feature_dir=data.feature_dir
+                )
             example.update(feature_dict)
 
         for processor in self.feature_processors:
@@ -29,6 +29,7 @@ from nemo.collections.asr.parts.utils.manifest_utils import read_manifest
 from nemo.collections.tts.parts.preprocessing.feature_processors import FeatureProcessor
 from nemo.collections.tts.parts.utils.tts_dataset_utils import (
     filter_dataset_by_duration,
+    get_duration_bucket_sampler,
     get_weighted_sampler,
     load_audio,
     sample_audio,
@@ -127,6 +128,11 @@ class VocoderDataset(Dataset):
             will be ignored.
         trunc_duration: Optional int, if provided audio will be truncated to at most 'trunc_duration' seconds.
         volume_norm: Whether to apply volume normalization to loaded audio.
+        batch_duration: Optional float, if provided then batches are formed from utterances of similar duration, with
+            the padded duration of a batch limited to 'batch_duration' seconds, and the batch size of the data loader
+            used as the maximum batch size. Durations are capped by 'n_samples' and 'trunc_duration'.
+            See DurationBucketBatchSampler.
+        num_buckets: Number of duration buckets used when 'batch_duration' is provided.
     """
 
     def __init__(
@@ -140,6 +146,8 @@ class VocoderDataset(Dataset):
         max_duration: Optional[float] = None,
         trunc_duration: Optional[float] = None,
         volume_norm: bool = False,
+        batch_duration: Optional[float] = None,
+        num_buckets: int = 10,
     ):
         super().__init__()
 
@@ -148,6 +156,8 @@ class VocoderDataset(Dataset):
         self.trunc_duration = trunc_duration
         self.volume_norm = volume_norm
         self.weighted_sampling_steps_per_epoch = weighted_sampling_steps_per_epoch
+        self.batch_duration = batch_duration
+        self.num_buckets = num_buckets
         self.load_precomputed_mel = False
 
         if feature_processors:
@@ -167,6 +177,17 @@ class VocoderDataset(Dataset):
             self.sample_weights += weights
 
     def get_sampler(self, batch_size: int, world_size: int) -> Optional[torch.utils.data.Sampler]:
+        if self.batch_duration:
+            return get_duration_bucket_sampler(
+                durations=[self._get_loaded_duration(sample) for sample in self.data_samples],
+                batch_duration=self.batch_duration,
+                batch_size=batch_size,
+                world_size=world_size,
+                num_buckets=self.num_buckets,
+                sample_weights=self.sample_weights if self.weighted_sampling_steps_per_epoch else None,
+                num_steps=self.weighted_sampling_steps_per_epoch,
+            )
+
         if not self.weighted_sampling_steps_per_epoch:
             return None
 
@@ -178,6 +199,15 @@ class VocoderDataset(Dataset):
         )
         return sampler
 
+    def _get_loaded_duration(self, sample: DatasetSample) -> float:
+        # duration of the audio returned by __getitem__
+        duration = sample.manifest_entry["duration"]
+        if self.n_samples:
+            duration = min(duration, self.n_samples / self.sample_rate)
+        elif self.trunc_duration:
+            duration = min(duration, self.trunc_duration)
+        return duration
+
     def __len__(self):
         return len(self.data_samples)
 
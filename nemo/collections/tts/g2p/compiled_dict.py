@@ -0,0 +1,226 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compiled, memory-mapped pronunciation tables for the dictionary based G2P modules.
+
+Parsing and normalizing a pronunciation dictionary such as CMUdict takes about a second, and is repeated by
+every process which builds a G2P module. A compiled table stores the parsed dictionary in a form which loads
+in milliseconds: the words are stored as one newline separated text, and the pronunciations as one memory-mapped
+byte blob with an offset index, decoded only when a word is looked up.
+
+Layout of a table directory:
+
+    meta.json           # format version and the symbol set of the dictionary
+    words.txt           # words, one per line, in the order of the index
+    prons.bin           # UTF-8 pronunciations of all words, concatenated
+    prons.idx.npy       # int64 [num_words + 1], offsets of the pronunciations of every word in prons.bin
+"""
+
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import tempfile
+from typing import Callable, Dict, Iterator, List, MutableMapping, Optional, Set, Tuple, Union
+
+import numpy as np
+
+COMPILED_DICT_VERSION = 1
+COMPILED_DICT_META = "meta.json"
+
+# separators of symbols within a pronunciation, and of pronunciations of a word
+SYMBOL_SEPARATOR = "\x1f"
+PRONUNCIATION_SEPARATOR = "\x1e"
+
+
+def get_compiled_dict_key(phoneme_dict_path: Union[str, pathlib.Path], **options) -> str:
+    """
+    Computes the key of a compiled table from the content of a dictionary file and the options used to parse it.
+
+    Args:
+        phoneme_dict_path: Path to the dictionary file.
+        options: Parsing and normalization options which change the content of the table.
+
+    Returns:
+        Hex digest identifying the compiled table.
+    """
+    sha = hashlib.sha256()
+    sha.update(f"v{COMPILED_DICT_VERSION}".encode())
+    with open(phoneme_dict_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    sha.update(json.dumps(options, sort_keys=True, default=str).encode())
+    return sha.hexdigest()[:32]
+
+
+def compile_phoneme_dict(
+    phoneme_dict: MutableMapping[str, List[List[str]]], symbols: Set[str], table_dir: Union[str, pathlib.Path]
+):
+    """
+    Writes a compiled table of a pronunciation dictionary.
+
+    The table is written to a temporary directory next to `table_dir` and then renamed, so concurrent readers
+    never see a partially written table. If another process already created `table_dir`, it is kept.
+
+    Args:
+        phoneme_dict: Dictionary of words to lists of pronunciations, every pronunciation being a list of symbols.
+        symbols: Symbol set of the dictionary.
+        table_dir: Directory to write the table to.
+    """
+    table_dir = pathlib.Path(table_dir)
+    table_dir.parent.mkdir(parents=True, exist_ok=True)
+
+    words = []
+    offsets = [0]
+    blobs = []
+    for word, prons in phoneme_dict.items():
+        if "\n" in word:
+            raise ValueError(f"Word {repr(word)} contains a newline")
+        encoded = PRONUNCIATION_SEPARATOR.join(SYMBOL_SEPARATOR.join(pron) for pron in prons)
+        if any(SYMBOL_SEPARATOR in symbol or PRONUNCIATION_SEPARATOR in symbol for pron in prons for symbol in pron):
+            raise ValueError(f"Pronunciations of {repr(word)} contain reserved separator characters")
+        blob = encoded.encode("utf-8")
+        words.append(word)
+        blobs.append(blob)
+        offsets.append(offsets[-1] + len(blob))
+
+    tmp_dir = pathlib.Path(tempfile.mkdtemp(dir=table_dir.parent, prefix=f".{table_dir.name}."))
+    try:
+        with open(tmp_dir / "words.txt", "w", encoding="utf-8") as f:
+            f.write("\n".join(words))
+        with open(tmp_dir / "prons.bin", "wb") as f:
+            f.write(b"".join(blobs))
+        np.save(tmp_dir / "prons.idx.npy", np.asarray(offsets, dtype=np.int64))
+        with open(tmp_dir / COMPILED_DICT_META, "w", encoding="utf-8") as f:
+            json.dump({"version": COMPILED_DICT_VERSION, "symbols": sorted(symbols)}, f, ensure_ascii=False)
+        os.replace(tmp_dir, table_dir)
+    except OSError:
+        # the table was created concurrently by another process
+        if not (table_dir / COMPILED_DICT_META).exists():
+            raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+class CompiledPhonemeDict(MutableMapping):
+    """
+    Dictionary of words to pronunciations backed by a compiled table.
+
+    Lookups decode the pronunciations of a word from the memory-mapped table. The table itself is read-only:
+    assigned and deleted entries are kept in memory on top of it, so the mapping supports the same updates as the
+    dictionary it was compiled from (e.g. `IpaG2p.replace_symbols`).
+
+    Args:
+        table_dir: Directory of a table written by `compile_phoneme_dict`.
+    """
+
+    def __init__(self, table_dir: Union[str, pathlib.Path]):
+        self.table_dir = pathlib.Path(table_dir)
+        with open(self.table_dir / COMPILED_DICT_META, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["version"] != COMPILED_DICT_VERSION:
+            raise ValueError(f"Unsupported compiled dictionary version {meta['version']} in {self.table_dir}")
+        self.symbols = set(meta["symbols"])
+
+        with open(self.table_dir / "words.txt", "r", encoding="utf-8") as f:
+            words = f.read()
+        self._words = words.split("\n") if words else []
+        self._index = {word: i for i, word in enumerate(self._words)}
+        self._offsets = np.load(self.table_dir / "prons.idx.npy")
+        self._prons = None
+
+        self._overrides: Dict[str, List[List[str]]] = {}
+        self._deleted: Set[str] = set()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_prons"] = None
+        return state
+
+    def _decode(self, i: int) -> List[List[str]]:
+        if self._prons is None:
+            if self._offsets[-1] == 0:
+                # empty files cannot be memory-mapped
+                self._prons = np.zeros(0, dtype=np.uint8)
+            else:
+                self._prons = np.memmap(self.table_dir / "prons.bin", dtype=np.uint8, mode="r")
+        encoded = self._prons[self._offsets[i] : self._offsets[i + 1]].tobytes().decode("utf-8")
+        if not encoded:
+            return []
+        return [pron.split(SYMBOL_SEPARATOR) if pron else [] for pron in encoded.split(PRONUNCIATION_SEPARATOR)]
+
+    def __getitem__(self, word: str) -> List[List[str]]:
+        if word in self._overrides:
+            return self._overrides[word]
+        i = self._index.get(word)
+        if i is None or word in self._deleted:
+            raise KeyError(word)
+        return self._decode(i)
+
+    def __setitem__(self, word: str, prons: List[List[str]]):
+        self._overrides[word] = prons
+        self._deleted.discard(word)
+
+    def __delitem__(self, word: str):
+        if word not in self:
+            raise KeyError(word)
+        self._overrides.pop(word, None)
+        if word in self._index:
+            self._deleted.add(word)
+
+    def __contains__(self, word) -> bool:
+        return word in self._overrides or (word in self._index and word not in self._deleted)
+
+    def __iter__(self) -> Iterator[str]:
+        for word in self._words:
+            if word not in self._deleted and word not in self._overrides:
+                yield word
+        yield from self._overrides
+
+    def __len__(self) -> int:
+        num_new = sum(1 for word in self._overrides if word not in self._index)
+        return len(self._index) - len(self._deleted) + num_new
+
+
+def load_or_compile_phoneme_dict(
+    phoneme_dict_path: Union[str, pathlib.Path],
+    cache_dir: Optional[Union[str, pathlib.Path]],
+    build_fn: Callable[[], Tuple[MutableMapping[str, List[List[str]]], Set[str]]],
+    **options,
+) -> Tuple[MutableMapping[str, List[List[str]]], Set[str]]:
+    """
+    Loads the compiled pronunciation table of a dictionary file from a cache directory, or builds and compiles it.
+
+    Args:
+        phoneme_dict_path: Path to the dictionary file.
+        cache_dir: Directory with compiled tables. If None, the dictionary is built without caching.
+        build_fn: Function parsing the dictionary file, returning the dictionary and its symbol set.
+        options: Parsing and normalization options of `build_fn`, which are part of the key of the table.
+
+    Returns:
+        Tuple of the dictionary and its symbol set.
+    """
+    if cache_dir is None:
+        return build_fn()
+
+    table_dir = pathlib.Path(cache_dir) / get_compiled_dict_key(phoneme_dict_path, **options)
+    if (table_dir / COMPILED_DICT_META).exists():
+        compiled_dict = CompiledPhonemeDict(table_dir)
+        return compiled_dict, compiled_dict.symbols
+
+    phoneme_dict, symbols = build_fn()
+    compile_phoneme_dict(phoneme_dict, symbols, table_dir)
+    return phoneme_dict, symbols
@@ -12,8 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import functools
 from abc import ABC, abstractmethod
 from typing import Optional
+
 from nemo.utils import logging
 
 
@@ -42,6 +44,36 @@ class BaseG2p(ABC):
     def __call__(self, text: str) -> str:
         pass
 
+    def _setup_word_cache(self, word_cache_size: int):
+        """
+        Memoizes `self._parse_one_word_uncached`, the deterministic part of parsing a single word, in a bounded
+        LRU cache. Subclasses call this at the end of their constructor, and draw any random choices (e.g. for
+        `phoneme_probability`) outside of the cached function.
+
+        Args:
+            word_cache_size: Maximum number of words in the cache. 0 disables caching.
+        """
+        self.word_cache_size = word_cache_size
+        self._parse_one_word_cached = functools.lru_cache(maxsize=word_cache_size)(self._parse_one_word_uncached)
+
+    def clear_word_cache(self):
+        """
+        Clears the cache of parsed words. It has to be called after modifying the attributes which determine how
+        words are parsed, e.g. `phoneme_dict`, `heteronyms` or `apply_to_oov_word`.
+        """
+        self._parse_one_word_cached.cache_clear()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # the cache wraps a bound method, it is rebuilt for the copy
+        state.pop("_parse_one_word_cached", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if "word_cache_size" in state:
+            self._setup_word_cache(self.word_cache_size)
+
     # TODO @xueyang: replace `wordid_to_phonemes_file` default variable with a global variable defined in util file.
     def setup_heteronym_model(
         self,
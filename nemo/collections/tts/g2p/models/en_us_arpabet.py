@@ -16,12 +16,13 @@ import pathlib
 import random
 import re
 import time
-from typing import Optional
+from typing import List, Optional, Union
 
 import nltk
 import torch
 
 from nemo.collections.common.tokenizers.text_to_speech.tokenizer_utils import english_word_tokenize
+from nemo.collections.tts.g2p.compiled_dict import load_or_compile_phoneme_dict
 from nemo.collections.tts.g2p.models.base import BaseG2p
 from nemo.utils import logging
 from nemo.utils.get_rank import is_global_rank_zero
@@ -38,6 +39,8 @@ class EnglishG2p(BaseG2p):
         encoding='latin-1',
         phoneme_probability: Optional[float] = None,
         mapping_file: Optional[str] = None,
+        phoneme_dict_cache_dir: Optional[str] = None,
+        word_cache_size: int = 100000,
     ):
         """English G2P module. This module converts words from grapheme to phoneme representation using phoneme_dict in CMU dict format.
         Optionally, it can ignore words which are heteronyms, ambiguous or marked as unchangeable by word_tokenize_func (see code for details).
@@ -55,12 +58,20 @@ class EnglishG2p(BaseG2p):
             phoneme_probability (Optional[float]): The probability (0.<var<1.) that each word is phonemized. Defaults to None which is the same as 1.
                 Note that this code path is only run if the word can be phonemized. For example: If the word does not have an entry in the g2p dict, it will be returned
                 as characters. If the word has multiple entries and ignore_ambiguous_words is True, it will be returned as characters.
+            phoneme_dict_cache_dir (Optional[str]): Directory to keep compiled pronunciation tables in. If set and phoneme_dict is a path,
+                the parsed dictionary is compiled to a memory-mapped table on first use and loaded from it afterwards, which is much faster.
+            word_cache_size (int): Maximum number of parsed words to memoize. 0 disables the cache. Defaults to 100000.
         """
-        phoneme_dict = (
-            self._parse_as_cmu_dict(phoneme_dict, encoding)
-            if isinstance(phoneme_dict, str) or isinstance(phoneme_dict, pathlib.Path) or phoneme_dict is None
-            else phoneme_dict
-        )
+        if isinstance(phoneme_dict, str) or isinstance(phoneme_dict, pathlib.Path):
+            phoneme_dict_path = phoneme_dict
+            phoneme_dict, _ = load_or_compile_phoneme_dict(
+                phoneme_dict_path,
+                cache_dir=phoneme_dict_cache_dir,
+                build_fn=lambda: (self._parse_as_cmu_dict(phoneme_dict_path, encoding), set()),
+                encoding=encoding,
+            )
+        elif phoneme_dict is None:
+            phoneme_dict = self._parse_as_cmu_dict(phoneme_dict, encoding)
 
         if apply_to_oov_word is None:
             logging.warning(
@@ -85,6 +96,7 @@ class EnglishG2p(BaseG2p):
         )
         self.phoneme_probability = phoneme_probability
         self._rng = random.Random()
+        self._setup_word_cache(word_cache_size)
 
     @staticmethod
     def _parse_as_cmu_dict(phoneme_dict_path=None, encoding='latin-1'):
@@ -160,6 +172,9 @@ class EnglishG2p(BaseG2p):
         if self.phoneme_probability is not None and self._rng.random() > self.phoneme_probability:
             return word, True
 
+        return self._parse_one_word_cached(word)
+
+    def _parse_one_word_uncached(self, word: str):
         # punctuation or whitespace.
         if re.search(r"[a-zA-ZÀ-ÿ\d]", word) is None:
             return list(word), True
@@ -197,7 +212,21 @@ class EnglishG2p(BaseG2p):
         else:
             return word, False
 
-    def __call__(self, text):
+    def __call__(self, text: Union[str, List[str]]):
+        """
+        Converts a text, or a batch of texts, to phonemes.
+
+        Args:
+            text: Text or list of texts.
+
+        Returns:
+            List of phonemes of the text, or a list with the phonemes of every text.
+        """
+        if isinstance(text, list):
+            return [self._parse_text(t) for t in text]
+        return self._parse_text(text)
+
+    def _parse_text(self, text: str):
         words = self.word_tokenize_func(text)
 
         prons = []
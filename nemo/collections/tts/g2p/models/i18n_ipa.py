@@ -25,6 +25,7 @@ from nemo.collections.common.tokenizers.text_to_speech.tokenizer_utils import (
     english_word_tokenize,
     normalize_unicode_text,
 )
+from nemo.collections.tts.g2p.compiled_dict import load_or_compile_phoneme_dict
 from nemo.collections.tts.g2p.models.base import BaseG2p
 from nemo.collections.tts.g2p.utils import GRAPHEME_CASE_MIXED, GRAPHEME_CASE_UPPER, set_grapheme_case
 from nemo.utils import logging
@@ -53,6 +54,8 @@ class IpaG2p(BaseG2p):
         grapheme_case: Optional[str] = GRAPHEME_CASE_UPPER,
         grapheme_prefix: Optional[str] = "",
         mapping_file: Optional[str] = None,
+        phoneme_dict_cache_dir: Optional[str] = None,
+        word_cache_size: int = 100000,
     ) -> None:
         """
         Generic IPA G2P module. This module converts words from graphemes to International Phonetic Alphabet
@@ -92,6 +95,11 @@ class IpaG2p(BaseG2p):
                 from phonemes because there may be overlaps between the two set. It is suggested to choose a prefix that
                 is not used or preserved somewhere else. "#" could be a good candidate. Default to "".
             TODO @borisfom: add docstring for newly added `mapping_file` argument.
+            phoneme_dict_cache_dir (Optional[str]): Directory to keep compiled pronunciation tables in. If set and
+                `phoneme_dict` is a path, the parsed and normalized dictionary is compiled to a memory-mapped table on
+                first use and loaded from it afterwards, which skips parsing and normalization at construction.
+            word_cache_size (int): Maximum number of parsed words to memoize. Words kept as graphemes due to
+                `phoneme_probability` are still sampled for every call. 0 disables the cache. Defaults to 100000.
         """
         self.use_stresses = use_stresses
         self.grapheme_case = grapheme_case
@@ -112,13 +120,18 @@ class IpaG2p(BaseG2p):
         else:
             self.use_chars = use_chars
 
-        phoneme_dict_obj = self._parse_phoneme_dict(phoneme_dict)
-
-        # verify if phoneme dict obj is empty
-        if phoneme_dict_obj:
-            _phoneme_dict, self.symbols = self._normalize_dict(phoneme_dict_obj)
+        if isinstance(phoneme_dict, str) or isinstance(phoneme_dict, pathlib.Path):
+            _phoneme_dict, self.symbols = load_or_compile_phoneme_dict(
+                phoneme_dict,
+                cache_dir=phoneme_dict_cache_dir,
+                build_fn=lambda: self._parse_and_normalize_dict(phoneme_dict),
+                use_stresses=use_stresses,
+                grapheme_case=grapheme_case,
+                grapheme_prefix=grapheme_prefix,
+                use_chars=self.use_chars,
+            )
         else:
-            raise ValueError(f"{phoneme_dict} contains no entries!")
+            _phoneme_dict, self.symbols = self._parse_and_normalize_dict(phoneme_dict)
 
         if apply_to_oov_word is None:
             logging.warning(
@@ -154,6 +167,18 @@ class IpaG2p(BaseG2p):
         if self.heteronyms:
             self.heteronyms = {set_grapheme_case(het, case=self.grapheme_case) for het in self.heteronyms}
 
+        self._setup_word_cache(word_cache_size)
+
+    def _parse_and_normalize_dict(
+        self, phoneme_dict: Union[str, pathlib.Path, Dict[str, List[List[str]]]]
+    ) -> Tuple[Dict[str, List[List[str]]], Set]:
+        phoneme_dict_obj = self._parse_phoneme_dict(phoneme_dict)
+
+        # verify if phoneme dict obj is empty
+        if not phoneme_dict_obj:
+            raise ValueError(f"{phoneme_dict} contains no entries!")
+        return self._normalize_dict(phoneme_dict_obj)
+
     @staticmethod
     def _parse_phoneme_dict(
         phoneme_dict: Union[str, pathlib.Path, Dict[str, List[List[str]]]]
@@ -224,6 +249,7 @@ class IpaG2p(BaseG2p):
         Replace model's phoneme dictionary with a custom one
         """
         self.phoneme_dict = self._parse_phoneme_dict(phoneme_dict)
+        self.clear_word_cache()
 
     @staticmethod
     def _parse_file_by_lines(p: Union[str, pathlib.Path]) -> List[str]:
@@ -339,6 +365,7 @@ class IpaG2p(BaseG2p):
             self.phoneme_dict.update(replacement_dict)
 
         self.symbols = new_symbols
+        self.clear_word_cache()
 
     def is_unique_in_phoneme_dict(self, word: str) -> bool:
         return len(self.phoneme_dict[word]) == 1
@@ -346,16 +373,31 @@ class IpaG2p(BaseG2p):
     def parse_one_word(self, word: str) -> Tuple[List[str], bool]:
         """Returns parsed `word` and `status` (bool: False if word wasn't handled, True otherwise).
         """
+        pron, is_handled, graphemes = self._parse_one_word_cached(word)
+
+        # Keep graphemes of a word with a probability, unless it is punctuation.
+        if (
+            graphemes is not None
+            and self.phoneme_probability is not None
+            and self._rng.random() > self.phoneme_probability
+        ):
+            return graphemes, True
+
+        return pron, is_handled
+
+    def _parse_one_word_uncached(self, word: str) -> Tuple[List[str], bool, Optional[List[str]]]:
+        """Returns parsed `word`, `status` and the graphemes of the word, which are None for punctuation.
+        """
         word = set_grapheme_case(word, case=self.grapheme_case)
 
         # Punctuation (assumes other chars have been stripped)
         if self.CHAR_REGEX.search(word) is None:
-            return list(word), True
+            return list(word), True, None
 
-        # Keep graphemes of a word with a probability.
-        if self.phoneme_probability is not None and self._rng.random() > self.phoneme_probability:
-            return self._prepend_prefix_for_one_word(word), True
+        pron, is_handled = self._parse_word_with_dict(word)
+        return pron, is_handled, self._prepend_prefix_for_one_word(word)
 
+    def _parse_word_with_dict(self, word: str) -> Tuple[List[str], bool]:
         # Heteronyms
         if self.heteronyms and word in self.heteronyms:
             return self._prepend_prefix_for_one_word(word), True
@@ -449,15 +491,30 @@ class IpaG2p(BaseG2p):
         else:
             return self._prepend_prefix_for_one_word(word), False
 
-    def __call__(self, text: str) -> List[str]:
-        text = normalize_unicode_text(text)
+    def __call__(self, text: Union[str, List[str]]) -> Union[List[str], List[List[str]]]:
+        """
+        Converts a text, or a batch of texts, to phonemes. For a batch, heteronyms of all texts are disambiguated
+        with a single call of the heteronym model.
 
-        if self.heteronym_model is not None:
+        Args:
+            text: Text or list of texts.
+
+        Returns:
+            List of phonemes and graphemes of the text, or a list with the phonemes and graphemes of every text.
+        """
+        is_batch = isinstance(text, list)
+        texts = [normalize_unicode_text(t) for t in text] if is_batch else [normalize_unicode_text(text)]
+
+        if self.heteronym_model is not None and texts:
             try:
-                text = self.heteronym_model.disambiguate(sentences=[text])[1][0]
+                texts = self.heteronym_model.disambiguate(sentences=texts)[1]
             except Exception as e:
                 logging.warning(f"Heteronym model failed {e}, skipping")
 
+        prons = [self._parse_text(t) for t in texts]
+        return prons if is_batch else prons[0]
+
+    def _parse_text(self, text: str) -> List[str]:
         words_list_of_tuple = self.word_tokenize_func(text)
 
         prons = []
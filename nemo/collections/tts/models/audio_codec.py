@@ -35,6 +35,7 @@ from nemo.collections.tts.losses.audio_codec_loss import (
 from nemo.collections.tts.modules.common import GaussianDropout
 from nemo.collections.tts.parts.utils.callbacks import LoggingCallback
 from nemo.collections.tts.parts.utils.helpers import get_batch_size, get_num_workers
+from nemo.collections.tts.parts.utils.tts_dataset_utils import DurationBucketBatchSampler, get_train_dataloader
 from nemo.core import ModelPT
 from nemo.core.classes.common import PretrainedModelInfo, typecheck
 from nemo.core.neural_types.elements import AudioSignal, EncodedRepresentation, LengthsType, TokenIndex
@@ -519,9 +520,7 @@ class AudioCodecModel(ModelPT):
 
     def _setup_train_dataloader(self, cfg):
         dataset, sampler = self.get_dataset(cfg)
-        data_loader = torch.utils.data.DataLoader(
-            dataset, collate_fn=dataset.collate_fn, sampler=sampler, **cfg.dataloader_params
-        )
+        data_loader = get_train_dataloader(dataset, sampler, cfg.dataloader_params)
         return data_loader
 
     def _setup_test_dataloader(self, cfg):
@@ -570,13 +569,21 @@ class AudioCodecModel(ModelPT):
 
         if "steps_per_epoch" in self._cfg:
             return self._cfg.max_epochs * self._cfg.steps_per_epoch
+        if isinstance(self._train_dl.batch_sampler, DurationBucketBatchSampler):
+            # batches have variable sizes, the sampler provides the number of batches per device
+            num_workers, num_samples, batch_size = 1, len(self._train_dl), 1
+        else:
+            num_workers = get_num_workers(self.trainer)
+            num_samples = len(self._train_dl.dataset)
+            batch_size = get_batch_size(self._train_dl)
+
         return compute_max_steps(
             max_epochs=self._cfg.max_epochs,
             accumulate_grad_batches=self.trainer.accumulate_grad_batches,
             limit_train_batches=self.trainer.limit_train_batches,
-            num_workers=get_num_workers(self.trainer),
-            num_samples=len(self._train_dl.dataset),
-            batch_size=get_batch_size(self._train_dl),
+            num_workers=num_workers,
+            num_samples=num_samples,
+            batch_size=batch_size,
             drop_last=self._train_dl.drop_last,
         )
 
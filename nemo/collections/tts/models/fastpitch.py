@@ -37,6 +37,7 @@ from nemo.collections.tts.parts.utils.helpers import (
     process_batch,
     sample_tts_input,
 )
+from nemo.collections.tts.parts.utils.tts_dataset_utils import get_train_dataloader
 from nemo.core.classes import Exportable
 from nemo.core.classes.common import PretrainedModelInfo, typecheck
 from nemo.core.neural_types.elements import (
@@ -601,9 +602,7 @@ class FastPitchModel(SpectrogramGenerator, Exportable, FastPitchAdapterModelMixi
             dataset = instantiate(cfg.dataset, text_tokenizer=self.vocab,)
 
         sampler = dataset.get_sampler(cfg.dataloader_params.batch_size, world_size=self.trainer.world_size)
-        return torch.utils.data.DataLoader(
-            dataset, collate_fn=dataset.collate_fn, sampler=sampler, **cfg.dataloader_params
-        )
+        return get_train_dataloader(dataset, sampler, cfg.dataloader_params)
 
     def _setup_test_dataloader(self, cfg):
         phon_mode = contextlib.nullcontext()
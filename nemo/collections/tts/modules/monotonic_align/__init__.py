@@ -35,3 +35,5 @@
 
 
 from .numba_core import maximum_path
+from .numba_core import maximum_path as maximum_path_numba
+from .torch_core import maximum_path as maximum_path_torch
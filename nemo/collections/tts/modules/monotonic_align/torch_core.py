@@ -0,0 +1,58 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import torch
+
+
+def maximum_path(neg_cent, mask, max_neg_val=-1e9):
+    """ Torch version, computes the same path as the numba version on the device of the inputs.
+    The dynamic program runs over t_t, vectorized over the batch and t_s. Only the comparisons needed
+    for the backtracking are kept, and the backtracking is vectorized over the batch.
+    neg_cent: [b, t_t, t_s]
+    mask: [b, t_t, t_s]
+    """
+    device = neg_cent.device
+    batch_size, max_t_y, max_t_x = neg_cent.shape
+    value = neg_cent.detach().float()
+
+    t_ys = mask.sum(1)[:, 0].long()
+    t_xs = mask.sum(2)[:, 0].long()
+
+    x = torch.arange(max_t_x, device=device)
+    neg_val = torch.full((batch_size, max_t_x), max_neg_val, dtype=value.dtype, device=device)
+    # value of the previous row, shifted by one along t_s
+    prev_row = neg_val
+    prev_row_shifted = torch.where(x == 0, torch.zeros_like(neg_val), neg_val)
+    # take_prev[:, y, x] is True if value[y - 1, x] < value[y - 1, x - 1]
+    take_prev = torch.zeros(batch_size, max_t_y, max_t_x, dtype=torch.bool, device=device)
+    for y in range(max_t_y):
+        v_cur = torch.where(x == y, neg_val, prev_row)
+        take_prev[:, y] = prev_row < prev_row_shifted
+        prev_row = value[:, y] + torch.maximum(prev_row_shifted, v_cur)
+        prev_row_shifted = torch.cat([neg_val[:, :1], prev_row[:, :-1]], dim=1)
+
+    index = t_xs - 1
+    path_index = torch.zeros(batch_size, max_t_y, dtype=torch.long, device=device)
+    for y in range(max_t_y - 1, -1, -1):
+        is_valid_row = y < t_ys
+        path_index[:, y] = index
+        if y > 0:
+            move = take_prev[:, y].gather(1, index.clamp(min=0).unsqueeze(1)).squeeze(1) | (index == y)
+            index = index - (move & is_valid_row & (index != 0)).long()
+
+    path = torch.zeros(batch_size, max_t_y, max_t_x, dtype=neg_cent.dtype, device=device)
+    row_mask = torch.arange(max_t_y, device=device).unsqueeze(0) < t_ys.unsqueeze(1)
+    path.scatter_(2, path_index.clamp(min=0).unsqueeze(2), row_mask.unsqueeze(2).to(path.dtype))
+    return path
@@ -26,7 +26,7 @@ from nemo.collections.tts.modules.common import (
     LinearNorm,
     get_radtts_encoder,
 )
-from nemo.collections.tts.parts.utils.helpers import get_mask_from_lengths, mas_width1, regulate_len
+from nemo.collections.tts.parts.utils.helpers import b_mas, batched_mas_width1, get_mask_from_lengths, regulate_len
 from nemo.core.classes import Exportable, NeuralModule
 from nemo.core.neural_types.elements import Index, LengthsType, MelSpectrogramType, TokenDurationType, TokenIndex
 from nemo.core.neural_types.neural_type import NeuralType
@@ -390,14 +390,11 @@ class RadTTSModule(NeuralModule, Exportable):
         Args:
             attn: B x 1 x max_mel_len x max_text_len
         """
-        b_size = attn.shape[0]
         with torch.no_grad():
-            attn_cpu = attn.data.cpu().numpy()
-            attn_out = torch.zeros_like(attn)
-            for ind in range(b_size):
-                hard_attn = mas_width1(attn_cpu[ind, 0, : out_lens[ind], : in_lens[ind]])
-                attn_out[ind, 0, : out_lens[ind], : in_lens[ind]] = torch.tensor(hard_attn, device=attn.get_device())
-        return attn_out
+            if attn.device.type != "cpu":
+                return batched_mas_width1(attn.data, in_lens, out_lens)
+            attn_out = b_mas(attn.data.numpy(), in_lens.cpu().numpy(), out_lens.cpu().numpy(), width=1)
+        return torch.from_numpy(attn_out)
 
     def get_first_order_features(self, feats, dilation=1):
         """
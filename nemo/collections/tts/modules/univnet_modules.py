@@ -348,6 +348,7 @@ class Generator(NeuralModule):
     def input_types(self):
         return {
             "x": NeuralType(('B', 'D', 'T'), MelSpectrogramType()),
+            "z": NeuralType(('B', 'D', 'T'), VoidType(), optional=True),
         }
 
     @property
@@ -357,9 +358,10 @@ class Generator(NeuralModule):
         }
 
     @typecheck()
-    def forward(self, x):
-        # UnivNet starts with Gaussian noise
-        z = torch.randn(x.size(0), self.noise_dim, x.size(2), dtype=x.dtype, device=x.device)
+    def forward(self, x, z=None):
+        # UnivNet starts with Gaussian noise, which can be given to make the output deterministic
+        if z is None:
+            z = torch.randn(x.size(0), self.noise_dim, x.size(2), dtype=x.dtype, device=x.device)
         z = self.conv_pre(z)  # (B, c_g, L)
 
         for res_block in self.res_stack:
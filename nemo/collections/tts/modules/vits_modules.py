@@ -42,7 +42,7 @@ from torch.nn import functional as F
 from torch.nn.utils import remove_weight_norm, spectral_norm, weight_norm
 
 from nemo.collections.tts.modules.hifigan_modules import ResBlock1, ResBlock2, get_padding, init_weights
-from nemo.collections.tts.modules.monotonic_align import maximum_path
+from nemo.collections.tts.modules.monotonic_align import maximum_path_numba, maximum_path_torch
 from nemo.collections.tts.parts.utils.helpers import (
     convert_pad_shape,
     generate_path,
@@ -869,6 +869,8 @@ class SynthesizerTrn(nn.Module):
             neg_cent = neg_cent1 + neg_cent2 + neg_cent3 + neg_cent4
 
             attn_mask = torch.unsqueeze(text_mask, 2) * torch.unsqueeze(spec_mask, -1)
+            # numba is faster on CPU, on accelerators the torch version avoids copying to the host and syncing
+            maximum_path = maximum_path_numba if neg_cent.device.type == "cpu" else maximum_path_torch
             attn = maximum_path(neg_cent, attn_mask.squeeze(1)).unsqueeze(1).detach()
 
         w = attn.sum(2)
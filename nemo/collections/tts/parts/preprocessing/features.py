@@ -24,10 +24,15 @@ import torch
 from torch import Tensor
 
 from nemo.collections.asr.modules import AudioToMelSpectrogramPreprocessor
+from nemo.collections.tts.parts.preprocessing.pitch_estimation import batch_yin
+from nemo.collections.tts.parts.utils.sup_data_store import SupDataStore
 from nemo.collections.tts.parts.utils.tts_dataset_utils import get_audio_filepaths, normalize_volume, stack_tensors
 from nemo.utils.decorators import experimental
 
 
+PITCH_BACKENDS = ("pyin", "yin")
+
+
 @experimental
 class Featurizer(ABC):
     @abstractmethod
@@ -42,8 +47,30 @@ class Featurizer(ABC):
             overwrite: whether to overwrite features if they already exist.
         """
 
+    def save_batch(
+        self, manifest_entries: List[Dict[str, Any]], audio_dir: Path, feature_dir: Path, overwrite: bool = True
+    ) -> None:
+        """
+        Save feature values to disk for a list of manifest entries. Featurizers which compute features faster in
+        batches override this, by default the entries are saved one by one.
+
+        Args:
+            manifest_entries: List of manifest entry dictionaries.
+            audio_dir: base directory where audio is stored.
+            feature_dir: base directory where features will be stored.
+            overwrite: whether to overwrite features if they already exist.
+        """
+        for manifest_entry in manifest_entries:
+            self.save(manifest_entry=manifest_entry, audio_dir=audio_dir, feature_dir=feature_dir, overwrite=overwrite)
+
     @abstractmethod
-    def load(self, manifest_entry: Dict[str, Any], audio_dir: Path, feature_dir: Path) -> Dict[str, Tensor]:
+    def load(
+        self,
+        manifest_entry: Dict[str, Any],
+        audio_dir: Path,
+        feature_dir: Path,
+        feature_store: Optional[SupDataStore] = None,
+    ) -> Dict[str, Tensor]:
         """
         Read saved feature value for given manifest entry.
 
@@ -51,6 +78,8 @@ class Featurizer(ABC):
             manifest_entry: Manifest entry dictionary.
             audio_dir: base directory where audio is stored.
             feature_dir: base directory where features were stored by save().
+            feature_store: Optional packed feature store to read features from. Features missing from the
+                store are read from feature_dir.
 
         Returns:
             Dictionary of feature names to Tensors
@@ -77,6 +106,17 @@ def _get_feature_filepath(
     return feature_filepath
 
 
+def get_feature_store_key(manifest_entry: Dict[str, Any], audio_dir: Path) -> str:
+    """
+    Get the key of the input manifest entry in a packed feature store.
+
+    Example: audio_filepath "<audio_dir>/speaker1/audio1.wav" has the key "speaker1/audio1",
+        matching the feature file "<feature_dir>/<feature_name>/speaker1/audio1.npy"
+    """
+    _, audio_filepath_rel = get_audio_filepaths(manifest_entry=manifest_entry, audio_dir=audio_dir)
+    return audio_filepath_rel.with_suffix("").as_posix()
+
+
 def _features_exists(
     feature_names: List[Optional[str]], manifest_entry: Dict[str, Any], audio_dir: Path, feature_dir: Path,
 ) -> bool:
@@ -118,13 +158,24 @@ def _load_feature(
     audio_dir: Path,
     feature_dir: Path,
     indices: Optional[Tuple[int, int]] = None,
+    feature_store: Optional[SupDataStore] = None,
 ) -> None:
     """
-    If feature_name is provided, load feature into feature_dict from .npy file.
+    If feature_name is provided, load feature into feature_dict from the feature store or from .npy file.
     """
     if feature_name is None:
         return
 
+    if feature_store is not None:
+        feature_array = feature_store.get(
+            key=get_feature_store_key(manifest_entry=manifest_entry, audio_dir=audio_dir),
+            name=feature_name,
+            indices=indices,
+        )
+        if feature_array is not None:
+            feature_dict[feature_name] = torch.from_numpy(feature_array)
+            return
+
     feature_filepath = _get_feature_filepath(
         manifest_entry=manifest_entry, audio_dir=audio_dir, feature_dir=feature_dir, feature_name=feature_name
     )
@@ -257,7 +308,13 @@ class MelSpectrogramFeaturizer(Featurizer):
             feature_dir=feature_dir,
         )
 
-    def load(self, manifest_entry: Dict[str, Any], audio_dir: Path, feature_dir: Path) -> Dict[str, Tensor]:
+    def load(
+        self,
+        manifest_entry: Dict[str, Any],
+        audio_dir: Path,
+        feature_dir: Path,
+        feature_store: Optional[SupDataStore] = None,
+    ) -> Dict[str, Tensor]:
         feature_dict = {}
         indices = _get_frame_indices(
             manifest_entry=manifest_entry, sample_rate=self.sample_rate, hop_length=self.hop_length
@@ -269,6 +326,7 @@ class MelSpectrogramFeaturizer(Featurizer):
             audio_dir=audio_dir,
             feature_dir=feature_dir,
             indices=indices,
+            feature_store=feature_store,
         )
         return feature_dict
 
@@ -318,7 +376,13 @@ class EnergyFeaturizer(Featurizer):
             feature_dir=feature_dir,
         )
 
-    def load(self, manifest_entry: Dict[str, Any], audio_dir: Path, feature_dir: Path) -> Dict[str, Tensor]:
+    def load(
+        self,
+        manifest_entry: Dict[str, Any],
+        audio_dir: Path,
+        feature_dir: Path,
+        feature_store: Optional[SupDataStore] = None,
+    ) -> Dict[str, Tensor]:
         feature_dict = {}
         indices = _get_frame_indices(
             manifest_entry=manifest_entry,
@@ -332,6 +396,7 @@ class EnergyFeaturizer(Featurizer):
             audio_dir=audio_dir,
             feature_dir=feature_dir,
             indices=indices,
+            feature_store=feature_store,
         )
         return feature_dict
 
@@ -364,6 +429,10 @@ class PitchFeaturizer(Featurizer):
         batch_padding: If batch_seconds is provided, then this determines how many audio frames will be padded on
             both sides of each segment to ensure that the pitch values at the boundary are correct.
             If batch_seconds is not provided then this parameter is ignored.
+        pitch_backend: Pitch estimation algorithm, either "pyin" (librosa.pyin) or "yin" (vectorized YIN estimator
+            from pitch_estimation.py). "yin" is orders of magnitude faster, but it does not smooth pitch across frames.
+        yin_threshold: Threshold of the "yin" backend for a frame to be voiced. Lower values mark fewer frames
+            as voiced.
     """
 
     def __init__(
@@ -379,7 +448,12 @@ class PitchFeaturizer(Featurizer):
         volume_norm: bool = True,
         batch_seconds: Optional[float] = 30.0,
         batch_padding: int = 10,
+        pitch_backend: str = "pyin",
+        yin_threshold: float = 0.1,
     ) -> None:
+        if pitch_backend not in PITCH_BACKENDS:
+            raise ValueError(f"Unknown pitch_backend '{pitch_backend}', expected one of {PITCH_BACKENDS}")
+
         self.pitch_name = pitch_name
         self.voiced_mask_name = voiced_mask_name
         self.voiced_prob_name = voiced_prob_name
@@ -389,6 +463,8 @@ class PitchFeaturizer(Featurizer):
         self.volume_norm = volume_norm
         self.pitch_fmin = pitch_fmin
         self.pitch_fmax = pitch_fmax
+        self.pitch_backend = pitch_backend
+        self.yin_threshold = yin_threshold
         if batch_seconds:
             assert batch_padding is not None
             # Round sample size up to a multiple of hop_length
@@ -401,6 +477,151 @@ class PitchFeaturizer(Featurizer):
             self.batch_samples = None
             self.batch_padding = None
 
+    def estimate_pitch(self, audio: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Runs the configured pitch estimation backend on the input audio.
+
+        Args:
+            audio: [T_audio] float array with audio samples.
+
+        Returns:
+            pitch: [T_spec] float32 array containing pitch for each audio frame, 0 for unvoiced frames.
+            voiced_mask: [T_spec] bool array indicating whether each audio frame is voiced.
+            voiced_prob: [T_spec] float32 array with [0, 1] probability that each audio frame is voiced.
+        """
+        return self.estimate_pitch_batch([audio])[0]
+
+    def estimate_pitch_batch(self, audio_list: List[np.ndarray]) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Same as estimate_pitch for a list of audio. With the "yin" backend, all of them are processed in a single
+        batch, zero padded to the longest one, which does not change the frames of the shorter ones.
+
+        Args:
+            audio_list: List of [T_audio] float arrays with audio samples.
+
+        Returns:
+            List with the (pitch, voiced_mask, voiced_prob) arrays of every audio.
+        """
+        if self.pitch_backend == "pyin":
+            outputs = []
+            for audio in audio_list:
+                pitch, voiced_mask, voiced_prob = librosa.pyin(
+                    audio,
+                    fmin=self.pitch_fmin,
+                    fmax=self.pitch_fmax,
+                    sr=self.sample_rate,
+                    frame_length=self.win_length,
+                    hop_length=self.hop_length,
+                    fill_na=0.0,
+                )
+                outputs.append((pitch.astype(np.float32), voiced_mask, voiced_prob.astype(np.float32)))
+            return outputs
+
+        audio_batch = torch.zeros(len(audio_list), max(audio.shape[0] for audio in audio_list))
+        for i, audio in enumerate(audio_list):
+            audio_batch[i, : audio.shape[0]] = torch.from_numpy(audio)
+        pitch, voiced_mask, voiced_prob = batch_yin(
+            audio_batch,
+            sample_rate=self.sample_rate,
+            fmin=self.pitch_fmin,
+            fmax=self.pitch_fmax,
+            frame_length=self.win_length,
+            hop_length=self.hop_length,
+            threshold=self.yin_threshold,
+        )
+        outputs = []
+        for i, audio in enumerate(audio_list):
+            num_frames = 1 + audio.shape[0] // self.hop_length
+            outputs.append(
+                (
+                    pitch[i, :num_frames].numpy().astype(np.float32),
+                    voiced_mask[i, :num_frames].numpy(),
+                    voiced_prob[i, :num_frames].numpy().astype(np.float32),
+                )
+            )
+        return outputs
+
+    def _load_audio(self, manifest_entry: Dict[str, Any], audio_dir: Path) -> np.ndarray:
+        audio_filepath_abs, _ = get_audio_filepaths(manifest_entry=manifest_entry, audio_dir=audio_dir)
+        audio, _ = librosa.load(audio_filepath_abs, sr=self.sample_rate)
+
+        if self.volume_norm:
+            audio = normalize_volume(audio)
+
+        return audio
+
+    def _split_audio(self, audio: np.ndarray) -> List[np.ndarray]:
+        """Splits long audio into segments of batch_samples samples, padded on both sides with adjacent audio."""
+        if not self.batch_samples or audio.shape[0] < self.batch_samples:
+            return [audio]
+
+        num_chunks = int(np.ceil(audio.shape[0] / self.batch_samples))
+        audio_chunks = []
+        for i in range(num_chunks):
+            start_i = i * self.batch_samples
+            end_i = (i + 1) * self.batch_samples
+
+            if i != 0:
+                # Pad beginning with additional frames
+                start_i -= self.batch_padding_samples
+            if i != (num_chunks - 1):
+                # Pad end with additional frames
+                end_i += self.batch_padding_samples
+
+            audio_chunks.append(audio[start_i:end_i])
+        return audio_chunks
+
+    def _merge_chunks(
+        self, chunk_outputs: List[Tuple[np.ndarray, np.ndarray, np.ndarray]]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Removes the padded frames of the pitch of every segment returned by _split_audio and concatenates them."""
+        if len(chunk_outputs) == 1:
+            return chunk_outputs[0]
+
+        num_chunks = len(chunk_outputs)
+        features_list = []
+        for i, features in enumerate(chunk_outputs):
+            # Remove padded frames
+            if i != 0:
+                features = [feature[self.batch_padding_frames :] for feature in features]
+            if i != (num_chunks - 1):
+                features = [feature[: self.batch_frames] for feature in features]
+            features_list.append(features)
+
+        pitch, voiced_mask, voiced_prob = [
+            np.concatenate(feature_list, axis=0) for feature_list in zip(*features_list)
+        ]
+        return pitch, voiced_mask, voiced_prob
+
+    def _compute_pitch_from_audio(
+        self, audio_list: List[np.ndarray]
+    ) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        chunk_lists = [self._split_audio(audio) for audio in audio_list]
+        chunks = [chunk for chunk_list in chunk_lists for chunk in chunk_list]
+
+        # with yin, the segments are estimated in batches of at most as many padded samples as the longest segment
+        max_batch_samples = None
+        if self.pitch_backend == "yin" and self.batch_samples:
+            max_batch_samples = self.batch_samples + 2 * self.batch_padding_samples
+        chunk_outputs = []
+        batch = []
+        batch_length = 0
+        for chunk in chunks:
+            batch_length = max(batch_length, chunk.shape[0])
+            if batch and max_batch_samples and (len(batch) + 1) * batch_length > max_batch_samples:
+                chunk_outputs += self.estimate_pitch_batch(batch)
+                batch = []
+                batch_length = chunk.shape[0]
+            batch.append(chunk)
+        chunk_outputs += self.estimate_pitch_batch(batch)
+
+        outputs = []
+        start = 0
+        for chunk_list in chunk_lists:
+            outputs.append(self._merge_chunks(chunk_outputs[start : start + len(chunk_list)]))
+            start += len(chunk_list)
+        return outputs
+
     def compute_pitch(
         self, manifest_entry: Dict[str, Any], audio_dir: Path
     ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
@@ -416,105 +637,85 @@ class PitchFeaturizer(Featurizer):
             voiced_mask: [T_spec] bool tensor indicating whether each audio frame is voiced.
             voiced_prob: [T_spec] float array with [0, 1] probability that each audio frame is voiced.
         """
-        audio_filepath_abs, _ = get_audio_filepaths(manifest_entry=manifest_entry, audio_dir=audio_dir)
-        audio, _ = librosa.load(audio_filepath_abs, sr=self.sample_rate)
+        return self.compute_pitch_batch(manifest_entries=[manifest_entry], audio_dir=audio_dir)[0]
 
-        if self.volume_norm:
-            audio = normalize_volume(audio)
+    def compute_pitch_batch(
+        self, manifest_entries: List[Dict[str, Any]], audio_dir: Path
+    ) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Same as compute_pitch for several manifest entries. With the "yin" backend, the audio of all entries is
+        processed in batches.
 
-        if not self.batch_samples or audio.shape[0] < self.batch_samples:
-            pitch, voiced_mask, voiced_prob = librosa.pyin(
-                audio,
-                fmin=self.pitch_fmin,
-                fmax=self.pitch_fmax,
-                sr=self.sample_rate,
-                frame_length=self.win_length,
-                hop_length=self.hop_length,
-                fill_na=0.0,
-            )
-        else:
-            num_chunks = int(np.ceil(audio.shape[0] / self.batch_samples))
-            pitch_list = []
-            voiced_mask_list = []
-            voiced_prob_list = []
-
-            for i in range(num_chunks):
-                start_i = i * self.batch_samples
-                end_i = (i + 1) * self.batch_samples
-
-                if i != 0:
-                    # Pad beginning with additional frames
-                    start_i -= self.batch_padding_samples
-                if i != (num_chunks - 1):
-                    # Pad end with additional frames
-                    end_i += self.batch_padding_samples
-
-                audio_chunk = audio[start_i:end_i]
-                pitch_i, voiced_mask_i, voiced_prob_i = librosa.pyin(
-                    audio_chunk,
-                    fmin=self.pitch_fmin,
-                    fmax=self.pitch_fmax,
-                    sr=self.sample_rate,
-                    frame_length=self.win_length,
-                    hop_length=self.hop_length,
-                    fill_na=0.0,
-                )
-                # Remove padded frames
-                if i != 0:
-                    pitch_i = pitch_i[self.batch_padding_frames :]
-                    voiced_mask_i = voiced_mask_i[self.batch_padding_frames :]
-                    voiced_prob_i = voiced_prob_i[self.batch_padding_frames :]
-                if i != (num_chunks - 1):
-                    pitch_i = pitch_i[: self.batch_frames]
-                    voiced_mask_i = voiced_mask_i[: self.batch_frames]
-                    voiced_prob_i = voiced_prob_i[: self.batch_frames]
-
-                pitch_list.append(pitch_i)
-                voiced_mask_list.append(voiced_mask_i)
-                voiced_prob_list.append(voiced_prob_i)
-
-            pitch = np.concatenate(pitch_list, axis=0)
-            voiced_mask = np.concatenate(voiced_mask_list, axis=0)
-            voiced_prob = np.concatenate(voiced_prob_list, axis=0)
-
-        pitch = pitch.astype(np.float32)
-        voiced_prob = voiced_prob.astype(np.float32)
+        Args:
+            manifest_entries: List of manifest entry dictionaries.
+            audio_dir: base directory where audio is store
 
-        return pitch, voiced_mask, voiced_prob
+        Returns:
+            List with the (pitch, voiced_mask, voiced_prob) arrays of every entry.
+        """
+        audio_list = [self._load_audio(manifest_entry=entry, audio_dir=audio_dir) for entry in manifest_entries]
+        return self._compute_pitch_from_audio(audio_list)
 
-    def save(self, manifest_entry: Dict[str, Any], audio_dir: Path, feature_dir: Path, overwrite: bool = True) -> None:
-        if not overwrite and _features_exists(
-            feature_names=[self.pitch_name, self.voiced_mask_name, self.voiced_prob_name],
-            manifest_entry=manifest_entry,
-            audio_dir=audio_dir,
-            feature_dir=feature_dir,
-        ):
-            return
+    def _save_pitch(
+        self,
+        features: Tuple[np.ndarray, np.ndarray, np.ndarray],
+        manifest_entry: Dict[str, Any],
+        audio_dir: Path,
+        feature_dir: Path,
+    ) -> None:
+        feature_names = [self.pitch_name, self.voiced_mask_name, self.voiced_prob_name]
+        for feature_name, feature in zip(feature_names, features):
+            _save_feature(
+                feature_name=feature_name,
+                features=feature,
+                manifest_entry=manifest_entry,
+                audio_dir=audio_dir,
+                feature_dir=feature_dir,
+            )
 
-        pitch, voiced_mask, voiced_prob = self.compute_pitch(manifest_entry=manifest_entry, audio_dir=audio_dir)
-        _save_feature(
-            feature_name=self.pitch_name,
-            features=pitch,
-            manifest_entry=manifest_entry,
-            audio_dir=audio_dir,
-            feature_dir=feature_dir,
-        )
-        _save_feature(
-            feature_name=self.voiced_mask_name,
-            features=voiced_mask,
-            manifest_entry=manifest_entry,
-            audio_dir=audio_dir,
-            feature_dir=feature_dir,
-        )
-        _save_feature(
-            feature_name=self.voiced_prob_name,
-            features=voiced_prob,
-            manifest_entry=manifest_entry,
-            audio_dir=audio_dir,
-            feature_dir=feature_dir,
+    def save(self, manifest_entry: Dict[str, Any], audio_dir: Path, feature_dir: Path, overwrite: bool = True) -> None:
+        self.save_batch(
+            manifest_entries=[manifest_entry], audio_dir=audio_dir, feature_dir=feature_dir, overwrite=overwrite
         )
 
-    def load(self, manifest_entry: Dict[str, Any], audio_dir: Path, feature_dir: Path) -> Dict[str, Tensor]:
+    def save_batch(
+        self, manifest_entries: List[Dict[str, Any]], audio_dir: Path, feature_dir: Path, overwrite: bool = True
+    ) -> None:
+        if not overwrite:
+            manifest_entries = [
+                entry
+                for entry in manifest_entries
+                if not _features_exists(
+                    feature_names=[self.pitch_name, self.voiced_mask_name, self.voiced_prob_name],
+                    manifest_entry=entry,
+                    audio_dir=audio_dir,
+                    feature_dir=feature_dir,
+                )
+            ]
+
+        # with yin, the audio is loaded until there is enough of it for a batch, which bounds the memory
+        pending_entries = []
+        pending_audio = []
+        for i, entry in enumerate(manifest_entries):
+            pending_entries.append(entry)
+            pending_audio.append(self._load_audio(manifest_entry=entry, audio_dir=audio_dir))
+            num_samples = sum(audio.shape[0] for audio in pending_audio)
+            is_full = self.pitch_backend == "pyin" or (self.batch_samples and num_samples >= self.batch_samples)
+            if is_full or i == len(manifest_entries) - 1:
+                for pending_entry, features in zip(pending_entries, self._compute_pitch_from_audio(pending_audio)):
+                    self._save_pitch(
+                        features=features, manifest_entry=pending_entry, audio_dir=audio_dir, feature_dir=feature_dir
+                    )
+                pending_entries = []
+                pending_audio = []
+
+    def load(
+        self,
+        manifest_entry: Dict[str, Any],
+        audio_dir: Path,
+        feature_dir: Path,
+        feature_store: Optional[SupDataStore] = None,
+    ) -> Dict[str, Tensor]:
         feature_dict = {}
         indices = _get_frame_indices(
             manifest_entry=manifest_entry, sample_rate=self.sample_rate, hop_length=self.hop_length
@@ -526,6 +727,7 @@ class PitchFeaturizer(Featurizer):
             audio_dir=audio_dir,
             feature_dir=feature_dir,
             indices=indices,
+            feature_store=feature_store,
         )
         _load_feature(
             feature_dict=feature_dict,
@@ -534,6 +736,7 @@ class PitchFeaturizer(Featurizer):
             audio_dir=audio_dir,
             feature_dir=feature_dir,
             indices=indices,
+            feature_store=feature_store,
         )
         _load_feature(
             feature_dict=feature_dict,
@@ -542,6 +745,7 @@ class PitchFeaturizer(Featurizer):
             audio_dir=audio_dir,
             feature_dir=feature_dir,
             indices=indices,
+            feature_store=feature_store,
         )
         return feature_dict
 
@@ -0,0 +1,122 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import math
+from typing import Tuple
+
+import torch
+from torch import Tensor
+
+YIN_EPSILON = 1e-10
+
+
+def _next_power_of_two(value: int) -> int:
+    return 1 << (value - 1).bit_length()
+
+
+def batch_yin(
+    audio: Tensor,
+    sample_rate: int,
+    fmin: float,
+    fmax: float,
+    frame_length: int,
+    hop_length: int,
+    threshold: float = 0.1,
+) -> Tuple[Tensor, Tensor, Tensor]:
+    """
+    Vectorized YIN pitch estimator over a batch of audio.
+
+    All frames of all utterances are processed at once: the difference function of every frame is computed
+    with an FFT-based cross-correlation, followed by the cumulative mean normalized difference and the
+    selection of the first trough below the threshold, refined with parabolic interpolation.
+    Frames are centered and zero padded the same way as `librosa.pyin`, so an utterance with
+    `num_samples` samples has `1 + num_samples // hop_length` frames, matching pyin and the mel spectrogram.
+
+    Unlike pyin, there is no HMM smoothing across frames. The voiced probability is derived from
+    the aperiodicity of the selected period, `1 - cmnd(period)`.
+
+    Args:
+        audio: [B, T] float tensor with a batch of (zero padded) audio.
+        sample_rate: Sample rate of the audio.
+        fmin: Minimum pitch to detect, in Hz.
+        fmax: Maximum pitch to detect, in Hz.
+        frame_length: Audio frame length to use for pitch computation.
+        hop_length: Audio hop length to use for pitch computation.
+        threshold: Threshold on the cumulative mean normalized difference for a frame to be voiced.
+
+    Returns:
+        pitch: [B, T_frames] float tensor with pitch in Hz, 0 for unvoiced frames.
+        voiced_mask: [B, T_frames] bool tensor indicating whether each frame is voiced.
+        voiced_prob: [B, T_frames] float tensor with [0, 1] probability that each frame is voiced.
+    """
+    if audio.dim() != 2:
+        raise ValueError(f"Expected audio of shape [B, T], got {list(audio.shape)}")
+    if not 0 < fmin < fmax:
+        raise ValueError(f"Expected 0 < fmin < fmax, got fmin={fmin}, fmax={fmax}")
+
+    min_period = max(int(math.floor(sample_rate / fmax)), 1)
+    max_period = int(math.ceil(sample_rate / fmin))
+    if max_period >= frame_length:
+        raise ValueError(
+            f"frame_length={frame_length} is too short for fmin={fmin}: it must be larger than {max_period} samples"
+        )
+
+    # [B, T_frames, frame_length], centered frames as in librosa
+    padding = frame_length // 2
+    audio = torch.nn.functional.pad(audio.float(), (padding, padding))
+    frames = audio.unfold(-1, frame_length, hop_length)
+
+    # difference function d(tau) = sum_j (x[j] - x[j + tau]) ** 2 for j < window, tau <= max_period
+    window = frame_length - max_period
+    n_fft = _next_power_of_two(frame_length + window)
+    frames_fft = torch.fft.rfft(frames, n=n_fft)
+    window_fft = torch.fft.rfft(frames[..., :window], n=n_fft)
+    cross_correlation = torch.fft.irfft(frames_fft * window_fft.conj(), n=n_fft)[..., : max_period + 1]
+
+    energy_cumsum = torch.nn.functional.pad(torch.cumsum(frames.square(), dim=-1), (1, 0))
+    lagged_energy = energy_cumsum[..., window : window + max_period + 1] - energy_cumsum[..., : max_period + 1]
+    frame_energy = lagged_energy[..., :1]
+    difference = (frame_energy + lagged_energy - 2 * cross_correlation).clamp(min=0.0)
+
+    # cumulative mean normalized difference, for tau in [1, max_period]
+    periods = torch.arange(1, max_period + 1, device=audio.device, dtype=difference.dtype)
+    cmnd = difference[..., 1:] * periods / torch.cumsum(difference[..., 1:], dim=-1).clamp(min=YIN_EPSILON)
+    # restrict to [min_period, max_period]
+    cmnd = cmnd[..., min_period - 1 :]
+
+    previous_value = torch.nn.functional.pad(cmnd[..., :-1], (1, 0), value=math.inf)
+    next_value = torch.nn.functional.pad(cmnd[..., 1:], (0, 1), value=math.inf)
+    is_trough = (cmnd <= previous_value) & (cmnd <= next_value)
+    candidates = is_trough & (cmnd < threshold)
+    has_candidate = candidates.any(dim=-1)
+    first_candidate = torch.argmax(candidates.to(torch.int8), dim=-1)
+    best_index = torch.where(has_candidate, first_candidate, torch.argmin(cmnd, dim=-1))
+
+    # parabolic interpolation around the selected trough
+    last_index = cmnd.shape[-1] - 1
+    center = cmnd.gather(-1, best_index.unsqueeze(-1)).squeeze(-1)
+    left = cmnd.gather(-1, (best_index - 1).clamp(min=0).unsqueeze(-1)).squeeze(-1)
+    right = cmnd.gather(-1, (best_index + 1).clamp(max=last_index).unsqueeze(-1)).squeeze(-1)
+    curvature = left - 2 * center + right
+    shift = torch.where(curvature > YIN_EPSILON, 0.5 * (left - right) / curvature, torch.zeros_like(curvature))
+    interior = (best_index > 0) & (best_index < last_index)
+    shift = torch.where(interior, shift.clamp(min=-1.0, max=1.0), torch.zeros_like(shift))
+
+    period = min_period + best_index.to(shift.dtype) + shift
+    is_silent = frame_energy.squeeze(-1) <= YIN_EPSILON * window
+    voiced_mask = has_candidate & ~is_silent
+    pitch = torch.where(voiced_mask, sample_rate / period, torch.zeros_like(period))
+    voiced_prob = torch.where(is_silent, torch.zeros_like(center), (1.0 - center).clamp(min=0.0, max=1.0))
+
+    return pitch, voiced_mask, voiced_prob
@@ -0,0 +1,342 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Bulk tokenization of audio with audio codec models.
+
+The codec tokens of a manifest are stored as an `MMapIndexedDataset`, the binary format of the Megatron language
+model datasets, with one item per manifest entry, in the order of the manifest:
+
+    <prefix>.bin        # tokens of all entries, concatenated
+    <prefix>.idx        # MMapIndexedDataset index, with the number of tokens of every entry
+    <prefix>.json       # format version, number of codebooks, sample rate and samples per frame of the codec
+
+The [num_codebooks, num_frames] tokens of an entry are stored frame-major, i.e. as the flattened
+[num_frames, num_codebooks] array, so that a range of frames is a contiguous range of the item.
+
+Tokens are computed in shards of the manifest, written to '<prefix>.shards/', which are merged once all of them
+are complete. Completed shards are skipped when tokenization is restarted, so an interrupted run can be resumed.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import torch
+
+from nemo.collections.nlp.data.language_modeling.megatron.indexed_dataset import (
+    MMapIndexedDataset,
+    MMapIndexedDatasetBuilder,
+    data_file_path,
+    index_file_path,
+)
+from nemo.collections.tts.parts.utils.tts_dataset_utils import load_audio, stack_tensors
+
+CODEC_TOKENS_VERSION = 1
+
+
+def get_codec_tokens_meta_path(prefix: Union[str, Path]) -> Path:
+    """Path of the metadata of the codec tokens with the given path prefix."""
+    return Path(f"{prefix}.json")
+
+
+def get_codec_tokens_shard_prefix(prefix: Union[str, Path], shard_id: int) -> Path:
+    """Path prefix of a shard of the codec tokens with the given path prefix."""
+    return Path(f"{prefix}.shards") / f"shard_{shard_id:06d}"
+
+
+def get_batches_by_duration(
+    durations: Sequence[float], batch_duration: float, max_batch_size: Optional[int] = None
+) -> List[List[int]]:
+    """
+    Groups utterances into batches of similar duration for inference.
+
+    Utterances are sorted by decreasing duration and packed greedily, so that the padded duration of every batch,
+    i.e. its number of utterances times its longest duration, is at most `batch_duration`. Utterances longer than
+    `batch_duration` are put into batches of their own.
+
+    Args:
+        durations: Duration of every utterance.
+        batch_duration: Maximum padded duration of a batch.
+        max_batch_size: Optional maximum number of utterances per batch.
+
+    Returns:
+        List of batches, each a list of utterance indices.
+    """
+    if batch_duration <= 0:
+        raise ValueError(f"batch_duration must be positive, got {batch_duration}")
+
+    order = sorted(range(len(durations)), key=lambda i: durations[i], reverse=True)
+    batches = []
+    batch = []
+    for i in order:
+        # the first utterance of a batch is the longest one
+        padded_duration = (len(batch) + 1) * (durations[batch[0]] if batch else durations[i])
+        if batch and (padded_duration > batch_duration or len(batch) == max_batch_size):
+            batches.append(batch)
+            batch = []
+        batch.append(i)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class CodecAudioDataset(torch.utils.data.Dataset):
+    """
+    Loads the audio of manifest entries for tokenization with a codec model.
+
+    Args:
+        entries: Manifest entries.
+        audio_dir: Base directory of relative audio paths.
+        sample_rate: Sample rate of the codec model.
+    """
+
+    def __init__(self, entries: List[Dict[str, Any]], audio_dir: Path, sample_rate: int):
+        super().__init__()
+        self.entries = entries
+        self.audio_dir = Path(audio_dir)
+        self.sample_rate = sample_rate
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, index):
+        audio, _, _ = load_audio(
+            manifest_entry=self.entries[index], audio_dir=self.audio_dir, sample_rate=self.sample_rate
+        )
+        return index, torch.tensor(audio, dtype=torch.float32)
+
+    @staticmethod
+    def collate_fn(batch: List[Tuple[int, torch.Tensor]]) -> Tuple[List[int], torch.Tensor, torch.Tensor]:
+        indices = [index for index, _ in batch]
+        audio_len = torch.tensor([audio.shape[0] for _, audio in batch], dtype=torch.int32)
+        audio = stack_tensors([audio for _, audio in batch], max_lens=[int(audio_len.max().item())])
+        return indices, audio, audio_len
+
+
+def encode_codec_tokens(
+    model,
+    entries: List[Dict[str, Any]],
+    audio_dir: Path,
+    batch_duration: float = 200.0,
+    max_batch_size: Optional[int] = None,
+    num_workers: int = 0,
+) -> List[np.ndarray]:
+    """
+    Encodes the audio of manifest entries into codec tokens.
+
+    Audio is loaded by `num_workers` data loader workers while the model encodes the previous batch. Batches are
+    formed from utterances of similar duration with `get_batches_by_duration`, to keep padding small.
+
+    Args:
+        model: Audio codec model, e.g. AudioCodecModel.
+        entries: Manifest entries with 'audio_filepath' and 'duration'.
+        audio_dir: Base directory of relative audio paths.
+        batch_duration: Maximum padded duration of a batch, in seconds.
+        max_batch_size: Optional maximum number of utterances per batch.
+        num_workers: Number of data loader workers loading audio.
+
+    Returns:
+        List with the [num_codebooks, num_frames] tokens of every entry, in the order of the entries.
+    """
+    dataset = CodecAudioDataset(entries=entries, audio_dir=audio_dir, sample_rate=model.sample_rate)
+    batches = get_batches_by_duration(
+        durations=[entry["duration"] for entry in entries],
+        batch_duration=batch_duration,
+        max_batch_size=max_batch_size,
+    )
+    data_loader = torch.utils.data.DataLoader(
+        dataset, batch_sampler=batches, collate_fn=dataset.collate_fn, num_workers=num_workers
+    )
+
+    tokens_list = [None] * len(entries)
+    with torch.inference_mode():
+        for indices, audio, audio_len in data_loader:
+            tokens, tokens_len = model.encode(audio=audio.to(model.device), audio_len=audio_len.to(model.device))
+            tokens = tokens.cpu().numpy()
+            tokens_len = tokens_len.tolist()
+            for i, index in enumerate(indices):
+                tokens_list[index] = tokens[i, :, : tokens_len[i]]
+    return tokens_list
+
+
+def _get_token_dtype(max_token: int) -> type:
+    return np.uint16 if max_token <= np.iinfo(np.uint16).max else np.int32
+
+
+def _write_meta(prefix: Path, meta: Dict[str, Any]):
+    meta_path = get_codec_tokens_meta_path(prefix)
+    # the temporary file is unique, so that processes writing the same metadata do not interfere
+    fd, tmp_meta_path = tempfile.mkstemp(dir=meta_path.parent, prefix=f".{meta_path.name}.", suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as meta_f:
+        json.dump(meta, meta_f, indent=2)
+    os.replace(tmp_meta_path, meta_path)
+
+
+def _invalidate_meta(prefix: Path):
+    """Removes the metadata of tokens which are about to be rewritten, so that they are not read in the meantime."""
+    get_codec_tokens_meta_path(prefix).unlink(missing_ok=True)
+
+
+def write_codec_tokens(
+    prefix: Union[str, Path], tokens: Sequence[np.ndarray], sample_rate: int, samples_per_frame: int, **extra_meta
+):
+    """
+    Writes codec tokens as an MMapIndexedDataset.
+
+    The metadata file is removed first and written last, so readers never see partially written tokens.
+
+    Args:
+        prefix: Path prefix of the output files.
+        tokens: List with the [num_codebooks, num_frames] tokens of every entry.
+        sample_rate: Sample rate of the codec model.
+        samples_per_frame: Number of audio samples per frame of tokens.
+        extra_meta: Additional entries of the metadata.
+    """
+    prefix = Path(prefix)
+    prefix.parent.mkdir(parents=True, exist_ok=True)
+    num_codebooks = tokens[0].shape[0] if len(tokens) else 0
+    if any(t.shape[0] != num_codebooks for t in tokens):
+        raise ValueError(f"All entries must have {num_codebooks} codebooks")
+
+    _invalidate_meta(prefix)
+    dtype = _get_token_dtype(max((int(t.max()) for t in tokens if t.size), default=0))
+    builder = MMapIndexedDatasetBuilder(data_file_path(str(prefix)), dtype=dtype)
+    for entry_tokens in tokens:
+        builder.add_item(torch.from_numpy(np.ascontiguousarray(entry_tokens.T).reshape(-1)))
+        builder.end_document()
+    builder.finalize(index_file_path(str(prefix)))
+
+    meta = {
+        "version": CODEC_TOKENS_VERSION,
+        "num_items": len(tokens),
+        "num_codebooks": num_codebooks,
+        "sample_rate": sample_rate,
+        "samples_per_frame": samples_per_frame,
+        **extra_meta,
+    }
+    _write_meta(prefix, meta)
+
+
+def merge_codec_tokens(shard_prefixes: Sequence[Union[str, Path]], prefix: Union[str, Path], **extra_meta):
+    """
+    Merges shards of codec tokens written by `write_codec_tokens` into a single MMapIndexedDataset.
+
+    The output is written to temporary files unique to the calling process, which are renamed when complete, so
+    several processes may merge the same shards concurrently.
+
+    Args:
+        shard_prefixes: Path prefixes of the shards, in order.
+        prefix: Path prefix of the merged output.
+        extra_meta: Additional entries of the metadata.
+    """
+    shards = [CodecTokens(shard_prefix) for shard_prefix in shard_prefixes]
+    if not shards:
+        raise ValueError("No shards to merge")
+    for key in ("num_codebooks", "sample_rate", "samples_per_frame"):
+        values = {shard.meta[key] for shard in shards if shard.meta["num_items"] > 0}
+        if len(values) > 1:
+            raise ValueError(f"Shards have different values of {key}: {values}")
+
+    dtype = np.int32 if any(shard.dtype == np.int32 for shard in shards) else np.uint16
+    prefix = Path(prefix)
+    prefix.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=prefix.parent, prefix=f".{prefix.name}.", suffix=".tmp")
+    try:
+        tmp_prefix = os.path.join(tmp_dir, prefix.name)
+        builder = MMapIndexedDatasetBuilder(data_file_path(tmp_prefix), dtype=dtype)
+        for shard in shards:
+            for i in range(len(shard)):
+                builder.add_item(torch.from_numpy(shard.indexed_dataset[i].astype(np.int32)))
+                builder.end_document()
+        builder.finalize(index_file_path(tmp_prefix))
+        _invalidate_meta(prefix)
+        os.replace(data_file_path(tmp_prefix), data_file_path(str(prefix)))
+        os.replace(index_file_path(tmp_prefix), index_file_path(str(prefix)))
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    shard = next((shard for shard in shards if len(shard) > 0), shards[0])
+    meta = {
+        "version": CODEC_TOKENS_VERSION,
+        "num_items": sum(len(shard) for shard in shards),
+        "num_codebooks": shard.num_codebooks,
+        "sample_rate": shard.sample_rate,
+        "samples_per_frame": shard.samples_per_frame,
+        **extra_meta,
+    }
+    _write_meta(prefix, meta)
+
+
+class CodecTokens:
+    """
+    Read-only access to codec tokens written by `write_codec_tokens` or `merge_codec_tokens`.
+
+    Args:
+        prefix: Path prefix of the tokens.
+    """
+
+    def __init__(self, prefix: Union[str, Path]):
+        self.prefix = Path(prefix)
+        meta_path = get_codec_tokens_meta_path(self.prefix)
+        if not meta_path.exists():
+            raise FileNotFoundError(f"Codec tokens metadata not found: {meta_path}")
+        with open(meta_path, "r", encoding="utf-8") as meta_f:
+            self.meta = json.load(meta_f)
+        if self.meta["version"] != CODEC_TOKENS_VERSION:
+            raise ValueError(f"Unsupported codec tokens version {self.meta['version']} in {meta_path}")
+
+        self.num_codebooks = self.meta["num_codebooks"]
+        self.sample_rate = self.meta["sample_rate"]
+        self.samples_per_frame = self.meta["samples_per_frame"]
+        self.indexed_dataset = MMapIndexedDataset(str(self.prefix), skip_warmup=True)
+        if len(self.indexed_dataset) != self.meta["num_items"]:
+            raise ValueError(
+                f"Codec tokens {self.prefix} have {len(self.indexed_dataset)} items, expected {self.meta['num_items']}"
+            )
+
+    def __len__(self) -> int:
+        return len(self.indexed_dataset)
+
+    @property
+    def dtype(self) -> type:
+        return self.indexed_dataset._index.dtype
+
+    @property
+    def num_frames(self) -> np.ndarray:
+        """Number of frames of every entry."""
+        return self.indexed_dataset.sizes // max(self.num_codebooks, 1)
+
+    def get(self, index: int, frame_offset: int = 0, num_frames: Optional[int] = None) -> np.ndarray:
+        """
+        Reads the tokens of an entry.
+
+        Args:
+            index: Index of the entry in the manifest.
+            frame_offset: Index of the first frame to read.
+            num_frames: Number of frames to read. Defaults to all frames after `frame_offset`.
+
+        Returns:
+            [num_codebooks, num_frames] array of tokens.
+        """
+        if num_frames is None:
+            num_frames = int(self.num_frames[index]) - frame_offset
+        flat_tokens = self.indexed_dataset.get(
+            index, offset=frame_offset * self.num_codebooks, length=num_frames * self.num_codebooks
+        )
+        return flat_tokens.reshape(num_frames, self.num_codebooks).T
@@ -129,9 +129,12 @@ def binarize_attention_parallel(attn, in_lens, out_lens):
             attn: B x 1 x max_mel_len x max_text_len
         """
     with torch.no_grad():
-        log_attn_cpu = torch.log(attn.data).cpu().numpy()
-        attn_out = b_mas(log_attn_cpu, in_lens.cpu().numpy(), out_lens.cpu().numpy(), width=1)
-    return torch.from_numpy(attn_out).to(attn.device)
+        log_attn = torch.log(attn.data)
+        if log_attn.device.type != "cpu":
+            # avoids copying the attention to the host and syncing on every step
+            return batched_mas_width1(log_attn, in_lens, out_lens)
+        attn_out = b_mas(log_attn.numpy(), in_lens.cpu().numpy(), out_lens.cpu().numpy(), width=1)
+    return torch.from_numpy(attn_out)
 
 
 def get_mask_from_lengths(lengths: Optional[torch.Tensor] = None, x: Optional[torch.Tensor] = None,) -> torch.Tensor:
@@ -259,6 +262,55 @@ def b_mas(b_log_attn_map, in_lens, out_lens, width=1):
     return attn_out
 
 
+def batched_mas_width1(b_log_attn_map: torch.Tensor, in_lens: torch.Tensor, out_lens: torch.Tensor) -> torch.Tensor:
+    """Batched monotonic alignment search with width 1, on the device of the inputs.
+
+    Computes the same alignments as `b_mas`, without copying the attention maps to the host. The dynamic
+    program runs frame by frame, vectorized over the batch and text dimensions, and only the choice of the
+    previous token is stored for the backtracking, which is vectorized over the batch as well.
+    Padded text positions never influence valid ones (every cell only depends on itself and the previous token
+    of the previous frame), so the whole padded map is processed at once.
+
+    Args:
+        b_log_attn_map: B x 1 x max_mel_len x max_text_len. Log attention matrix.
+        in_lens: B. Lengths of texts.
+        out_lens: B. Lengths of spectrograms.
+
+    Output:
+        attn_out: B x 1 x max_mel_len x max_text_len. Hard attention matrix, zero outside of the valid lengths.
+    """
+    log_attn_map = b_log_attn_map[:, 0]
+    batch_size, max_mel_len, max_text_len = log_attn_map.shape
+    device = log_attn_map.device
+    in_lens = in_lens.to(device=device, dtype=torch.long)
+    out_lens = out_lens.to(device=device, dtype=torch.long)
+
+    # log_p of the first frame: only the first token can be attended
+    neg_inf = torch.full((batch_size, 1), -float("inf"), dtype=log_attn_map.dtype, device=device)
+    log_p = torch.cat([log_attn_map[:, 0, :1], neg_inf.expand(-1, max_text_len - 1)], dim=1)
+    # move_to_prev[:, i, j] is True if frame i attends token j after token j - 1 at frame i - 1
+    move_to_prev = torch.zeros(batch_size, max_mel_len, max_text_len, dtype=torch.bool, device=device)
+    for i in range(1, max_mel_len):
+        log_p_prev_token = torch.cat([neg_inf, log_p[:, :-1]], dim=1)
+        move_to_prev[:, i] = log_p_prev_token >= log_p
+        log_p = log_attn_map[:, i] + torch.maximum(log_p_prev_token, log_p)
+
+    # backtrack from the last token at the last frame of every utterance
+    token_idx = (in_lens - 1).clamp(min=0)
+    path = torch.zeros(batch_size, max_mel_len, dtype=torch.long, device=device)
+    for i in range(max_mel_len - 1, 0, -1):
+        is_valid_frame = i < out_lens
+        path[:, i] = token_idx
+        move = move_to_prev[:, i].gather(1, token_idx.unsqueeze(1)).squeeze(1)
+        token_idx = token_idx - (move & is_valid_frame & (token_idx > 0)).long()
+    path[:, 0] = token_idx
+
+    attn_out = torch.zeros_like(b_log_attn_map)
+    frame_mask = torch.arange(max_mel_len, device=device).unsqueeze(0) < out_lens.unsqueeze(1)
+    attn_out[:, 0].scatter_(2, path.unsqueeze(2), frame_mask.unsqueeze(2).to(attn_out.dtype))
+    return attn_out
+
+
 def griffin_lim(magnitudes, n_iters=50, n_fft=1024):
     """
     Griffin-Lim algorithm to convert magnitude spectrograms to audio signals
@@ -0,0 +1,267 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import math
+from typing import Iterator, Optional, Tuple
+
+import torch
+
+# longest spectrogram used to measure the receptive field of a vocoder
+_MAX_PROBE_FRAMES = 4096
+# number of frames of noise drawn at a time for noise driven vocoders
+_NOISE_BLOCK_FRAMES = 64
+
+
+class StreamingVocoder:
+    """
+    Chunked, streaming inference of convolutional vocoders such as HiFi-GAN and UnivNet.
+
+    Spectrogram frames are fed incrementally, and the audio of every `chunk_frames` frames is returned as soon as
+    `context_frames` frames after it are available. Every chunk is vocoded together with `context_frames` frames
+    of context on both sides, which covers the receptive field of the vocoder, and the audio of the context is
+    discarded. Since the audio of a chunk then only depends on frames which were vocoded with it, the concatenated
+    chunks are the same as the audio of a single forward pass over the whole spectrogram, without any
+    cross-fading at the chunk boundaries.
+
+    The receptive field is measured once, by vocoding a random spectrogram with and without a change of its
+    center frame, unless `context_frames` is given.
+
+    UnivNet generates audio from Gaussian noise, which is drawn anew on every forward pass. To keep the chunks
+    consistent, the noise of every frame is drawn once when the frame is fed, from a generator seeded with `seed`,
+    and passed to every forward pass covering the frame. The noise of a stream only depends on the seed, so a stream
+    is the same as a single forward pass with the same noise.
+
+    Args:
+        vocoder: Vocoder model with `convert_spectrogram_to_audio`, e.g. HifiGanModel or UnivNetModel.
+        chunk_frames: Number of spectrogram frames returned per chunk.
+        context_frames: Number of spectrogram frames of context on each side of a chunk. Defaults to the measured
+            receptive field of the vocoder.
+        seed: Seed of the noise of noise driven vocoders. Defaults to the global random number generator.
+    """
+
+    def __init__(
+        self, vocoder, chunk_frames: int = 32, context_frames: Optional[int] = None, seed: Optional[int] = None
+    ):
+        if chunk_frames <= 0:
+            raise ValueError(f"chunk_frames must be positive, got {chunk_frames}")
+        if context_frames is not None and context_frames < 0:
+            raise ValueError(f"context_frames must not be negative, got {context_frames}")
+
+        self.vocoder = vocoder
+        self.chunk_frames = chunk_frames
+        self.seed = seed
+        self.noise_dim = getattr(getattr(vocoder, "generator", None), "noise_dim", None)
+
+        self._context_frames = context_frames
+        self._hop_length = None
+        self.reset()
+
+    @property
+    def context_frames(self) -> Optional[int]:
+        """Frames of context on each side of a chunk, None until it is measured on the first chunk."""
+        return self._context_frames
+
+    @property
+    def hop_length(self) -> Optional[int]:
+        """Audio samples per spectrogram frame, None until it is measured on the first chunk."""
+        return self._hop_length
+
+    @property
+    def lookahead_frames(self) -> Optional[int]:
+        """Number of frames which have to be fed before the first chunk is returned."""
+        if self._context_frames is None:
+            return None
+        return self.chunk_frames + self._context_frames
+
+    def reset(self):
+        """Starts a new stream."""
+        self._spec = None
+        self._noise = None
+        # absolute index of the first frame in the buffers
+        self._buffer_start = 0
+        self._num_frames = 0
+        self._num_returned_frames = 0
+        self._finished = False
+        self._noise_generator = None
+        self._spare_noise = None
+
+    def _vocode(self, spec: torch.Tensor, noise: Optional[torch.Tensor]) -> torch.Tensor:
+        if noise is not None:
+            return self.vocoder.generator(x=spec, z=noise).squeeze(1)
+        return self.vocoder.convert_spectrogram_to_audio(spec=spec)
+
+    def _draw_noise(self, batch_size: int, num_frames: int, like: torch.Tensor) -> torch.Tensor:
+        if self._noise_generator is None and self.seed is not None:
+            self._noise_generator = torch.Generator(device=like.device)
+            self._noise_generator.manual_seed(self.seed)
+        # noise is drawn in blocks of a fixed size, since the values drawn by torch.randn depend on the size
+        # of the draw, so the noise of a frame does not depend on how the frames are fed
+        while self._spare_noise is None or self._spare_noise.shape[-1] < num_frames:
+            block = torch.randn(
+                (batch_size, self.noise_dim, _NOISE_BLOCK_FRAMES),
+                generator=self._noise_generator,
+                dtype=like.dtype,
+                device=like.device,
+            )
+            self._spare_noise = block if self._spare_noise is None else torch.cat([self._spare_noise, block], dim=-1)
+        noise = self._spare_noise[..., :num_frames]
+        self._spare_noise = self._spare_noise[..., num_frames:]
+        return noise
+
+    def _measure_receptive_field(self, like: torch.Tensor) -> Tuple[int, int]:
+        """
+        Measures the hop length and the receptive field of the vocoder, in frames on each side of a frame.
+
+        Args:
+            like: Spectrogram chunk whose number of mel channels, data type and device are used.
+
+        Returns:
+            Tuple of the hop length and the receptive field.
+        """
+        generator = torch.Generator(device=like.device)
+        generator.manual_seed(0)
+        num_frames = 64
+        while True:
+            shape = (1, like.shape[1], num_frames)
+            spec = torch.randn(shape, generator=generator, dtype=like.dtype, device=like.device)
+            noise = None
+            if self.noise_dim is not None:
+                noise = torch.randn(
+                    (1, self.noise_dim, num_frames), generator=generator, dtype=like.dtype, device=like.device
+                )
+
+            audio = self._vocode(spec, noise)[0]
+            if audio.shape[-1] % num_frames != 0:
+                raise ValueError(
+                    f"Vocoder returned {audio.shape[-1]} samples for {num_frames} frames, "
+                    "which is not a whole number of samples per frame"
+                )
+            hop_length = audio.shape[-1] // num_frames
+
+            center = num_frames // 2
+            spec[..., center] += 1.0
+            if noise is not None:
+                noise[..., center] += 1.0
+            diff = (self._vocode(spec, noise)[0] - audio).abs()
+            changed = torch.nonzero(diff > torch.finfo(diff.dtype).eps * audio.abs().max()).squeeze(1)
+            if changed.numel() == 0:
+                return hop_length, 0
+
+            samples_before = center * hop_length - changed.min().item()
+            samples_after = changed.max().item() + 1 - (center + 1) * hop_length
+            receptive_field = math.ceil(max(samples_before, samples_after, 0) / hop_length)
+            if receptive_field < center - 1:
+                return hop_length, receptive_field
+            if num_frames >= _MAX_PROBE_FRAMES:
+                raise ValueError(f"Receptive field of the vocoder is longer than {_MAX_PROBE_FRAMES // 2} frames")
+            num_frames *= 2
+
+    def _vocode_chunk(self, chunk_start: int, chunk_end: int) -> torch.Tensor:
+        context = self._context_frames
+        window_start = max(chunk_start - context, 0)
+        window_end = min(chunk_end + context, self._num_frames)
+        buffer_slice = slice(window_start - self._buffer_start, window_end - self._buffer_start)
+        noise = self._noise[..., buffer_slice] if self._noise is not None else None
+        audio = self._vocode(self._spec[..., buffer_slice], noise)
+        offset = (chunk_start - window_start) * self._hop_length
+        return audio[:, offset : offset + (chunk_end - chunk_start) * self._hop_length]
+
+    def feed(self, spec: torch.Tensor, is_last: bool = False) -> torch.Tensor:
+        """
+        Feeds spectrogram frames, and returns the audio of all chunks which are complete.
+
+        Args:
+            spec: [B, n_mels, T_chunk] spectrogram frames following the previously fed frames. The frames may be
+                split into chunks of any size.
+            is_last: Whether these are the last frames of the stream. The audio of all remaining frames is returned,
+                and the stream has to be `reset` before feeding more frames.
+
+        Returns:
+            [B, T_audio] audio of the returned chunks, which may be empty.
+        """
+        if self._finished:
+            raise RuntimeError("The stream is finished, call reset() to start a new one")
+
+        with torch.no_grad():
+            if self._hop_length is None or self._context_frames is None:
+                hop_length, receptive_field = self._measure_receptive_field(spec)
+                self._hop_length = hop_length
+                if self._context_frames is None:
+                    self._context_frames = receptive_field
+
+            if self._spec is None:
+                self._spec = spec
+            else:
+                self._spec = torch.cat([self._spec, spec], dim=-1)
+            if self.noise_dim is not None:
+                noise = self._draw_noise(spec.shape[0], spec.shape[-1], like=spec)
+                self._noise = noise if self._noise is None else torch.cat([self._noise, noise], dim=-1)
+            self._num_frames += spec.shape[-1]
+
+            outputs = []
+            while self._num_returned_frames < self._num_frames:
+                chunk_start = self._num_returned_frames
+                chunk_end = min(chunk_start + self.chunk_frames, self._num_frames)
+                if not is_last and chunk_start + self.chunk_frames + self._context_frames > self._num_frames:
+                    break
+                outputs.append(self._vocode_chunk(chunk_start, chunk_end))
+                self._num_returned_frames = chunk_end
+
+            # frames which are not part of the context of the remaining chunks are no longer needed
+            drop = max(self._num_returned_frames - self._context_frames - self._buffer_start, 0)
+            if drop > 0:
+                self._spec = self._spec[..., drop:]
+                if self._noise is not None:
+                    self._noise = self._noise[..., drop:]
+                self._buffer_start += drop
+            self._finished = is_last
+
+        if not outputs:
+            return spec.new_zeros(spec.shape[0], 0)
+        return torch.cat(outputs, dim=-1)
+
+    def stream(self, spec: torch.Tensor, feed_frames: Optional[int] = None) -> Iterator[torch.Tensor]:
+        """
+        Vocodes a spectrogram in a new stream, returning audio as soon as it is available.
+
+        Args:
+            spec: [B, n_mels, T_spec] spectrogram.
+            feed_frames: Number of frames fed at a time, to simulate a spectrogram generator producing frames
+                incrementally. Defaults to `chunk_frames`.
+
+        Returns:
+            Iterator over non-empty [B, T_audio] audio chunks.
+        """
+        feed_frames = feed_frames or self.chunk_frames
+        self.reset()
+        num_frames = spec.shape[-1]
+        for start in range(0, num_frames, feed_frames):
+            audio = self.feed(spec[..., start : start + feed_frames], is_last=start + feed_frames >= num_frames)
+            if audio.shape[-1] > 0:
+                yield audio
+
+    def convert_spectrogram_to_audio(self, spec: torch.Tensor) -> torch.Tensor:
+        """
+        Vocodes a whole spectrogram chunk by chunk.
+
+        Args:
+            spec: [B, n_mels, T_spec] spectrogram.
+
+        Returns:
+            [B, T_audio] audio.
+        """
+        chunks = list(self.stream(spec))
+        if not chunks:
+            return spec.new_zeros(spec.shape[0], 0)
+        return torch.cat(chunks, dim=-1)
@@ -0,0 +1,271 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Packed, sharded store for supplementary TTS data (log mel, pitch, voiced mask, energy, ...).
+
+Instead of one small file per utterance and feature, every shard of the store keeps one contiguous binary
+file per feature plus an offset index. The binary files are opened with `np.memmap`, so reading a feature
+of an utterance is a slice of a memory-mapped array without unpickling or opening a file.
+
+Layout of a store directory:
+
+    meta.json                         # format version, number of shards, per-feature frame shapes and dtypes
+    shard_00000.keys.json             # keys of the utterances stored in the shard, in order
+    shard_00000.<feature>.bin         # all frames of the feature, concatenated, [num_frames, *frame_shape]
+    shard_00000.<feature>.idx.npy     # int64 [num_keys, 2]: (first frame, number of frames), -1 frames if missing
+    ...
+
+Features are stored with time as the leading axis and restored to their original layout (time as the last axis)
+when read. Floating point features are stored as float16 by default and read as float32; other features
+(e.g. boolean voiced masks) keep their data type. A store is created with `SupDataStoreWriter` or converted from existing sup data folders with
+`scripts/dataset_processing/tts/convert_sup_data_to_store.py`.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+SUP_DATA_STORE_VERSION = 1
+SUP_DATA_STORE_META = "meta.json"
+
+
+def _shard_prefix(shard_id: int) -> str:
+    return f"shard_{shard_id:05d}"
+
+
+class SupDataStoreWriter:
+    """
+    Writer of a packed supplementary data store.
+
+    Args:
+        store_dir: Directory to create the store in.
+        dtype: Data type to store floating point features as. float16 halves the size of float32 features.
+        shard_size: Maximum number of utterances per shard.
+    """
+
+    def __init__(self, store_dir: Union[str, Path], dtype: str = "float16", shard_size: int = 100000):
+        if shard_size <= 0:
+            raise ValueError(f"shard_size must be positive, got {shard_size}")
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        if (self.store_dir / SUP_DATA_STORE_META).exists():
+            raise FileExistsError(f"Sup data store already exists: {self.store_dir}")
+        self.dtype = np.dtype(dtype)
+        self.shard_size = shard_size
+
+        self.frame_shapes: Dict[str, Tuple[int, ...]] = {}
+        self.feature_dtypes: Dict[str, np.dtype] = {}
+        self.num_shards = 0
+        self._keys: List[str] = []
+        self._all_keys = set()
+        self._files = {}
+        self._index: Dict[str, List[Tuple[int, int]]] = {}
+        self._num_frames: Dict[str, int] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add(self, key: str, features: Dict[str, np.ndarray]):
+        """
+        Adds features of a single utterance.
+
+        Args:
+            key: Unique key of the utterance.
+            features: Dictionary of feature name to array with time as the last axis.
+                Features which are not provided are marked as missing for this utterance.
+        """
+        if key in self._all_keys:
+            raise ValueError(f"Duplicate key: {key}")
+
+        frames = {}
+        for name, value in features.items():
+            value = np.asarray(value)
+            if value.ndim == 0:
+                raise ValueError(f"Feature {name} of {key} must have a time axis")
+            frame_shape = tuple(value.shape[:-1])
+            if self.frame_shapes.get(name, frame_shape) != frame_shape:
+                raise ValueError(
+                    f"Feature {name} of {key} has frame shape {frame_shape}, expected {self.frame_shapes[name]}"
+                )
+            feature_dtype = self.dtype if np.issubdtype(value.dtype, np.floating) else value.dtype
+            if self.feature_dtypes.get(name, feature_dtype) != feature_dtype:
+                raise ValueError(
+                    f"Feature {name} of {key} has dtype {feature_dtype}, expected {self.feature_dtypes[name]}"
+                )
+            frames[name] = np.ascontiguousarray(np.moveaxis(value, -1, 0), dtype=feature_dtype)
+
+        if len(self._keys) >= self.shard_size:
+            self._flush_shard()
+
+        for name, value in frames.items():
+            self.frame_shapes.setdefault(name, value.shape[1:])
+            self.feature_dtypes.setdefault(name, value.dtype)
+            if name not in self._files:
+                self._open_feature(name)
+            self._files[name].write(value.tobytes())
+            self._index[name].append((self._num_frames[name], value.shape[0]))
+            self._num_frames[name] += value.shape[0]
+
+        for name in self._files:
+            if name not in features:
+                self._index[name].append((self._num_frames[name], -1))
+
+        self._keys.append(key)
+        self._all_keys.add(key)
+
+    def _open_feature(self, name: str):
+        prefix = self.store_dir / _shard_prefix(self.num_shards)
+        self._files[name] = open(f"{prefix}.{name}.bin", "wb")
+        # utterances added to the shard before the feature first appeared do not have it
+        self._index[name] = [(0, -1)] * len(self._keys)
+        self._num_frames[name] = 0
+
+    def _flush_shard(self):
+        if not self._keys:
+            return
+        prefix = self.store_dir / _shard_prefix(self.num_shards)
+        for name, f in self._files.items():
+            f.close()
+            np.save(f"{prefix}.{name}.idx.npy", np.asarray(self._index[name], dtype=np.int64).reshape(-1, 2))
+        with open(f"{prefix}.keys.json", "w", encoding="utf-8") as f:
+            json.dump(self._keys, f)
+
+        self.num_shards += 1
+        self._keys = []
+        self._files = {}
+        self._index = {}
+        self._num_frames = {}
+
+    def close(self):
+        """Writes the last shard and the store metadata."""
+        self._flush_shard()
+        meta = {
+            "version": SUP_DATA_STORE_VERSION,
+            "num_shards": self.num_shards,
+            "features": {
+                name: {"frame_shape": list(shape), "dtype": self.feature_dtypes[name].str}
+                for name, shape in self.frame_shapes.items()
+            },
+        }
+        with open(self.store_dir / SUP_DATA_STORE_META, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+
+
+class SupDataStore:
+    """
+    Read-only access to a packed supplementary data store created by `SupDataStoreWriter`.
+
+    The binary shards are memory-mapped lazily on first access. Opened maps are not pickled,
+    so every data loader worker maps the shards on its own.
+
+    Args:
+        store_dir: Directory of the store.
+    """
+
+    def __init__(self, store_dir: Union[str, Path]):
+        self.store_dir = Path(store_dir)
+        meta_path = self.store_dir / SUP_DATA_STORE_META
+        if not meta_path.exists():
+            raise FileNotFoundError(f"Sup data store metadata not found: {meta_path}")
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["version"] != SUP_DATA_STORE_VERSION:
+            raise ValueError(f"Unsupported sup data store version {meta['version']} in {self.store_dir}")
+
+        self.num_shards = meta["num_shards"]
+        self.frame_shapes = {name: tuple(info["frame_shape"]) for name, info in meta["features"].items()}
+        self.feature_dtypes = {name: np.dtype(info["dtype"]) for name, info in meta["features"].items()}
+
+        self._key_to_location: Dict[str, Tuple[int, int]] = {}
+        for shard_id in range(self.num_shards):
+            with open(self.store_dir / f"{_shard_prefix(shard_id)}.keys.json", "r", encoding="utf-8") as f:
+                keys = json.load(f)
+            for row, key in enumerate(keys):
+                self._key_to_location[key] = (shard_id, row)
+        self._shards = {}
+
+    @property
+    def features(self) -> List[str]:
+        return list(self.frame_shapes.keys())
+
+    def __len__(self) -> int:
+        return len(self._key_to_location)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._key_to_location
+
+    def keys(self):
+        return self._key_to_location.keys()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_shards"] = {}
+        return state
+
+    def _get_shard_feature(self, shard_id: int, name: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        shard_key = (shard_id, name)
+        if shard_key not in self._shards:
+            prefix = self.store_dir / _shard_prefix(shard_id)
+            index_path = Path(f"{prefix}.{name}.idx.npy")
+            if not index_path.exists():
+                self._shards[shard_key] = None
+            else:
+                index = np.load(index_path)
+                frame_size = int(np.prod(self.frame_shapes[name], dtype=np.int64))
+                dtype = self.feature_dtypes[name]
+                data_path = Path(f"{prefix}.{name}.bin")
+                if data_path.stat().st_size == 0:
+                    # empty files cannot be memory-mapped
+                    data = np.zeros((0, frame_size), dtype=dtype)
+                else:
+                    data = np.memmap(data_path, dtype=dtype, mode="r").reshape(-1, frame_size)
+                self._shards[shard_key] = (index, data)
+        return self._shards[shard_key]
+
+    def get(self, key: str, name: str, indices: Optional[Tuple[int, int]] = None) -> Optional[np.ndarray]:
+        """
+        Reads a feature of an utterance.
+
+        Args:
+            key: Key of the utterance.
+            name: Name of the feature.
+            indices: Optional (start, end) frame indices to read only a segment of the feature.
+        Returns:
+            Array with time as the last axis (float32 for floating point features), or None if the store does not contain the feature for the key.
+        """
+        location = self._key_to_location.get(key)
+        if location is None or name not in self.frame_shapes:
+            return None
+        shard_id, row = location
+        shard_feature = self._get_shard_feature(shard_id, name)
+        if shard_feature is None:
+            return None
+        index, data = shard_feature
+        start, length = index[row]
+        if length < 0:
+            return None
+
+        frames = data[start : start + length]
+        if indices is not None:
+            frames = frames[indices[0] : indices[1]]
+        frames = frames.reshape((frames.shape[0],) + self.frame_shapes[name])
+        # copy out of the memory map, restoring time as the last axis
+        dtype = np.float32 if np.issubdtype(frames.dtype, np.floating) else frames.dtype
+        return np.array(np.moveaxis(frames, 0, -1), dtype=dtype)
@@ -0,0 +1,247 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import torch
+
+
+@dataclass
+class AudioChunk:
+    """
+    Chunk of synthesized audio of a single utterance.
+
+    Attributes:
+        index: Index of the utterance in the list of input texts.
+        audio: [T_chunk] float tensor with the audio samples of the chunk.
+        is_last: Whether this is the last chunk of the utterance.
+    """
+
+    index: int
+    audio: torch.Tensor
+    is_last: bool
+
+
+@dataclass
+class SynthesisMetrics:
+    """
+    Wall clock time spent in each stage of synthesis, in seconds.
+
+    Attributes:
+        text_processing_time: Text normalization and tokenization.
+        spectrogram_time: Spectrogram generation.
+        vocoder_time: Vocoding, including cross-fading of the chunks.
+        time_to_first_audio: Time from the start of synthesis until the first audio chunk is returned.
+        total_time: Time from the start until the end of synthesis.
+        num_samples: Number of audio samples synthesized.
+        sample_rate: Sample rate of the audio, if known.
+    """
+
+    text_processing_time: float = 0.0
+    spectrogram_time: float = 0.0
+    vocoder_time: float = 0.0
+    time_to_first_audio: Optional[float] = None
+    total_time: float = 0.0
+    num_samples: int = 0
+    sample_rate: Optional[int] = None
+
+    @property
+    def real_time_factor(self) -> Optional[float]:
+        """Synthesis time divided by the duration of the synthesized audio."""
+        if self.sample_rate is None or self.num_samples == 0:
+            return None
+        return self.total_time / (self.num_samples / self.sample_rate)
+
+
+class TTSSynthesisEngine:
+    """
+    Batched, streaming text to waveform synthesis with a spectrogram generator and a vocoder.
+
+    Texts are tokenized, sorted by length and grouped into batches, so that every batch is padded as little as
+    possible. Spectrograms of a batch are generated at once, and then vocoded in chunks of `chunk_frames` frames,
+    batched over the utterances of the batch. Every chunk is vocoded with `overlap_frames` frames of context on both
+    sides, whose audio is discarded, as in `StreamingVocoder`. When `overlap_frames` covers the receptive field of the
+    vocoder, the concatenated chunks are the same as vocoding the whole spectrogram; with a shorter overlap, the audio
+    near the chunk boundaries differs. HiFi-GAN typically needs several frames of context, see
+    `StreamingVocoder` to measure the receptive field of a vocoder. Audio chunks are returned as soon as they are vocoded, so the first audio of a batch is available after
+    vocoding its first chunk instead of after vocoding the whole batch.
+
+    Spectrograms are generated in batches for FastPitch, whose forward pass returns the number of frames of
+    every utterance. Other spectrogram generators, e.g. RADTTS and MixerTTS, are called for one utterance at a time,
+    since `generate_spectrogram` does not return the lengths of padded outputs; their vocoding is still batched.
+
+    Args:
+        spec_generator: Spectrogram generator model, e.g. FastPitchModel.
+        vocoder: Vocoder model, e.g. HifiGanModel or UnivNetModel.
+        batch_size: Maximum number of utterances per batch.
+        chunk_frames: Number of spectrogram frames vocoded per chunk.
+        overlap_frames: Number of spectrogram frames of context on each side of a chunk, which should cover the
+            receptive field of the vocoder.
+        pad_id: Token id used to pad batches of tokens. Defaults to the padding index of the FastPitch encoder, or 0.
+        sample_rate: Sample rate of the vocoder, only used for metrics. Defaults to `vocoder.sample_rate` if set.
+        spec_kwargs: Additional keyword arguments of the spectrogram generator, e.g. `speaker` or `pace`.
+    """
+
+    def __init__(
+        self,
+        spec_generator,
+        vocoder,
+        batch_size: int = 8,
+        chunk_frames: int = 32,
+        overlap_frames: int = 4,
+        pad_id: Optional[int] = None,
+        sample_rate: Optional[int] = None,
+        spec_kwargs: Optional[Dict[str, Any]] = None,
+    ):
+        if batch_size <= 0:
+            raise ValueError(f"batch_size must be positive, got {batch_size}")
+        if chunk_frames <= 0:
+            raise ValueError(f"chunk_frames must be positive, got {chunk_frames}")
+        if overlap_frames < 0:
+            raise ValueError(f"overlap_frames must not be negative, got {overlap_frames}")
+
+        self.spec_generator = spec_generator
+        self.vocoder = vocoder
+        self.batch_size = batch_size
+        self.chunk_frames = chunk_frames
+        self.overlap_frames = overlap_frames
+        self.spec_kwargs = spec_kwargs or {}
+        self.sample_rate = sample_rate if sample_rate is not None else getattr(vocoder, "sample_rate", None)
+
+        if pad_id is None:
+            fastpitch = getattr(spec_generator, "fastpitch", None)
+            pad_id = getattr(getattr(fastpitch, "encoder", None), "padding_idx", 0)
+        self.pad_id = pad_id
+
+        self.metrics = SynthesisMetrics(sample_rate=self.sample_rate)
+
+    def synthesize(self, texts: List[str]) -> List[torch.Tensor]:
+        """
+        Synthesizes a list of texts.
+
+        Args:
+            texts: Texts to synthesize.
+
+        Returns:
+            List with a [T_audio] float tensor of audio for every text, in the order of the input texts.
+        """
+        chunks = [[] for _ in texts]
+        for chunk in self.synthesize_stream(texts):
+            chunks[chunk.index].append(chunk.audio)
+        return [torch.cat(audio_chunks) for audio_chunks in chunks]
+
+    def synthesize_stream(self, texts: List[str]) -> Iterator[AudioChunk]:
+        """
+        Synthesizes a list of texts, returning audio chunks as soon as they are available.
+
+        Chunks of every utterance are returned in order. Chunks of different utterances are interleaved, and
+        utterances are processed in order of increasing length. `self.metrics` is reset at the start and
+        is complete once the iterator is exhausted.
+
+        Args:
+            texts: Texts to synthesize.
+
+        Returns:
+            Iterator over audio chunks.
+        """
+        self.metrics = SynthesisMetrics(sample_rate=self.sample_rate)
+        start_time = time.perf_counter()
+
+        # inference mode is entered per stage rather than around the loop, so it is not active in the caller
+        # while the iterator is suspended
+        with torch.inference_mode():
+            tokens = [self.spec_generator.parse(text).squeeze(0) for text in texts]
+        self.metrics.text_processing_time = time.perf_counter() - start_time
+
+        order = sorted(range(len(texts)), key=lambda i: tokens[i].shape[0])
+        for batch_start in range(0, len(order), self.batch_size):
+            batch_indices = order[batch_start : batch_start + self.batch_size]
+
+            spec_start_time = time.perf_counter()
+            with torch.inference_mode():
+                spec, spec_len = self._generate_spectrograms([tokens[i] for i in batch_indices])
+            self.metrics.spectrogram_time += time.perf_counter() - spec_start_time
+
+            for batch_idx, audio, is_last in self._vocode_chunks(spec, spec_len):
+                if self.metrics.time_to_first_audio is None:
+                    self.metrics.time_to_first_audio = time.perf_counter() - start_time
+                self.metrics.num_samples += audio.shape[0]
+                yield AudioChunk(index=batch_indices[batch_idx], audio=audio, is_last=is_last)
+
+        self.metrics.total_time = time.perf_counter() - start_time
+
+    def _generate_spectrograms(self, tokens: List[torch.Tensor]) -> Tuple[torch.Tensor, torch.Tensor]:
+        spec_kwargs = dict(self.spec_kwargs)
+        if hasattr(self.spec_generator, "fastpitch"):
+            device = self.spec_generator.device
+            tokens = torch.nn.utils.rnn.pad_sequence(tokens, batch_first=True, padding_value=self.pad_id).to(device)
+            speaker = spec_kwargs.pop("speaker", None)
+            if isinstance(speaker, int):
+                speaker = torch.full((tokens.shape[0],), speaker, dtype=torch.long, device=device)
+            spec, spec_len, *_ = self.spec_generator(
+                text=tokens, durs=None, pitch=None, speaker=speaker, **spec_kwargs
+            )
+            return spec, spec_len.long()
+
+        specs = [self.spec_generator.generate_spectrogram(tokens=t.unsqueeze(0), **spec_kwargs)[0] for t in tokens]
+        spec_len = torch.tensor([s.shape[-1] for s in specs], dtype=torch.long)
+        spec = torch.nn.utils.rnn.pad_sequence([s.transpose(0, 1) for s in specs], batch_first=True).transpose(1, 2)
+        return spec, spec_len
+
+    def _vocode_chunks(self, spec: torch.Tensor, spec_len: torch.Tensor) -> Iterator[Tuple[int, torch.Tensor, bool]]:
+        """
+        Vocodes a batch of spectrograms chunk by chunk.
+
+        Args:
+            spec: [B, n_mels, T_spec] batch of spectrograms.
+            spec_len: [B] number of valid frames of every spectrogram.
+
+        Returns:
+            Iterator over (index in the batch, audio chunk, is last chunk of the utterance).
+        """
+        spec_len = spec_len.tolist()
+        for frame_start in range(0, max(spec_len), self.chunk_frames):
+            active = [i for i in range(len(spec_len)) if spec_len[i] > frame_start]
+            window_start = max(frame_start - self.overlap_frames, 0)
+
+            vocoder_start_time = time.perf_counter()
+            with torch.inference_mode():
+                chunk_ends = [min(frame_start + self.chunk_frames, spec_len[i]) for i in active]
+                window_ends = [min(end + self.overlap_frames, spec_len[i]) for i, end in zip(active, chunk_ends)]
+                window = max(window_ends) - window_start
+                chunk = torch.stack(
+                    [
+                        torch.nn.functional.pad(
+                            spec[i : i + 1, :, window_start:window_end],
+                            (0, window - (window_end - window_start)),
+                            mode="replicate",
+                        )[0]
+                        for i, window_end in zip(active, window_ends)
+                    ]
+                )
+                audio = self.vocoder.convert_spectrogram_to_audio(spec=chunk)
+                samples_per_frame = audio.shape[-1] // window
+
+                # the audio of the context frames on both sides of the chunk is discarded
+                offset = (frame_start - window_start) * samples_per_frame
+                outputs = []
+                for batch_row, (i, chunk_end) in enumerate(zip(active, chunk_ends)):
+                    chunk_audio = audio[batch_row, offset : offset + (chunk_end - frame_start) * samples_per_frame]
+                    outputs.append((i, chunk_audio, chunk_end >= spec_len[i]))
+            self.metrics.vocoder_time += time.perf_counter() - vocoder_start_time
+
+            for output in outputs:
+                yield output
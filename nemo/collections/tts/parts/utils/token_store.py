@@ -0,0 +1,269 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Pre-tokenized text of TTS manifests.
+
+Tokenizing text with G2P is repeated for every sample in every epoch (or for every sample on every start of
+training). A token store holds the token ids of every line of a manifest in a compact binary side file, so the
+datasets read them instead of running the tokenizer.
+
+The store of a manifest is written next to it, in a directory named after a hash of the tokenizer configuration:
+
+    <manifest_path>.tokens/<tokenizer_hash>/
+        meta.json           # format version, number of lines and variants, data type of the tokens
+        tokens.bin          # token ids of all lines and variants, concatenated
+        tokens.idx.npy      # int64 [num_lines * num_variants + 1], offsets of the tokens of every (line, variant)
+        text_hashes.npy     # uint64 [num_lines], hash of the tokenized text of every line
+
+Datasets find the store of their tokenizer automatically. Tokens of a line are only used if the text of the line
+has the hash stored for it, so edited lines, or lines which the dataset normalizes differently, are tokenized
+on the fly as before.
+
+Tokenizers with a `phoneme_probability` produce a random mix of phonemes and graphemes on every call. For them
+the store holds `num_variants` tokenizations of every line, and the datasets pick one of them at random.
+
+A store is created with `scripts/dataset_processing/tts/pretokenize_text.py`.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import pathlib
+import shutil
+import tempfile
+from collections.abc import Mapping
+from typing import Any, List, Optional, Sequence, Union
+
+import numpy as np
+
+from nemo.collections.common.tokenizers.text_to_speech.tts_tokenizers import BaseTokenizer
+from nemo.utils import logging
+
+TOKEN_STORE_VERSION = 1
+TOKEN_STORE_META = "meta.json"
+
+# attributes which do not change the output of a tokenizer
+_IGNORED_TOKENIZER_ATTRIBUTES = {"word_cache_size"}
+_MAX_CONFIG_DEPTH = 3
+
+
+def _describe_config(value: Any, depth: int = 0) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, pathlib.PurePath):
+        return str(value)
+    if isinstance(value, Mapping):
+        # large mappings such as pronunciation dictionaries are only hashed, which is much faster than describing
+        # every entry
+        return "sha256:" + hashlib.sha256(repr(dict(value)).encode("utf-8")).hexdigest()
+    if isinstance(value, (set, frozenset)):
+        return sorted((_describe_config(v, depth) for v in value), key=repr)
+    if isinstance(value, (list, tuple)):
+        return [_describe_config(v, depth) for v in value]
+    if inspect.isroutine(value) or inspect.isclass(value):
+        return f"{getattr(value, '__module__', None)}.{getattr(value, '__qualname__', repr(value))}"
+    if hasattr(value, "__dict__") and depth < _MAX_CONFIG_DEPTH:
+        description = {"__class__": f"{type(value).__module__}.{type(value).__qualname__}"}
+        for name, attribute in vars(value).items():
+            if name.startswith("_") or name in _IGNORED_TOKENIZER_ATTRIBUTES:
+                continue
+            description[name] = _describe_config(attribute, depth + 1)
+        return description
+    return type(value).__qualname__
+
+
+def get_tokenizer_hash(text_tokenizer: BaseTokenizer) -> str:
+    """
+    Computes a hash of the configuration of a tokenizer.
+
+    The hash covers the class, vocabulary and public attributes of the tokenizer and of its G2P module,
+    including the pronunciation dictionary, so tokenizers configured the same way in different processes
+    have the same hash.
+
+    Args:
+        text_tokenizer: Tokenizer to hash.
+
+    Returns:
+        Hex digest of the tokenizer configuration.
+    """
+    config = json.dumps(_describe_config(text_tokenizer), sort_keys=True, default=str)
+    sha = hashlib.sha256(f"v{TOKEN_STORE_VERSION}".encode())
+    sha.update(config.encode())
+    return sha.hexdigest()[:32]
+
+
+def get_text_hash(text: str) -> int:
+    """64 bit hash of a text, stored for every line of a token store."""
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def get_manifest_text(entry: dict) -> str:
+    """Text of a manifest entry which is tokenized by `pretokenize_text.py`."""
+    for key in ("normalized_text", "text_normalized"):
+        if key in entry:
+            return entry[key]
+    return entry["text"]
+
+
+def get_token_store_dir(manifest_path: Union[str, pathlib.Path], tokenizer_hash: str) -> pathlib.Path:
+    """Directory of the token store of a manifest for a tokenizer."""
+    return pathlib.Path(f"{pathlib.Path(manifest_path).expanduser()}.tokens") / tokenizer_hash
+
+
+def write_token_store(
+    store_dir: Union[str, pathlib.Path], texts: Sequence[str], tokens: Sequence[Sequence[Sequence[int]]],
+):
+    """
+    Writes a token store.
+
+    The store is written to a temporary directory next to `store_dir` and then renamed, so datasets never read a
+    partially written store. An existing store in `store_dir` is replaced.
+
+    Args:
+        store_dir: Directory to write the store to.
+        texts: Tokenized text of every manifest line.
+        tokens: For every manifest line, a list of `num_variants` token id lists.
+    """
+    if len(texts) != len(tokens):
+        raise ValueError(f"Got {len(texts)} texts and tokens of {len(tokens)} lines")
+    num_variants = len(tokens[0]) if tokens else 1
+    if any(len(line_tokens) != num_variants for line_tokens in tokens):
+        raise ValueError(f"All lines must have {num_variants} variants")
+
+    max_token = max((max(variant, default=0) for line_tokens in tokens for variant in line_tokens), default=0)
+    dtype = np.dtype(np.int16) if max_token <= np.iinfo(np.int16).max else np.dtype(np.int32)
+
+    lengths = [len(variant) for line_tokens in tokens for variant in line_tokens]
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    flat_tokens = np.fromiter(
+        (token for line_tokens in tokens for variant in line_tokens for token in variant),
+        dtype=dtype,
+        count=int(offsets[-1]),
+    )
+    text_hashes = np.asarray([get_text_hash(text) for text in texts], dtype=np.uint64)
+
+    store_dir = pathlib.Path(store_dir)
+    store_dir.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = pathlib.Path(tempfile.mkdtemp(dir=store_dir.parent, prefix=f".{store_dir.name}."))
+    try:
+        with open(tmp_dir / "tokens.bin", "wb") as f:
+            f.write(flat_tokens.tobytes())
+        np.save(tmp_dir / "tokens.idx.npy", offsets)
+        np.save(tmp_dir / "text_hashes.npy", text_hashes)
+        meta = {
+            "version": TOKEN_STORE_VERSION,
+            "num_lines": len(texts),
+            "num_variants": num_variants,
+            "dtype": dtype.str,
+        }
+        with open(tmp_dir / TOKEN_STORE_META, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        shutil.rmtree(store_dir, ignore_errors=True)
+        os.replace(tmp_dir, store_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+class TokenStore:
+    """
+    Read-only access to a token store written by `write_token_store`.
+
+    The tokens are memory-mapped lazily on first access. The opened map is not pickled,
+    so every data loader worker maps the store on its own.
+
+    Args:
+        store_dir: Directory of the store.
+    """
+
+    def __init__(self, store_dir: Union[str, pathlib.Path]):
+        self.store_dir = pathlib.Path(store_dir)
+        meta_path = self.store_dir / TOKEN_STORE_META
+        if not meta_path.exists():
+            raise FileNotFoundError(f"Token store metadata not found: {meta_path}")
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["version"] != TOKEN_STORE_VERSION:
+            raise ValueError(f"Unsupported token store version {meta['version']} in {self.store_dir}")
+
+        self.tokenizer_hash = self.store_dir.name
+        self.num_lines = meta["num_lines"]
+        self.num_variants = meta["num_variants"]
+        self.dtype = np.dtype(meta["dtype"])
+        self._offsets = np.load(self.store_dir / "tokens.idx.npy")
+        self._text_hashes = np.load(self.store_dir / "text_hashes.npy")
+        self._tokens = None
+
+    def __len__(self) -> int:
+        return self.num_lines
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_tokens"] = None
+        return state
+
+    def get(self, line: int, text: str, variant: Optional[int] = None) -> Optional[List[int]]:
+        """
+        Reads the tokens of a manifest line.
+
+        Args:
+            line: Index of the line in the manifest.
+            text: Text of the line which would otherwise be tokenized.
+            variant: Index of the tokenization of the line, in [0, num_variants). Defaults to the first one.
+
+        Returns:
+            List of token ids, or None if the store does not have the line or the text of the line changed.
+        """
+        if not 0 <= line < self.num_lines or int(self._text_hashes[line]) != get_text_hash(text):
+            return None
+        if self._tokens is None:
+            if self._offsets[-1] == 0:
+                # empty files cannot be memory-mapped
+                self._tokens = np.zeros(0, dtype=self.dtype)
+            else:
+                self._tokens = np.memmap(self.store_dir / "tokens.bin", dtype=self.dtype, mode="r")
+        i = line * self.num_variants + (variant or 0)
+        return self._tokens[self._offsets[i] : self._offsets[i + 1]].tolist()
+
+
+def load_token_store(
+    manifest_path: Union[str, pathlib.Path], text_tokenizer: Any, tokenizer_hash: Optional[str] = None
+) -> Optional[TokenStore]:
+    """
+    Finds the token store of a manifest for a tokenizer.
+
+    Args:
+        manifest_path: Path to the manifest.
+        text_tokenizer: Tokenizer of the dataset. Only `BaseTokenizer` instances have token stores.
+        tokenizer_hash: Precomputed `get_tokenizer_hash(text_tokenizer)`, if available.
+
+    Returns:
+        Token store, or None if the manifest has not been pre-tokenized with this tokenizer configuration.
+    """
+    if not isinstance(text_tokenizer, BaseTokenizer):
+        return None
+    # hashing the tokenizer configuration takes a moment, skip it for manifests which were never pre-tokenized
+    if not get_token_store_dir(manifest_path, "").exists():
+        return None
+    if tokenizer_hash is None:
+        tokenizer_hash = get_tokenizer_hash(text_tokenizer)
+    store_dir = get_token_store_dir(manifest_path, tokenizer_hash)
+    if not (store_dir / TOKEN_STORE_META).exists():
+        logging.info(f"No pre-tokenized text of {manifest_path} for tokenizer {tokenizer_hash}")
+        return None
+    token_store = TokenStore(store_dir)
+    logging.info(f"Reading tokens of {manifest_path} from {store_dir} with {token_store.num_variants} variant(s)")
+    return token_store
@@ -13,6 +13,7 @@
 # limitations under the License.
 
 import functools
+import math
 import os
 import random
 import traceback
@@ -159,6 +160,55 @@ def beta_binomial_prior_distribution(phoneme_count: int, mel_count: int, scaling
     return logbetabinom(n, a, b, x).exp().numpy()
 
 
+class BetaBinomialPriorTable:
+    """
+    This module calculates exact alignment prior matrices (based on beta-binomial distribution) from a precomputed
+    table of log-gamma values.
+
+    With integer parameters a = y, b = mel_count + 1 - y and n = phoneme_count - 1, the log prior of mel frame y and
+    phoneme x splits into f(x) + g(y) + k(x + y) + const, where every term is a sum of log-gamma values of integers.
+    The matrix is assembled from three vectors gathered from the table, with the k(x + y) term read as a strided
+    (Hankel) view, so only one pass of additions and an exponent remain per sample. The table is kept in shared
+    memory, so data loader workers reuse it instead of holding their own caches.
+
+    Args:
+        max_len: Initial maximum of mel_count + phoneme_count supported by the table. The table grows on demand.
+    """
+
+    def __init__(self, max_len: int = 4096):
+        self.log_gamma = self._build_table(max_len)
+
+    @staticmethod
+    def _build_table(max_len: int) -> torch.Tensor:
+        # log_gamma[i] = log(Gamma(i)); entry 0 is never used
+        log_gamma = gammaln(torch.arange(max_len + 1, dtype=torch.float64))
+        return log_gamma.share_memory_()
+
+    def __call__(self, w: int, h: int) -> torch.Tensor:
+        """
+        Args:
+            w: Number of mel frames.
+            h: Number of phonemes.
+
+        Returns:
+            [w, h] float tensor, equal to `beta_binomial_prior_distribution(h, w)`.
+        """
+        if w + h >= self.log_gamma.shape[0]:
+            self.log_gamma = self._build_table(2 * (w + h))
+        log_gamma = self.log_gamma
+
+        x = torch.arange(h)
+        y = torch.arange(1, w + 1)
+        s = torch.arange(1, w + h)
+        log_phoneme = -log_gamma[x + 1] - log_gamma[h - x]
+        log_mel = -log_gamma[y] - log_gamma[w + 1 - y] + (log_gamma[h] - log_gamma[w + h] + log_gamma[w + 1])
+        log_diagonal = log_gamma[s] + log_gamma[w + h - s]
+
+        # [w, h] view with log_diagonal[i + j] at (i, j)
+        log_hankel = log_diagonal.as_strided((w, h), (1, 1))
+        return (log_hankel + log_phoneme + log_mel.unsqueeze(1)).exp().float()
+
+
 def get_base_dir(paths):
     def is_relative_to(path1, path2):
         try:
@@ -238,6 +288,223 @@ def get_weighted_sampler(
     return sampler
 
 
+class DurationBucketBatchSampler(torch.utils.data.Sampler):
+    """
+    Distributed batch sampler which groups utterances of similar duration.
+
+    Utterances are assigned to `num_buckets` duration buckets holding about the same number of utterances. Batches are
+    formed within a bucket, adding utterances until the padded duration of the batch (batch size times the longest
+    duration in the batch) would exceed `batch_duration`. Short utterances are batched with a large batch size and long
+    utterances with a small one, so batches are padded much less than with random batching.
+
+    Batches are shuffled and split across ranks, with the same number of batches for every rank. The batches only
+    depend on `seed` and the epoch set with `set_epoch`, so they are the same when training is restarted.
+
+    If `sample_weights` are provided, utterances are drawn with replacement proportionally to their weights, like with
+    `get_weighted_sampler`, until every rank has `num_steps` batches.
+
+    The sampler has to be passed to the data loader as `batch_sampler`, and Lightning must not replace it with a
+    distributed sampler (`trainer.use_distributed_sampler=False`).
+
+    Args:
+        durations: Duration of every utterance in the dataset, in seconds.
+        batch_duration: Maximum padded duration of a batch, in seconds. Utterances longer than this are put into a batch
+            of their own.
+        max_batch_size: Optional maximum number of utterances per batch.
+        num_buckets: Number of duration buckets.
+        sample_weights: Optional sampling weights of all utterances in the dataset.
+        num_steps: Number of batches per rank and epoch. Required if sample_weights are provided.
+        world_size: Number of ranks.
+        rank: Rank to sample batches for. Defaults to the rank of the default process group, or 0 if it is not
+            initialized.
+        shuffle: Whether to shuffle utterances and batches. If False, batches are in order of increasing duration, or
+            in the order they are filled with sample_weights.
+        seed: Random seed.
+    """
+
+    def __init__(
+        self,
+        durations: List[float],
+        batch_duration: float,
+        max_batch_size: Optional[int] = None,
+        num_buckets: int = 10,
+        sample_weights: Optional[List[float]] = None,
+        num_steps: Optional[int] = None,
+        world_size: int = 1,
+        rank: Optional[int] = None,
+        shuffle: bool = True,
+        seed: int = 0,
+    ):
+        if batch_duration <= 0:
+            raise ValueError(f"batch_duration must be positive, got {batch_duration}")
+        if num_buckets <= 0:
+            raise ValueError(f"num_buckets must be positive, got {num_buckets}")
+        if sample_weights is not None:
+            if len(sample_weights) != len(durations):
+                raise ValueError(f"Got {len(sample_weights)} sample weights for {len(durations)} utterances")
+            if not num_steps:
+                raise ValueError("num_steps must be provided with sample_weights")
+
+        self.durations = np.asarray(durations, dtype=np.float64)
+        self.batch_duration = batch_duration
+        self.max_batch_size = max_batch_size
+        self.num_steps = num_steps
+        self.world_size = world_size
+        self.rank = rank
+        self.shuffle = shuffle
+        self.seed = seed
+        self.epoch = 0
+
+        self.sample_probs = None
+        if sample_weights is not None:
+            weights = np.asarray(sample_weights, dtype=np.float64)
+            self.sample_probs = weights / weights.sum()
+
+        if len(self.durations) > 0:
+            quantiles = np.linspace(0.0, 1.0, num_buckets + 1)[1:-1]
+            self.bucket_boundaries = np.quantile(self.durations, quantiles)
+        else:
+            self.bucket_boundaries = np.zeros(0)
+        self.num_buckets = num_buckets
+        self.bucket_ids = np.searchsorted(self.bucket_boundaries, self.durations, side="right")
+
+        self._batches = None
+        self._batches_epoch = None
+
+    def set_epoch(self, epoch: int):
+        """Sets the epoch, which together with the seed determines the batches."""
+        self.epoch = epoch
+
+    def _add_to_bucket(self, index: int, pending: List[Tuple[List[int], float]], batches: List[List[int]]):
+        bucket = self.bucket_ids[index]
+        batch, max_duration = pending[bucket]
+        duration = self.durations[index]
+        max_duration = max(max_duration, duration)
+        is_full = self.max_batch_size is not None and len(batch) >= self.max_batch_size
+        if batch and (is_full or (len(batch) + 1) * max_duration > self.batch_duration):
+            batches.append(batch)
+            batch, max_duration = [], duration
+        batch.append(index)
+        pending[bucket] = (batch, max_duration)
+
+    def _create_batches(self) -> List[List[int]]:
+        rng = np.random.default_rng([self.seed, self.epoch])
+        pending = [([], 0.0) for _ in range(self.num_buckets)]
+        batches = []
+
+        if len(self.durations) == 0:
+            return batches
+
+        if self.sample_probs is not None:
+            num_batches = self.num_steps * self.world_size
+            while len(batches) < num_batches:
+                for index in rng.choice(len(self.durations), size=4096, p=self.sample_probs).tolist():
+                    self._add_to_bucket(index, pending, batches)
+            batches = batches[:num_batches]
+            # short batches are filled faster than long ones, so the order of the batches depends on their duration
+            if self.shuffle:
+                batches = [batches[i] for i in rng.permutation(num_batches)]
+            return batches
+
+        if self.shuffle:
+            order = rng.permutation(len(self.durations)).tolist()
+        else:
+            order = np.argsort(self.durations, kind="stable").tolist()
+        for index in order:
+            self._add_to_bucket(index, pending, batches)
+        batches += [batch for batch, _ in pending if batch]
+
+        if self.shuffle:
+            batches = [batches[i] for i in rng.permutation(len(batches))]
+        else:
+            batches.sort(key=lambda batch: self.durations[batch[-1]])
+        # repeat batches so that every rank has the same number of batches
+        num_padding = -len(batches) % self.world_size
+        batches += (batches * math.ceil(num_padding / len(batches)))[:num_padding]
+        return batches
+
+    def _get_batches(self) -> List[List[int]]:
+        if self._batches_epoch != self.epoch:
+            self._batches = self._create_batches()
+            self._batches_epoch = self.epoch
+        return self._batches
+
+    def _get_rank(self) -> int:
+        if self.rank is not None:
+            return self.rank
+        if torch.distributed.is_available() and torch.distributed.is_initialized():
+            return torch.distributed.get_rank()
+        return 0
+
+    def __iter__(self):
+        return iter(self._get_batches()[self._get_rank() :: self.world_size])
+
+    def __len__(self) -> int:
+        return len(self._get_batches()) // self.world_size
+
+
+def get_duration_bucket_sampler(
+    durations: List[float],
+    batch_duration: float,
+    batch_size: int,
+    world_size: int,
+    num_buckets: int,
+    sample_weights: Optional[List[float]] = None,
+    num_steps: Optional[int] = None,
+) -> DurationBucketBatchSampler:
+    """
+    Create batch sampler grouping utterances of similar duration, for the `get_sampler` method of datasets.
+
+    Args:
+        durations: Duration of every utterance in the dataset, in seconds.
+        batch_duration: Maximum padded duration of a batch, in seconds.
+        batch_size: Maximum batch size.
+        world_size: Number of devices being used.
+        num_buckets: Number of duration buckets.
+        sample_weights: Optional sampling weights of all elements in the dataset, for weighted sampling.
+        num_steps: Number of steps to be considered an epoch, for weighted sampling.
+
+    Returns:
+        Batch sampler
+    """
+    return DurationBucketBatchSampler(
+        durations=durations,
+        batch_duration=batch_duration,
+        max_batch_size=batch_size,
+        num_buckets=num_buckets,
+        sample_weights=sample_weights,
+        num_steps=num_steps,
+        world_size=world_size,
+    )
+
+
+def get_train_dataloader(
+    dataset: torch.utils.data.Dataset, sampler: Optional[torch.utils.data.Sampler], dataloader_params: Dict[str, Any]
+) -> torch.utils.data.DataLoader:
+    """
+    Create training data loader with the sampler returned by the `get_sampler` method of a dataset.
+
+    Args:
+        dataset: Dataset with a `collate_fn` method.
+        sampler: Sampler or batch sampler of the dataset, or None.
+        dataloader_params: Keyword arguments of the data loader.
+
+    Returns:
+        Pytorch data loader
+    """
+    if isinstance(sampler, DurationBucketBatchSampler):
+        # batch size and order are determined by the batch sampler
+        dataloader_params = {
+            key: value
+            for key, value in dataloader_params.items()
+            if key not in ("batch_size", "shuffle", "sampler", "drop_last")
+        }
+        return torch.utils.data.DataLoader(
+            dataset, collate_fn=dataset.collate_fn, batch_sampler=sampler, **dataloader_params
+        )
+    return torch.utils.data.DataLoader(dataset, collate_fn=dataset.collate_fn, sampler=sampler, **dataloader_params)
+
+
 def _read_audio(
     audio_filepath: Path, sample_rate: int, offset: float, duration: float, n_retries: int = 5
 ) -> AudioSegment:
@@ -0,0 +1,195 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This script tokenizes the audio of a manifest with an audio codec model, for training models on codec tokens.
+The tokens are stored as an MMapIndexedDataset at '<output_prefix>.bin' and '<output_prefix>.idx', with one item per
+manifest entry, and can be read with nemo.collections.tts.data.codec_token_dataset.CodecTokenDataset.
+
+The manifest is split into shards of 'shard_size' entries. The audio of a shard is loaded by 'num_workers' data loader
+workers and encoded in batches of utterances of similar duration, with at most 'batch_duration' seconds of padded
+audio per batch. Every completed shard is written to '<output_prefix>.shards/', and with '--resume' (default),
+shards which were already completed with the same model are skipped.
+
+Shards can be split between several processes, e.g. one per GPU, with '--num_jobs' and '--job_id'. The process which
+completes the last shard merges all shards into the output files. Processes finishing at the same time may both merge,
+which is safe since every merge writes its own temporary files and renames them into place.
+
+$ python <nemo_root_path>/scripts/dataset_processing/tts/compute_codec_tokens.py \
+    --codec_model_path=<path_to_codec_model>/audio_codec.nemo \
+    --manifest_path=<data_root_path>/manifest.json \
+    --audio_dir=<data_root_path>/audio \
+    --output_prefix=<data_root_path>/codec_tokens/manifest \
+    --batch_duration=200 \
+    --num_workers=4 \
+    --shard_size=1000
+"""
+
+import argparse
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict
+
+import torch
+from tqdm import tqdm
+
+from nemo.collections.asr.parts.utils.manifest_utils import read_manifest
+from nemo.collections.tts.models import AudioCodecModel
+from nemo.collections.tts.parts.utils.codec_tokens import (
+    encode_codec_tokens,
+    get_codec_tokens_meta_path,
+    get_codec_tokens_shard_prefix,
+    merge_codec_tokens,
+    write_codec_tokens,
+)
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter, description="Compute audio codec tokens.",
+    )
+    parser.add_argument(
+        "--codec_model_path", required=True, type=str, help="Path or name of the audio codec model.",
+    )
+    parser.add_argument(
+        "--manifest_path", required=True, type=Path, help="Path to the manifest.",
+    )
+    parser.add_argument(
+        "--audio_dir", required=True, type=Path, help="Path to base directory with audio data.",
+    )
+    parser.add_argument(
+        "--output_prefix", required=True, type=Path, help="Path prefix of the output files.",
+    )
+    parser.add_argument(
+        "--batch_duration", default=200.0, type=float, help="Maximum duration of padded audio per batch, in seconds.",
+    )
+    parser.add_argument(
+        "--max_batch_size", default=None, type=int, help="Maximum number of utterances per batch.",
+    )
+    parser.add_argument(
+        "--num_workers", default=4, type=int, help="Number of data loader workers loading audio.",
+    )
+    parser.add_argument(
+        "--shard_size", default=1000, type=int, help="Number of manifest entries per shard (unit of checkpointing).",
+    )
+    parser.add_argument(
+        "--num_jobs", default=1, type=int, help="Number of processes the shards are split between.",
+    )
+    parser.add_argument(
+        "--job_id", default=0, type=int, help="Index of this process, in [0, num_jobs).",
+    )
+    parser.add_argument(
+        "--device", default="cuda" if torch.cuda.is_available() else "cpu", type=str, help="Device of the model.",
+    )
+    parser.add_argument(
+        "--resume",
+        default=True,
+        action=argparse.BooleanOptionalAction,
+        help="Whether to skip shards that were already completed with the same model.",
+    )
+
+    args = parser.parse_args()
+    return args
+
+
+def _get_hash(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _get_model_hash(codec_model_path: str) -> str:
+    if not Path(codec_model_path).is_file():
+        # name of a pretrained model
+        return _get_hash(codec_model_path)
+    sha = hashlib.sha256()
+    with open(codec_model_path, "rb") as model_f:
+        for block in iter(lambda: model_f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def _is_shard_complete(shard_prefix: Path, checkpoint: Dict[str, Any]) -> bool:
+    meta_path = get_codec_tokens_meta_path(shard_prefix)
+    if not meta_path.exists():
+        return False
+    with open(meta_path, "r", encoding="utf-8") as meta_f:
+        return json.load(meta_f).get("checkpoint") == checkpoint
+
+
+def main():
+    args = get_args()
+
+    if not args.manifest_path.exists():
+        raise ValueError(f"Manifest {args.manifest_path} does not exist.")
+
+    if args.shard_size <= 0:
+        raise ValueError(f"shard_size must be positive, got {args.shard_size}")
+
+    if not 0 <= args.job_id < args.num_jobs:
+        raise ValueError(f"job_id must be in [0, {args.num_jobs}), got {args.job_id}")
+
+    entries = read_manifest(args.manifest_path)
+    model_hash = _get_model_hash(args.codec_model_path)
+
+    shards = []
+    for shard_id, start_i in enumerate(range(0, len(entries), args.shard_size)):
+        shard_entries = entries[start_i : start_i + args.shard_size]
+        checkpoint = {"model": model_hash, "entries": _get_hash(shard_entries)}
+        shard_prefix = get_codec_tokens_shard_prefix(args.output_prefix, shard_id)
+        shards.append((shard_id, shard_entries, checkpoint, shard_prefix))
+
+    shard_jobs = [
+        shard
+        for shard in shards
+        if shard[0] % args.num_jobs == args.job_id
+        and not (args.resume and _is_shard_complete(shard_prefix=shard[3], checkpoint=shard[2]))
+    ]
+    print(f"Computing codec tokens: {len(shard_jobs)} shards of job {args.job_id}, {len(shards)} shards in total.")
+
+    if shard_jobs:
+        if Path(args.codec_model_path).is_file():
+            model = AudioCodecModel.restore_from(args.codec_model_path, map_location=args.device)
+        else:
+            model = AudioCodecModel.from_pretrained(args.codec_model_path, map_location=args.device)
+        model.eval()
+
+        for shard_id, shard_entries, checkpoint, shard_prefix in tqdm(shard_jobs):
+            tokens = encode_codec_tokens(
+                model=model,
+                entries=shard_entries,
+                audio_dir=args.audio_dir,
+                batch_duration=args.batch_duration,
+                max_batch_size=args.max_batch_size,
+                num_workers=args.num_workers,
+            )
+            write_codec_tokens(
+                shard_prefix,
+                tokens=tokens,
+                sample_rate=model.sample_rate,
+                samples_per_frame=model.samples_per_frame,
+                checkpoint=checkpoint,
+            )
+
+    if not all(_is_shard_complete(shard_prefix=shard[3], checkpoint=shard[2]) for shard in shards):
+        print("Not all shards are complete yet, they will be merged by the job completing the last shard.")
+        return
+
+    merge_codec_tokens(
+        [shard[3] for shard in shards], args.output_prefix, manifest_path=str(args.manifest_path), model=model_hash
+    )
+    print(f"Wrote codec tokens of {len(entries)} entries to {args.output_prefix}")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,17 +16,29 @@
 This script computes features for TTS models prior to training, such as pitch and energy.
 The resulting features will be stored in the provided 'feature_dir'.
 
+The manifest is split into shards of 'shard_size' entries which are processed by 'num_workers' processes.
+When all features of a shard are computed, a checkpoint is written to '<feature_dir>/.progress'.
+With '--resume' (default without '--overwrite'), shards which were already completed with the same featurizer config
+are skipped, so an interrupted run can be restarted without recomputing finished shards. '--overwrite' recomputes all
+shards, and cannot be combined with '--resume'.
+
+For much faster pitch extraction, set 'pitch_backend: yin' in the PitchFeaturizer config.
+
 $ python <nemo_root_path>/scripts/dataset_processing/tts/compute_features.py \
     --feature_config_path=<nemo_root_path>/examples/tts/conf/features/feature_22050.yaml \
     --manifest_path=<data_root_path>/manifest.json \
     --audio_dir=<data_root_path>/audio \
     --feature_dir=<data_root_path>/features \
     --overwrite \
-    --num_workers=1
+    --num_workers=1 \
+    --shard_size=1000
 """
 
 import argparse
+import hashlib
+import json
 from pathlib import Path
+from typing import Any, Dict, List
 
 from hydra.utils import instantiate
 from joblib import Parallel, delayed
@@ -61,13 +73,61 @@ def get_args():
         "--overwrite", action=argparse.BooleanOptionalAction, help="Whether to overwrite existing feature files.",
     )
     parser.add_argument(
-        "--num_workers", default=1, type=int, help="Number of parallel threads to use. If -1 all CPUs are used."
+        "--num_workers", default=1, type=int, help="Number of parallel processes to use. If -1 all CPUs are used."
+    )
+    parser.add_argument(
+        "--shard_size", default=1000, type=int, help="Number of manifest entries per shard (unit of checkpointing).",
+    )
+    parser.add_argument(
+        "--resume",
+        default=None,
+        action=argparse.BooleanOptionalAction,
+        help="Whether to skip shards that were already completed with the same featurizer config. "
+        "Defaults to true, unless --overwrite is given.",
     )
 
     args = parser.parse_args()
     return args
 
 
+def _get_hash(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _get_checkpoint_path(feature_dir: Path, feature_name: str, shard_id: int) -> Path:
+    return feature_dir / ".progress" / feature_name / f"shard_{shard_id:06d}.json"
+
+
+def _is_shard_complete(checkpoint_path: Path, checkpoint: Dict[str, Any]) -> bool:
+    if not checkpoint_path.exists():
+        return False
+    with open(checkpoint_path, "r", encoding="utf-8") as checkpoint_f:
+        return json.load(checkpoint_f) == checkpoint
+
+
+def compute_shard(
+    featurizers: Dict[str, Any],
+    checkpoints: Dict[str, Dict[str, Any]],
+    shard_id: int,
+    entries: List[Dict[str, Any]],
+    audio_dir: Path,
+    feature_dir: Path,
+    overwrite: bool,
+) -> None:
+    """Computes the given features for one shard of the manifest and checkpoints every completed feature."""
+    for feature_name, featurizer in featurizers.items():
+        featurizer.save_batch(
+            manifest_entries=entries, audio_dir=audio_dir, feature_dir=feature_dir, overwrite=overwrite
+        )
+
+        checkpoint_path = _get_checkpoint_path(feature_dir=feature_dir, feature_name=feature_name, shard_id=shard_id)
+        checkpoint_path.parent.mkdir(exist_ok=True, parents=True)
+        tmp_checkpoint_path = checkpoint_path.with_suffix(".tmp")
+        with open(tmp_checkpoint_path, "w", encoding="utf-8") as checkpoint_f:
+            json.dump(checkpoints[feature_name], checkpoint_f)
+        tmp_checkpoint_path.replace(checkpoint_path)
+
+
 def main():
     args = get_args()
     feature_config_path = args.feature_config_path
@@ -77,6 +137,13 @@ def main():
     dedupe_files = args.dedupe_files
     overwrite = args.overwrite
     num_workers = args.num_workers
+    shard_size = args.shard_size
+    resume = args.resume
+
+    if resume is None:
+        resume = not overwrite
+    elif resume and overwrite:
+        raise ValueError("--overwrite recomputes all features and cannot be combined with --resume.")
 
     if not manifest_path.exists():
         raise ValueError(f"Manifest {manifest_path} does not exist.")
@@ -84,7 +151,14 @@ def main():
     if not audio_dir.exists():
         raise ValueError(f"Audio directory {audio_dir} does not exist.")
 
+    if shard_size <= 0:
+        raise ValueError(f"shard_size must be positive, got {shard_size}")
+
     feature_config = OmegaConf.load(feature_config_path)
+    featurizer_config_hashes = {
+        feature_name: _get_hash(OmegaConf.to_container(featurizer_config, resolve=True))
+        for feature_name, featurizer_config in feature_config.featurizers.items()
+    }
     feature_config = instantiate(feature_config)
     featurizers = feature_config.featurizers
 
@@ -101,14 +175,42 @@ def main():
             audio_filepath_set.add(audio_filepath)
         entries = final_entries
 
-    for feature_name, featurizer in featurizers.items():
-        print(f"Computing: {feature_name}")
-        Parallel(n_jobs=num_workers)(
-            delayed(featurizer.save)(
-                manifest_entry=entry, audio_dir=audio_dir, feature_dir=feature_dir, overwrite=overwrite
+    shard_jobs = []
+    num_skipped = 0
+    for shard_id, start_i in enumerate(range(0, len(entries), shard_size)):
+        shard_entries = entries[start_i : start_i + shard_size]
+        entries_hash = _get_hash(shard_entries)
+        checkpoints = {
+            feature_name: {"config": featurizer_config_hashes[feature_name], "entries": entries_hash}
+            for feature_name in featurizers
+        }
+        shard_featurizers = {}
+        for feature_name, featurizer in featurizers.items():
+            checkpoint_path = _get_checkpoint_path(
+                feature_dir=feature_dir, feature_name=feature_name, shard_id=shard_id
             )
-            for entry in tqdm(entries)
+            if resume and _is_shard_complete(checkpoint_path=checkpoint_path, checkpoint=checkpoints[feature_name]):
+                continue
+            shard_featurizers[feature_name] = featurizer
+
+        if shard_featurizers:
+            shard_jobs.append((shard_id, shard_entries, shard_featurizers, checkpoints))
+        else:
+            num_skipped += 1
+
+    print(f"Computing features {list(featurizers.keys())}: {len(shard_jobs)} shards, {num_skipped} already completed.")
+    Parallel(n_jobs=num_workers)(
+        delayed(compute_shard)(
+            featurizers=shard_featurizers,
+            checkpoints=checkpoints,
+            shard_id=shard_id,
+            entries=shard_entries,
+            audio_dir=audio_dir,
+            feature_dir=feature_dir,
+            overwrite=overwrite,
         )
+        for shard_id, shard_entries, shard_featurizers, checkpoints in tqdm(shard_jobs)
+    )
 
 
 if __name__ == "__main__":
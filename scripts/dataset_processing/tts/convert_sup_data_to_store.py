@@ -0,0 +1,118 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This script converts supplementary data stored as one file per utterance and feature into a packed,
+sharded store which can be memory-mapped by the TTS datasets.
+
+It supports both layouts:
+    - 'sup_data_path' of TTSDataset, with files '<sup_data_path>/<feature>/<audio_id>.pt'.
+      Pass the store as 'sup_data_store_path' to TTSDataset.
+    - 'feature_dir' of TextToSpeechDataset (scripts/dataset_processing/tts/compute_features.py), with files
+      '<feature_dir>/<feature>/<relative audio path>.npy'.
+      Pass the store as 'feature_store_dir' in the dataset metadata of TextToSpeechDataset.
+
+The key of every utterance is the path of its feature file relative to the feature folder, without extension.
+
+$ python <nemo_root_path>/scripts/dataset_processing/tts/convert_sup_data_to_store.py \
+    --sup_data_path=<data_root_path>/sup_data \
+    --store_dir=<data_root_path>/sup_data_store \
+    --features log_mel pitch voiced_mask p_voiced energy \
+    --dtype=float16 \
+    --shard_size=100000
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import torch
+from tqdm import tqdm
+
+from nemo.collections.tts.parts.utils.sup_data_store import SupDataStoreWriter
+
+SUP_DATA_EXTENSIONS = (".pt", ".npy")
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter, description="Convert TTS sup data to a packed store.",
+    )
+    parser.add_argument(
+        "--sup_data_path", required=True, type=Path, help="Directory with one sub-directory per feature.",
+    )
+    parser.add_argument(
+        "--store_dir", required=True, type=Path, help="Directory to write the packed store to.",
+    )
+    parser.add_argument(
+        "--features",
+        nargs="+",
+        default=["log_mel", "pitch", "voiced_mask", "p_voiced", "energy"],
+        help="Names of the features to convert. Features without a sub-directory are skipped.",
+    )
+    parser.add_argument(
+        "--dtype", default="float16", type=str, help="Data type to store floating point features as.",
+    )
+    parser.add_argument(
+        "--shard_size", default=100000, type=int, help="Maximum number of utterances per shard.",
+    )
+    args = parser.parse_args()
+    return args
+
+
+def load_sup_data_file(filepath: Path) -> np.ndarray:
+    if filepath.suffix == ".npy":
+        return np.load(filepath)
+    value = torch.load(filepath, map_location="cpu")
+    return value.numpy() if isinstance(value, torch.Tensor) else np.asarray(value)
+
+
+def main():
+    args = get_args()
+    sup_data_path = args.sup_data_path
+
+    if not sup_data_path.exists():
+        raise ValueError(f"Sup data directory {sup_data_path} does not exist.")
+
+    feature_files = {}
+    for feature_name in args.features:
+        feature_folder = sup_data_path / feature_name
+        if not feature_folder.is_dir():
+            print(f"Skipping {feature_name}: {feature_folder} does not exist.")
+            continue
+        files = {}
+        for filepath in feature_folder.rglob("*"):
+            if filepath.suffix in SUP_DATA_EXTENSIONS and filepath.is_file():
+                files[filepath.relative_to(feature_folder).with_suffix("").as_posix()] = filepath
+        print(f"Found {len(files)} files for {feature_name}")
+        feature_files[feature_name] = files
+
+    if not feature_files:
+        raise ValueError(f"None of the features {args.features} were found in {sup_data_path}.")
+
+    keys = sorted(set().union(*[files.keys() for files in feature_files.values()]))
+    with SupDataStoreWriter(store_dir=args.store_dir, dtype=args.dtype, shard_size=args.shard_size) as writer:
+        for key in tqdm(keys):
+            features = {
+                feature_name: load_sup_data_file(files[key])
+                for feature_name, files in feature_files.items()
+                if key in files
+            }
+            writer.add(key, features)
+
+    print(f"Wrote {len(keys)} utterances in {writer.num_shards} shards to {args.store_dir}")
+
+
+if __name__ == "__main__":
+    main()
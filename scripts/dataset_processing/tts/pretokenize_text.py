@@ -0,0 +1,108 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This script tokenizes the text of TTS manifests ahead of training, so that TTSDataset and TextToSpeechDataset
+read the token ids instead of running text preprocessing and G2P for every sample.
+
+The tokens are written next to every manifest, to '<manifest_path>.tokens/<tokenizer_hash>/'. The datasets use them
+automatically when they are configured with a tokenizer with the same hash. The tokenized text is 'normalized_text'
+(or 'text_normalized') if present, and 'text' otherwise, so manifests should be normalized beforehand with
+scripts/dataset_processing/tts/preprocess_text.py.
+
+For tokenizers with a 'phoneme_probability', '--num_variants' random tokenizations are stored for every line,
+and the datasets sample one of them every time a line is loaded.
+
+The tokenizer config is either a file with the tokenizer config only, or a training config with the key of the
+tokenizer in it, for example:
+
+$ python <nemo_root_path>/scripts/dataset_processing/tts/pretokenize_text.py \
+    --manifest_path <data_root_path>/train_manifest.json <data_root_path>/dev_manifest.json \
+    --tokenizer_config_path=<nemo_root_path>/examples/tts/conf/fastpitch_align_ipa.yaml \
+    --tokenizer_config_key=model.text_tokenizer \
+    --num_variants=8
+"""
+
+import argparse
+from pathlib import Path
+
+from hydra.utils import instantiate
+from omegaconf import OmegaConf
+from tqdm import tqdm
+
+from nemo.collections.asr.parts.utils.manifest_utils import read_manifest
+from nemo.collections.tts.parts.utils.token_store import (
+    get_manifest_text,
+    get_token_store_dir,
+    get_tokenizer_hash,
+    write_token_store,
+)
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter, description="Pre-tokenize text of TTS manifests.",
+    )
+    parser.add_argument(
+        "--manifest_path", required=True, nargs="+", type=Path, help="Path(s) to the manifests to tokenize.",
+    )
+    parser.add_argument(
+        "--tokenizer_config_path", required=True, type=Path, help="Path to the config file with the text tokenizer.",
+    )
+    parser.add_argument(
+        "--tokenizer_config_key",
+        default=None,
+        type=str,
+        help="Dot separated key of the tokenizer in the config file, e.g. 'model.text_tokenizer'. "
+        "Defaults to the whole config file.",
+    )
+    parser.add_argument(
+        "--num_variants",
+        default=8,
+        type=int,
+        help="Number of random tokenizations to store per line, for tokenizers with a 'phoneme_probability'.",
+    )
+    args = parser.parse_args()
+    return args
+
+
+def main():
+    args = get_args()
+
+    config = OmegaConf.load(args.tokenizer_config_path)
+    if args.tokenizer_config_key:
+        config = OmegaConf.select(config, args.tokenizer_config_key)
+        if config is None:
+            raise ValueError(f"Key {args.tokenizer_config_key} not found in {args.tokenizer_config_path}")
+    text_tokenizer = instantiate(config)
+
+    num_variants = 1
+    if getattr(text_tokenizer, "phoneme_probability", None) is not None:
+        if args.num_variants <= 0:
+            raise ValueError(f"num_variants must be positive, got {args.num_variants}")
+        num_variants = args.num_variants
+    tokenizer_hash = get_tokenizer_hash(text_tokenizer)
+    print(f"Tokenizer hash: {tokenizer_hash}, variants per line: {num_variants}")
+
+    for manifest_path in args.manifest_path:
+        entries = read_manifest(manifest_path)
+        texts = [get_manifest_text(entry) for entry in entries]
+        tokens = [[text_tokenizer(text) for _ in range(num_variants)] for text in tqdm(texts, desc=str(manifest_path))]
+        store_dir = get_token_store_dir(manifest_path, tokenizer_hash)
+        write_token_store(store_dir, texts=texts, tokens=tokens)
+        print(f"Wrote tokens of {len(texts)} lines to {store_dir}")
+
+
+if __name__ == "__main__":
+    main()
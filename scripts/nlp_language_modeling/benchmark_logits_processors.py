@@ -0,0 +1,122 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark of the logits processing of a sampling step in text generation, comparing the previous top-k/top-p
+filtering with a loop over the rows of the batch with the batched logits processors, and timing the full chain
+with penalties.
+
+# Usage
+python benchmark_logits_processors.py --batch_sizes 1 8 64 --vocab_size 256000 --top_k 50 --top_p 0.9
+"""
+
+import argparse
+import time
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+from nemo.collections.nlp.modules.common.logits_processors import get_logits_processors
+
+
+def loop_top_k_logits(logits, top_k, top_p, started, filter_value=-float('Inf')):
+    # filtering with a loop over the rows where the generation has started, synchronizing with the host
+    if top_k > 0:
+        indices_to_remove = logits < torch.topk(logits, top_k)[0][..., -1, None]
+        for i in np.arange(indices_to_remove.size(0))[started.cpu().numpy()]:
+            logits[i, indices_to_remove[i]] = filter_value
+    if top_p > 0.0:
+        sorted_logits, sorted_indices = torch.sort(logits, descending=True, dim=-1)
+        cumulative_probs = torch.cumsum(F.softmax(sorted_logits, dim=-1), dim=-1)
+        sorted_indices_to_remove = cumulative_probs > top_p
+        sorted_indices_to_remove[..., 1:] = sorted_indices_to_remove[..., :-1].clone()
+        sorted_indices_to_remove[..., 0] = 0
+        for i in np.arange(sorted_indices.size(0))[started.cpu().numpy()]:
+            logits[i, sorted_indices[i][sorted_indices_to_remove[i]]] = filter_value
+    return logits
+
+
+def time_fn(fn, device, num_iters, warmup):
+    for _ in range(warmup):
+        fn()
+    if device.type == "cuda":
+        torch.cuda.synchronize()
+
+    start = time.perf_counter()
+    for _ in range(num_iters):
+        fn()
+    if device.type == "cuda":
+        torch.cuda.synchronize()
+    return (time.perf_counter() - start) / num_iters
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark logits processors of text generation")
+    parser.add_argument("--batch_sizes", type=int, nargs="+", default=[1, 8, 64])
+    parser.add_argument("--vocab_size", type=int, default=50304)
+    parser.add_argument("--top_k", type=int, default=50)
+    parser.add_argument("--top_p", type=float, default=0.9)
+    parser.add_argument("--num_generated", type=int, default=256, help="Number of tokens in the history")
+    parser.add_argument("--device", type=str, default="cuda" if torch.cuda.is_available() else "cpu")
+    parser.add_argument("--num_iters", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    args = parser.parse_args()
+
+    device = torch.device(args.device)
+    torch.manual_seed(0)
+
+    print(f"V={args.vocab_size} top_k={args.top_k} top_p={args.top_p} device={device}")
+    for batch_size in args.batch_sizes:
+        logits = torch.randn(batch_size, args.vocab_size, device=device) * 4
+        started = torch.ones(batch_size, dtype=torch.bool, device=device)
+        filters = get_logits_processors(top_k=args.top_k, top_p=args.top_p)
+
+        loop_output = loop_top_k_logits(logits.clone(), args.top_k, args.top_p, started)
+        max_diff = (filters(logits.clone()) - loop_output).nan_to_num(posinf=0.0, neginf=0.0).abs().max().item()
+
+        loop_seconds = time_fn(
+            lambda: loop_top_k_logits(logits.clone(), args.top_k, args.top_p, started),
+            device,
+            args.num_iters,
+            args.warmup,
+        )
+        batched_seconds = time_fn(lambda: filters(logits.clone()), device, args.num_iters, args.warmup)
+
+        chain = get_logits_processors(
+            temperature=0.8,
+            top_k=args.top_k,
+            top_p=args.top_p,
+            min_p=0.05,
+            repetition_penalty=1.2,
+            presence_penalty=0.5,
+            frequency_penalty=0.5,
+            min_length=4,
+            eos_id=0,
+            bad_words_ids=[[1], [2, 3]],
+        )
+        history = chain.make_history(batch_size, args.vocab_size, device)
+        history.add_prompt(torch.randint(0, args.vocab_size, (batch_size, args.num_generated), device=device))
+        for _ in range(args.num_generated):
+            history.add_tokens(torch.randint(0, args.vocab_size, (batch_size,), device=device))
+        chain_seconds = time_fn(lambda: chain(logits.clone(), history), device, args.num_iters, args.warmup)
+
+        print(
+            f"B={batch_size:4d} top-k/top-p loop: {loop_seconds * 1000:8.3f} ms, batched: {batched_seconds * 1000:8.3f} "
+            f"ms, full chain: {chain_seconds * 1000:8.3f} ms, max abs difference: {max_diff:.3e}"
+        )
+
+
+if __name__ == '__main__':
+    main()
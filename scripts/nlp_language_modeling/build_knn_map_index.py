@@ -34,7 +34,8 @@ python scripts/nlp_language_modeling/build_knn_map_index.py \
     --output_file=knn_map.idx 
 ```
 Use `--remove_duplicate` flag if the data and retrieval dataset are the same. It will remove the neighbors from the same document.
-It creates a knn_map.idx KNNIndex file.
+It creates a knn_map.idx KNNIndex file, which is checkpointed after every `process_chunk_size` chunks.
+Use `--resume` flag to continue the file of an interrupted job from its last checkpoint.
 During training of RETRO model, it can look up the KNN chunk ids of the
 DB dataset given the input training data chunk id. 
 
@@ -62,7 +63,7 @@ python scripts/nlp_language_modeling/build_knn_map_index.py \
     --faiss_index=faiss.index
 ```
 
-stage-2: merge the sharding indexes into one that is written directly to disk, example
+stage-2: merge the sharding indexes into one that is written directly to disk, one block of chunks at a time, example
 
 ```python
 python scripts/nlp_language_modeling/build_knn_map_index.py  \
@@ -75,19 +76,22 @@ python scripts/nlp_language_modeling/build_knn_map_index.py  \
 import argparse
 import multiprocessing
 import pathlib
+import queue as thread_queue
 import sys
+import threading
 import time
 from multiprocessing import Pool
 
 import faiss
 import numpy as np
 import torch
-from numba import njit, prange
 from sentence_transformers import SentenceTransformer
 
 from nemo.collections.nlp.data.language_modeling.megatron.indexed_retrieval_dataset import (
     KNNIndex,
     MMapRetrievalIndexedDataset,
+    build_chunk_id_to_range,
+    dedup_knn,
     merge_knn_files,
 )
 from nemo.collections.nlp.modules.common.tokenizer_utils import get_nmt_tokenizer
@@ -99,33 +103,12 @@ queue = multiprocessing.Queue(QUEUE_SIZE)
 emb_queue = multiprocessing.Queue(QUEUE_SIZE)
 
 
-@njit(parallel=True)
 def build_map(chunk_start, result, total_chunks, start_id, end_id):
     """
     Build the map from chunk_id to a range of chunk ids that are from the same document.
     The chunk_id is in range [start_id, end_id)
     """
-    size = len(chunk_start)
-    for i in prange(size):
-        beg = chunk_start[i]
-        end = chunk_start[i + 1] if i < size - 1 else total_chunks
-        if start_id < end and beg < end_id:  # [beg, end) intersect  [start_id, end_id)
-            result[max(beg - start_id, 0) : (end - start_id), 0] = beg
-            result[max(beg - start_id, 0) : (end - start_id), 1] = end
-
-
-@njit(parallel=True)
-def _dedup(chunk_id_to_range, I, tmp_neighbors, chunk_id_start, offset):
-    for cid in prange(len(I)):
-        if chunk_id_start + cid - offset >= 0 and chunk_id_start + cid - offset < len(chunk_id_to_range):
-            beg, end = chunk_id_to_range[chunk_id_start + cid - offset]
-        position = 0
-        for target_chunk_id in I[cid]:
-            if beg <= target_chunk_id < end:
-                # target chunk is from the same document
-                continue
-            tmp_neighbors[cid, position] = target_chunk_id
-            position += 1
+    result[:] = build_chunk_id_to_range(chunk_start, total_chunks, start_id, end_id)
 
 
 def dedup(chunk_id_to_range, I, tmp_neighbors, chunk_id_start, offset):
@@ -141,7 +124,8 @@ def dedup(chunk_id_to_range, I, tmp_neighbors, chunk_id_start, offset):
     """
     if chunk_id_start < offset or chunk_id_start + len(I) - offset > len(chunk_id_to_range):
         raise ValueError('chunk_id_start out side the range')
-    _dedup(chunk_id_to_range, I, tmp_neighbors, chunk_id_start, offset)
+    beg = chunk_id_start - offset
+    tmp_neighbors[:] = dedup_knn(I, chunk_id_to_range[beg : beg + len(I)])
 
 
 def get_tokenizer(args):
@@ -182,11 +166,13 @@ def process_sentence_chunks(
     workers: int,
     shard_id: int,
     total_shards: int,
+    skip_chunks: int = 0,
 ):
     """
     This function takes chunked tokens from the retrieval dataset and map it back to text.
     In stage 1, it divides the total work into `total_shards`, and process only at the `shard_id`.  
     If the stage is None, it process all the chunks.
+    The first `skip_chunks` chunks are skipped, they are already in the checkpoint of a resumed job.
     """
     total_chunks = ds.chunks
     start = 0
@@ -197,6 +183,7 @@ def process_sentence_chunks(
             total_chunks=total_chunks, total_shards=total_shards, shard_id=shard_id
         )
         logging.info(f'shard_id {shard_id}, create index from chunk {start} to {total_chunks}')
+    start += skip_chunks
 
     with Pool(workers) as p:
         while start < total_chunks:
@@ -237,6 +224,38 @@ def get_emb():
     return emb_queue.get()
 
 
+def dedup_and_write(search_queue, writer, chunk_id_to_range, offset, K, errors):
+    """
+    Last stage of the pipeline, it runs in a thread so that the dedup and the write of a slice overlap with
+    the search of the next one. The index is checkpointed after every slice.
+    The slices after a failure are dropped, and the exception is appended to `errors`.
+    """
+    while True:
+        I, slice_id = search_queue.get()
+        if I is None:
+            break
+        if errors:
+            continue
+        try:
+            _dedup_and_write_slice(I, slice_id, writer, chunk_id_to_range, offset, K)
+        except Exception as e:
+            errors.append(e)
+
+
+def _dedup_and_write_slice(I, slice_id, writer, chunk_id_to_range, offset, K):
+    assert writer.count_chunks + offset == slice_id[0]
+    if chunk_id_to_range is not None:
+        beg = time.time()
+        I = dedup_knn(I, chunk_id_to_range[slice_id[0] - offset : slice_id[1] - offset])[:, :K]
+        end = time.time()
+        logging.info(f'dedup {slice_id[0]} - {slice_id[1]} takes {end-beg}')
+    beg = time.time()
+    writer.write(np.ascontiguousarray(I, dtype=np.int64))
+    writer.checkpoint()
+    end = time.time()
+    logging.info(f'write {slice_id[0]} - {slice_id[1]} takes {end-beg}')
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="build Faiss index",)
     parser.add_argument(
@@ -317,6 +336,17 @@ if __name__ == "__main__":
         default=None,
         help='the knn sharding index files, which are created at stage 1',
     )
+    group.add_argument(
+        '--resume',
+        action='store_true',
+        help='continue the output file of an interrupted job after its last checkpointed chunk',
+    )
+    group.add_argument(
+        '--merge_block_size',
+        type=int,
+        default=1 << 20,
+        help='number of chunks copied at a time when merging the sharding indexes',
+    )
 
     args = parser.parse_args()
 
@@ -333,7 +363,7 @@ if __name__ == "__main__":
         path = input_file.parent
         fname = input_file.name
         all_files = [str(i) for i in pathlib.Path(path).glob(fname + '*')]
-        merge_knn_files(all_files, args.output_file)
+        merge_knn_files(all_files, args.output_file, block_size=args.merge_block_size)
         f = KNNIndex(args.output_file)
         logging.info(f'Write to {args.output_file},  Size of Index : {f.len}')
         logging.info(f'Index neighbors: {f.K}')
@@ -341,25 +371,8 @@ if __name__ == "__main__":
         logging.info(f'Index chunk end id: {f.chunk_end_id}')
         sys.exit(0)
 
-    model = SentenceTransformer(args.sentence_transformer_model)
-    tokenizer = get_tokenizer(args)
     ds = MMapRetrievalIndexedDataset(args.input_file)
 
-    if args.devices is None or not torch.cuda.is_available():
-        device_list = None
-    else:
-        device_list = ['cuda:' + str(device) for device in args.devices.split(',')]
-
-    index = faiss.read_index(args.faiss_index)
-    if has_gpu:
-        co = faiss.GpuMultipleClonerOptions()
-        co.useFloat16 = True
-        co.usePrecomputed = False
-        co.shard = True
-        index = faiss.index_cpu_to_all_gpus(index, co, ngpu=len(device_list))
-
-    index.nprobe = args.nprobe
-
     start = 0
     total_chunks = ds.chunks
     if args.stage == 1:
@@ -367,50 +380,93 @@ if __name__ == "__main__":
             total_chunks=total_chunks, total_shards=args.total_shards, shard_id=args.shard_id
         )
 
-    process = multiprocessing.Process(
-        target=process_sentence_chunks,
-        args=(ds, tokenizer, args.process_chunk_size, args.stage, args.workers, args.shard_id, args.total_shards),
-    )
-    process.start()
-
-    pool = model.start_multi_process_pool(device_list)
+    with KNNIndex.writer(args.output_file, args.K_neighbors, offset=start, resume=args.resume) as w:
+        if w.count_chunks > 0:
+            logging.info(f'resume {args.output_file} from chunk {start + w.count_chunks}')
+        if start + w.count_chunks >= total_chunks:
+            logging.info(f'{args.output_file} is complete')
+            sys.exit(0)
+
+        model = SentenceTransformer(args.sentence_transformer_model)
+        tokenizer = get_tokenizer(args)
+
+        if args.devices is None or not torch.cuda.is_available():
+            device_list = None
+        else:
+            device_list = ['cuda:' + str(device) for device in args.devices.split(',')]
+
+        index = faiss.read_index(args.faiss_index)
+        if has_gpu:
+            co = faiss.GpuMultipleClonerOptions()
+            co.useFloat16 = True
+            co.usePrecomputed = False
+            co.shard = True
+            index = faiss.index_cpu_to_all_gpus(index, co, ngpu=len(device_list))
+
+        index.nprobe = args.nprobe
+
+        # the stages of the pipeline: tokenization, embedding, search and dedup with the write
+        process = multiprocessing.Process(
+            target=process_sentence_chunks,
+            args=(
+                ds,
+                tokenizer,
+                args.process_chunk_size,
+                args.stage,
+                args.workers,
+                args.shard_id,
+                args.total_shards,
+                w.count_chunks,
+            ),
+        )
+        process.start()
+        pool = emb_process = None
+        completed = False
+        try:
+            pool = model.start_multi_process_pool(device_list)
 
-    emb_process = multiprocessing.Process(target=calculate_embedding, args=(pool, args.batch_size))
-    emb_process.start()
+            emb_process = multiprocessing.Process(target=calculate_embedding, args=(pool, args.batch_size))
+            emb_process.start()
 
-    if ds._index.retrieval_db and args.remove_duplicate:
-        neighbors = args.K_neighbors + args.dedup_margin
-        # build the id maps for quick dedup
-        id_start = np.array(ds._index._chunk_id_start)
-        chunk_id_to_doc_id_map = np.zeros((total_chunks - start, 2), dtype=np.int64)
-        build_map(id_start, chunk_id_to_doc_id_map, ds.chunks, start, total_chunks)
-    else:
-        neighbors = args.K_neighbors
-
-    chunk_id_start = start
-    with KNNIndex.writer(args.output_file, args.K_neighbors, offset=start) as w:
-        while True:
-            emb, slice_id = get_emb()
-            if emb is None:
-                break
-            beg = time.time()
-            D, I = index.search(emb, neighbors)
-            end = time.time()
-            logging.info(f'search {slice_id[0]} - {slice_id[1]} takes {end-beg}')
-            assert chunk_id_start == slice_id[0]
             if ds._index.retrieval_db and args.remove_duplicate:
-                beg = time.time()
-                tmp_neighbors = np.ones_like(I) * -1
-                dedup(chunk_id_to_doc_id_map, I, tmp_neighbors, chunk_id_start, start)
-                I = tmp_neighbors[:, : args.K_neighbors]
-                end = time.time()
-                logging.info(f'dedup {slice_id[0]} - {slice_id[1]} takes {end-beg}')
-            beg = time.time()
-            w.write(I)
-            end = time.time()
-            logging.info(f'write {slice_id[0]} - {slice_id[1]} takes {end-beg}')
-            chunk_id_start += len(I)
-
-    process.join()
-    emb_process.join()
-    model.stop_multi_process_pool(pool)
+                neighbors = args.K_neighbors + args.dedup_margin
+                # build the id maps for quick dedup
+                id_start = np.array(ds._index._chunk_id_start)
+                chunk_id_to_doc_id_map = build_chunk_id_to_range(id_start, ds.chunks, start, total_chunks)
+            else:
+                neighbors = args.K_neighbors
+                chunk_id_to_doc_id_map = None
+
+            search_queue = thread_queue.Queue(QUEUE_SIZE)
+            write_errors = []
+            write_thread = threading.Thread(
+                target=dedup_and_write,
+                args=(search_queue, w, chunk_id_to_doc_id_map, start, args.K_neighbors, write_errors),
+            )
+            write_thread.start()
+            try:
+                # the slices after a failed write are dropped, so the search stops at the first error
+                while not write_errors:
+                    emb, slice_id = get_emb()
+                    if emb is None:
+                        completed = True
+                        break
+                    beg = time.time()
+                    D, I = index.search(emb, neighbors)
+                    end = time.time()
+                    logging.info(f'search {slice_id[0]} - {slice_id[1]} takes {end-beg}')
+                    search_queue.put((I, slice_id))
+            finally:
+                search_queue.put((None, None))
+                write_thread.join()
+        finally:
+            # unless the pipeline is complete, the stages before the search may be blocked on a full queue
+            for stage_process in [process, emb_process]:
+                if stage_process is not None:
+                    if not completed:
+                        stage_process.terminate()
+                    stage_process.join()
+            if pool is not None:
+                model.stop_multi_process_pool(pool)
+        if write_errors:
+            raise write_errors[0]
@@ -45,6 +45,9 @@ def main(cfg) -> None:
         cfg.sentence_bert.sentence_bert,
         cfg.sentence_bert.sentence_bert_batch,
         port=cfg.sentence_bert.port,
+        max_batch_size=cfg.sentence_bert.get('max_batch_size', 256),
+        max_wait_time=cfg.sentence_bert.get('max_wait_time', 0.002),
+        cache_size=cfg.sentence_bert.get('cache_size', 100000),
     )
 
 
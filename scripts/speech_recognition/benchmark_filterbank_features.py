@@ -0,0 +1,82 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark of the mel spectrogram extraction of `FilterbankFeatures` for inference on CPU,
+comparing the dense filterbank product with the banded filterbank (`banded_filterbank=True`).
+
+# Usage
+python benchmark_filterbank_features.py --batch_size 16 --duration 20 --features 80 128 --num_threads 8
+"""
+
+import argparse
+import time
+
+import torch
+
+from nemo.collections.asr.parts.preprocessing.features import FilterbankFeatures
+
+
+def time_featurizer(featurizer, audio, audio_len, num_iters, warmup):
+    for _ in range(warmup):
+        featurizer(audio, audio_len)
+
+    start = time.perf_counter()
+    for _ in range(num_iters):
+        featurizer(audio, audio_len)
+    return (time.perf_counter() - start) / num_iters
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FilterbankFeatures on CPU")
+    parser.add_argument("--batch_size", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0, help="Duration of every utterance in seconds")
+    parser.add_argument("--sample_rate", type=int, default=16000)
+    parser.add_argument("--n_fft", type=int, default=512)
+    parser.add_argument("--features", type=int, nargs="+", default=[80, 128])
+    parser.add_argument("--num_threads", type=int, default=0, help="Torch threads, 0 keeps the default")
+    parser.add_argument("--num_iters", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    args = parser.parse_args()
+
+    if args.num_threads > 0:
+        torch.set_num_threads(args.num_threads)
+
+    torch.manual_seed(0)
+    num_samples = int(args.duration * args.sample_rate)
+    audio = torch.randn(args.batch_size, num_samples)
+    audio_len = torch.randint(num_samples // 2, num_samples + 1, (args.batch_size,))
+    audio_len[0] = num_samples
+
+    print(f"B={args.batch_size} duration={args.duration}s n_fft={args.n_fft} torch_threads={torch.get_num_threads()}")
+    for features in args.features:
+        featurizers = {
+            banded: FilterbankFeatures(
+                sample_rate=args.sample_rate, n_fft=args.n_fft, nfilt=features, dither=0.0, banded_filterbank=banded,
+            ).eval()
+            for banded in (False, True)
+        }
+
+        outputs = {banded: featurizer(audio, audio_len)[0] for banded, featurizer in featurizers.items()}
+        max_diff = (outputs[True] - outputs[False]).abs().max().item()
+
+        for banded, featurizer in featurizers.items():
+            seconds = time_featurizer(featurizer, audio, audio_len, args.num_iters, args.warmup)
+            name = "banded" if banded else "dense"
+            print(f"features={features:4d} {name:>8s}: {seconds * 1000:10.2f} ms / batch")
+        print(f"features={features:4d} max abs difference: {max_diff:.3e}")
+
+
+if __name__ == '__main__':
+    main()
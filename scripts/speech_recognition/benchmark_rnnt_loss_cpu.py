@@ -0,0 +1,119 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark of the CPU implementations of the RNNT / TDT losses (forward + backward).
+
+Compares the multithreaded Numba kernels used by `warprnnt_numba` / `tdt` on CPU with the
+legacy scalar CPU port (`rnnt_loss_cpu`) and the pure Pytorch losses (`pytorch`, `tdt_pytorch`).
+
+# Usage
+python benchmark_rnnt_loss_cpu.py --batch_size 8 --max_t 200 --max_u 50 --vocab_size 128 --num_threads 8
+
+The pure Pytorch and legacy CPU implementations are very slow; they can be skipped with `--skip_slow`.
+"""
+
+import argparse
+import time
+
+import numba
+import torch
+
+from nemo.collections.asr.losses.rnnt_pytorch import RNNTLossPytorch, TDTLossPytorch
+from nemo.collections.asr.parts.numba.rnnt_loss import rnnt
+from nemo.collections.asr.parts.numba.rnnt_loss.rnnt_pytorch import RNNTLossNumba, TDTLossNumba
+
+
+def legacy_rnnt_loss_cpu(acts, labels, act_lens, label_lens, blank):
+    log_probs = torch.log_softmax(acts.detach(), dim=-1)
+    costs = torch.zeros(acts.shape[0], dtype=torch.float32)
+    grads = torch.zeros_like(log_probs)
+    rnnt.rnnt_loss_cpu(
+        log_probs,
+        labels=labels,
+        input_lengths=act_lens,
+        label_lengths=label_lens,
+        costs=costs,
+        grads=grads,
+        blank_label=blank,
+        fastemit_lambda=0.0,
+        clamp=0.0,
+        num_threads=0,
+    )
+    return costs
+
+
+def time_loss(loss_fn, acts, labels, act_lens, label_lens, num_iters, warmup):
+    for _ in range(warmup):
+        _run_once(loss_fn, acts, labels, act_lens, label_lens)
+
+    start = time.perf_counter()
+    for _ in range(num_iters):
+        _run_once(loss_fn, acts, labels, act_lens, label_lens)
+    return (time.perf_counter() - start) / num_iters
+
+
+def _run_once(loss_fn, acts, labels, act_lens, label_lens):
+    acts = acts.detach().requires_grad_(True)
+    loss = loss_fn(acts, labels, act_lens, label_lens).sum()
+    if loss.requires_grad:
+        loss.backward()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CPU RNNT and TDT losses")
+    parser.add_argument("--batch_size", type=int, default=8)
+    parser.add_argument("--max_t", type=int, default=200)
+    parser.add_argument("--max_u", type=int, default=50)
+    parser.add_argument("--vocab_size", type=int, default=128, help="Vocabulary size without blank")
+    parser.add_argument("--durations", type=int, nargs="+", default=[0, 1, 2, 3, 4])
+    parser.add_argument("--num_threads", type=int, default=0, help="Numba threads, 0 keeps the default")
+    parser.add_argument("--num_iters", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--skip_slow", action="store_true", help="Skip the legacy and pure Pytorch losses")
+    args = parser.parse_args()
+
+    if args.num_threads > 0:
+        numba.set_num_threads(args.num_threads)
+
+    torch.manual_seed(0)
+    B, T, U, V = args.batch_size, args.max_t, args.max_u + 1, args.vocab_size + 1
+    blank = V - 1
+    act_lens = torch.randint(T // 2, T + 1, (B,), dtype=torch.int64)
+    act_lens[0] = T
+    label_lens = torch.randint(U // 2, U, (B,), dtype=torch.int64)
+    label_lens[0] = U - 1
+    labels = torch.randint(0, V - 1, (B, U - 1), dtype=torch.int64)
+
+    rnnt_acts = torch.randn(B, T, U, V)
+    tdt_acts = torch.randn(B, T, U, V + len(args.durations))
+
+    candidates = [
+        ("warprnnt_numba (parallel CPU)", RNNTLossNumba(blank=blank, reduction='none'), rnnt_acts, False),
+        ("tdt (parallel CPU)", TDTLossNumba(blank=blank, durations=args.durations, reduction='none'), tdt_acts, False),
+        ("warprnnt_numba (legacy CPU)", lambda *inputs: legacy_rnnt_loss_cpu(*inputs, blank=blank), rnnt_acts, True),
+        ("pytorch", RNNTLossPytorch(blank=blank, reduction='none'), rnnt_acts, True),
+        ("tdt_pytorch", TDTLossPytorch(blank=blank, durations=args.durations, reduction='none'), tdt_acts, True),
+    ]
+
+    print(f"B={B} T={T} U={U} V={V} numba_threads={numba.get_num_threads()} torch_threads={torch.get_num_threads()}")
+    for name, loss_fn, acts, is_slow in candidates:
+        if is_slow and args.skip_slow:
+            continue
+        seconds = time_loss(loss_fn, acts, labels, act_lens, label_lens, args.num_iters, args.warmup)
+        print(f"{name:>32s}: {seconds * 1000:10.2f} ms / batch")
+
+
+if __name__ == '__main__':
+    main()
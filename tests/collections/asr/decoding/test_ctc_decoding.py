@@ -25,6 +25,7 @@ from nemo.collections.asr.parts.submodules.ctc_decoding import (
     CTCBPEDecodingConfig,
     CTCDecoding,
     CTCDecodingConfig,
+    batched_ctc_collapse,
 )
 from nemo.collections.asr.parts.utils.rnnt_utils import Hypothesis
 
@@ -74,6 +75,24 @@ def check_subword_timestamps(hyp: Hypothesis, decoding: CTCBPEDecoding):
     assert len(chars) == len(all_chars)
 
 
+def sequential_ctc_collapse(prediction, blank_id):
+    decoded, token_lengths, token_repetitions = [], [], []
+    previous, last_length, last_repetition = blank_id, 0, 1
+    for pidx, p in enumerate(prediction):
+        if (p != previous or previous == blank_id) and p != blank_id:
+            decoded.append(p)
+            token_lengths.append(pidx - last_length)
+            last_length = pidx
+            token_repetitions.append(last_repetition)
+            last_repetition = 1
+        if p == previous and previous != blank_id:
+            last_repetition += 1
+        previous = p
+    if len(token_repetitions) > 0:
+        token_repetitions = token_repetitions[1:] + [last_repetition]
+    return decoded, token_lengths, token_repetitions
+
+
 class TestCTCDecoding:
     @pytest.mark.unit
     def test_constructor(self):
@@ -107,6 +126,39 @@ class TestCTCDecoding:
             for text in texts:
                 assert isinstance(text, str)
 
+    @pytest.mark.unit
+    @pytest.mark.parametrize('fold_consecutive', [False, True])
+    def test_batched_ctc_collapse(self, fold_consecutive):
+        blank_id = 3
+        torch.manual_seed(0)
+        predictions = [torch.randint(0, blank_id + 1, size=[length]) for length in [0, 1, 7, 30, 30, 12]]
+        predictions.append(torch.tensor([1, 1, 3, 1, 2, 2, 2, 3, 3, 0]))
+
+        decoded, token_lengths, token_repetitions = batched_ctc_collapse(
+            predictions, blank_id=blank_id, fold_consecutive=fold_consecutive
+        )
+
+        assert len(decoded) == len(token_lengths) == len(token_repetitions) == len(predictions)
+        for idx, prediction in enumerate(predictions):
+            if fold_consecutive:
+                expected = sequential_ctc_collapse(prediction.tolist(), blank_id)
+            else:
+                expected_tokens = prediction[prediction != blank_id].tolist()
+                expected = (expected_tokens, [1] * len(expected_tokens), [1] * len(expected_tokens))
+            assert (decoded[idx], token_lengths[idx], token_repetitions[idx]) == expected
+
+        assert decoded[-1] == ([1, 1, 2, 0] if fold_consecutive else [1, 1, 1, 2, 2, 2, 0])
+
+    @pytest.mark.unit
+    def test_char_decode_tokens_to_str_batch(self):
+        cfg = CTCDecodingConfig(strategy='greedy')
+        decoding = CTCDecoding(decoding_cfg=cfg, vocabulary=char_vocabulary())
+
+        tokens_list = [[], [1, 2, 0, 3], [7, 4, 7], [5]]
+        texts = decoding.decode_tokens_to_str_batch(tokens_list)
+        assert texts == [decoding.decode_tokens_to_str(tokens) for tokens in tokens_list]
+        assert texts == ['', 'ab c', 'd', 'e']
+
     @pytest.mark.unit
     @pytest.mark.parametrize('alignments', [False, True])
     @pytest.mark.parametrize('timestamps', [False, True])
@@ -0,0 +1,96 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import pytest
+import torch
+
+try:
+    from nemo.collections.asr.parts.k2.graph_cache import DecodingGraphCache, fsa_content_hash
+    from nemo.collections.asr.parts.k2.graph_compilers import CtcNumGraphCompiler
+    from nemo.core.utils.k2_guard import k2
+except (ImportError, ModuleNotFoundError):
+    pytest.skip("k2 is not installed, skipping graph cache tests.", allow_module_level=True)
+
+
+def token_bigram_lm(num_classes: int, weight: float = 0.0) -> 'k2.Fsa':
+    arcs = []
+    for token in range(1, num_classes):
+        arcs.append(f"0 1 {token} {-0.5 + weight}")
+        arcs.append(f"1 1 {token} -1.0")
+    arcs.append("1 2 -1 0.0")
+    arcs.append("2")
+    return k2.Fsa.from_str("\n".join(arcs), acceptor=True)
+
+
+class TestDecodingGraphCache:
+    @pytest.mark.unit
+    def test_content_hash(self):
+        assert fsa_content_hash(token_bigram_lm(5)) == fsa_content_hash(token_bigram_lm(5))
+        assert fsa_content_hash(token_bigram_lm(5)) != fsa_content_hash(token_bigram_lm(5, weight=0.1))
+        assert fsa_content_hash(token_bigram_lm(5)) != fsa_content_hash(token_bigram_lm(6))
+
+    @pytest.mark.unit
+    def test_compiler_uses_cache(self, tmp_path):
+        num_classes, blank = 5, 0
+        lm = token_bigram_lm(num_classes)
+        reference = CtcNumGraphCompiler(num_classes, blank, aux_graph=lm)
+
+        cache = DecodingGraphCache(str(tmp_path))
+        compiler = CtcNumGraphCompiler(num_classes, blank, aux_graph=lm, graph_cache=cache)
+        cached_files = os.listdir(tmp_path)
+        assert len(cached_files) == 1
+        assert str(compiler.base_graph) == str(reference.base_graph)
+
+        # a cache hit must not call the compilation at all
+        key = cache.make_key(
+            graphs={"topo_inv": compiler.ctc_topo_inv, "aux_graph": lm}, op="intersect_with_self_loops"
+        )
+        assert cache.path(key) == os.path.join(str(tmp_path), cached_files[0])
+        loaded = cache.get_or_compile(key, lambda: pytest.fail("the graph must be loaded from the cache"))
+        assert str(k2.arc_sort(loaded)) == str(reference.base_graph)
+
+        compiler = CtcNumGraphCompiler(num_classes, blank, aux_graph=lm, graph_cache=cache)
+        assert str(compiler.base_graph) == str(reference.base_graph)
+        assert len(os.listdir(tmp_path)) == 1
+
+        # a different LM gets its own entry
+        CtcNumGraphCompiler(num_classes, blank, aux_graph=token_bigram_lm(num_classes, weight=0.1), graph_cache=cache)
+        assert len(os.listdir(tmp_path)) == 2
+
+    @pytest.mark.unit
+    def test_corrupted_entry_is_recompiled(self, tmp_path):
+        cache = DecodingGraphCache(str(tmp_path))
+        lm = token_bigram_lm(4)
+        key = cache.make_key(graphs={"lm": lm})
+        with open(cache.path(key), "wb") as f:
+            f.write(b"not a graph")
+        assert cache.get(key) is None
+        graph = cache.get_or_compile(key, lambda: lm)
+        assert str(graph) == str(lm)
+        assert torch.equal(cache.get(key).arcs.values(), lm.arcs.values())
+
+    @pytest.mark.unit
+    def test_ragged_aux_labels(self, tmp_path):
+        cache = DecodingGraphCache(str(tmp_path))
+        graph = token_bigram_lm(4)
+        # a ragged attribute, as the aux_labels of a graph composed with a lexicon
+        graph.aux_labels = k2.RaggedTensor([[i % 3] * (i % 3) for i in range(graph.num_arcs - 1)] + [[-1]])
+        key = cache.make_key(graphs={"lm": graph})
+        cache.put(key, graph)
+        loaded = cache.get(key)
+        assert loaded is not None
+        assert torch.equal(loaded.arcs.values(), graph.arcs.values())
+        assert str(loaded.aux_labels) == str(graph.aux_labels)
@@ -0,0 +1,163 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+import torch
+
+from nemo.collections.asr.losses.rnnt import TDTLossPytorch
+from nemo.collections.asr.parts.numba.rnnt_loss import rnnt
+from nemo.collections.asr.parts.numba.rnnt_loss.rnnt_numpy import RNNTLoss as RNNTLoss_Numpy
+from nemo.collections.asr.parts.numba.rnnt_loss.rnnt_pytorch import RNNTLossNumba, TDTLossNumba
+
+
+def _random_batch(seed, B=5, T=12, U=6, V=7):
+    torch.manual_seed(seed)
+    act_lens = torch.tensor([T, 7, 10, 3, T][:B], dtype=torch.int64)
+    label_lens = torch.tensor([U - 1, 2, U - 1, 1, 0][:B], dtype=torch.int64)
+    labels = torch.randint(0, V - 1, (B, U - 1), dtype=torch.int64)
+    return act_lens, labels, label_lens
+
+
+def _cost_and_grad(fn, acts, labels, act_lens, label_lens):
+    acts = acts.clone().requires_grad_(True)
+    costs = fn(acts, labels, act_lens, label_lens)
+    costs.sum().backward()
+    return costs.detach().sum().numpy(), acts.grad.numpy()
+
+
+class TestCPUParallelRNNTLoss:
+    @pytest.mark.unit
+    @pytest.mark.parametrize('fastemit_lambda', [0.0, 0.1])
+    def test_variable_lengths_match_numpy(self, fastemit_lambda):
+        act_lens, labels, label_lens = _random_batch(seed=0)
+        acts = torch.randn(5, 12, 6, 7)
+
+        fn_pt = RNNTLossNumba(blank=6, reduction='sum', fastemit_lambda=fastemit_lambda)
+        fn_np = RNNTLoss_Numpy(blank=6, fastemit_lambda=fastemit_lambda)
+
+        pt_cost, pt_grads = _cost_and_grad(fn_pt, acts, labels, act_lens, label_lens)
+        np_cost, np_grads = _cost_and_grad(fn_np, acts, labels, act_lens, label_lens)
+
+        assert np.allclose(pt_cost, np_cost, rtol=1e-5), "costs mismatch."
+        assert np.allclose(pt_grads, np_grads, atol=1e-5), "gradient mismatch."
+
+    @pytest.mark.unit
+    def test_matches_legacy_cpu_kernel(self):
+        act_lens, labels, label_lens = _random_batch(seed=1)
+        log_probs = torch.log_softmax(torch.randn(5, 12, 6, 7), dim=-1)
+
+        results = []
+        for loss_func in [rnnt.rnnt_loss_cpu, rnnt.rnnt_loss_cpu_parallel]:
+            costs = torch.zeros(5)
+            grads = torch.zeros_like(log_probs)
+            loss_func(
+                log_probs,
+                labels=labels,
+                input_lengths=act_lens,
+                label_lengths=label_lens,
+                costs=costs,
+                grads=grads,
+                blank_label=6,
+                fastemit_lambda=0.0,
+                clamp=0.0,
+                num_threads=0,
+            )
+            results.append((costs, grads))
+
+        (legacy_costs, legacy_grads), (costs, grads) = results
+        assert torch.allclose(costs, legacy_costs, rtol=1e-5)
+        assert torch.allclose(grads, legacy_grads, atol=1e-5)
+
+    @pytest.mark.unit
+    def test_forward_only(self):
+        act_lens, labels, label_lens = _random_batch(seed=2)
+        acts = torch.randn(5, 12, 6, 7)
+
+        fn_pt = RNNTLossNumba(blank=6, reduction='none')
+        with torch.no_grad():
+            costs = fn_pt(acts, labels, act_lens, label_lens)
+
+        _, grads = _cost_and_grad(fn_pt, acts, labels, act_lens, label_lens)
+        assert costs.shape == (5,)
+        assert torch.isfinite(costs).all()
+        assert np.isfinite(grads).all()
+
+
+class TestCPUParallelTDTLoss:
+    @pytest.mark.unit
+    def test_randomized_act_label(self):
+        durations = [0, 1, 2, 4]
+        act_lens, labels, label_lens = _random_batch(seed=3)
+        acts = torch.randn(5, 12, 6, 7 + len(durations))
+
+        fn_pt = TDTLossNumba(blank=6, reduction='sum', durations=durations, sigma=0.05)
+        fn_ag = TDTLossPytorch(blank=6, reduction='sum', durations=durations, sigma=0.05)
+
+        pt_cost, pt_grads = _cost_and_grad(fn_pt, acts, labels, act_lens, label_lens)
+        ag_cost, ag_grads = _cost_and_grad(fn_ag, acts, labels, act_lens, label_lens)
+
+        assert np.allclose(pt_cost, ag_cost, rtol=1e-5), "tdt costs mismatch."
+        assert np.allclose(pt_grads, ag_grads, atol=1e-5), "tdt gradient mismatch."
+
+    @pytest.mark.unit
+    def test_fixed_case_act_label(self):
+        B, T, U, V = 1, 3, 2, 3  # here V is number of non blank labels
+        durations = [0, 1, 2]
+
+        acts = torch.zeros([B, T, U, V + 1 + len(durations)])
+        labels = torch.tensor([[0]], dtype=torch.int64)
+        act_lens = torch.tensor([T], dtype=torch.int64)
+        label_lens = torch.tensor([U - 1], dtype=torch.int64)
+
+        fn_pt = TDTLossNumba(blank=V, reduction='sum', durations=durations, sigma=0.05)
+        pt_cost, pt_grads = _cost_and_grad(fn_pt, acts, labels, act_lens, label_lens)
+
+        # same expected values as the CUDA kernel test in test_rnnt_pytorch.py
+        expected_cost = 4.155739
+        expected_grads = [
+            [
+                [
+                    [-0.64962804, 0.25, 0.25, 0.14962798, 0.2672583, -0.16792619, -0.09933221],
+                    [0.01651875, 0.01651875, 0.01651875, -0.04955626, 0.022025, -0.01227201, -0.009753],
+                ],
+                [
+                    [-0.04892651, 0.01714851, 0.01714851, 0.01462949, -0.01143234, -0.01143234, 0.02286467],
+                    [0.12531489, 0.12531489, 0.12531489, -0.37594467, 0.16708651, 0.13027048, -0.29735702],
+                ],
+                [
+                    [-0.02572276, 0.00857425, 0.00857425, 0.00857425, -0.02286468, 0.01143234, 0.01143234],
+                    [0.13388914, 0.13388914, 0.13388914, -0.40166742, 0.17851885, -0.35703772, 0.17851885],
+                ],
+            ]
+        ]
+
+        assert np.allclose(pt_cost, expected_cost, rtol=1e-6), "tdt costs mismatch."
+        assert np.allclose(pt_grads, expected_grads, rtol=1e-2), "tdt gradient mismatch."
+
+    @pytest.mark.unit
+    def test_omega_falls_back_to_rnnt(self):
+        durations = [0, 1, 2]
+        act_lens, labels, label_lens = _random_batch(seed=4)
+        acts = torch.randn(5, 12, 6, 7 + len(durations))
+
+        fn_tdt = TDTLossNumba(blank=6, reduction='sum', durations=durations, omega=1.0)
+        fn_rnnt = RNNTLossNumba(blank=6, reduction='sum')
+
+        tdt_cost, tdt_grads = _cost_and_grad(fn_tdt, acts, labels, act_lens, label_lens)
+        rnnt_cost, rnnt_grads = _cost_and_grad(fn_rnnt, acts[..., :7].contiguous(), labels, act_lens, label_lens)
+
+        assert np.allclose(tdt_cost, rnnt_cost, rtol=1e-5)
+        assert np.allclose(tdt_grads[..., :7], rnnt_grads, atol=1e-5)
+        assert np.allclose(tdt_grads[..., 7:], 0.0)
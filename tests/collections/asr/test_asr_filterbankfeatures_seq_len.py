@@ -97,3 +97,42 @@ class TestFilterbankFeatures:
             assert (
                 fb_spec.shape[2] == audio_length // hop_size
             ), f"{fb_spec.shape}, {nfft}, {window_size}, {hop_size}, {audio_length}, {audio_length // hop_size}"
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize('nfilt', [64, 80, 128])
+    @pytest.mark.parametrize('mag_power', [1.0, 2.0])
+    def test_banded_filterbank(self, nfilt, mag_power):
+        torch.manual_seed(0)
+        kwargs = dict(nfilt=nfilt, mag_power=mag_power, dither=0.0, pad_to=16, max_duration=1.0)
+        fb_module = FilterbankFeatures(**kwargs)
+        banded_fb_module = FilterbankFeatures(banded_filterbank=True, **kwargs)
+
+        # second sample is longer than max_duration, so the cached frame indices are exceeded
+        audio = torch.randn(3, 24000)
+        audio_len = torch.tensor([12000, 24000, 801])
+
+        fb_spec, fb_len = fb_module(audio, audio_len)
+        banded_spec, banded_len = banded_fb_module(audio, audio_len)
+
+        assert torch.equal(fb_len, banded_len)
+        assert torch.allclose(fb_spec, banded_spec, atol=1e-5)
+        assert (banded_spec[0, :, fb_len[0] :] == 0.0).all()
+
+    @pytest.mark.unit
+    def test_power_spectrum(self):
+        fb_module = FilterbankFeatures(preemph=None, dither=0.0, pad_to=0, n_fft=512)
+        audio = torch.randn(2, 4000)
+        audio_len = torch.tensor([4000, 4000])
+
+        spec, _ = fb_module(audio, audio_len, linear_spec=True)
+        stft = torch.stft(
+            audio,
+            n_fft=512,
+            hop_length=160,
+            win_length=320,
+            window=fb_module.window,
+            center=True,
+            return_complex=True,
+        )
+
+        assert torch.allclose(spec, stft.abs().pow(2.0), rtol=1e-4, atol=1e-6)
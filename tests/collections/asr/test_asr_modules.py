@@ -17,6 +17,9 @@ import torch
 from omegaconf import OmegaConf
 
 from nemo.collections.asr import modules
+from nemo.collections.asr.losses.rnnt import RNNTLoss
+from nemo.collections.asr.metrics.wer import WER
+from nemo.collections.asr.parts.submodules.rnnt_decoding import RNNTDecoding, RNNTDecodingConfig
 from nemo.collections.asr.parts.utils.rnnt_utils import Hypothesis
 from nemo.core.utils import numba_utils
 from nemo.core.utils.numba_utils import __NUMBA_MINIMUM_VERSION__
@@ -308,6 +311,129 @@ class TestASRModulesBasicTests:
         # assert vocab size
         assert jointnet.num_classes_with_blank == vocab_size + 1
 
+    @pytest.mark.unit
+    @pytest.mark.skipif(
+        not numba_utils.numba_cpu_is_supported(__NUMBA_MINIMUM_VERSION__), reason="Numba is not supported"
+    )
+    @pytest.mark.parametrize('time_chunk_size, clamp', [(1, -1.0), (5, -1.0), (64, -1.0), (5, 0.01)])
+    def test_RNNTJoint_fused_time_chunks(self, time_chunk_size, clamp):
+        vocab = [str(x) for x in range(10)]
+        vocab_size = len(vocab)
+
+        batchsize = 6
+        encoder_hidden = 16
+        pred_hidden = 8
+        joint_hidden = 12
+
+        torch.manual_seed(0)
+        prednet = modules.RNNTDecoder(
+            prednet={'pred_hidden': pred_hidden, 'pred_rnn_layers': 1}, vocab_size=vocab_size, blank_as_pad=True
+        )
+        joint_kwargs = dict(
+            jointnet={
+                'encoder_hidden': encoder_hidden,
+                'pred_hidden': pred_hidden,
+                'joint_hidden': joint_hidden,
+                'activation': 'relu',
+            },
+            num_classes=vocab_size,
+            vocabulary=vocab,
+            fuse_loss_wer=True,
+            fused_batch_size=4,
+        )
+        jointnet = modules.RNNTJoint(**joint_kwargs)
+        chunked_jointnet = modules.RNNTJoint(**joint_kwargs, fused_time_chunk_size=time_chunk_size)
+        chunked_jointnet.load_state_dict(jointnet.state_dict())
+        assert chunked_jointnet.fused_time_chunk_size == time_chunk_size
+
+        decoding = RNNTDecoding(
+            decoding_cfg=OmegaConf.structured(RNNTDecodingConfig(strategy='greedy_batch')),
+            decoder=prednet,
+            joint=jointnet,
+            vocabulary=vocab,
+        )
+        for joint in (jointnet, chunked_jointnet):
+            joint.set_loss(
+                RNNTLoss(
+                    num_classes=vocab_size,
+                    loss_name='warprnnt_numba',
+                    reduction='mean_batch',
+                    loss_kwargs={'clamp': clamp},
+                )
+            )
+            joint.set_wer(WER(decoding=decoding))
+
+        enc = torch.randn(batchsize, encoder_hidden, 23)  # [B, D1, T]
+        enc_lens = torch.tensor([23, 20, 9, 23, 17, 1])
+        transcripts = torch.randint(0, vocab_size, (batchsize, 7))
+        transcript_lens = torch.tensor([7, 3, 5, 0, 7, 1])
+        dec = torch.randn(batchsize, pred_hidden, 8)  # [B, D2, U + 1]
+
+        results = []
+        for joint in (jointnet, chunked_jointnet):
+            joint.zero_grad()
+            enc_, dec_ = enc.clone().requires_grad_(True), dec.clone().requires_grad_(True)
+            loss, _, _, _ = joint(
+                encoder_outputs=enc_,
+                decoder_outputs=dec_,
+                encoder_lengths=enc_lens,
+                transcripts=transcripts,
+                transcript_lengths=transcript_lens,
+            )
+            loss.backward()
+            results.append((loss.detach(), enc_.grad, dec_.grad, joint.joint_net[-1].weight.grad.clone()))
+
+        for expected, actual in zip(*results):
+            assert torch.allclose(expected, actual, atol=1e-5)
+
+    @pytest.mark.unit
+    def test_RNNTJoint_fused_time_chunks_unsupported_loss(self):
+        jointnet = modules.RNNTJoint(
+            jointnet={'encoder_hidden': 16, 'pred_hidden': 8, 'joint_hidden': 12, 'activation': 'relu'},
+            num_classes=10,
+            fuse_loss_wer=True,
+            fused_batch_size=2,
+            fused_time_chunk_size=4,
+        )
+        jointnet.set_loss(RNNTLoss(num_classes=10, loss_name='pytorch'))
+        jointnet.set_wer(torch.nn.Identity())
+
+        with pytest.raises(ValueError, match="fused_time_chunk_size"):
+            jointnet(
+                encoder_outputs=torch.randn(2, 16, 5),
+                decoder_outputs=torch.randn(2, 8, 3),
+                encoder_lengths=torch.tensor([5, 4]),
+                transcripts=torch.randint(0, 10, (2, 2)),
+                transcript_lengths=torch.tensor([2, 1]),
+            )
+
+        with pytest.raises(ValueError):
+            jointnet.set_fused_time_chunk_size(0)
+
+    @pytest.mark.unit
+    def test_SampledRNNTJoint_fused_time_chunks_unsupported(self):
+        jointnet = modules.SampledRNNTJoint(
+            jointnet={'encoder_hidden': 16, 'pred_hidden': 8, 'joint_hidden': 12, 'activation': 'relu'},
+            num_classes=10,
+            n_samples=4,
+            fuse_loss_wer=True,
+            fused_batch_size=2,
+            fused_time_chunk_size=4,
+        )
+        assert jointnet.fused_time_chunk_size == 4
+        jointnet.set_loss(RNNTLoss(num_classes=10, loss_name='warprnnt_numba'))
+        jointnet.set_wer(torch.nn.Identity())
+
+        # the sampled joint of the training step cannot be computed in chunks
+        with pytest.raises(ValueError, match="fused_time_chunk_size"):
+            jointnet(
+                encoder_outputs=torch.randn(2, 16, 5, requires_grad=True),
+                decoder_outputs=torch.randn(2, 8, 3),
+                encoder_lengths=torch.tensor([5, 4]),
+                transcripts=torch.randint(0, 10, (2, 2)),
+                transcript_lengths=torch.tensor([2, 1]),
+            )
+
     @pytest.mark.unit
     def test_HATJoint(self):
         vocab = list(range(10))
@@ -0,0 +1,164 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import itertools
+
+import pytest
+import torch
+import torch.nn.functional as F
+
+from nemo.collections.nlp.modules.common.beam_search import BeamSearchDecoder, BeamSearchLanguageModel
+from nemo.collections.nlp.modules.common.logits_processors import get_logits_processors
+
+
+class TinyLM(BeamSearchLanguageModel):
+    """
+    Causal model whose logits are a function of the mean embedding of the tokens so far. The tokens of the
+    processed positions are kept as its memory, and the logits are computed from the memory, so that the beams
+    only get the right logits if the memory is reordered with them.
+    """
+
+    def __init__(self, vocab_size, seed=0):
+        generator = torch.Generator().manual_seed(seed)
+        self.embedding = torch.randn(vocab_size, 8, generator=generator)
+        self.output = torch.randn(8, vocab_size, generator=generator) * 3.0
+        self.memory = None
+        self.num_valid = 0
+        self.num_forwards = 0
+        self.num_reorders = 0
+
+    def logits(self, tokens):
+        hidden = self.embedding[tokens].cumsum(dim=1) / torch.arange(1, tokens.size(1) + 1).view(1, -1, 1)
+        return hidden @ self.output
+
+    def forward(self, tokens, start, end):
+        assert start == self.num_valid or start == 0
+        if start == 0:
+            self.memory = torch.zeros(tokens.size(0), tokens.size(1), dtype=torch.long)
+        assert self.memory.size(0) == tokens.size(0)
+        self.memory[:, start:end] = tokens[:, start:end]
+        self.num_valid = end
+        self.num_forwards += 1
+        return self.logits(self.memory[:, :end])[:, start:end]
+
+    def reorder(self, indices, length):
+        assert length == self.num_valid
+        self.memory = self.memory[indices]
+        self.num_reorders += 1
+
+
+def _score(model, sequence, context_length, length_penalty=0.0):
+    log_probs = F.log_softmax(model.logits(torch.tensor([sequence])), dim=-1)[0]
+    total = sum(log_probs[i - 1, sequence[i]].item() for i in range(context_length, len(sequence)))
+    return total / ((5 + len(sequence) - context_length) / 6) ** length_penalty
+
+
+class TestBeamSearch:
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_exhaustive_search(self):
+        # with as many beams as prefixes, the beam search finds the best sequences
+        vocab_size = 3
+        model = TinyLM(vocab_size)
+        decoder = BeamSearchDecoder(model, beam_size=9, end_token_ids=[], num_return_sequences=4)
+        tokens, lengths, scores = decoder.search(torch.tensor([[1, 2, 0, 0, 0]]), torch.tensor([2]), max_length=5)
+
+        candidates = [[1, 2, *sequence] for sequence in itertools.product(range(vocab_size), repeat=3)]
+        expected = sorted(candidates, key=lambda sequence: -_score(model, sequence, 2))[:4]
+        assert tokens[0].tolist() == expected
+        assert lengths[0].tolist() == [5] * 4
+        expected_scores = torch.tensor([_score(model, sequence, 2) for sequence in expected])
+        assert torch.allclose(scores[0], expected_scores, atol=1e-5)
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_several_end_tokens(self):
+        # every token but 3 ends a sequence, so all the sequences are 3s followed by at most one end token
+        model = TinyLM(4, seed=3)
+        decoder = BeamSearchDecoder(model, beam_size=2, end_token_ids=[0, 1, 2], num_return_sequences=2)
+        tokens, lengths, scores = decoder.search(torch.tensor([[3, 1, 0, 0, 0, 0]]), torch.tensor([2]), max_length=6)
+
+        candidates = [[3, 1, *[3] * num_running, end] for num_running in range(4) for end in [0, 1, 2]]
+        candidates.append([3, 1, 3, 3, 3, 3])
+        expected = sorted(candidates, key=lambda sequence: -_score(model, sequence, 2))[:2]
+        for sequence, length, expected_sequence in zip(tokens[0], lengths[0].tolist(), expected):
+            assert sequence[:length].tolist() == expected_sequence
+        expected_scores = torch.tensor([_score(model, sequence, 2) for sequence in expected])
+        assert torch.allclose(scores[0], expected_scores, atol=1e-5)
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_single_beam_is_greedy(self):
+        model = TinyLM(16)
+        decoder = BeamSearchDecoder(model, beam_size=1, end_token_ids=[15])
+        context = torch.randint(15, (1, 12), generator=torch.Generator().manual_seed(1))
+        tokens, lengths, _ = decoder.search(context, torch.tensor([4]), max_length=12)
+
+        expected = context[:, :4]
+        while expected.size(1) < 12 and (expected.size(1) == 4 or expected[0, -1] != 15):
+            expected = torch.cat([expected, model.logits(expected)[:, -1:].argmax(dim=-1)], dim=1)
+        assert lengths[0, 0] == expected.size(1)
+        assert torch.equal(tokens[0, :, : expected.size(1)], expected)
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    @pytest.mark.parametrize("length_penalty", [0.0, 1.0])
+    def test_batch_matches_single_prompts(self, length_penalty):
+        # prompts of different lengths, whose searches stop at different steps
+        model = TinyLM(16)
+        context_lengths = torch.tensor([3, 6, 4])
+        context = torch.randint(14, (3, 24), generator=torch.Generator().manual_seed(2))
+        decoder = BeamSearchDecoder(
+            model, beam_size=4, end_token_ids=[14, 15], length_penalty=length_penalty, num_return_sequences=2
+        )
+        tokens, lengths, scores = decoder.search(context, context_lengths, max_length=24)
+        assert model.num_reorders > 1
+        assert (lengths < 24).any()
+
+        for i in range(3):
+            single_tokens, single_lengths, single_scores = decoder.search(
+                context[i : i + 1], context_lengths[i : i + 1], max_length=24
+            )
+            assert torch.equal(tokens[i], single_tokens[0])
+            assert torch.equal(lengths[i], single_lengths[0])
+            assert torch.allclose(scores[i], single_scores[0])
+            for rank in range(2):
+                sequence = tokens[i, rank, : lengths[i, rank]].tolist()
+                assert sequence[: context_lengths[i]] == context[i, : context_lengths[i]].tolist()
+                assert abs(_score(model, sequence, context_lengths[i].item(), length_penalty) - scores[i, rank]) < 1e-4
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_logits_processors(self):
+        model = TinyLM(16)
+        processors = get_logits_processors(min_length=5, eos_id=15, bad_words_ids=[[3], [4, 5]], greedy=True)
+        decoder = BeamSearchDecoder(
+            model, beam_size=4, end_token_ids=[15], logits_processors=processors, num_return_sequences=4
+        )
+        context = torch.randint(15, (2, 20), generator=torch.Generator().manual_seed(3))
+        tokens, lengths, _ = decoder.search(context, torch.tensor([3, 5]), max_length=20)
+        for i, context_length in enumerate([3, 5]):
+            for rank in range(4):
+                generated = tokens[i, rank, context_length : lengths[i, rank]].tolist()
+                assert len(generated) >= 5 or generated[-1] != 15
+                assert 3 not in generated
+                assert all(pair != (4, 5) for pair in zip(generated, generated[1:]))
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError):
+            BeamSearchDecoder(TinyLM(4), beam_size=0, end_token_ids=[0])
+        with pytest.raises(ValueError):
+            BeamSearchDecoder(TinyLM(4), beam_size=2, end_token_ids=[0], num_return_sequences=3)
@@ -0,0 +1,123 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import numpy as np
+import pytest
+
+from nemo.collections.nlp.data.language_modeling.megatron.indexed_retrieval_dataset import (
+    KNNIndex,
+    build_chunk_id_to_range,
+    dedup_knn,
+    merge_knn_files,
+)
+
+
+def _reference_map(chunk_start, total_chunks, start_id, end_id):
+    result = np.zeros((end_id - start_id, 2), dtype=np.int64)
+    for i, beg in enumerate(chunk_start):
+        end = chunk_start[i + 1] if i < len(chunk_start) - 1 else total_chunks
+        for chunk_id in range(max(beg, start_id), min(end, end_id)):
+            result[chunk_id - start_id] = beg, end
+    return result
+
+
+def _reference_dedup(knn, chunk_id_to_range):
+    result = np.full_like(knn, -1)
+    for i, (beg, end) in enumerate(chunk_id_to_range):
+        neighbors = [chunk_id for chunk_id in knn[i] if not beg <= chunk_id < end]
+        result[i, : len(neighbors)] = neighbors
+    return result
+
+
+class TestKNNMapIndex:
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_build_chunk_id_to_range(self):
+        # the documents starting at 300 and 900 are empty
+        chunk_start = np.array([0, 100, 200, 300, 300, 500, 900, 900])
+        for start_id, end_id in [(30, 210), (0, 1000), (250, 600), (900, 1000), (150, 151)]:
+            expected = _reference_map(chunk_start, 1000, start_id, end_id)
+            assert np.array_equal(build_chunk_id_to_range(chunk_start, 1000, start_id, end_id), expected)
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_dedup_knn(self):
+        rng = np.random.default_rng(0)
+        chunk_start = np.sort(rng.choice(1000, 50, replace=False))
+        chunk_start[0] = 0
+        chunk_id_to_range = build_chunk_id_to_range(chunk_start, 1000, 0, 1000)
+        # the neighbors of a chunk are often from its own document
+        knn = np.clip(np.arange(1000)[:, None] + rng.integers(-40, 40, (1000, 18)), 0, 999)
+        result = dedup_knn(knn, chunk_id_to_range)
+        assert np.array_equal(result, _reference_dedup(knn, chunk_id_to_range))
+        assert (result == -1).any()
+
+        knn = np.arange(1000)[None, :]
+        result = dedup_knn(knn, np.array([[100, 200]]))
+        assert np.array_equal(result[0], np.array(list(range(100)) + list(range(200, 1000)) + [-1] * 100))
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_resume_writer(self, tmp_path):
+        path = str(tmp_path / 'knn_shard')
+        K = 4
+        knn = np.random.randint(0, 100, (150, K))
+        with KNNIndex.writer(path, K, offset=100) as w:
+            w.write(knn[:50])
+            w.checkpoint()
+            w.write(knn[50:100])
+            w.checkpoint()
+            # an interrupted job does not checkpoint its last slice, nor updates the header on exit
+            w.write(knn[100:120])
+            w._file.close()
+            w._write_len = lambda: None
+        assert os.path.getsize(path) == KNNIndex._HDR_SIZE + 120 * K * 8
+        assert len(KNNIndex(path)) == 100
+
+        with KNNIndex.writer(path, K, offset=100, resume=True) as w:
+            assert w.count_chunks == 100
+            w.write(knn[100:])
+        f = KNNIndex(path)
+        assert (f.chunk_start_id, f.chunk_end_id, f.K) == (100, 250, K)
+        assert np.array_equal(f.knn_map, knn)
+
+        with pytest.raises(ValueError):
+            with KNNIndex.writer(path, K, offset=0, resume=True):
+                pass
+        # without resume, the file is written again
+        with KNNIndex.writer(path, K, offset=100) as w:
+            w.write(knn[:10])
+        assert len(KNNIndex(path)) == 10
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_streaming_merge(self, tmp_path):
+        K = 3
+        knn = np.random.randint(0, 100, (230, K))
+        bounds = [0, 70, 71, 160, 230]
+        paths = []
+        for i in range(len(bounds) - 1):
+            paths.append(str(tmp_path / f'knn_shard{i}'))
+            with KNNIndex.writer(paths[-1], K, offset=bounds[i]) as w:
+                w.write(knn[bounds[i] : bounds[i + 1]])
+        merged = str(tmp_path / 'merged')
+        merge_knn_files(paths[::-1], merged, block_size=8)
+        f = KNNIndex(merged)
+        assert (f.chunk_start_id, f.chunk_end_id, f.K) == (0, 230, K)
+        assert np.array_equal(f.knn_map, knn)
+
+        with pytest.raises(ValueError):
+            merge_knn_files([paths[0], paths[2]], merged)
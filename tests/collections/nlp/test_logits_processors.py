@@ -0,0 +1,149 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+import torch
+import torch.nn.functional as F
+
+from nemo.collections.nlp.modules.common.logits_processors import (
+    BadWordsLogitsProcessor,
+    MinLengthLogitsProcessor,
+    MinPLogitsProcessor,
+    PresenceFrequencyPenaltyLogitsProcessor,
+    RepetitionPenaltyLogitsProcessor,
+    TokenHistory,
+    TopKLogitsProcessor,
+    TopPLogitsProcessor,
+    get_logits_processors,
+)
+from nemo.collections.nlp.modules.common.text_generation_utils import sample_token_topk, top_k_logits
+
+NEG_INF = -float('Inf')
+
+
+def _loop_top_k_logits(logits, top_k=0, top_p=0.0, started=None):
+    # reference implementation with a loop over the rows of the batch
+    rows = range(logits.size(0)) if started is None else np.arange(logits.size(0))[started.numpy()]
+    for i in rows:
+        if top_k > 0:
+            logits[i, logits[i] < torch.topk(logits[i], top_k)[0][-1]] = NEG_INF
+        if top_p > 0.0:
+            sorted_logits, sorted_indices = torch.sort(logits[i], descending=True)
+            cumulative_probs = torch.cumsum(F.softmax(sorted_logits, dim=-1), dim=-1)
+            remove = cumulative_probs > top_p
+            remove[1:] = remove[:-1].clone()
+            remove[0] = False
+            logits[i, sorted_indices[remove]] = NEG_INF
+    return logits
+
+
+class TestLogitsProcessors:
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    @pytest.mark.parametrize("top_k, top_p", [(0, 0.9), (5, 0.0), (10, 0.5)])
+    def test_top_k_top_p_match_loop(self, top_k, top_p):
+        torch.manual_seed(0)
+        logits = torch.randn(6, 50) * 3
+        started = torch.tensor([True, False, True, True, False, True])
+
+        expected = _loop_top_k_logits(logits.clone(), top_k=top_k, top_p=top_p, started=started)
+        output = top_k_logits(logits.clone(), top_k=top_k, top_p=top_p, started=started)
+        assert torch.equal(output, expected)
+
+        expected = _loop_top_k_logits(logits.clone(), top_k=top_k, top_p=top_p)
+        processors = get_logits_processors(top_k=top_k, top_p=top_p)
+        assert torch.equal(processors(logits.clone()), expected)
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_top_k_and_top_p_keep_best_token(self):
+        logits = torch.tensor([[5.0, 1.0, 0.0, -1.0], [0.0, 0.0, 10.0, 0.0]])
+        for processor in [TopKLogitsProcessor(1), TopPLogitsProcessor(0.01), MinPLogitsProcessor(0.5)]:
+            output = processor(logits.clone())
+            assert output.argmax(dim=-1).tolist() == [0, 2]
+            assert torch.isfinite(output).sum(dim=-1).tolist() == [1, 1]
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_min_p(self):
+        probs = torch.tensor([[0.5, 0.3, 0.15, 0.05]])
+        output = MinPLogitsProcessor(0.2)(probs.log())
+        assert torch.isfinite(output).tolist() == [[True, True, True, False]]
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_penalties(self):
+        history = TokenHistory(batch_size=2, vocab_size=5, device=torch.device('cpu'))
+        history.add_prompt(torch.tensor([[0, 0], [4, 4]]))
+        history.add_tokens(torch.tensor([1, 2]))
+        history.add_tokens(torch.tensor([1, 3]), is_generated=torch.tensor([True, False]))
+        assert history.num_generated.tolist() == [2, 1]
+        assert history.counts.tolist() == [[0, 2, 0, 0, 0], [0, 0, 1, 0, 0]]
+
+        logits = torch.tensor([[2.0, 2.0, -2.0, 2.0, -2.0], [2.0, 2.0, -2.0, 2.0, -2.0]])
+        output = RepetitionPenaltyLogitsProcessor(2.0)(logits.clone(), history)
+        assert output.tolist() == [[1.0, 1.0, -2.0, 2.0, -2.0], [2.0, 2.0, -4.0, 1.0, -4.0]]
+
+        output = PresenceFrequencyPenaltyLogitsProcessor(presence_penalty=0.5, frequency_penalty=0.25)(
+            logits.clone(), history
+        )
+        assert output.tolist() == [[2.0, 1.0, -2.0, 2.0, -2.0], [2.0, 2.0, -2.75, 2.0, -2.0]]
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_min_length_and_bad_words(self):
+        eos_id = 0
+        processors = get_logits_processors(min_length=2, eos_id=eos_id, bad_words_ids=[[3], [1, 2], [4, 1, 2]])
+        history = processors.make_history(batch_size=2, vocab_size=5, device=torch.device('cpu'))
+        assert history.recent_tokens.shape == (2, 2)
+        history.add_prompt(torch.tensor([[4, 1], [1, 4]]))
+        history.add_tokens(torch.tensor([0, 1]))
+
+        output = processors(torch.zeros(2, 5), history)
+        # eos before min_length, single token bad word, '1 2' after '1'
+        assert torch.isfinite(output).tolist() == [[False, True, True, False, True], [False, True, False, False, True]]
+
+        history.add_tokens(torch.tensor([4, 4]))
+        history.add_tokens(torch.tensor([1, 2]))
+        output = processors(torch.zeros(2, 5), history)
+        # '4 1 2' after '4 1'
+        assert torch.isfinite(output).tolist() == [[True, True, False, False, True], [True, True, True, False, True]]
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_get_logits_processors(self):
+        assert len(get_logits_processors()) == 0
+        assert not get_logits_processors(top_k=5, top_p=0.9).needs_history
+        # greedy decoding is an argmax over the constrained logits, without penalties
+        processors = get_logits_processors(
+            temperature=0.0, top_k=5, repetition_penalty=1.2, presence_penalty=0.5, min_length=1, eos_id=0, greedy=True
+        )
+        assert [type(p) for p in processors] == [MinLengthLogitsProcessor]
+        processors = get_logits_processors(repetition_penalty=1.2)
+        assert [type(p) for p in processors] == [RepetitionPenaltyLogitsProcessor]
+        assert processors.needs_counts
+        with pytest.raises(ValueError):
+            get_logits_processors(min_length=1)
+        assert isinstance(get_logits_processors(min_length=1, eos_id=0)[0], MinLengthLogitsProcessor)
+        assert isinstance(get_logits_processors(bad_words_ids=[[1]])[0], BadWordsLogitsProcessor)
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_sample_token_topk(self):
+        torch.manual_seed(0)
+        logits = torch.randn(8, 20)
+        log_probs, token_ids = sample_token_topk(logits.clone(), top_k=1, temperature=0.5)
+        assert token_ids.tolist() == logits.argmax(dim=-1).tolist()
+        assert torch.allclose(log_probs, torch.zeros(8))
@@ -0,0 +1,90 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import torch
+
+from nemo.collections.nlp.modules.common.prefix_cache import PrefixKVCache
+
+NUM_LAYERS = 2
+# bytes of the key and value memory of a position in all layers
+POSITION_BYTES = NUM_LAYERS * 2 * 3 * 4
+
+
+def _memory(token_ids):
+    # the memory of a position is a function of the tokens up to it, like the key-value memory of a causal model
+    prefix_sums = torch.cumsum(torch.tensor(token_ids, dtype=torch.float32), dim=0)
+    return [
+        (prefix_sums[:, None] * (layer + 1) + torch.arange(3), -prefix_sums[:, None] * (layer + 1) - torch.arange(3))
+        for layer in range(NUM_LAYERS)
+    ]
+
+
+def _assert_memory(memory, token_ids):
+    for (key, value), (expected_key, expected_value) in zip(memory, _memory(token_ids)):
+        assert torch.equal(key, expected_key)
+        assert torch.equal(value, expected_value)
+
+
+class TestPrefixKVCache:
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_match_and_split(self):
+        cache = PrefixKVCache(max_memory_bytes=10 ** 6)
+        assert cache.match([1, 2, 3]) == (0, None)
+
+        cache.insert([1, 2, 3, 4], _memory([1, 2, 3, 4]))
+        num_tokens, memory = cache.match([1, 2, 5])
+        assert num_tokens == 2
+        _assert_memory(memory, [1, 2])
+
+        # splits the node of [1, 2, 3, 4] after [1, 2]
+        cache.insert([1, 2, 5, 6], _memory([1, 2, 5, 6]))
+        assert cache.num_tokens == 6
+        assert cache.memory_bytes == 6 * POSITION_BYTES
+        for token_ids in [[1, 2, 3, 4], [1, 2, 5, 6], [1, 2, 5]]:
+            num_tokens, memory = cache.match(token_ids + [7])
+            assert num_tokens == len(token_ids)
+            _assert_memory(memory, token_ids)
+
+        # a sequence which is already cached does not change the cache
+        cache.insert([1, 2, 5], _memory([1, 2, 5]))
+        assert cache.num_tokens == 6
+
+        cache.clear()
+        assert cache.match([1, 2]) == (0, None)
+        assert cache.memory_bytes == 0
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_eviction(self):
+        cache = PrefixKVCache(max_memory_bytes=7 * POSITION_BYTES)
+        cache.insert([1, 2, 3, 4], _memory([1, 2, 3, 4]))
+        cache.insert([1, 2, 5, 6], _memory([1, 2, 5, 6]))
+        # [1, 2, 3, 4] is used more recently than [1, 2, 5, 6]
+        cache.match([1, 2, 3, 4])
+
+        cache.insert([7, 8], _memory([7, 8]))
+        assert cache.memory_bytes <= 7 * POSITION_BYTES
+        assert cache.match([1, 2, 5, 6])[0] == 2
+        assert cache.match([1, 2, 3, 4])[0] == 4
+        assert cache.match([7, 8])[0] == 2
+
+        # evicting all the leaves below a node evicts the node as well
+        cache.insert([9] * 7, _memory([9] * 7))
+        assert cache.num_tokens == 7
+        assert cache.match([1, 2])[0] == 0
+
+        with pytest.raises(ValueError):
+            PrefixKVCache(max_memory_bytes=0)
@@ -0,0 +1,119 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+import torch
+
+from nemo.collections.nlp.data.language_modeling.megatron.indexed_retrieval_dataset import (
+    KNNIndex,
+    MMapRetrievalIndexedDataset,
+    MMapRetrievalIndexedDatasetBuilder,
+)
+from nemo.collections.nlp.data.language_modeling.megatron.retro_dataset import RETROPrefetchingBatchSampler
+
+
+def _build_dataset(prefix, chunk_size, retrieval_db, dtype=np.int64):
+    builder = MMapRetrievalIndexedDatasetBuilder(
+        prefix + '.bin', chunk_size, 0, retrieval_db, dtype=dtype, stride=chunk_size // 2
+    )
+    for size in [100, 250, 150, 200]:
+        builder.add_item(torch.arange(1, 2 * size, 2))
+    builder.finalize(prefix + '.idx')
+    return MMapRetrievalIndexedDataset(prefix)
+
+
+class TestRetrievalChunks:
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    @pytest.mark.parametrize("retrieval_db", [False, True])
+    def test_get_chunks(self, tmp_path, retrieval_db):
+        ds = _build_dataset(str(tmp_path / 'data'), 16, retrieval_db)
+        chunk_ids = np.random.randint(0, ds.chunks, (5, 3))
+        for force_no_cont_ids in [False, True]:
+            chunks = ds.get_chunks(chunk_ids, force_no_cont_ids=force_no_cont_ids)
+            expected = [ds.get_chunk(chunk_id, force_no_cont_ids) for chunk_id in chunk_ids.flatten()]
+            assert np.array_equal(chunks, np.stack(expected).reshape(chunk_ids.shape + (-1,)))
+        assert chunks.shape == (5, 3, 16)
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_get_chunks_padding_and_output(self, tmp_path):
+        ds = _build_dataset(str(tmp_path / 'db'), 16, True, dtype=np.uint16)
+        chunk_ids = np.array([[3, -1], [-2, ds.chunks - 1]])
+        out = np.empty((2, 2, 32), dtype=np.int64)
+        chunks = ds.get_chunks(chunk_ids, pad_id=7, out=out)
+        assert chunks is out
+        assert np.array_equal(out[0, 0], ds.get_chunk(3))
+        assert np.array_equal(out[1, 1], ds.get_chunk(ds.chunks - 1))
+        assert (out[0, 1] == 7).all() and (out[1, 0] == 7).all()
+
+        assert ds.get_chunks(np.zeros(0, dtype=np.int64)).shape == (0, 32)
+        with pytest.raises(ValueError):
+            ds.get_chunks(chunk_ids, out=np.empty((2, 2, 16), dtype=np.int64))
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_get_chunks_out_of_range(self, tmp_path):
+        ds = _build_dataset(str(tmp_path / 'db'), 16, True)
+        # the continuation of the last chunk is missing from the truncated tokens
+        ds._tokens = ds._tokens[:-8]
+        assert ds.get_chunks([ds.chunks - 2]).shape == (1, 32)
+        for out in [None, np.empty((2, 32), dtype=np.int64)]:
+            with pytest.raises(ValueError, match=f"chunk ids \\[{ds.chunks - 1}\\]"):
+                ds.get_chunks([0, ds.chunks - 1], out=out)
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_knn_chunk_ids(self, tmp_path):
+        path = str(tmp_path / 'knn_map')
+        knn = np.random.randint(0, 100, (50, 4))
+        with KNNIndex.writer(path, 4, offset=10) as w:
+            w.write(knn)
+        f = KNNIndex(path)
+        assert np.array_equal(f.get_KNN_chunk_ids(np.arange(20, 30)), knn[10:20])
+        assert np.array_equal(f.get_KNN_chunk_ids(12), knn[2])
+        with pytest.raises(ValueError):
+            f.get_KNN_chunk_ids(np.arange(50, 61))
+
+
+class PrefetchRecorder:
+    def __init__(self):
+        self.prefetched = []
+        self.num_cancels = 0
+
+    def prefetch(self, indices):
+        self.prefetched.append(list(indices))
+
+    def cancel_prefetch(self):
+        self.num_cancels += 1
+
+
+class TestRETROPrefetchingBatchSampler:
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_prefetch_order(self):
+        # shuffled batches, as from a random sampler
+        batches = [[7, 2], [0, 9], [4, 4], [1]]
+        dataset = PrefetchRecorder()
+        sampler = RETROPrefetchingBatchSampler(batches, dataset, num_batches=2)
+        assert len(sampler) == 4
+        iterator = iter(sampler)
+        assert next(iterator) == [7, 2]
+        # the next batches are prefetched in the order of the sampler before the current one is yielded
+        assert dataset.prefetched == [[7, 2], [0, 9], [4, 4]]
+        assert list(iterator) == batches[1:]
+        assert dataset.prefetched == batches
+        # pending reads are cancelled when an iteration starts and ends
+        assert dataset.num_cancels == 2
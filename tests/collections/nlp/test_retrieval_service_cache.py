@@ -0,0 +1,151 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from nemo.collections.nlp.modules.common.megatron.retrieval_services import retrieval_service
+from nemo.collections.nlp.modules.common.megatron.retrieval_services.retrieval_service import (
+    DynamicFaissRetrievalService,
+    FaissRetrievalService,
+)
+from nemo.collections.nlp.modules.common.megatron.retrieval_services.util import EmbeddingBatcher, LRUCache
+
+
+def _embedding(sentence):
+    return np.array([len(sentence), sum(map(ord, sentence))], dtype=np.float32)
+
+
+class _Embedder:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+
+    def __call__(self, sentences):
+        self.calls.append(list(sentences))
+        time.sleep(self.delay)
+        return np.stack([_embedding(sentence) for sentence in sentences])
+
+
+class _KnnService:
+    """Replaces the HTTP requests, the neighbors of a sentence are derived from its length."""
+
+    def __init__(self):
+        self.requests = []
+
+    def __call__(self, data, ip, port):
+        self.requests.append(data)
+        if 'neighbors' not in data:
+            return "success"
+        return [[[len(s) + i] * 4 for i in range(data['neighbors'])] for s in data['sentences']]
+
+
+class TestRetrievalServiceCache:
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_lru_cache(self):
+        cache = LRUCache(max_size=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        assert cache.get('a') == 1
+        # 'b' is the least recently used entry
+        cache.put('c', 3)
+        assert cache.get('b') is None
+        assert (cache.get('a'), cache.get('c')) == (1, 3)
+        assert (cache.hits, cache.misses) == (3, 1)
+
+        disabled = LRUCache(max_size=0)
+        disabled.put('a', 1)
+        assert disabled.get('a') is None and len(disabled) == 0
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_embedding_batcher(self):
+        embedder = _Embedder(delay=0.05)
+        batcher = EmbeddingBatcher(embedder, max_batch_size=64, max_wait_time=0.02)
+        queries = [['a', 'bb', 'ccc'], ['bb', 'dddd'], ['eeeee'], ['a', 'ffffff']] * 4
+        results = [None] * len(queries)
+
+        def embed(i):
+            results[i] = batcher.embed(queries[i])
+
+        threads = [threading.Thread(target=embed, args=(i,)) for i in range(len(queries))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for query, result in zip(queries, results):
+            assert np.array_equal(result, np.stack([_embedding(sentence) for sentence in query]))
+        # the concurrent requests are merged, and every sentence is embedded once
+        assert len(embedder.calls) < len(queries)
+        embedded = [sentence for call in embedder.calls for sentence in call]
+        assert sorted(embedded) == ['a', 'bb', 'ccc', 'dddd', 'eeeee', 'ffffff']
+
+        # cached sentences are not embedded again
+        assert np.array_equal(batcher.embed(['ccc', 'a']), np.stack([_embedding('ccc'), _embedding('a')]))
+        assert len(embedder.calls) == batcher.num_batches
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_embedding_batcher_error(self):
+        def fail(sentences):
+            raise RuntimeError("embedding failed")
+
+        batcher = EmbeddingBatcher(fail, max_wait_time=0.0)
+        with pytest.raises(RuntimeError, match="embedding failed"):
+            batcher.embed(['a'])
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_query_cache(self, monkeypatch):
+        knn_service = _KnnService()
+        monkeypatch.setattr(retrieval_service, 'request_data', knn_service)
+        service = FaissRetrievalService(tokenizer=None, query_cache_size=10)
+
+        result = service.get_knn(['a', 'bb', 'a'], 2)
+        assert result.shape == (3, 2, 4)
+        assert knn_service.requests[-1]['sentences'] == ['a', 'bb']
+        result = service.get_knn(['bb', 'ccc'], 2)
+        assert result[:, :, 0].tolist() == [[2, 3], [3, 4]]
+        assert knn_service.requests[-1]['sentences'] == ['ccc']
+        assert service.get_knn('ccc', 2).shape == (2, 4)
+        # the neighbors are cached per number of neighbors
+        service.get_knn('ccc', 3)
+        assert len(knn_service.requests) == 3
+
+        uncached = FaissRetrievalService(tokenizer=None)
+        uncached.get_knn(['a'], 2)
+        uncached.get_knn(['a'], 2)
+        assert len(knn_service.requests) == 5
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_dynamic_query_cache_invalidation(self, monkeypatch):
+        knn_service = _KnnService()
+        monkeypatch.setattr(retrieval_service, 'request_data', knn_service)
+        service = DynamicFaissRetrievalService(tokenizer=None, query_cache_size=10)
+        service.get_knn(['a'], 2)
+        service.get_knn(['a'], 2)
+        assert len(knn_service.requests) == 1
+
+        service.add_docs_to_index(['new document'])
+        service.get_knn(['a'], 2)
+        assert len(knn_service.requests) == 3
+        service.reset()
+        service.get_knn(['a'], 2)
+        assert len(knn_service.requests) == 5
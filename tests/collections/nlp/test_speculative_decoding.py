@@ -0,0 +1,148 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import itertools
+
+import pytest
+import torch
+import torch.nn.functional as F
+
+from nemo.collections.nlp.modules.common.logits_processors import LogitsProcessorList, TemperatureLogitsProcessor
+from nemo.collections.nlp.modules.common.speculative_decoding import (
+    IncrementalLanguageModel,
+    SpeculativeDecoder,
+    sample_after_draft,
+    verify_draft_tokens,
+)
+
+
+class TinyLM(IncrementalLanguageModel):
+    """
+    Causal model whose logits are a function of the mean embedding of the tokens so far. It is run on the full
+    sequences, and checks that only the memory of the processed positions is used.
+    """
+
+    def __init__(self, vocab_size, seed, scale=3.0):
+        generator = torch.Generator().manual_seed(seed)
+        self.embedding = torch.randn(vocab_size, 8, generator=generator)
+        self.output = torch.randn(8, vocab_size, generator=generator) * scale
+        self.num_valid = 0
+        self.num_forwards = 0
+
+    def logits(self, tokens):
+        hidden = self.embedding[tokens].cumsum(dim=1) / torch.arange(1, tokens.size(1) + 1).view(1, -1, 1)
+        return hidden @ self.output
+
+    def forward(self, tokens, start, end):
+        assert start <= self.num_valid and start < end
+        self.num_valid = end
+        self.num_forwards += 1
+        return self.logits(tokens[:, :end])[:, start:end]
+
+
+def _generate(decoder, tokens, context_lengths, max_length):
+    tokens = tokens.clone()
+    positions = list(decoder.generate(tokens, context_lengths, max_length))
+    assert positions == list(range(int(context_lengths.min()), max_length))
+    return tokens
+
+
+class TestSpeculativeDecoding:
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    @pytest.mark.parametrize("num_speculative_tokens", [1, 3, 8])
+    def test_greedy_matches_target(self, num_speculative_tokens):
+        target, draft = TinyLM(16, seed=0), TinyLM(16, seed=0)
+        # a draft model close to the target model
+        draft.output = draft.output + torch.randn(8, 16, generator=torch.Generator().manual_seed(1))
+        decoder = SpeculativeDecoder(target, draft, num_speculative_tokens, greedy=True)
+        context_lengths = torch.tensor([3, 5, 3])
+        tokens = torch.randint(16, (3, 20), generator=torch.Generator().manual_seed(2))
+        output = _generate(decoder, tokens, context_lengths, max_length=20)
+
+        expected = tokens.clone()
+        for position in range(3, 20):
+            next_tokens = target.logits(expected[:, :position])[:, -1].argmax(dim=-1)
+            expected[:, position] = torch.where(context_lengths > position, expected[:, position], next_tokens)
+        assert torch.equal(output, expected)
+        assert target.num_forwards < 17
+        assert 0.0 < decoder.stats.as_dict()["acceptance_rate"] < 1.0
+        # the positions of the longer context are not counted
+        assert decoder.stats.num_generated_tokens == 17 + 15 + 17
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_identical_draft(self):
+        torch.manual_seed(0)
+        target, draft = TinyLM(16, seed=0), TinyLM(16, seed=0)
+        decoder = SpeculativeDecoder(target, draft, num_speculative_tokens=4)
+        _generate(decoder, torch.zeros(2, 12, dtype=torch.long), torch.tensor([2, 2]), max_length=12)
+
+        metrics = decoder.stats.as_dict()
+        assert metrics["acceptance_rate"] == 1.0
+        # 10 tokens with 5 tokens per forward pass of the target model
+        assert metrics["num_target_forwards"] == 2
+        assert metrics["tokens_per_target_forward"] == 10.0
+        assert metrics["tokens_per_second"] > 0.0
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_accept_reject_preserves_target_distribution(self):
+        torch.manual_seed(0)
+        p = torch.tensor([0.1, 0.2, 0.3, 0.4])
+        q = torch.tensor([0.4, 0.3, 0.2, 0.1])
+        num_samples = 200000
+        draft_tokens = torch.multinomial(q, num_samples, replacement=True).view(-1, 1)
+        target_probs = p.expand(num_samples, 1, 4)
+        draft_probs = q.expand(num_samples, 1, 4)
+        accepted = verify_draft_tokens(target_probs, draft_probs, draft_tokens)[:, 0]
+        resampled = sample_after_draft(target_probs[:, 0], draft_probs[:, 0])
+        output = torch.where(accepted, draft_tokens[:, 0], resampled)
+
+        frequencies = torch.bincount(output, minlength=4).float() / num_samples
+        assert torch.allclose(frequencies, p, atol=0.005)
+        # the acceptance rate is the sum of min(p, q)
+        assert abs(accepted.float().mean().item() - torch.minimum(p, q).sum().item()) < 0.005
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_sampling_preserves_target_distribution(self):
+        torch.manual_seed(0)
+        vocab_size = 3
+        target, draft = TinyLM(vocab_size, seed=0, scale=1.0), TinyLM(vocab_size, seed=3, scale=1.0)
+        processors = LogitsProcessorList([TemperatureLogitsProcessor(0.8)])
+        context = torch.tensor([[1, 2, 0, 0, 0]])
+
+        num_samples = 4000
+        counts = torch.zeros(vocab_size, vocab_size, vocab_size)
+        for _ in range(num_samples):
+            target.num_valid = draft.num_valid = 0
+            decoder = SpeculativeDecoder(target, draft, num_speculative_tokens=2, logits_processors=processors)
+            output = _generate(decoder, context, torch.tensor([2]), max_length=5)
+            counts[tuple(output[0, 2:].tolist())] += 1
+
+        expected = torch.zeros(vocab_size, vocab_size, vocab_size)
+        for sequence in itertools.product(range(vocab_size), repeat=3):
+            tokens = torch.tensor([[1, 2, *sequence]])
+            probs = F.softmax(target.logits(tokens)[0, 1:4] / 0.8, dim=-1)
+            expected[sequence] = probs[0, sequence[0]] * probs[1, sequence[1]] * probs[2, sequence[2]]
+        assert torch.allclose(counts / num_samples, expected, atol=0.025)
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_unsupported_processors(self):
+        from nemo.collections.nlp.modules.common.logits_processors import get_logits_processors
+
+        with pytest.raises(ValueError, match="repetition penalty"):
+            SpeculativeDecoder(TinyLM(4, seed=0), TinyLM(4, seed=1), 2, get_logits_processors(repetition_penalty=1.2))
@@ -0,0 +1,154 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+from types import SimpleNamespace
+
+import pytest
+import torch
+
+from nemo.collections.nlp.modules.common.stop_strings import IncrementalDetokenizer, StopStringMatcher
+from nemo.collections.nlp.modules.common.text_generation_strategy import TextGenerationStrategy
+
+
+class ToySentencePieceTokenizer:
+    # pieces starting with '▁' start a word, the leading space of the text is dropped
+    def __init__(self, pieces):
+        self.pieces = pieces
+
+    def ids_to_text(self, ids):
+        return "".join(self.pieces[i] for i in ids).replace("▁", " ").lstrip(" ")
+
+    def text_to_ids(self, text):
+        text = "▁" + text.replace(" ", "▁")
+        ids = []
+        while text:
+            i = max((i for i, p in enumerate(self.pieces) if text.startswith(p)), key=lambda i: len(self.pieces[i]))
+            ids.append(i)
+            text = text[len(self.pieces[i]) :]
+        return ids
+
+
+class ToyByteTokenizer:
+    # every token is a byte of the utf-8 encoding of the text
+    def ids_to_text(self, ids):
+        return bytes(ids).decode("utf-8", errors="replace")
+
+    def text_to_ids(self, text):
+        return list(text.encode("utf-8"))
+
+
+PIECES = [
+    "<extra_id_1>",
+    "▁",
+    "▁Done",
+    "Done!",
+    "▁the",
+    "▁end",
+    ".",
+    "!",
+    "<",
+    ">",
+    "D",
+    "o",
+    "n",
+    "e",
+    "▁a",
+    "b",
+    "x",
+    "_",
+    "1",
+    "i",
+]
+
+
+class TestStopStrings:
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_matcher_matches_naive_search(self):
+        rng = random.Random(0)
+        strings = ["ab", "b", "abc", "cab", "aaa", "bca"]
+        matcher = StopStringMatcher(strings)
+        for _ in range(50):
+            text = "".join(rng.choice("abcd") for _ in range(rng.randint(1, 30)))
+            state = StopStringMatcher.INITIAL_STATE
+            fed = ""
+            while len(fed) < len(text):
+                chunk = text[len(fed) : len(fed) + rng.randint(1, 4)]
+                state, match_end = matcher.feed(state, chunk)
+                ends = [
+                    i + 1 - len(fed)
+                    for i in range(len(fed), len(fed) + len(chunk))
+                    if (fed + chunk)[: i + 1].endswith(tuple(strings))
+                ]
+                fed += chunk
+                assert match_end == (ends[0] if ends else -1)
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    @pytest.mark.parametrize(
+        "tokenizer, text",
+        [(ToySentencePieceTokenizer(PIECES), "the end. Done! a Done"), (ToyByteTokenizer(), "déjà vu — \U0001f600!")],
+    )
+    def test_incremental_detokenizer(self, tokenizer, text):
+        ids = tokenizer.text_to_ids(text)
+        for num_prompt in range(len(ids)):
+            detokenizer = IncrementalDetokenizer(tokenizer, ids[:num_prompt])
+            generated = "".join(detokenizer.add_token(token_id) for token_id in ids[num_prompt:])
+            assert generated == tokenizer.ids_to_text(ids)[len(tokenizer.ids_to_text(ids[:num_prompt])) :]
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_end_of_generation_condition(self):
+        tokenizer = ToySentencePieceTokenizer(PIECES)
+        strategy = TextGenerationStrategy(SimpleNamespace(training=False, tokenizer=tokenizer))
+        eod_id = PIECES.index("_")
+        end_strings = ["Done", "<i>"]
+
+        sequences = [
+            ["▁the", "▁end", "Done!", "▁a", "▁a"],
+            ["▁the", "<", "i", ">", "▁a"],
+            ["▁the", "▁end", "▁a", "_", "▁a"],
+            ["▁the", "▁end", "▁a", "▁a", "▁a"],
+        ]
+        tokens = torch.tensor([[PIECES.index(p) for p in sequence] for sequence in sequences])
+
+        with pytest.warns(UserWarning, match="no associated special token"):
+            strategy.end_of_generation_condition(tokens[:, :2], tokens[:, 1], eod_id, end_strings)
+        stops = [
+            strategy.end_of_generation_condition(tokens[:, : length + 1], tokens[:, length], eod_id, end_strings)
+            for length in range(2, tokens.size(1))
+        ]
+        is_end = torch.stack(stops, dim=1)
+        assert is_end.tolist() == [
+            [True, False, False],
+            [False, True, False],
+            [False, True, False],
+            [False, False, False],
+        ]
+
+        # a new generation in the same buffer, whose first step has the length of the next step of the previous
+        # generation, gets a new checker from `init_batch`: the "<i" of the previous generation is not matched
+        # with the ">" of the new one
+        strategy._reset_stop_string_checker()
+        strategy.end_of_generation_condition(tokens[:, :3], tokens[:, 2], eod_id, end_strings)
+        tokens[1] = torch.tensor([PIECES.index(p) for p in ["▁the", "▁end", "▁a", ">", "▁a"]])
+        strategy._reset_stop_string_checker()
+        reference = TextGenerationStrategy(SimpleNamespace(training=False, tokenizer=tokenizer))
+        is_end = strategy.end_of_generation_condition(tokens[:, :4], tokens[:, 3], eod_id, end_strings)
+        assert not is_end[1]
+        assert (
+            is_end.tolist()
+            == reference.end_of_generation_condition(tokens[:, :4], tokens[:, 3], eod_id, end_strings).tolist()
+        )
@@ -0,0 +1,217 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import torch
+
+from nemo.collections.nlp.modules.common.text_generation_scheduler import (
+    ContinuousBatchingScheduler,
+    GenerationEngine,
+    GenerationRequest,
+    _gather_aligned_memory,
+)
+
+VOCAB_SIZE = 16
+EOS_ID = 0
+
+
+class ToyTokenizer:
+    eos_id = EOS_ID
+    vocab_size = VOCAB_SIZE
+
+    def ids_to_text(self, ids):
+        return "".join(chr(ord("a") + i) for i in ids)
+
+
+class CountingEngine(GenerationEngine):
+    # the most likely next token is the last token + 1, wrapping to EOS_ID
+    max_sequence_length = 12
+
+    def __init__(self):
+        super().__init__(ToyTokenizer())
+        self.batches = []
+        # ids of the sequences run by the engine and not released yet
+        self.sequence_ids = set()
+        self.released = []
+
+    def forward(self, sequences, sequence_ids):
+        self.batches.append([len(sequence) for sequence in sequences])
+        self.sequence_ids.update(sequence_ids)
+        next_tokens = torch.tensor([(sequence[-1] + 1) % VOCAB_SIZE for sequence in sequences])
+        return torch.nn.functional.one_hot(next_tokens, VOCAB_SIZE).float() * 10.0
+
+    def release(self, sequence_id):
+        self.sequence_ids.discard(sequence_id)
+        self.released.append(sequence_id)
+
+
+def _request(prompt_ids, **kwargs):
+    return GenerationRequest(prompt_ids=prompt_ids, greedy=True, repetition_penalty=1.0, **kwargs)
+
+
+class TestContinuousBatchingScheduler:
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_admission_and_eviction(self):
+        engine = CountingEngine()
+        scheduler = ContinuousBatchingScheduler(engine, max_batch_size=2)
+        long_request = scheduler.submit(_request([1], tokens_to_generate=10))
+        short_request = scheduler.submit(_request([13], tokens_to_generate=10))
+        queued_request = scheduler.submit(_request([5], tokens_to_generate=2))
+
+        # the short request ends with EOS after 3 tokens, and the queued request takes its slot
+        while scheduler.step() or scheduler.num_queued:
+            pass
+
+        assert short_request.result().generated_ids == [14, 15, EOS_ID]
+        assert queued_request.result().generated_ids == [6, 7]
+        assert long_request.result().generated_ids == list(range(2, 12))
+        assert all(len(batch) <= 2 for batch in engine.batches)
+        assert engine.batches[3] == [4, 1]
+        assert short_request.result().finish_time < queued_request.result().finish_time
+        assert engine.released == [
+            short_request.result().request_id,
+            queued_request.result().request_id,
+            long_request.result().request_id,
+        ]
+        assert not engine.sequence_ids
+
+        metrics = scheduler.get_metrics()
+        assert metrics["num_finished_requests"] == 3
+        assert metrics["num_generated_tokens"] == 15
+        assert metrics["num_steps"] == len(engine.batches)
+        for name in ["queue_time", "time_to_first_token", "inter_token_latency", "total_time"]:
+            assert metrics[f"{name}_p50"] >= 0.0
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_stop_conditions(self):
+        engine = CountingEngine()
+        scheduler = ContinuousBatchingScheduler(engine, max_batch_size=4)
+        # stops at the maximum sequence length of the engine
+        max_length = scheduler.submit(_request([1], tokens_to_generate=100))
+        # 'e' is the text of token 4
+        end_string = scheduler.submit(_request([1], tokens_to_generate=100, end_strings=["de"]))
+        min_tokens = scheduler.submit(_request([14], tokens_to_generate=4, min_tokens_to_generate=3))
+        while scheduler.step():
+            pass
+
+        assert len(max_length.result().token_ids) == CountingEngine.max_sequence_length
+        assert end_string.result().generated_ids == [2, 3, 4]
+        # EOS is masked, so the next most likely token is sampled instead
+        assert min_tokens.result().generated_ids[:2] == [15, 1]
+        assert len(min_tokens.result().generated_ids) == 4
+
+        with pytest.raises(ValueError):
+            scheduler.submit(_request(list(range(1, 13))))
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_background_thread(self):
+        scheduler = ContinuousBatchingScheduler(CountingEngine(), max_batch_size=3)
+        scheduler.start()
+        try:
+            futures = [scheduler.submit(_request([i], tokens_to_generate=4)) for i in range(1, 8)]
+            results = [future.result(timeout=10) for future in futures]
+        finally:
+            scheduler.stop()
+        for i, request in enumerate(results, start=1):
+            assert request.generated_ids == [(i + j) % VOCAB_SIZE for j in range(1, 5)]
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_failed_step(self):
+        class FailingEngine(CountingEngine):
+            def forward(self, sequences, sequence_ids):
+                raise RuntimeError("out of memory")
+
+        engine = FailingEngine()
+        scheduler = ContinuousBatchingScheduler(engine)
+        request = _request([1], stream=True)
+        future = scheduler.submit(request)
+        assert scheduler.step() == 0
+        with pytest.raises(RuntimeError, match="out of memory"):
+            future.result()
+        # the stream is closed with the exception of the request
+        with pytest.raises(RuntimeError, match="out of memory"):
+            list(request.iter_text(timeout=1))
+        assert engine.released == [request.request_id]
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_engine_max_batch_size(self):
+        engine = CountingEngine()
+        engine.max_batch_size = 2
+        ContinuousBatchingScheduler(engine, max_batch_size=2)
+        with pytest.raises(ValueError):
+            ContinuousBatchingScheduler(engine, max_batch_size=3)
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_streaming(self):
+        scheduler = ContinuousBatchingScheduler(CountingEngine(), max_batch_size=2)
+        request = _request([1], tokens_to_generate=5, stream=True)
+        scheduler.submit(request)
+        while scheduler.step():
+            pass
+        assert "".join(request.iter_text(timeout=1)) == ToyTokenizer().ids_to_text(request.generated_ids) == "cdefg"
+
+        with pytest.raises(ValueError):
+            next(_request([1]).iter_text())
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_cancellation(self):
+        engine = CountingEngine()
+        scheduler = ContinuousBatchingScheduler(engine, max_batch_size=1)
+        running = _request([1], tokens_to_generate=10, stream=True)
+        queued = _request([5], tokens_to_generate=10, stream=True)
+        scheduler.submit(running)
+        scheduler.submit(queued)
+        scheduler.step()
+        scheduler.step()
+
+        queued.cancel()
+        running.cancel()
+        assert scheduler.step() == 0
+        # the running request has the tokens generated so far as result, and the queued request is never run
+        assert running.future.result(timeout=1).generated_ids == [2, 3]
+        assert queued.future.cancelled() and queued.generated_ids == []
+        # the streams of both requests are closed
+        assert list(running.iter_text(timeout=1)) == ["c", "d"]
+        assert list(queued.iter_text(timeout=1)) == []
+        assert engine.batches == [[1], [2]]
+        assert engine.released == [running.request_id]
+        assert scheduler.get_metrics()["num_finished_requests"] == 1
+
+
+class TestGatherAlignedMemory:
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_alignment(self):
+        # the position p of the sequence in slot s stores 100 * s + p
+        memory = (100 * torch.arange(4)[None, :] + torch.arange(10)[:, None]).unsqueeze(-1).float()
+        slots = torch.tensor([2, 0, 3])
+        lengths = torch.tensor([3, 5, 1])
+        gathered, padding = _gather_aligned_memory(memory, slots, lengths, 5)
+        assert gathered.shape == (6, 3, 1)
+        assert gathered[2:5, 0, 0].tolist() == [200, 201, 202]
+        assert gathered[:5, 1, 0].tolist() == [0, 1, 2, 3, 4]
+        assert gathered[4, 2, 0].item() == 300
+        # the positions before the sequences are masked, the last position is the next token of all sequences
+        assert padding.tolist() == [
+            [True, True, False, False, False, False],
+            [False] * 6,
+            [True, True, True, True, False, False],
+        ]
@@ -0,0 +1,195 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import queue
+import threading
+
+import pytest
+import torch
+from flask import Flask
+from flask_restful import Api
+
+from nemo.collections.nlp.modules.common.megatron.retrieval_services import util
+from nemo.collections.nlp.modules.common.text_generation_scheduler import ContinuousBatchingScheduler, GenerationEngine
+from nemo.collections.nlp.modules.common.text_generation_server import (
+    MegatronGenerateStream,
+    _BatchTextStreamer,
+    _format_event,
+)
+
+EOS_ID = 256
+
+
+class ByteTokenizer:
+    """Tokenizer whose token ids are the UTF-8 bytes of the text, followed by the EOS token."""
+
+    eos_id = EOS_ID
+    bos_id = EOS_ID
+    vocab_size = EOS_ID + 1
+
+    def text_to_ids(self, text):
+        return list(text.encode('utf-8'))
+
+    def ids_to_text(self, ids):
+        return bytes(i for i in ids if i != EOS_ID).decode('utf-8', errors='replace')
+
+
+class ReplyEngine(GenerationEngine):
+    # generates the bytes of the reply after prompts of PROMPT_LENGTH tokens, then EOS
+    PROMPT_LENGTH = 2
+    REPLY = list('hé!'.encode('utf-8')) + [EOS_ID]
+    max_sequence_length = 32
+
+    def __init__(self):
+        super().__init__(ByteTokenizer())
+
+    def forward(self, sequences, sequence_ids):
+        next_tokens = torch.tensor([self.REPLY[len(sequence) - self.PROMPT_LENGTH] for sequence in sequences])
+        return torch.nn.functional.one_hot(next_tokens, ByteTokenizer.vocab_size).float() * 10.0
+
+
+class FailingEngine(ReplyEngine):
+    def forward(self, sequences, sequence_ids):
+        raise RuntimeError("out of memory")
+
+
+class ToyModel:
+    tokenizer = ByteTokenizer()
+
+
+class _StreamedResponse:
+    def __init__(self, response):
+        self.response = response
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.response.close()
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self.response.get_data(as_text=True).split('\n'))
+
+
+class _TestClientSession:
+    """Session sending the requests of `util.text_generation_stream` to a flask test client."""
+
+    def __init__(self, client):
+        self.client = client
+        self.urls = []
+
+    def put(self, url, data, headers, stream):
+        self.urls.append(url)
+        return _StreamedResponse(self.client.put('/generate_stream', data=data, headers=headers))
+
+
+def _serve(engine, monkeypatch):
+    scheduler = ContinuousBatchingScheduler(engine, max_batch_size=4)
+    app = Flask(__name__)
+    Api(app).add_resource(
+        MegatronGenerateStream, '/generate_stream', resource_class_args=[ToyModel(), None, scheduler]
+    )
+    session = _TestClientSession(app.test_client())
+    monkeypatch.setattr(util, 'get_session', lambda: session)
+    return scheduler, session
+
+
+def _stream(tokens, context_lengths, step_lengths):
+    text_queue = queue.Queue()
+    streamer = _BatchTextStreamer(ByteTokenizer(), text_queue, threading.Event())
+    for length in step_lengths:
+        assert not streamer(tokens[:, :length], context_lengths)
+    texts = {}
+    while not text_queue.empty():
+        index, text = text_queue.get()
+        texts[index] = texts.get(index, '') + text
+    return texts
+
+
+class TestBatchTextStreamer:
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_context_skipping(self):
+        # the second sentence has a longer context, so its first generated token is the fifth one
+        tokenizer = ByteTokenizer()
+        tokens = torch.tensor([tokenizer.text_to_ids('abxyz'), tokenizer.text_to_ids('cdewv')])
+        texts = _stream(tokens, torch.tensor([2, 4]), range(3, 6))
+        assert texts == {0: 'xyz', 1: 'v'}
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_eos(self):
+        # nothing is streamed from EOS on, even if the generation of the other sentences goes on
+        tokenizer = ByteTokenizer()
+        tokens = torch.tensor([tokenizer.text_to_ids('ab') + [EOS_ID, 120, 121], tokenizer.text_to_ids('cdefg')])
+        texts = _stream(tokens, torch.tensor([2, 2]), range(3, 6))
+        assert texts == {1: 'efg'}
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_multibyte_characters(self):
+        # the characters are only streamed once all of their bytes are generated
+        tokenizer = ByteTokenizer()
+        tokens = torch.tensor([tokenizer.text_to_ids('aé€')])
+        text_queue = queue.Queue()
+        streamer = _BatchTextStreamer(tokenizer, text_queue, threading.Event())
+        streamed = []
+        for length in range(2, tokens.size(1) + 1):
+            streamer(tokens[:, :length], torch.tensor([1]))
+            streamed.append(text_queue.get_nowait()[1] if not text_queue.empty() else '')
+        assert streamed == ['', 'é', '', '', '€']
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_cancellation(self):
+        cancelled = threading.Event()
+        streamer = _BatchTextStreamer(ByteTokenizer(), queue.Queue(), cancelled)
+        tokens = torch.tensor([[97, 98, 99]])
+        assert not streamer(tokens[:, :2], torch.tensor([1]))
+        cancelled.set()
+        assert streamer(tokens, torch.tensor([1]))
+
+
+class TestMegatronGenerateStream:
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_event_framing(self):
+        assert _format_event({'index': 0, 'text': 'é\n'}) == 'data: {"index": 0, "text": "\\u00e9\\n"}\n\n'
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_stream(self, monkeypatch):
+        scheduler, session = _serve(ReplyEngine(), monkeypatch)
+        scheduler.start()
+        try:
+            data = {'sentences': ['ab', 'cd'], 'tokens_to_generate': 8, 'greedy': True, 'repetition_penalty': 1.0}
+            events = list(util.text_generation_stream(data, port=5555))
+        finally:
+            scheduler.stop()
+
+        assert session.urls == ['http://localhost:5555/generate_stream']
+        assert events[-1] == {'done': True, 'sentences': ['abhé!', 'cdhé!']}
+        for index in range(2):
+            assert ''.join(event['text'] for event in events[:-1] if event['index'] == index) == 'hé!'
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_failed_generation(self, monkeypatch):
+        scheduler, _ = _serve(FailingEngine(), monkeypatch)
+        scheduler.start()
+        try:
+            with pytest.raises(RuntimeError, match="out of memory"):
+                list(util.text_generation_stream({'sentences': ['ab'], 'greedy': True}, port=5555))
+        finally:
+            scheduler.stop()
@@ -0,0 +1,105 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pickle
+
+import pytest
+
+from nemo.collections.tts.g2p.compiled_dict import (
+    CompiledPhonemeDict,
+    compile_phoneme_dict,
+    load_or_compile_phoneme_dict,
+)
+
+
+class TestCompiledPhonemeDict:
+    PHONEME_DICT = {
+        "HELLO": [list("həˈɫoʊ")],
+        "LEAD": [list("ˈlɛd"), list("ˈlid")],
+        "A": [["ə"], ["ˈeɪ"]],
+        "EMPTY": [],
+    }
+
+    def _compile(self, tmp_path):
+        symbols = {symbol for prons in self.PHONEME_DICT.values() for pron in prons for symbol in pron}
+        compile_phoneme_dict(self.PHONEME_DICT, symbols, tmp_path / "table")
+        return CompiledPhonemeDict(tmp_path / "table"), symbols
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_round_trip(self, tmp_path):
+        compiled_dict, symbols = self._compile(tmp_path)
+
+        assert compiled_dict.symbols == symbols
+        assert len(compiled_dict) == len(self.PHONEME_DICT)
+        assert dict(compiled_dict) == self.PHONEME_DICT
+        assert "WORLD" not in compiled_dict
+        with pytest.raises(KeyError):
+            compiled_dict["WORLD"]
+
+        restored = pickle.loads(pickle.dumps(compiled_dict))
+        assert dict(restored) == self.PHONEME_DICT
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_mutation(self, tmp_path):
+        compiled_dict, _ = self._compile(tmp_path)
+
+        compiled_dict["LEAD"] = [list("ˈlid")]
+        compiled_dict["WORLD"] = [list("ˈwɝɫd")]
+        del compiled_dict["HELLO"]
+
+        assert compiled_dict["LEAD"] == [list("ˈlid")]
+        assert compiled_dict["WORLD"] == [list("ˈwɝɫd")]
+        assert "HELLO" not in compiled_dict
+        assert len(compiled_dict) == len(self.PHONEME_DICT)
+        assert set(compiled_dict) == {"LEAD", "A", "EMPTY", "WORLD"}
+
+        compiled_dict["HELLO"] = [list("hɛˈloʊ")]
+        assert compiled_dict["HELLO"] == [list("hɛˈloʊ")]
+        with pytest.raises(KeyError):
+            del compiled_dict["KITTY"]
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_load_or_compile(self, tmp_path):
+        dict_path = tmp_path / "dict.txt"
+        dict_path.write_text("HELLO  həˈɫoʊ\n")
+        symbols = set("həˈɫoʊ")
+        num_builds = 0
+
+        def build_fn():
+            nonlocal num_builds
+            num_builds += 1
+            return {"HELLO": [list("həˈɫoʊ")]}, symbols
+
+        cache_dir = tmp_path / "cache"
+        phoneme_dict, _ = load_or_compile_phoneme_dict(dict_path, cache_dir, build_fn, use_chars=False)
+        assert type(phoneme_dict) is dict
+        phoneme_dict, loaded_symbols = load_or_compile_phoneme_dict(dict_path, cache_dir, build_fn, use_chars=False)
+        assert type(phoneme_dict) is CompiledPhonemeDict
+        assert loaded_symbols == symbols
+        assert phoneme_dict["HELLO"] == [list("həˈɫoʊ")]
+        assert num_builds == 1
+
+        # different options and a changed file are compiled to different tables
+        load_or_compile_phoneme_dict(dict_path, cache_dir, build_fn, use_chars=True)
+        assert num_builds == 2
+        dict_path.write_text("HELLO  hɛˈloʊ\n")
+        load_or_compile_phoneme_dict(dict_path, cache_dir, build_fn, use_chars=False)
+        assert num_builds == 3
+        assert len(list(cache_dir.iterdir())) == 3
+
+        load_or_compile_phoneme_dict(dict_path, None, build_fn)
+        assert num_builds == 4
@@ -17,6 +17,7 @@ import unicodedata
 
 import pytest
 
+from nemo.collections.tts.g2p.compiled_dict import CompiledPhonemeDict
 from nemo.collections.tts.g2p.models.i18n_ipa import IpaG2p
 from nemo.collections.tts.g2p.utils import GRAPHEME_CASE_LOWER, GRAPHEME_CASE_MIXED, GRAPHEME_CASE_UPPER
 
@@ -209,6 +210,44 @@ class TestIpaG2p:
         assert phonemes_dict == expected_output
         assert phonemes_file == phonemes_dict
 
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_forward_call_with_compiled_dict(self, tmp_path):
+        input_text = "Hello world, lead the Jones airport."
+        g2p = self._create_g2p(use_chars=True, grapheme_prefix=self.GRAPHEME_PREFIX)
+
+        for _ in range(2):
+            g2p_compiled = IpaG2p(
+                self.PHONEME_DICT_PATH_EN,
+                use_chars=True,
+                grapheme_prefix=self.GRAPHEME_PREFIX,
+                apply_to_oov_word=lambda x: x,
+                phoneme_dict_cache_dir=tmp_path,
+            )
+            assert g2p_compiled.symbols == g2p.symbols
+            assert dict(g2p_compiled.phoneme_dict) == g2p.phoneme_dict
+            assert g2p_compiled(input_text) == g2p(input_text)
+
+        assert type(g2p_compiled.phoneme_dict) is CompiledPhonemeDict
+        assert len(os.listdir(tmp_path)) == 1
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_forward_call_with_batch(self):
+        input_texts = ["Hello world.", "Hello Kitty!", ""]
+        g2p = self._create_g2p()
+
+        assert g2p(input_texts) == [g2p(text) for text in input_texts]
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_word_cache_after_replace_symbols(self):
+        g2p = self._create_g2p()
+        assert g2p("Jones") == list("ˈdʒoʊnz")
+
+        g2p.replace_symbols(g2p.symbols - {"ʒ"})
+        assert g2p("Jones") == list("JONES")
+
     @pytest.mark.run_only_on('CPU')
     @pytest.mark.unit
     def test_forward_call_with_oov_word(self):
@@ -0,0 +1,39 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import torch
+
+from nemo.collections.tts.modules.monotonic_align import maximum_path_numba, maximum_path_torch
+
+
+@pytest.mark.unit
+def test_maximum_path_torch_matches_numba():
+    generator = torch.Generator()
+    generator.manual_seed(0)
+    batch_size, max_t_t, max_t_s = 6, 40, 10
+    t_s = torch.randint(1, max_t_s + 1, (batch_size,), generator=generator)
+    t_t = torch.randint(max_t_s, max_t_t + 1, (batch_size,), generator=generator)
+    t_s[0], t_t[0] = max_t_s, max_t_t
+    mask = (torch.arange(max_t_t).view(1, -1, 1) < t_t.view(-1, 1, 1)) & (
+        torch.arange(max_t_s).view(1, 1, -1) < t_s.view(-1, 1, 1)
+    )
+    neg_cent = 5 * torch.randn(batch_size, max_t_t, max_t_s, generator=generator)
+
+    expected_path = maximum_path_numba(neg_cent.clone(), mask.float())
+    path = maximum_path_torch(neg_cent, mask.float())
+
+    assert path.dtype == neg_cent.dtype
+    assert torch.equal(path, expected_path)
+    assert torch.equal(path.sum(dim=2), (torch.arange(max_t_t) < t_t.unsqueeze(1)).float())
@@ -27,6 +27,7 @@ from nemo.collections.tts.parts.preprocessing.features import (
     MelSpectrogramFeaturizer,
     PitchFeaturizer,
 )
+from nemo.collections.tts.parts.utils.sup_data_store import SupDataStore, SupDataStoreWriter
 
 
 class TestTTSFeatures:
@@ -138,6 +139,70 @@ class TestTTSFeatures:
         torch.testing.assert_close(voiced_batch, voiced)
         torch.testing.assert_close(voiced_prob_batch, voiced_prob)
 
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_compute_pitch_yin(self):
+        pitch_featurizer = PitchFeaturizer(
+            hop_length=self.hop_len, sample_rate=self.sample_rate, pitch_backend="yin", batch_seconds=1.0
+        )
+
+        with self._create_test_dir() as test_dir:
+            pitch, voiced_mask, voiced_prob = pitch_featurizer.compute_pitch(
+                manifest_entry=self.manifest_entry, audio_dir=test_dir
+            )
+
+        assert pitch.shape == voiced_mask.shape == voiced_prob.shape == (self.spec_len,)
+        assert pitch.dtype == np.float32
+        assert voiced_mask.dtype == bool
+        assert voiced_prob.dtype == np.float32
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    @pytest.mark.parametrize("pitch_backend", ["pyin", "yin"])
+    def test_estimate_pitch_dtype(self, pitch_backend):
+        pitch_featurizer = PitchFeaturizer(
+            hop_length=self.hop_len, sample_rate=self.sample_rate, pitch_backend=pitch_backend
+        )
+        audio = np.sin(2 * np.pi * 200.0 * np.arange(5000) / self.sample_rate).astype(np.float32)
+
+        pitch, voiced_mask, voiced_prob = pitch_featurizer.estimate_pitch(audio)
+
+        assert pitch.dtype == voiced_prob.dtype == np.float32
+        assert voiced_mask.dtype == bool
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_compute_pitch_yin_batch(self):
+        # utterances shorter and longer than batch_seconds, which are split into segments
+        durations = [0.5, 2.5, 0.3, 1.2, 0.8]
+        pitch_featurizer = PitchFeaturizer(
+            hop_length=self.hop_len, sample_rate=self.sample_rate, pitch_backend="yin", batch_seconds=1.0
+        )
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            test_dir = Path(temp_dir)
+            manifest_entries = []
+            for i, duration in enumerate(durations):
+                time = np.arange(int(duration * self.sample_rate)) / self.sample_rate
+                audio = np.sin(2 * np.pi * (150.0 + 50.0 * i) * time) * np.linspace(0.2, 1.0, time.shape[0])
+                sf.write(test_dir / f"{i}.wav", audio, self.sample_rate)
+                manifest_entries.append({"audio_filepath": f"{i}.wav"})
+
+            batch_outputs = pitch_featurizer.compute_pitch_batch(manifest_entries=manifest_entries, audio_dir=test_dir)
+            for manifest_entry, batch_output in zip(manifest_entries, batch_outputs):
+                output = pitch_featurizer.compute_pitch(manifest_entry=manifest_entry, audio_dir=test_dir)
+                for feature, batch_feature in zip(output, batch_output):
+                    assert batch_feature.dtype == feature.dtype
+                    np.testing.assert_allclose(batch_feature, feature, atol=1e-3)
+
+            feature_dir = test_dir / "feature"
+            pitch_featurizer.save_batch(manifest_entries=manifest_entries, audio_dir=test_dir, feature_dir=feature_dir)
+            for manifest_entry, (pitch, _, _) in zip(manifest_entries, batch_outputs):
+                pitch_dict = pitch_featurizer.load(
+                    manifest_entry=manifest_entry, audio_dir=test_dir, feature_dir=feature_dir
+                )
+                np.testing.assert_allclose(pitch_dict["pitch"].numpy(), pitch, atol=1e-3)
+
     @pytest.mark.run_only_on('CPU')
     @pytest.mark.unit
     def test_save_and_load_pitch(self):
@@ -175,6 +240,44 @@ class TestTTSFeatures:
         assert voiced_prob.shape[0] == self.spec_len
         assert voiced_prob.dtype == torch.float32
 
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_load_pitch_from_feature_store(self):
+        pitch_name = "pitch_test"
+        voiced_mask_name = "voiced_mask_test"
+        pitch_featurizer = PitchFeaturizer(
+            pitch_name=pitch_name,
+            voiced_mask_name=voiced_mask_name,
+            hop_length=self.hop_len,
+            sample_rate=self.sample_rate,
+        )
+
+        with self._create_test_dir() as test_dir:
+            feature_dir = test_dir / "feature"
+            pitch_featurizer.save(manifest_entry=self.manifest_entry, audio_dir=test_dir, feature_dir=feature_dir)
+            expected_dict = pitch_featurizer.load(
+                manifest_entry=self.manifest_entry, audio_dir=test_dir, feature_dir=feature_dir
+            )
+
+            store_dir = test_dir / "store"
+            with SupDataStoreWriter(store_dir, dtype="float32") as writer:
+                writer.add("test", {name: value.numpy() for name, value in expected_dict.items()})
+            feature_store = SupDataStore(store_dir)
+
+            # features found in the store are not read from feature_dir
+            empty_dir = test_dir / "empty"
+            pitch_dict = pitch_featurizer.load(
+                manifest_entry=self.manifest_entry,
+                audio_dir=test_dir,
+                feature_dir=empty_dir,
+                feature_store=feature_store,
+            )
+
+        assert pitch_dict.keys() == expected_dict.keys()
+        for name, expected in expected_dict.items():
+            assert pitch_dict[name].dtype == expected.dtype
+            assert torch.equal(pitch_dict[name], expected)
+
     @pytest.mark.run_only_on('CPU')
     @pytest.mark.unit
     def test_save_and_load_pitch_segments(self, test_data_dir):
@@ -0,0 +1,106 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import librosa
+import numpy as np
+import pytest
+import torch
+
+from nemo.collections.tts.parts.preprocessing.pitch_estimation import batch_yin
+
+
+class TestPitchEstimation:
+    def setup_class(self):
+        self.sample_rate = 22050
+        self.frame_length = 1024
+        self.hop_length = 256
+        self.fmin = 60
+        self.fmax = 640
+
+    def _harmonic_sweep(self, duration, f0_start, f0_end, seed=0):
+        num_samples = int(self.sample_rate * duration)
+        f0 = np.linspace(f0_start, f0_end, num_samples)
+        phase = 2 * np.pi * np.cumsum(f0) / self.sample_rate
+        audio = sum(np.sin(k * phase) / k for k in range(1, 6))
+        # leading silence, which must be unvoiced
+        audio[: self.sample_rate // 8] = 0.0
+        rng = np.random.default_rng(seed)
+        audio = audio + 0.01 * rng.standard_normal(num_samples)
+        return audio.astype(np.float32)
+
+    def _batch_yin(self, audio):
+        return batch_yin(
+            audio,
+            sample_rate=self.sample_rate,
+            fmin=self.fmin,
+            fmax=self.fmax,
+            frame_length=self.frame_length,
+            hop_length=self.hop_length,
+        )
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_matches_pyin(self):
+        audio = self._harmonic_sweep(duration=1.0, f0_start=100.0, f0_end=300.0)
+        expected_pitch, expected_voiced, _ = librosa.pyin(
+            audio,
+            fmin=self.fmin,
+            fmax=self.fmax,
+            sr=self.sample_rate,
+            frame_length=self.frame_length,
+            hop_length=self.hop_length,
+            fill_na=0.0,
+        )
+
+        pitch, voiced_mask, voiced_prob = self._batch_yin(torch.from_numpy(audio).unsqueeze(0))
+        pitch, voiced_mask, voiced_prob = pitch[0].numpy(), voiced_mask[0].numpy(), voiced_prob[0].numpy()
+
+        assert pitch.shape == expected_pitch.shape
+        assert voiced_mask.dtype == bool
+        assert np.all((voiced_prob >= 0.0) & (voiced_prob <= 1.0))
+        assert not voiced_mask[:8].any()
+        assert np.all(pitch[~voiced_mask] == 0.0)
+
+        assert np.mean(voiced_mask == expected_voiced) > 0.95
+        both_voiced = voiced_mask & expected_voiced
+        relative_error = np.abs(pitch[both_voiced] - expected_pitch[both_voiced]) / expected_pitch[both_voiced]
+        assert np.median(relative_error) < 0.01
+        assert np.mean(relative_error > 0.2) < 0.02
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_batch_matches_single(self):
+        audios = [self._harmonic_sweep(duration, 150.0, 250.0, seed=i) for i, duration in enumerate([0.5, 0.8])]
+        max_len = max(audio.shape[0] for audio in audios)
+        batch = torch.stack([torch.from_numpy(np.pad(audio, (0, max_len - audio.shape[0]))) for audio in audios])
+
+        batch_pitch, batch_voiced_mask, batch_voiced_prob = self._batch_yin(batch)
+        for i, audio in enumerate(audios):
+            pitch, voiced_mask, voiced_prob = self._batch_yin(torch.from_numpy(audio).unsqueeze(0))
+            num_frames = 1 + audio.shape[0] // self.hop_length
+            assert pitch.shape[1] == num_frames
+            # frames which do not overlap the padding are identical
+            num_valid = num_frames - self.frame_length // (2 * self.hop_length)
+            torch.testing.assert_close(batch_pitch[i, :num_valid], pitch[0, :num_valid], rtol=1e-4, atol=1e-3)
+            assert torch.equal(batch_voiced_mask[i, :num_valid], voiced_mask[0, :num_valid])
+            torch.testing.assert_close(batch_voiced_prob[i, :num_valid], voiced_prob[0, :num_valid])
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_invalid_frequency_range(self):
+        audio = torch.zeros(1, self.sample_rate)
+        with pytest.raises(ValueError):
+            batch_yin(audio, self.sample_rate, fmin=10, fmax=640, frame_length=1024, hop_length=256)
+        with pytest.raises(ValueError):
+            batch_yin(audio, self.sample_rate, fmin=640, fmax=60, frame_length=1024, hop_length=256)
@@ -0,0 +1,169 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+import numpy as np
+import pytest
+import torch
+
+from nemo.collections.tts.data.codec_token_dataset import CodecTokenDataset
+from nemo.collections.tts.parts.utils import codec_tokens
+from nemo.collections.tts.parts.utils.codec_tokens import (
+    CodecTokens,
+    encode_codec_tokens,
+    get_batches_by_duration,
+    merge_codec_tokens,
+    write_codec_tokens,
+)
+
+
+class ToyCodecModel:
+    sample_rate = 100
+    samples_per_frame = 10
+    device = torch.device("cpu")
+    num_codebooks = 2
+
+    def encode(self, audio, audio_len):
+        # token of a frame is the rounded first sample of the frame
+        num_frames = (audio_len + self.samples_per_frame - 1) // self.samples_per_frame
+        frames = audio[:, :: self.samples_per_frame]
+        tokens = torch.stack([frames.round().long(), frames.round().long() + 1000], dim=1)
+        return tokens, num_frames
+
+
+def _random_tokens(num_entries, num_codebooks=3, max_token=1023, seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, max_token + 1, size=(num_codebooks, rng.integers(1, 20))) for _ in range(num_entries)]
+
+
+class TestCodecTokens:
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_get_batches_by_duration(self):
+        durations = [1.0, 5.0, 2.0, 4.0, 9.0, 1.5]
+        batches = get_batches_by_duration(durations, batch_duration=8.0, max_batch_size=3)
+
+        assert sorted(i for batch in batches for i in batch) == list(range(len(durations)))
+        assert batches[0] == [4]
+        for batch in batches[1:]:
+            assert len(batch) <= 3
+            assert len(batch) * max(durations[i] for i in batch) <= 8.0
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_write_and_read(self, tmp_path):
+        tokens = _random_tokens(5)
+        write_codec_tokens(tmp_path / "tokens", tokens, sample_rate=16000, samples_per_frame=320)
+
+        reader = CodecTokens(tmp_path / "tokens")
+        assert len(reader) == 5
+        assert reader.dtype == np.uint16
+        assert reader.num_codebooks == 3 and reader.samples_per_frame == 320
+        assert reader.num_frames.tolist() == [t.shape[1] for t in tokens]
+        for i, entry_tokens in enumerate(tokens):
+            np.testing.assert_array_equal(reader.get(i), entry_tokens)
+        num_frames = tokens[0].shape[1]
+        np.testing.assert_array_equal(
+            reader.get(0, frame_offset=num_frames // 2, num_frames=1), tokens[0][:, [num_frames // 2]]
+        )
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_merge(self, tmp_path):
+        tokens = _random_tokens(7)
+        tokens[6][0, 0] = 70000
+        shard_prefixes = [tmp_path / "shards" / f"shard_{i}" for i in range(3)]
+        for shard_prefix, shard_tokens in zip(shard_prefixes, [tokens[:3], tokens[3:6], tokens[6:]]):
+            write_codec_tokens(shard_prefix, shard_tokens, sample_rate=16000, samples_per_frame=320)
+
+        merge_codec_tokens(shard_prefixes, tmp_path / "tokens", model="toy")
+
+        reader = CodecTokens(tmp_path / "tokens")
+        assert reader.dtype == np.int32
+        assert reader.meta["model"] == "toy"
+        assert len(reader) == len(tokens)
+        for i, entry_tokens in enumerate(tokens):
+            np.testing.assert_array_equal(reader.get(i), entry_tokens)
+        # only the merged files and the shards are left, without temporary files
+        assert sorted(path.name for path in tmp_path.iterdir()) == [
+            "shards",
+            "tokens.bin",
+            "tokens.idx",
+            "tokens.json",
+        ]
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_rewrite_invalidates_meta(self, tmp_path, monkeypatch):
+        write_codec_tokens(tmp_path / "tokens", _random_tokens(5), sample_rate=16000, samples_per_frame=320)
+
+        def interrupted_finalize(self, index_file):
+            raise KeyboardInterrupt
+
+        # the tokens of an interrupted rewrite are not read as complete
+        monkeypatch.setattr(codec_tokens.MMapIndexedDatasetBuilder, "finalize", interrupted_finalize)
+        with pytest.raises(KeyboardInterrupt):
+            write_codec_tokens(tmp_path / "tokens", _random_tokens(3), sample_rate=16000, samples_per_frame=320)
+        with pytest.raises(FileNotFoundError):
+            CodecTokens(tmp_path / "tokens")
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_encode_restores_manifest_order(self, monkeypatch):
+        entries = [{"audio_filepath": f"{i}.wav", "duration": d} for i, d in enumerate([0.3, 1.0, 0.55, 0.1])]
+
+        def load_audio(manifest_entry, audio_dir, sample_rate):
+            i = int(manifest_entry["audio_filepath"][0])
+            return np.full(int(manifest_entry["duration"] * sample_rate), i, dtype=np.float32), None, None
+
+        monkeypatch.setattr(codec_tokens, "load_audio", load_audio)
+        tokens = encode_codec_tokens(ToyCodecModel(), entries, audio_dir=".", batch_duration=1.2)
+
+        for i, (entry, entry_tokens) in enumerate(zip(entries, tokens)):
+            num_frames = int(np.ceil(entry["duration"] * 10))
+            np.testing.assert_array_equal(entry_tokens, [[i] * num_frames, [1000 + i] * num_frames])
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_codec_token_dataset(self, tmp_path):
+        tokens = _random_tokens(4)
+        entries = [{"audio_filepath": f"{i}.wav", "duration": 0.02 * t.shape[1]} for i, t in enumerate(tokens)]
+        with open(tmp_path / "manifest.json", "w") as f:
+            f.writelines(json.dumps(entry) + "\n" for entry in entries)
+        write_codec_tokens(tmp_path / "tokens", tokens, sample_rate=16000, samples_per_frame=320)
+
+        min_duration = sorted(entry["duration"] for entry in entries)[1]
+        dataset = CodecTokenDataset(
+            dataset_meta={"toy": {"manifest_path": tmp_path / "manifest.json", "tokens_path": tmp_path / "tokens"}},
+            min_duration=min_duration,
+            n_frames=5,
+        )
+        assert len(dataset) == 3
+
+        batch = dataset.collate_fn([dataset[i] for i in range(len(dataset))])
+        assert batch["tokens"].shape[:2] == (3, 3)
+        for example_tokens, tokens_len, audio_filepath in zip(
+            batch["tokens"], batch["tokens_lens"], batch["audio_filepaths"]
+        ):
+            entry_tokens = tokens[int(audio_filepath[0])]
+            assert tokens_len == min(entry_tokens.shape[1], 5)
+            # random crops are contiguous frames of the utterance
+            crop = example_tokens[:, :tokens_len].numpy()
+            offsets = [
+                o
+                for o in range(entry_tokens.shape[1] - tokens_len + 1)
+                if np.array_equal(entry_tokens[:, o : o + tokens_len], crop)
+            ]
+            assert offsets
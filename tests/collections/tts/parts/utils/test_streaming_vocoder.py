@@ -0,0 +1,108 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import torch
+
+from nemo.collections.tts.modules import hifigan_modules, univnet_modules
+from nemo.collections.tts.parts.utils.streaming_vocoder import StreamingVocoder
+
+
+class ToyVocoder:
+    def __init__(self, generator):
+        self.generator = generator.eval()
+
+    def convert_spectrogram_to_audio(self, spec):
+        return self.generator(x=spec).squeeze(1)
+
+
+@pytest.fixture(scope="module")
+def hifigan_vocoder():
+    torch.manual_seed(0)
+    generator = hifigan_modules.Generator(
+        resblock=1,
+        upsample_rates=[4, 4],
+        upsample_kernel_sizes=[8, 8],
+        upsample_initial_channel=16,
+        resblock_kernel_sizes=[3, 5],
+        resblock_dilation_sizes=[[1, 3, 5], [1, 3, 5]],
+        initial_input_size=8,
+    )
+    return ToyVocoder(generator)
+
+
+@pytest.fixture(scope="module")
+def univnet_vocoder():
+    torch.manual_seed(0)
+    generator = univnet_modules.Generator(
+        noise_dim=4,
+        channel_size=8,
+        dilations=[1, 3],
+        strides=[4, 4],
+        lrelu_slope=0.2,
+        kpnet_conv_size=3,
+        n_mel_channels=8,
+        hop_length=16,
+    )
+    return ToyVocoder(generator)
+
+
+class TestStreamingVocoder:
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    @pytest.mark.parametrize("chunk_frames, feed_frames", [(8, 8), (5, 3), (16, 50), (100, 7)])
+    def test_hifigan_matches_full_pass(self, hifigan_vocoder, chunk_frames, feed_frames):
+        spec = torch.randn(2, 8, 77)
+        with torch.no_grad():
+            expected_audio = hifigan_vocoder.convert_spectrogram_to_audio(spec)
+
+        streaming_vocoder = StreamingVocoder(hifigan_vocoder, chunk_frames=chunk_frames)
+        chunks = list(streaming_vocoder.stream(spec, feed_frames=feed_frames))
+
+        assert streaming_vocoder.hop_length == 16
+        assert streaming_vocoder.context_frames > 0
+        assert chunks[0].shape[-1] % (chunk_frames * 16) == 0 or len(chunks) == 1
+        torch.testing.assert_close(torch.cat(chunks, dim=-1), expected_audio, rtol=1e-5, atol=1e-5)
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_univnet_matches_full_pass_with_same_noise(self, univnet_vocoder):
+        spec = torch.randn(2, 8, 150)
+        # a single chunk without context is vocoded in a single forward pass
+        full_pass_vocoder = StreamingVocoder(univnet_vocoder, chunk_frames=150, context_frames=0, seed=1234)
+        expected_audio = full_pass_vocoder.convert_spectrogram_to_audio(spec)
+
+        streaming_vocoder = StreamingVocoder(univnet_vocoder, chunk_frames=10, seed=1234)
+        assert streaming_vocoder.hop_length is None
+        torch.testing.assert_close(
+            streaming_vocoder.convert_spectrogram_to_audio(spec), expected_audio, rtol=1e-5, atol=1e-5
+        )
+        assert streaming_vocoder.hop_length == 16
+        # noise only depends on the seed, not on how the frames are fed
+        audio_fed_frame_by_frame = torch.cat(list(streaming_vocoder.stream(spec, feed_frames=1)), dim=-1)
+        torch.testing.assert_close(audio_fed_frame_by_frame, expected_audio, rtol=1e-5, atol=1e-5)
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_feed_returns_chunks_after_lookahead(self, hifigan_vocoder):
+        streaming_vocoder = StreamingVocoder(hifigan_vocoder, chunk_frames=4, context_frames=3)
+        spec = torch.randn(1, 8, 20)
+
+        assert streaming_vocoder.feed(spec[..., :6]).shape == (1, 0)
+        # 4 frames of the first chunk and 3 frames of context are available
+        assert streaming_vocoder.feed(spec[..., 6:7]).shape == (1, 4 * 16)
+        assert streaming_vocoder.feed(spec[..., 7:15]).shape == (1, 8 * 16)
+        assert streaming_vocoder.feed(spec[..., 15:], is_last=True).shape == (1, 8 * 16)
+        with pytest.raises(RuntimeError):
+            streaming_vocoder.feed(spec)
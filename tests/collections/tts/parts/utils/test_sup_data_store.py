@@ -0,0 +1,103 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pickle
+
+import numpy as np
+import pytest
+
+from nemo.collections.tts.parts.utils.sup_data_store import SupDataStore, SupDataStoreWriter
+
+
+class TestSupDataStore:
+    def _random_utterance(self, rng, num_frames):
+        return {
+            "log_mel": rng.standard_normal((1, 8, num_frames)).astype(np.float32),
+            "pitch": rng.uniform(60, 400, size=num_frames).astype(np.float32),
+            "voiced_mask": rng.uniform(size=num_frames) > 0.5,
+        }
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    @pytest.mark.parametrize("shard_size", [1, 3, 100])
+    def test_round_trip(self, tmp_path, shard_size):
+        rng = np.random.default_rng(0)
+        utterances = {f"speaker_{i % 2}/utt_{i}": self._random_utterance(rng, 5 + 3 * i) for i in range(7)}
+        # missing features and empty features
+        del utterances["speaker_0/utt_2"]["pitch"]
+        utterances["speaker_1/utt_3"]["voiced_mask"] = np.zeros(0, dtype=bool)
+
+        with SupDataStoreWriter(tmp_path, dtype="float32", shard_size=shard_size) as writer:
+            for key, features in utterances.items():
+                writer.add(key, features)
+
+        store = SupDataStore(tmp_path)
+        assert len(store) == len(utterances)
+        assert set(store.features) == {"log_mel", "pitch", "voiced_mask"}
+        assert "missing" not in store
+        assert store.get("missing", "pitch") is None
+
+        for key, features in utterances.items():
+            assert key in store
+            for name in store.features:
+                value = store.get(key, name)
+                if name not in features:
+                    assert value is None
+                    continue
+                assert value.dtype == features[name].dtype
+                np.testing.assert_array_equal(value, features[name])
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_float16_and_segments(self, tmp_path):
+        rng = np.random.default_rng(1)
+        features = self._random_utterance(rng, 20)
+        with SupDataStoreWriter(tmp_path) as writer:
+            writer.add("utt", features)
+
+        store = SupDataStore(tmp_path)
+        log_mel = store.get("utt", "log_mel")
+        assert log_mel.dtype == np.float32
+        np.testing.assert_allclose(log_mel, features["log_mel"], rtol=1e-3, atol=1e-3)
+
+        segment = store.get("utt", "log_mel", indices=(4, 9))
+        assert segment.shape == (1, 8, 5)
+        np.testing.assert_array_equal(segment, log_mel[..., 4:9])
+        np.testing.assert_array_equal(store.get("utt", "voiced_mask", indices=(4, 9)), features["voiced_mask"][4:9])
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_pickle_reopens_shards(self, tmp_path):
+        rng = np.random.default_rng(2)
+        features = self._random_utterance(rng, 10)
+        with SupDataStoreWriter(tmp_path, dtype="float32") as writer:
+            writer.add("utt", features)
+
+        store = SupDataStore(tmp_path)
+        np.testing.assert_array_equal(store.get("utt", "pitch"), features["pitch"])
+        store_copy = pickle.loads(pickle.dumps(store))
+        np.testing.assert_array_equal(store_copy.get("utt", "pitch"), features["pitch"])
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_invalid_input(self, tmp_path):
+        with SupDataStoreWriter(tmp_path) as writer:
+            writer.add("utt", {"log_mel": np.zeros((8, 3), dtype=np.float32)})
+            with pytest.raises(ValueError):
+                writer.add("utt", {"log_mel": np.zeros((8, 3), dtype=np.float32)})
+            with pytest.raises(ValueError):
+                writer.add("other", {"log_mel": np.zeros((4, 3), dtype=np.float32)})
+
+        with pytest.raises(FileExistsError):
+            SupDataStoreWriter(tmp_path)
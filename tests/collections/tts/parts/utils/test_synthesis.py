@@ -0,0 +1,109 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import torch
+
+from nemo.collections.tts.parts.utils.synthesis import TTSSynthesisEngine
+
+
+class ToySpectrogramGenerator:
+    frames_per_token = 3
+
+    def parse(self, text):
+        return torch.tensor([ord(c) for c in text]).unsqueeze(0)
+
+    def generate_spectrogram(self, tokens):
+        frames = torch.arange(tokens.shape[1] * self.frames_per_token)
+        values = torch.sin(0.1 * frames) + tokens.repeat_interleave(self.frames_per_token, dim=1).float() / 100
+        return values.unsqueeze(1).repeat(1, 4, 1)
+
+
+class ToyVocoder:
+    samples_per_frame = 8
+    sample_rate = 16000
+    # every frame of audio depends on the spectrogram frames up to `context_frames` before and after it
+    context_frames = 2
+
+    def convert_spectrogram_to_audio(self, spec):
+        # replicate padding, so that the frames of an utterance padded in a batch do not depend on the padding
+        frames = torch.nn.functional.pad(spec.mean(dim=1, keepdim=True), (self.context_frames,) * 2, mode="replicate")
+        weight = torch.tensor([[[1.0, -2.0, 4.0, 3.0, -1.0]]])
+        frames = torch.nn.functional.conv1d(frames, weight)[:, 0]
+        return frames.repeat_interleave(self.samples_per_frame, dim=1)
+
+
+class TestTTSSynthesisEngine:
+    texts = ["a long sentence for the last batch", "hi", "medium text", "short"]
+
+    def _engine(self, **kwargs):
+        return TTSSynthesisEngine(ToySpectrogramGenerator(), ToyVocoder(), **kwargs)
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    @pytest.mark.parametrize("chunk_frames, overlap_frames", [(4, 2), (5, 3), (1, 2), (7, 7), (1000, 0)])
+    def test_synthesize_matches_full_vocoding(self, chunk_frames, overlap_frames):
+        engine = self._engine(batch_size=3, chunk_frames=chunk_frames, overlap_frames=overlap_frames)
+        audio = engine.synthesize(self.texts)
+
+        # the overlap covers the context of the vocoder, so chunked vocoding is exact
+        spec_generator, vocoder = ToySpectrogramGenerator(), ToyVocoder()
+        for text, text_audio in zip(self.texts, audio):
+            spec = spec_generator.generate_spectrogram(spec_generator.parse(text))
+            expected_audio = vocoder.convert_spectrogram_to_audio(spec)[0]
+            torch.testing.assert_close(text_audio, expected_audio)
+
+        assert engine.metrics.num_samples == sum(a.shape[0] for a in audio)
+        assert engine.metrics.time_to_first_audio <= engine.metrics.total_time
+        assert engine.metrics.real_time_factor > 0
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_overlap_shorter_than_context(self):
+        engine = self._engine(batch_size=3, chunk_frames=4, overlap_frames=1)
+        text_audio = engine.synthesize(self.texts[:1])[0]
+
+        spec_generator, vocoder = ToySpectrogramGenerator(), ToyVocoder()
+        spec = spec_generator.generate_spectrogram(spec_generator.parse(self.texts[0]))
+        expected_audio = vocoder.convert_spectrogram_to_audio(spec)[0]
+        assert text_audio.shape == expected_audio.shape
+        # only the frames next to the chunk boundaries, within the context of the vocoder, differ
+        differs = (text_audio - expected_audio).abs().view(-1, vocoder.samples_per_frame).amax(dim=1) > 1e-5
+        assert differs.any()
+        frames = torch.arange(spec.shape[-1])
+        distance = torch.minimum(frames % 4, 3 - frames % 4)
+        assert not differs[distance >= vocoder.context_frames - 1].any()
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_stream_interleaves_batch(self):
+        # the 6 frames of "hi" are a single chunk
+        engine = self._engine(batch_size=2, chunk_frames=6, overlap_frames=2)
+        chunks = list(engine.synthesize_stream(self.texts))
+
+        # shortest texts are batched first, and the first chunks of all utterances of the batch
+        # are returned before the longer one is done
+        assert [chunk.index for chunk in chunks[:2]] == [1, 3]
+        assert chunks[0].is_last and not chunks[1].is_last
+        for index in range(len(self.texts)):
+            is_last = [chunk.is_last for chunk in chunks if chunk.index == index]
+            assert is_last == [False] * (len(is_last) - 1) + [True]
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError):
+            self._engine(batch_size=0)
+        with pytest.raises(ValueError):
+            self._engine(chunk_frames=4, overlap_frames=-1)
@@ -0,0 +1,91 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import pickle
+
+import pytest
+
+from nemo.collections.common.tokenizers.text_to_speech.tts_tokenizers import EnglishCharsTokenizer
+from nemo.collections.tts.parts.utils.token_store import (
+    TokenStore,
+    get_manifest_text,
+    get_token_store_dir,
+    get_tokenizer_hash,
+    load_token_store,
+    write_token_store,
+)
+
+
+class TestTokenStore:
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_round_trip(self, tmp_path):
+        texts = ["hello world", "", "lead"]
+        tokens = [[[1, 2, 3], [1, 4]], [[], []], [[40000], [5, 6, 7, 8]]]
+        write_token_store(tmp_path / "store", texts=texts, tokens=tokens)
+
+        store = TokenStore(tmp_path / "store")
+        assert len(store) == len(texts)
+        assert store.num_variants == 2
+        for line, (text, line_tokens) in enumerate(zip(texts, tokens)):
+            for variant, expected in enumerate(line_tokens):
+                assert store.get(line, text, variant=variant) == expected
+        assert store.get(0, "hello world") == tokens[0][0]
+
+        # changed text and lines past the end of the store
+        assert store.get(0, "hello there") is None
+        assert store.get(len(texts), "lead") is None
+
+        restored = pickle.loads(pickle.dumps(store))
+        assert restored.get(2, "lead", variant=1) == tokens[2][1]
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_invalid_variants(self, tmp_path):
+        with pytest.raises(ValueError):
+            write_token_store(tmp_path / "store", texts=["a", "b"], tokens=[[[1]], [[1], [2]]])
+        with pytest.raises(ValueError):
+            write_token_store(tmp_path / "store", texts=["a"], tokens=[[[1]], [[2]]])
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_load_token_store(self, tmp_path):
+        manifest_path = tmp_path / "manifest.json"
+        entries = [{"text": "Hello world!", "normalized_text": "hello world!"}, {"text": "Lead."}]
+        with open(manifest_path, "w") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+
+        tokenizer = EnglishCharsTokenizer()
+        assert load_token_store(manifest_path, tokenizer) is None
+
+        tokenizer_hash = get_tokenizer_hash(tokenizer)
+        assert get_tokenizer_hash(EnglishCharsTokenizer()) == tokenizer_hash
+        assert get_tokenizer_hash(EnglishCharsTokenizer(punct=False)) != tokenizer_hash
+
+        texts = [get_manifest_text(entry) for entry in entries]
+        assert texts == ["hello world!", "Lead."]
+        write_token_store(
+            get_token_store_dir(manifest_path, tokenizer_hash), texts=texts, tokens=[[tokenizer(t)] for t in texts],
+        )
+
+        store = load_token_store(manifest_path, tokenizer)
+        assert store is not None
+        assert store.tokenizer_hash == tokenizer_hash
+        for line, text in enumerate(texts):
+            assert store.get(line, text) == tokenizer(text)
+
+        assert load_token_store(manifest_path, EnglishCharsTokenizer(punct=False)) is None
+        assert load_token_store(manifest_path, lambda text: [0]) is None
@@ -20,6 +20,9 @@ import pytest
 import torch
 
 from nemo.collections.tts.parts.utils.tts_dataset_utils import (
+    BetaBinomialPriorTable,
+    DurationBucketBatchSampler,
+    beta_binomial_prior_distribution,
     filter_dataset_by_duration,
     get_abs_rel_paths,
     get_audio_filepaths,
@@ -208,3 +211,90 @@ class TestTTSDatasetUtils:
         assert filtered_entries[1]["duration"] == 5.0
         assert total_hours == (135.6 / 3600.0)
         assert filtered_hours == (15.0 / 3600.0)
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_beta_binomial_prior_table(self):
+        prior_table = BetaBinomialPriorTable(max_len=16)
+
+        for mel_len, text_len in [(1, 1), (7, 1), (1, 4), (10, 10), (97, 23), (400, 60)]:
+            expected_prior = torch.from_numpy(beta_binomial_prior_distribution(text_len, mel_len))
+            prior = prior_table(mel_len, text_len)
+
+            assert prior.shape == (mel_len, text_len)
+            assert prior.dtype == torch.float32
+            torch.testing.assert_close(prior, expected_prior, rtol=1e-3, atol=1e-3)
+            torch.testing.assert_close(prior.sum(dim=1), torch.ones(mel_len))
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_duration_bucket_batch_sampler(self):
+        durations = np.random.default_rng(0).uniform(0.5, 20.0, size=200).tolist()
+        durations[7] = 40.0
+        world_size = 3
+        samplers = [
+            DurationBucketBatchSampler(
+                durations, batch_duration=60.0, max_batch_size=16, num_buckets=5, world_size=world_size, rank=rank
+            )
+            for rank in range(world_size)
+        ]
+
+        rank_batches = [list(sampler) for sampler in samplers]
+        assert all(len(batches) == len(samplers[0]) for batches in rank_batches)
+        all_batches = [batch for batches in rank_batches for batch in batches]
+        # every utterance is sampled, and only batches added for an equal number per rank are repeated
+        assert sorted({i for batch in all_batches for i in batch}) == list(range(len(durations)))
+        assert sum(len(batch) for batch in all_batches) < len(durations) + world_size * 16
+        for batch in all_batches:
+            assert len(batch) <= 16
+            assert len(batch) == 1 or len(batch) * max(durations[i] for i in batch) <= 60.0
+        assert [7] in all_batches
+
+        # deterministic for an epoch, different across epochs
+        assert list(samplers[0]) == rank_batches[0]
+        samplers[0].set_epoch(1)
+        assert list(samplers[0]) != rank_batches[0]
+        samplers[0].set_epoch(0)
+        assert list(samplers[0]) == rank_batches[0]
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_duration_bucket_batch_sampler_weighted(self):
+        durations = [1.0] * 50 + [10.0] * 50
+        sample_weights = [1.0] * 50 + [0.0] * 25 + [1.0] * 25
+        sampler = DurationBucketBatchSampler(
+            durations, batch_duration=20.0, num_buckets=2, sample_weights=sample_weights, num_steps=7, world_size=2,
+        )
+
+        batches = list(sampler)
+        assert len(sampler) == len(batches) == 7
+        for batch in batches:
+            assert all(sample_weights[i] > 0.0 for i in batch)
+            # batches do not mix short and long utterances
+            assert len({durations[i] for i in batch}) == 1
+            assert len(batch) * max(durations[i] for i in batch) <= 20.0
+
+        # the same batches are drawn with and without shuffling, only their order differs
+        unshuffled = DurationBucketBatchSampler(
+            durations, batch_duration=20.0, num_buckets=2, sample_weights=sample_weights, num_steps=20, shuffle=False,
+        )
+        shuffled = DurationBucketBatchSampler(
+            durations, batch_duration=20.0, num_buckets=2, sample_weights=sample_weights, num_steps=20,
+        )
+        assert list(shuffled) != list(unshuffled)
+        assert sorted(list(shuffled)) == sorted(list(unshuffled))
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_duration_bucket_batch_sampler_fewer_batches_than_ranks(self):
+        world_size = 5
+        samplers = [
+            DurationBucketBatchSampler([10.0, 12.0], batch_duration=15.0, world_size=world_size, rank=rank)
+            for rank in range(world_size)
+        ]
+
+        rank_batches = [list(sampler) for sampler in samplers]
+        # both batches are repeated cyclically so that every rank has one
+        assert all(len(batches) == len(sampler) == 1 for batches, sampler in zip(rank_batches, samplers))
+        all_batches = [batch for batches in rank_batches for batch in batches]
+        assert sorted([all_batches.count([0]), all_batches.count([1])]) == [2, 3]
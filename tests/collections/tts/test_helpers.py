@@ -15,7 +15,13 @@
 import pytest
 import torch
 
-from nemo.collections.tts.parts.utils.helpers import regulate_len, sort_tensor, unsort_tensor
+from nemo.collections.tts.parts.utils.helpers import (
+    b_mas,
+    batched_mas_width1,
+    regulate_len,
+    sort_tensor,
+    unsort_tensor,
+)
 
 
 def sample_duration_input(max_length=64, group_size=2, batch_size=3):
@@ -51,3 +57,23 @@ def test_regulate_len():
     # make sure all round-ups are <= group_size
     diff = lens_out - durs_in.sum(dim=1)
     assert torch.max(diff) < group_size
+
+
+@pytest.mark.unit
+def test_batched_mas_width1():
+    generator = torch.Generator()
+    generator.manual_seed(0)
+    batch_size, max_mel_len, max_text_len = 6, 50, 12
+    in_lens = torch.randint(2, max_text_len + 1, (batch_size,), generator=generator)
+    out_lens = torch.randint(max_text_len, max_mel_len + 1, (batch_size,), generator=generator)
+    in_lens[0], out_lens[0] = max_text_len, max_mel_len
+    attn = torch.softmax(3 * torch.randn(batch_size, 1, max_mel_len, max_text_len, generator=generator), dim=-1)
+    log_attn = torch.log(attn)
+
+    expected_attn = b_mas(log_attn.numpy(), in_lens.numpy(), out_lens.numpy(), width=1)
+    attn_out = batched_mas_width1(log_attn, in_lens, out_lens)
+
+    assert torch.equal(attn_out, torch.from_numpy(expected_attn))
+    # every valid frame attends exactly one token, every valid token is attended
+    assert torch.all(attn_out.sum(dim=3)[:, 0] == (torch.arange(max_mel_len) < out_lens.unsqueeze(1)))
+    assert torch.all((attn_out.sum(dim=2)[:, 0] > 0) == (torch.arange(max_text_len) < in_lens.unsqueeze(1)))